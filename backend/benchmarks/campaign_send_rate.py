@@ -0,0 +1,140 @@
+"""
+benchmarks/campaign_send_rate.py
+--------------------------------
+Messages/sec of the campaign send engine (utils/campaign_sender.py)
+delivering to a local SMTP sink that accepts and discards everything, so
+the numbers cover rendering, MIME building, the SMTP pool and delivery
+bookkeeping in Mongo, not a real mail server.
+
+The sink runs in-process on a free port (no aiosmtpd needed). The
+per-tenant rate limit is lifted for the run. "delivery" is the rate of the
+render + build + SMTP phase alone; the end-to-end rate adds the Mongo
+bookkeeping (with --in-memory, mongomock's O(n) unique checks dominate it).
+
+  python -m benchmarks.campaign_send_rate --recipients 2000 --concurrency 1 4 8
+"""
+
+import socketserver
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from bson import ObjectId
+
+from benchmarks.common import parser, bench_database
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: every command succeeds, DATA is discarded."""
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self) -> None:
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self.reply("250-sink")
+                self.reply("250 8BITMIME")
+            elif command == b"DATA":
+                self.reply("354 go ahead")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.messages += 1
+                self.reply("250 queued")
+            elif command == b"QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _SinkHandler)
+        self.messages = 0
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+
+class TimedExecutor(ThreadPoolExecutor):
+    """Thread pool that adds up the wall time spent inside map()."""
+
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers=max_workers)
+        self.seconds = 0.0
+
+    def map(self, fn, *iterables, **kwargs):
+        started = time.perf_counter()
+        results = list(super().map(fn, *iterables, **kwargs))
+        self.seconds += time.perf_counter() - started
+        return iter(results)
+
+
+def seed(db, recipients: int) -> dict:
+    business_id = ObjectId()
+    db["businesses"].insert_one({"_id": business_id, "name": "Bench Co"})
+    db["customers"].insert_many([{
+        "business_id": str(business_id),
+        "name": f"Customer {i}",
+        "email": f"customer{i}@example.com",
+        "created_at": datetime.utcnow(),
+    } for i in range(recipients)])
+    campaign = {
+        "business_id": str(business_id),
+        "name": "Autumn launch",
+        "subject": "{{ customer.first_name | default(\"Hi\") }}, autumn is here",
+        "body": "Hi {{ customer.first_name }},\n\nOur autumn menu is out. See https://example.com/menu\n",
+        "sender_name": "Bench Co",
+        "status": "sending",
+        "analytics": {"sent": 0, "opened": 0, "clicked": 0},
+        "created_at": datetime.utcnow(),
+    }
+    campaign["_id"] = db["campaigns"].insert_one(campaign).inserted_id
+    return campaign
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--recipients", type=int, default=2000)
+    p.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    args = p.parse_args()
+
+    sink = SMTPSink()
+    from utils import campaign_sender, mailer
+
+    mailer.SMTP_HOST, mailer.SMTP_PORT = sink.server_address
+    campaign_sender.CAMPAIGN_RATE_PER_SECOND = float("inf")
+
+    with bench_database(args) as db:
+        print(f"{args.recipients} recipients, SMTP sink on port {sink.server_address[1]}")
+        for concurrency in args.concurrency:
+            for name in ("businesses", "customers", "campaigns", "campaign_deliveries"):
+                db[name].delete_many({})
+            campaign_sender._buckets.clear()
+            campaign_sender._send_executor = executor = TimedExecutor(concurrency)
+            campaign_sender.smtp_pool = mailer.SMTPPool(size=concurrency)
+            received = sink.messages
+
+            stats = campaign_sender.send_campaign(db, seed(db, args.recipients))
+
+            campaign_sender.smtp_pool.close()
+            executor.shutdown()
+            print(
+                f"concurrency={concurrency:3d}  delivery {stats['sent'] / executor.seconds:8.1f} msg/s  "
+                f"end to end {stats['messages_per_second']:8.1f} msg/s  "
+                f"sent {stats['sent']}  failed {stats['failed']}  rejected {stats['rejected']}  "
+                f"sink received {sink.messages - received}"
+            )
+    sink.shutdown()
+
+
+if __name__ == "__main__":
+    main()
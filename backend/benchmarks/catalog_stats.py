@@ -0,0 +1,81 @@
+"""
+benchmarks/catalog_stats.py
+---------------------------
+GET /products/stats cost (utils/catalog_stats.py) for one large catalog.
+
+  cold      load_prices() with the cache emptied: the hinted, covered
+            price query into a NumPy array
+  unhinted  the same fetch without the hint or index-order sort, through
+            a generator, as before
+  warm      load_prices() served from the cache
+  stats     price_stats() on the cached array (10 bands)
+
+Against a Mongo server the hinted query is also explained; it should be a
+covered index scan (0 documents examined).
+
+  python -m benchmarks.catalog_stats --products 100000 1000000 --repeat 5
+"""
+
+import random
+
+import numpy as np
+
+from benchmarks.common import parser, bench_database, timed, summary
+
+
+def seed(db, business_id: str, products: int) -> None:
+    rng = random.Random(11)
+    db["products"].delete_many({})
+    for start in range(0, products, 50_000):
+        db["products"].insert_many([
+            {"business_id": business_id, "name": f"Product {i}", "price": round(rng.lognormvariate(3, 1), 2)}
+            for i in range(start, min(products, start + 50_000))
+        ])
+
+
+def unhinted(db, business_id: str) -> np.ndarray:
+    cursor = db["products"].find({"business_id": business_id}, {"price": 1, "_id": 0}).batch_size(50_000)
+    prices = np.fromiter((p.get("price") or 0.0 for p in cursor), dtype=np.float64)
+    prices.sort()
+    return prices
+
+
+def explain(db, business_id: str) -> str:
+    from utils.catalog_stats import _PRICE_INDEX
+
+    stats = db["products"].find(
+        {"business_id": business_id}, {"price": 1, "_id": 0}
+    ).hint(_PRICE_INDEX).sort("price", 1).explain()["executionStats"]
+    return f"keys examined {stats['totalKeysExamined']}, docs examined {stats['totalDocsExamined']}"
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--products", type=int, nargs="+", default=[100_000])
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    from utils import catalog_stats
+
+    business_id = "bench-business"
+    with bench_database(args) as db:
+        for products in args.products:
+            seed(db, business_id, products)
+            print(f"\n{products} products")
+
+            def cold():
+                catalog_stats._prices.clear()
+                catalog_stats.load_prices(db, business_id, "etag")
+
+            print(f"  cold      {summary(timed(cold, args.repeat))}")
+            print(f"  unhinted  {summary(timed(lambda: unhinted(db, business_id), args.repeat))}")
+            prices = catalog_stats.load_prices(db, business_id, "etag")
+            assert np.array_equal(prices, unhinted(db, business_id))
+            print(f"  warm      {summary(timed(lambda: catalog_stats.load_prices(db, business_id, 'etag'), args.repeat))}")
+            print(f"  stats     {summary(timed(lambda: catalog_stats.price_stats(prices), args.repeat))}")
+            if not args.in_memory:
+                print(f"  plan      {explain(db, business_id)}")
+
+
+if __name__ == "__main__":
+    main()
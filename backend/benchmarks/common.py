@@ -0,0 +1,103 @@
+"""
+benchmarks/common.py
+--------------------
+Shared setup for the scripts in this folder. Each script runs standalone:
+
+  cd backend && python -m benchmarks.<script> [--mongo-uri URI | --in-memory]
+
+By default they use MONGO_URI (a throwaway "bizsolve_bench" database that
+is dropped afterwards). --in-memory uses mongomock instead, which measures
+the Python side only; quote real-Mongo numbers when comparing changes.
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("JOB_WORKERS", "0")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BENCH_DB_NAME = "bizsolve_bench"
+
+
+def parser(description: str) -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description=description)
+    p.add_argument("--mongo-uri", default=os.environ["MONGO_URI"])
+    p.add_argument("--in-memory", action="store_true", help="use mongomock instead of a Mongo server")
+    return p
+
+
+@contextmanager
+def bench_database(args):
+    """
+    Point database.get_database() at a scratch database for the duration,
+    with the app's indexes created, and drop it afterwards.
+    """
+    import database
+
+    if args.in_memory:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(args.mongo_uri)
+    db = client[BENCH_DB_NAME]
+    client.drop_database(BENCH_DB_NAME)
+    database._create_indexes(db)
+    database._client, database._db = client, db
+    try:
+        yield db
+    finally:
+        client.drop_database(BENCH_DB_NAME)
+        database._client, database._db = None, None
+
+
+def timed(fn: Callable, repeat: int) -> List[float]:
+    """Run fn repeat times and return each run's wall time in ms."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+async def asgi_get(app, path: str, headers: Optional[dict] = None) -> int:
+    """
+    One GET handed straight to the ASGI app (no client, socket or HTTP
+    parsing), so timings are the app and its middleware alone. Returns the
+    response status.
+    """
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "client": ("127.0.0.1", 1), "server": ("bench", 80),
+        "headers": [(b"host", b"bench"), (b"accept-encoding", b"gzip")]
+                   + [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def summary(samples: List[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"median {statistics.median(ordered):8.2f} ms   p95 {p95:8.2f} ms"
@@ -0,0 +1,145 @@
+"""
+benchmarks/compression_cost.py
+------------------------------
+CPU time against bytes saved for each response codec and level, on payloads
+shaped like the ones that motivated compression: a website's content_json,
+a campaign list and a chat history. No database is needed.
+
+For each payload, codec and level it prints the compressed size (% of
+original), compress time and throughput. A final section shows what
+streaming costs: a chat answer sent as small SSE chunks, flushed after
+every chunk as the middleware does, against the same text compressed once.
+
+  python -m benchmarks.compression_cost --repeat 20
+  python -m benchmarks.compression_cost --levels gzip=1,6,9 br=1,4,6 zstd=1,3,9
+"""
+
+import json
+import zlib
+import random
+import argparse
+from datetime import datetime
+
+from benchmarks.common import timed
+
+from utils import compression
+
+_GZIP_LEVELS = [1, 6, 9]
+_BROTLI_QUALITIES = [1, 4, 6, 11]
+_ZSTD_LEVELS = [1, 3, 9, 19]
+
+_WORDS = (
+    "coffee roast beans morning regulars pastry seasonal offer loyalty weekend price menu "
+    "customers brand warm friendly local delivery order table queue margin supplier milk oat "
+    "cinnamon espresso filter launch review growth social email campaign discount bundle"
+).split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def payloads() -> dict:
+    """Realistic shapes with varied text, so ratios aren't flattered by repetition."""
+    rng = random.Random(0)
+    now = datetime(2026, 10, 1).isoformat()
+    website = {
+        "id": "6561f0c2a1b2c3d4e5f60718",
+        "template_id": "cafe-modern",
+        "content_json": {
+            "hero": {"headline": "Coffee worth the commute", "subheadline": "Roasted on site every Monday."},
+            "sections": [{
+                "type": "menu",
+                "title": f"Menu section {s}",
+                "items": [{
+                    "name": f"Drink {s}-{i}",
+                    "description": sentence(rng, 12),
+                    "price": round(rng.uniform(2, 9), 2),
+                } for i in range(25)],
+            } for s in range(12)],
+        },
+        "updated_at": now,
+    }
+    campaigns = [{
+        "id": f"{rng.getrandbits(96):024x}",
+        "title": f"Weekend offer #{i}",
+        "subject": sentence(rng, 8),
+        "body": "<p>Hi {{ first_name }},</p>" + "".join(f"<p>{sentence(rng, 15)}</p>" for _ in range(4)),
+        "status": "sent",
+        "created_at": now,
+    } for i in range(200)]
+    chat = [{
+        "id": f"{rng.getrandbits(96):024x}",
+        "message": sentence(rng, 12),
+        "response": " ".join(sentence(rng, 14) for _ in range(8)),
+        "created_at": now,
+    } for i in range(100)]
+    return {
+        name: json.dumps(value).encode()
+        for name, value in (("website content_json", website), ("campaign list", campaigns), ("chat history", chat))
+    }
+
+
+def codecs(levels: dict) -> list:
+    """(label, compress) for every available codec and level."""
+    out = [(f"gzip  {lvl:2d}", lambda b, lvl=lvl: zlib.compress(b, lvl, wbits=31)) for lvl in levels["gzip"]]
+    if compression.brotli is not None:
+        out += [(f"br    {q:2d}", lambda b, q=q: compression.brotli.compress(b, quality=q)) for q in levels["br"]]
+    if compression.zstandard is not None:
+        out += [
+            (f"zstd  {lvl:2d}", lambda b, c=compression.zstandard.ZstdCompressor(level=lvl): c.compress(b))
+            for lvl in levels["zstd"]
+        ]
+    return out
+
+
+def streaming(repeat: int) -> None:
+    rng = random.Random(1)
+    text = " ".join(sentence(rng, 14) for _ in range(12)).split(" ")
+    events = [f"event: delta\ndata: {json.dumps({'delta': word + ' '})}\n\n".encode() for word in text]
+    whole = b"".join(events)
+    print(f"\nstreaming: {len(events)} SSE chunks, {len(whole)} bytes")
+    for encoding, (one_shot, stream_cls) in compression.CODECS.items():
+        def run():
+            s = stream_cls()
+            return sum(len(s.chunk(e)) for e in events) + len(s.finish())
+
+        size = run()
+        ms = sorted(timed(run, repeat))[repeat // 2]
+        print(
+            f"  {encoding:5s} per-chunk flush {size / len(whole):6.1%} in {ms:6.2f} ms   "
+            f"one shot {len(one_shot(whole)) / len(whole):6.1%}"
+        )
+
+
+def parse_levels(values: list) -> dict:
+    levels = {"gzip": _GZIP_LEVELS, "br": _BROTLI_QUALITIES, "zstd": _ZSTD_LEVELS}
+    for value in values or []:
+        name, _, numbers = value.partition("=")
+        levels[name] = [int(n) for n in numbers.split(",")]
+    return levels
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--levels", nargs="*", help="e.g. gzip=1,6,9 br=4 zstd=3")
+    args = p.parse_args()
+
+    all_codecs = codecs(parse_levels(args.levels))
+    for name, body in payloads().items():
+        print(f"\n{name}: {len(body) / 1024:.1f} KiB")
+        for label, compress in all_codecs:
+            size = len(compress(body))
+            ms = sorted(timed(lambda: compress(body), args.repeat))[args.repeat // 2]
+            mb_per_sec = len(body) / 1e6 / (ms / 1000) if ms else float("inf")
+            print(f"  {label}  {size / len(body):6.1%}  {ms:7.3f} ms  {mb_per_sec:8.1f} MB/s")
+    streaming(args.repeat)
+    print(
+        f"\nconfigured: gzip {compression.COMPRESSION_GZIP_LEVEL}, br {compression.COMPRESSION_BROTLI_QUALITY}, "
+        f"zstd {compression.COMPRESSION_ZSTD_LEVEL}, min {compression.COMPRESSION_MIN_BYTES} B"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+benchmarks/dashboard_summary.py
+-------------------------------
+Dashboard home page load: the old flow against GET /dashboard/summary
+(routes/dashboard_routes.py).
+
+  old flow   GET /auth/me, then /business/me, /websites/, /posters/,
+             /campaigns/ and /products/ (full lists) concurrently, as
+             Dashboard.jsx used to
+  cold       /dashboard/summary with the summary cache emptied
+  warm       /dashboard/summary served from the summary cache
+  304        /dashboard/summary revalidated with If-None-Match
+
+Requests go straight to the ASGI app (benchmarks.common.asgi_get), so
+the old flow's five extra round trips over the network are not counted —
+the real gap is wider than shown. Another tenant's data is seeded as noise.
+
+  python -m benchmarks.dashboard_summary --items 50 500 --repeat 50
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from benchmarks.common import parser, bench_database, asgi_get, timed, summary
+
+OLD_FLOW_LISTS = ["/business/me", "/websites/", "/posters/", "/campaigns/", "/products/"]
+
+
+def seed(db, business_id: str, items: int) -> None:
+    now = datetime.utcnow()
+    for collection in ("websites", "posters", "campaigns", "products", "customers"):
+        db[collection].delete_many({})
+    for tenant in (business_id, str(ObjectId())):
+        at = [now - timedelta(minutes=i) for i in range(items)]
+        db["websites"].insert_many([{
+            "business_id": tenant, "template": "modern", "version": 1, "created_at": t, "updated_at": t,
+            "published_url": f"https://site-{i}.example" if i % 3 == 0 else None,
+            "content_json": {"hero": {"headline": f"Site {i}"}, "about": {"body": "About us. " * 40}},
+        } for i, t in enumerate(at)])
+        db["posters"].insert_many([{
+            "business_id": tenant, "title": f"Poster {i}", "image_url": f"https://img.example/{i}.png",
+            "prompt_used": "A warm autumn latte poster " * 5, "created_at": t,
+        } for i, t in enumerate(at)])
+        db["campaigns"].insert_many([{
+            "business_id": tenant, "name": f"Campaign {i}", "subject": "Hello {{ customer.first_name }}",
+            "body": "Our new menu is here. " * 30, "sender_name": "Bench", "status": "sent" if i % 2 else "draft",
+            "created_at": t,
+        } for i, t in enumerate(at)])
+        db["products"].insert_many([{
+            "business_id": tenant, "name": f"Product {i}", "name_lower": f"product {i}", "price": 2.5 + i,
+            "description": "House roasted. " * 10, "created_at": t,
+        } for i, t in enumerate(at)])
+        db["customers"].insert_many([{
+            "business_id": tenant, "email": f"c{i}@example.com", "name": f"Customer {i}", "created_at": t,
+        } for i, t in enumerate(at)])
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--items", type=int, nargs="+", default=[50, 500], help="items per collection")
+    p.add_argument("--repeat", type=int, default=50)
+    args = p.parse_args()
+
+    with bench_database(args) as db:
+        from fastapi.testclient import TestClient
+
+        import main as app_main
+        from routes import dashboard_routes
+
+        app = app_main.app
+        registered = TestClient(app).post("/auth/register", json={
+            "name": "Bench", "email": "bench@example.com", "password": "secret1",
+            "business_name": "Bench Co", "category": "Cafe", "description": "Benchmark tenant",
+            "target_audience": "Everyone", "primary_goal": "Speed", "brand_tone": "Plain",
+            "offerings": "Coffee",
+        }).json()
+        headers = {"Authorization": f"Bearer {registered['access_token']}"}
+        business_id = db["users"].find_one({"email": "bench@example.com"})["business_id"]
+        loop = asyncio.new_event_loop()
+
+        def get(path: str, extra: dict = None) -> int:
+            return loop.run_until_complete(asgi_get(app, path, {**headers, **(extra or {})}))
+
+        async def old_flow():
+            assert await asgi_get(app, "/auth/me", headers) == 200
+            statuses = await asyncio.gather(*(asgi_get(app, path, headers) for path in OLD_FLOW_LISTS))
+            assert set(statuses) == {200}, statuses
+
+        def cold():
+            dashboard_routes._cache.clear()
+            assert get("/dashboard/summary") == 200
+
+        try:
+            for items in args.items:
+                seed(db, business_id, items)
+                cold()
+                etag = TestClient(app).get("/dashboard/summary", headers=headers).headers["etag"]
+                print(f"\n{items} items per collection")
+                print(f"  old flow  {summary(timed(lambda: loop.run_until_complete(old_flow()), args.repeat))}")
+                print(f"  cold      {summary(timed(cold, args.repeat))}")
+                get("/dashboard/summary")
+                print(f"  warm      {summary(timed(lambda: get('/dashboard/summary'), args.repeat))}")
+                print(f"  304       {summary(timed(lambda: get('/dashboard/summary', {'If-None-Match': etag}), args.repeat))}")
+        finally:
+            loop.close()
+
+
+if __name__ == "__main__":
+    main()
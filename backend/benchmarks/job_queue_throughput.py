@@ -0,0 +1,73 @@
+"""
+benchmarks/job_queue_throughput.py
+----------------------------------
+Poster job throughput through the Mongo job queue with the stub generator:
+enqueue N distinct poster jobs, run a worker pool and report jobs/sec and
+the time from enqueue to success.
+
+  python -m benchmarks.job_queue_throughput --jobs 200 --workers 1 2 4 8 --latency 0.05
+
+With a stub latency L and W workers the ceiling is W / L jobs/sec; the gap
+to it is queue overhead (claim, lease, result writes).
+"""
+
+import os
+import time
+
+from benchmarks.common import parser, bench_database
+
+
+def run(db, jobs: int, workers: int) -> dict:
+    from routes import poster_routes
+    from utils import job_queue
+
+    db["jobs"].delete_many({})
+    db["posters"].delete_many({})
+    business_id = "0" * 24
+
+    started = time.perf_counter()
+    for i in range(jobs):
+        request = poster_routes.PosterGenerateRequest(title=f"Sale {i}", prompt=f"Autumn offer number {i}")
+        job_queue.enqueue(
+            db, "poster", business_id, poster_routes.prompt_dedupe_key(request), request.dict(),
+        )
+
+    pool = job_queue.JobWorkerPool(lambda: db, poster_routes.JOB_HANDLERS, concurrency=workers)
+    pool.start()
+    while db["jobs"].count_documents({"status": {"$nin": list(job_queue.TERMINAL_STATUSES)}}):
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    pool.stop()
+
+    return {
+        "succeeded": db["jobs"].count_documents({"status": "succeeded"}),
+        "jobs_per_sec": jobs / elapsed,
+        "elapsed": elapsed,
+    }
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--jobs", type=int, default=200)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    p.add_argument("--latency", type=float, default=0.05, help="stub generation seconds per poster")
+    args = p.parse_args()
+
+    os.environ["POSTER_STUB_LATENCY_SECONDS"] = str(args.latency)
+    from utils import poster_generator
+    poster_generator.POSTER_GENERATOR = "stub"
+    poster_generator.POSTER_STUB_LATENCY_SECONDS = args.latency
+
+    with bench_database(args) as db:
+        print(f"{args.jobs} jobs, stub latency {args.latency * 1000:.0f} ms")
+        for workers in args.workers:
+            r = run(db, args.jobs, workers)
+            ceiling = workers / args.latency
+            print(
+                f"workers={workers:3d}  {r['jobs_per_sec']:8.1f} jobs/s  "
+                f"(ceiling {ceiling:7.1f})  {r['succeeded']}/{args.jobs} succeeded in {r['elapsed']:.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+benchmarks/list_endpoints.py
+----------------------------
+GET /products/ and GET /assets/ (whole list, no paging) at 1k and 10k
+items, with the orjson fast path (utils/responses.py) against FastAPI's
+own response-model validation and serialization (VALIDATE_RESPONSES=true).
+
+Two measurements per size:
+  request   end to end through the app (TestClient), including the query
+  encode    only serialize → response body, for the same documents, which
+            isolates what the fast path changes
+
+  python -m benchmarks.list_endpoints --sizes 1000 10000 --repeat 20
+"""
+
+from datetime import datetime, timedelta
+
+from benchmarks.common import parser, bench_database, timed, summary
+
+
+def seed(db, business_id: str, size: int) -> None:
+    now = datetime.utcnow()
+    db["products"].delete_many({})
+    db["assets"].delete_many({})
+    db["products"].insert_many([{
+        "business_id": business_id,
+        "name": f"Product {i}",
+        "name_lower": f"product {i}",
+        "description": "Single-origin beans, roasted weekly. " * 3,
+        "price": float(i % 500) + 0.99,
+        "image_url": f"https://example.com/p/{i}.png",
+        "created_at": now - timedelta(seconds=i),
+    } for i in range(size)])
+    db["assets"].insert_many([{
+        "business_id": business_id,
+        "name": f"Note {i}",
+        "type": "note",
+        "parent_folder_id": None,
+        "content": "Brand voice: warm, direct, no jargon. " * 5,
+        "file_url": None,
+        "created_at": now,
+        "updated_at": now,
+    } for i in range(size)])
+
+
+def response_field(app, path: str):
+    """The response_model field FastAPI validates GET path's result against."""
+    def walk(routes):
+        for route in routes:
+            yield route
+            nested = getattr(route, "routes", None) or getattr(getattr(route, "original_router", None), "routes", None)
+            if nested:
+                yield from walk(nested)
+
+    for route in walk(app.routes):
+        if getattr(route, "path", None) == path and "GET" in getattr(route, "methods", ()):
+            return route.response_field
+    raise LookupError(path)
+
+
+def encode_paths(docs: list, serialize, field):
+    """(fast, validated) callables that turn docs into response bytes."""
+    from utils.responses import FastJSONResponse
+
+    def fast():
+        return FastJSONResponse([serialize(d) for d in docs]).body
+
+    def validated():
+        # What FastAPI does with a plain return value (fastapi.routing.serialize_response)
+        value, errors = field.validate([serialize(d) for d in docs], {}, loc=("response",))
+        assert not errors
+        return field.serialize_json(
+            value, include=None, exclude=None, by_alias=True,
+            exclude_unset=False, exclude_defaults=False, exclude_none=False,
+        )
+
+    return fast, validated
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    p.add_argument("--repeat", type=int, default=20)
+    args = p.parse_args()
+
+    with bench_database(args) as db:
+        from fastapi.testclient import TestClient
+
+        import main as app_main
+        from routes.asset_routes import serialize_asset
+        from routes.product_routes import serialize_product
+        from utils import responses
+
+        client = TestClient(app_main.app)
+        registered = client.post("/auth/register", json={
+            "name": "Bench", "email": "bench@example.com", "password": "secret1",
+            "business_name": "Bench Co", "category": "Cafe", "description": "Benchmark tenant",
+            "target_audience": "Everyone", "primary_goal": "Speed", "brand_tone": "Plain",
+            "offerings": "Coffee",
+        }).json()
+        headers = {"Authorization": f"Bearer {registered['access_token']}"}
+        business_id = db["users"].find_one({"email": "bench@example.com"})["business_id"]
+
+        for size in args.sizes:
+            seed(db, business_id, size)
+            print(f"\n{size} items")
+            for path, collection, serialize in (
+                ("/products/", "products", serialize_product),
+                ("/assets/", "assets", serialize_asset),
+            ):
+                docs = list(db[collection].find())
+                fast, validated = encode_paths(docs, serialize, response_field(app_main.app, path))
+                for label, validate, encode in (("orjson   ", False, fast), ("validated", True, validated)):
+                    responses.VALIDATE_RESPONSES = validate
+                    request = timed(lambda: client.get(path, headers=headers).raise_for_status(), args.repeat)
+                    print(
+                        f"  {path:11s} {label}  request {summary(request)}   "
+                        f"encode {summary(timed(encode, args.repeat))}"
+                    )
+            responses.VALIDATE_RESPONSES = False
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+benchmarks/metrics_overhead.py
+------------------------------
+Request latency with Prometheus metrics (utils/metrics.py) on and off,
+against the <2% overhead budget:
+
+  on    the app as shipped: MetricsMiddleware outermost, and Mongo clients
+        created with the global MongoCommandMetrics listener
+  off   MetricsMiddleware removed from the stack, and a Mongo client
+        created without that listener (the profiler's listener stays)
+
+Requests go straight to the ASGI app (benchmarks.common.asgi_get), so
+client overhead does not dilute the difference. The two variants run in
+alternating blocks to cancel out drift. mongomock emits no command
+events, so --in-memory measures the middleware only.
+
+  python -m benchmarks.metrics_overhead --repeat 2000 --block 100
+"""
+
+import asyncio
+import statistics
+
+from benchmarks.common import parser, bench_database, asgi_get, summary
+
+BUDGET = 0.02
+
+
+def without_metrics_middleware(app) -> list:
+    """Middleware list of app with MetricsMiddleware dropped."""
+    from utils.metrics import MetricsMiddleware
+
+    return [m for m in app.user_middleware if m.cls is not MetricsMiddleware]
+
+
+def client_without_listener(args):
+    """A MongoClient on the bench database created without MongoCommandMetrics."""
+    from pymongo import MongoClient, monitoring
+
+    from utils.metrics import MongoCommandMetrics
+
+    listeners = monitoring._LISTENERS.command_listeners
+    removed = [l for l in listeners if isinstance(l, MongoCommandMetrics)]
+    for listener in removed:
+        listeners.remove(listener)
+    try:
+        return MongoClient(args.mongo_uri)
+    finally:
+        listeners.extend(removed)
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--repeat", type=int, default=2000, help="requests per variant and path")
+    p.add_argument("--block", type=int, default=100, help="requests per variant before switching")
+    args = p.parse_args()
+
+    with bench_database(args) as db:
+        from fastapi.testclient import TestClient
+
+        import database
+        import main as app_main
+        from benchmarks.common import BENCH_DB_NAME
+
+        app = app_main.app
+        http = TestClient(app)
+        registered = http.post("/auth/register", json={
+            "name": "Bench", "email": "bench@example.com", "password": "secret1",
+            "business_name": "Bench Co", "category": "Cafe", "description": "Benchmark tenant",
+            "target_audience": "Everyone", "primary_goal": "Speed", "brand_tone": "Plain",
+            "offerings": "Coffee",
+        }).json()
+        headers = {"Authorization": f"Bearer {registered['access_token']}"}
+        for i in range(50):
+            http.post("/products/", headers=headers, json={"name": f"Product {i}", "price": 2.5 + i}).raise_for_status()
+        product_id = http.get("/products/?limit=1", headers=headers).json()[0]["id"]
+
+        on_middleware, off_middleware = list(app.user_middleware), without_metrics_middleware(app)
+        on_db = db
+        off_db = db if args.in_memory else client_without_listener(args)[BENCH_DB_NAME]
+
+        def use(variant: str) -> None:
+            app.user_middleware = on_middleware if variant == "on" else off_middleware
+            app.middleware_stack = app.build_middleware_stack()
+            database._db = on_db if variant == "on" else off_db
+
+        paths = ["/", "/products/?limit=50", f"/products/{product_id}"]
+        loop = asyncio.new_event_loop()
+        print(f"{args.repeat} requests per variant, blocks of {args.block}, budget {BUDGET:.0%}")
+        try:
+            for path in paths:
+                samples = {"on": [], "off": []}
+                for _ in range(max(1, args.repeat // args.block)):
+                    for variant in ("off", "on"):
+                        use(variant)
+                        for _ in range(args.block):
+                            started = loop.time()
+                            status = loop.run_until_complete(asgi_get(app, path, headers))
+                            samples[variant].append((loop.time() - started) * 1000)
+                            assert status == 200, (path, status)
+                on, off = statistics.median(samples["on"]), statistics.median(samples["off"])
+                overhead = on / off - 1
+                print(f"\n  GET {path}")
+                for variant in ("off", "on"):
+                    print(f"    {variant:3s}  {summary(samples[variant])}")
+                print(
+                    f"    overhead {(on - off) * 1000:+.0f} us ({overhead:+.2%})  "
+                    f"{'within' if overhead < BUDGET else 'OVER'} budget"
+                )
+        finally:
+            use("on")
+            loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+benchmarks/product_queries.py
+-----------------------------
+GET /products/ latency on a large catalog (default 100k products in one
+business, plus another tenant's products as noise): paged listing in each
+sort, a deep keyset page, a price range, a name prefix and full-text
+search, end to end through the app (TestClient).
+
+Against a Mongo server each query is also explained, printing the
+winning plan's index and keys/documents examined — a deep page or a
+filtered sort should examine about limit documents, not the catalog.
+mongomock scans every document and has no $text, so --in-memory numbers
+show the Python side only and skip search.
+
+  python -m benchmarks.product_queries --products 100000 --limit 50 --repeat 20
+"""
+
+import os
+import re
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from benchmarks.common import parser, bench_database, timed, summary
+
+# Slow mongomock queries would otherwise be profiled, skewing the timings
+os.environ.setdefault("PROFILER_ENABLED", "false")
+
+_WORDS = ["Espresso", "Latte", "Mocha", "Cortado", "Flat White", "Cold Brew", "Chai", "Matcha", "Croissant", "Scone"]
+
+
+def seed(db, business_id: str, products: int) -> None:
+    now = datetime.utcnow()
+    for tenant, count in ((business_id, products), (str(ObjectId()), products // 10)):
+        for start in range(0, count, 10_000):
+            docs = []
+            for i in range(start, min(count, start + 10_000)):
+                name = f"{_WORDS[i % len(_WORDS)]} {i}"
+                docs.append({
+                    "business_id": tenant,
+                    "name": name,
+                    "name_lower": name.lower(),
+                    "description": f"House {_WORDS[(i * 7) % len(_WORDS)].lower()}, roasted weekly.",
+                    "price": float((i * 37) % 5000) / 10 + 0.5,
+                    "image_url": None,
+                    "created_at": now - timedelta(seconds=i),
+                })
+            db["products"].insert_many(docs)
+
+
+def explain(db, business_id: str, params: dict) -> str:
+    """Winning index and keys/docs examined for the query list_products would run."""
+    from routes.product_routes import SORTS, decode_cursor
+
+    field, direction = SORTS[params.get("sort", "created_at")]
+    query = {"business_id": business_id}
+    if "q" in params:
+        query["name_lower"] = {"$regex": "^" + re.escape(params["q"].lower())}
+    if "search" in params:
+        query["$text"] = {"$search": params["search"]}
+    if "min_price" in params:
+        query["price"] = {"$gte": params["min_price"], "$lte": params["max_price"]}
+    if "cursor" in params:
+        value, oid = decode_cursor(params["cursor"], field)
+        op = "$gt" if direction == 1 else "$lt"
+        query["$or"] = [{field: {op: value}}, {field: value, "_id": {op: oid}}]
+    cursor = db["products"].find(query).sort([(field, direction), ("_id", direction)]).limit(params["limit"] + 1)
+    stats = cursor.explain()["executionStats"]
+
+    indexes, stack = [], [stats["executionStages"]]
+    while stack:
+        stage = stack.pop()
+        if "indexName" in stage:
+            indexes.append(stage["indexName"])
+        stack.extend(stage.get("inputStages", []) + ([stage["inputStage"]] if "inputStage" in stage else []))
+    return (
+        f"index {'+'.join(indexes) or 'COLLSCAN'}  keys {stats['totalKeysExamined']}  "
+        f"docs {stats['totalDocsExamined']}"
+    )
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--products", type=int, default=100_000)
+    p.add_argument("--limit", type=int, default=50)
+    p.add_argument("--deep-page", type=int, default=1000, help="page number for the deep keyset page")
+    p.add_argument("--repeat", type=int, default=20)
+    args = p.parse_args()
+
+    with bench_database(args) as db:
+        from fastapi.testclient import TestClient
+
+        import main as app_main
+        from routes.product_routes import encode_cursor
+
+        client = TestClient(app_main.app)
+        registered = client.post("/auth/register", json={
+            "name": "Bench", "email": "bench@example.com", "password": "secret1",
+            "business_name": "Bench Co", "category": "Cafe", "description": "Benchmark tenant",
+            "target_audience": "Everyone", "primary_goal": "Speed", "brand_tone": "Plain",
+            "offerings": "Coffee",
+        }).json()
+        headers = {"Authorization": f"Bearer {registered['access_token']}"}
+        business_id = db["users"].find_one({"email": "bench@example.com"})["business_id"]
+        seed(db, business_id, args.products)
+
+        skip = min(args.deep_page * args.limit, args.products - 1)
+        deep = db["products"].find({"business_id": business_id}).sort([("created_at", -1), ("_id", -1)]).skip(skip).limit(1)[0]
+        cases = [
+            ("newest first", {"sort": "-created_at"}),
+            ("cheapest first", {"sort": "price"}),
+            (f"deep page {skip // args.limit}", {"sort": "-created_at", "cursor": encode_cursor(deep, "created_at")}),
+            ("price 100-120, by price", {"sort": "price", "min_price": 100, "max_price": 120}),
+            ("prefix 'mocha 1'", {"q": "mocha 1"}),
+        ]
+        if not args.in_memory:
+            cases.append(("search 'matcha'", {"search": "matcha"}))
+
+        print(f"{args.products} products (+{args.products // 10} other tenant), limit {args.limit}")
+        for label, params in cases:
+            params = {**params, "limit": args.limit}
+            samples = timed(lambda: client.get("/products/", params=params, headers=headers).raise_for_status(), args.repeat)
+            line = f"  {label:26s} {summary(samples)}"
+            if not args.in_memory:
+                line += f"   {explain(db, business_id, params)}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
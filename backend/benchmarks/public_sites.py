@@ -0,0 +1,127 @@
+"""
+benchmarks/public_sites.py
+--------------------------
+GET /sites/{name} throughput of one worker (routes/site_routes.py), for
+a published site already in the page cache, against the 5k req/s target:
+
+  hit    full page (200) from the in-process LRU
+  304    the same request with a matching If-None-Match
+
+Two ways of driving the app:
+  asgi   requests handed straight to the ASGI app on one event loop, with
+         --concurrency in flight: the app and middleware cost alone
+  http   a single uvicorn worker in this process on a real socket, loaded
+         by --clients keep-alive client processes (as serve_scaling.py);
+         give the clients their own cores or the number is a lower bound
+
+Cache hits never touch MongoDB, so --in-memory gives the same numbers.
+
+  python -m benchmarks.public_sites --seconds 5 --concurrency 64 --clients 8
+"""
+
+import asyncio
+import tempfile
+import threading
+import time
+from multiprocessing import Pool
+
+from benchmarks.common import parser, bench_database, asgi_get
+from benchmarks.serve_scaling import client, free_port, wait_ready
+
+TARGET_RPS = 5000
+
+
+def setup(db) -> str:
+    """Register a tenant, publish and build its site, warm the cache; return the path."""
+    from fastapi.testclient import TestClient
+
+    import main as app_main
+    from routes.website_routes import run_site_build_job
+    from utils import job_queue
+
+    http = TestClient(app_main.app)
+    registered = http.post("/auth/register", json={
+        "name": "Bench", "email": "bench@example.com", "password": "secret1",
+        "business_name": "Bench Co", "category": "Cafe", "description": "Benchmark tenant",
+        "target_audience": "Everyone", "primary_goal": "Speed", "brand_tone": "Plain",
+        "offerings": "Coffee",
+    }).json()
+    headers = {"Authorization": f"Bearer {registered['access_token']}"}
+    http.post("/websites/", headers=headers, json={
+        "template": "modern", "vercel_project_name": "bench-co", "published_url": "https://bench-co.example",
+        "content_json": {
+            "hero": {"headline": "Fresh coffee", "subheadline": "Roasted weekly"},
+            "menu": [{"name": f"Drink {i}", "description": "Single origin, house roasted."} for i in range(40)],
+            "about": {"body": "A neighbourhood roastery. " * 20},
+        },
+    }).raise_for_status()
+    while (job := job_queue.claim(db, ["site_build"], "bench")) is not None:
+        job_queue.mark_succeeded(db, job, run_site_build_job(db, job))
+    http.get("/sites/bench-co").raise_for_status()
+    return "/sites/bench-co"
+
+
+async def asgi_rate(app, path: str, headers: dict, seconds: float, concurrency: int) -> float:
+    deadline = time.perf_counter() + seconds
+    done = 0
+
+    async def loop():
+        nonlocal done
+        while time.perf_counter() < deadline:
+            assert await asgi_get(app, path, headers) in (200, 304)
+            done += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return done / (time.perf_counter() - started)
+
+
+def http_rate(pool, app, path: str, headers: dict, seconds: float, clients: int) -> float:
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        wait_ready(port)
+        deadline = time.time() + seconds
+        results = pool.map(client, [(port, path, headers, deadline, [])] * clients)
+    finally:
+        server.should_exit = True
+        thread.join(30)
+    ok, errors = sum(r[0] for r in results), sum(r[1] for r in results)
+    if errors:
+        print(f"    ({errors} errors)")
+    return ok / seconds
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--seconds", type=float, default=5)
+    p.add_argument("--concurrency", type=int, default=64, help="in-flight requests on the ASGI loop")
+    p.add_argument("--clients", type=int, default=8, help="client processes for the http run")
+    args = p.parse_args()
+
+    # Fork the client processes before any server thread exists
+    with Pool(args.clients) as pool, tempfile.TemporaryDirectory() as builds, bench_database(args) as db:
+        import main as app_main
+        from utils import site_builder, site_cache
+
+        site_builder.SITE_BUILD_DIR = builds
+        site_cache.SITE_CACHE_TTL_SECONDS = 3600  # keep the entry for the whole run
+        path = setup(db)
+        entry = site_cache.get(path.rsplit("/", 1)[1])
+        cases = [("hit", {}), ("304", {"If-None-Match": entry["etag"]})]
+        print(f"GET {path}  page {len(entry['body'])} bytes, target {TARGET_RPS} req/s per worker")
+
+        for label, headers in cases:
+            rate = asyncio.run(asgi_rate(app_main.app, path, headers, args.seconds, args.concurrency))
+            print(f"  asgi  {label:4s} {rate:9.0f} req/s  {rate / TARGET_RPS:6.0%} of target")
+        for label, headers in cases:
+            rate = http_rate(pool, app_main.app, path, headers, args.seconds, args.clients)
+            print(f"  http  {label:4s} {rate:9.0f} req/s  {rate / TARGET_RPS:6.0%} of target")
+
+
+if __name__ == "__main__":
+    main()
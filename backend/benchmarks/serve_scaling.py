@@ -0,0 +1,132 @@
+"""
+benchmarks/serve_scaling.py
+---------------------------
+Requests/sec of the production server (serve.py) as workers are added,
+one worker per CPU core: for each count N the server is started with
+WEB_WORKERS=N and pinned to N cores (Linux), then loaded for a fixed time
+by client processes holding keep-alive connections.
+
+The default path (GET /) does not touch MongoDB, so this measures the
+request path and the fork/worker model alone. Pass --path and --header
+to load an authenticated endpoint against the MONGO_URI in .env.
+
+The load generator runs on the same machine: give it cores the server is
+not pinned to (--client-cores), or run it from another host, or the
+curve flattens early. Counts above the machine's core count are skipped.
+
+  python -m benchmarks.serve_scaling --workers 1 2 4 8 16 --seconds 10 --clients 32
+  python -m benchmarks.serve_scaling --path /products/?limit=50 --header "Authorization: Bearer ..."
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+
+_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def start_server(workers: int, port: int, cores: list) -> subprocess.Popen:
+    env = {
+        "SECRET_KEY": "benchmark", "MONGO_URI": "mongodb://localhost:27017",
+        **os.environ, "WEB_WORKERS": str(workers), "PORT": str(port), "HOST": "127.0.0.1",
+        "WEB_MAX_REQUESTS": "0", "LOG_LEVEL": "warning", "PROFILER_ENABLED": "false",
+        "SCHEDULER_ENABLED": "false", "JOB_WORKERS": "0",
+    }
+    pin = (lambda: os.sched_setaffinity(0, cores)) if hasattr(os, "sched_setaffinity") else None
+    return subprocess.Popen([sys.executable, "serve.py"], cwd=_BACKEND, env=env, preexec_fn=pin)
+
+
+def client(job: tuple) -> tuple:
+    """One keep-alive connection issuing requests until the deadline: (ok, errors)."""
+    port, path, headers, deadline, cores = job
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    ok = errors = 0
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    while time.time() < deadline:
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status < 400:
+                ok += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.close()
+    return ok, errors
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    p.add_argument("--seconds", type=float, default=10)
+    p.add_argument("--clients", type=int, default=32, help="concurrent keep-alive connections")
+    p.add_argument("--path", default="/")
+    p.add_argument("--header", action="append", default=[], help='"Name: value", repeatable')
+    p.add_argument("--client-cores", type=int, nargs="*", default=[],
+                   help="CPU ids for the load generator (server cores are taken from 0 upwards)")
+    args = p.parse_args()
+
+    headers = dict(h.split(":", 1) for h in args.header)
+    headers = {k.strip(): v.strip() for k, v in headers.items()}
+    available = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+    server_pool = [c for c in available if c not in args.client_cores]
+    print(f"{len(available)} cores available, {args.clients} clients, {args.seconds:.0f} s per run, GET {args.path}")
+
+    baseline = None
+    with Pool(args.clients) as pool:
+        for workers in args.workers:
+            if workers > len(server_pool):
+                print(f"  workers={workers:2d}  skipped: only {len(server_pool)} cores for the server")
+                continue
+            port = free_port()
+            server = start_server(workers, port, server_pool[:workers])
+            try:
+                wait_ready(port)
+                time.sleep(1)  # let every worker come up
+                deadline = time.time() + args.seconds
+                jobs = [(port, args.path, headers, deadline, args.client_cores)] * args.clients
+                results = pool.map(client, jobs)
+            finally:
+                server.terminate()
+                server.wait(60)
+            ok = sum(r[0] for r in results)
+            errors = sum(r[1] for r in results)
+            rate = ok / args.seconds
+            baseline = baseline or rate / workers
+            print(
+                f"  workers={workers:2d}  {rate:9.0f} req/s  {rate / workers:8.0f} per worker  "
+                f"efficiency {rate / (baseline * workers):6.1%}  errors {errors}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+benchmarks/template_render.py
+-----------------------------
+Campaign template render throughput (utils/campaign_template.py) for a
+send-sized audience. No database is needed.
+
+  compile       compile_template() for subject + body, once per send
+  render        render() per recipient
+  render_batch  render_batch() over send batches, as utils/campaign_sender.py does
+  naive         re.sub over the raw template for every recipient, the
+                approach compiling replaces
+
+  python -m benchmarks.template_render --recipients 100000 --repeat 5
+"""
+
+import re
+import random
+import argparse
+import statistics
+
+from benchmarks.common import timed
+
+from utils.campaign_sender import CAMPAIGN_BATCH_SIZE
+from utils.campaign_template import compile_template
+
+SUBJECT = '{{ customer.first_name | default("Hi") | title }}, autumn is here at {{ business.business_name }}'
+BODY = (
+    'Hi {{ customer.first_name | default("there") }},\n\n'
+    "Our autumn menu is out at {{ business.business_name }} in {{ business.location }}: "
+    "spiced lattes, pumpkin loaf and a new single-origin filter. Show this email "
+    "({{ customer.email }}) at the counter for 10% off your next visit.\n\n"
+    "See you soon,\n{{ business.business_name | upper }}\n"
+)
+BUSINESS = {"business_name": "Bean There", "location": "Leeds"}
+
+_FIRST = ["Ann", "Ben", "Chloé", "Dev", "Ezra", "Fatima", "Gus", "Hana", ""]
+_LAST = ["Smith", "Okafor", "Nguyen", "Kowalski", "Silva"]
+_TAG_RE = re.compile(r"{{(.*?)}}")
+
+
+def customers(count: int) -> list:
+    rng = random.Random(3)
+    return [
+        {"name": f"{rng.choice(_FIRST)} {rng.choice(_LAST)}".strip(), "email": f"customer{i}@example.com"}
+        for i in range(count)
+    ]
+
+
+def naive_render(template: str, customer: dict) -> str:
+    """What per-recipient rendering costs without compiling: parse every tag every time."""
+    def replace(match):
+        field, *filters = [part.strip() for part in match.group(1).split("|")]
+        scope, _, name = field.partition(".")
+        if scope == "business":
+            value = BUSINESS.get(name) or ""
+        elif name == "first_name":
+            value = (customer.get("name") or "").split(" ")[0]
+        else:
+            value = customer.get(name) or ""
+        for f in filters:
+            if f.startswith("default("):
+                value = value or f[9:-2]
+            elif f in ("upper", "lower", "title"):
+                value = getattr(value, f)()
+        return value
+
+    return _TAG_RE.sub(replace, template)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--recipients", type=int, default=100_000)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    audience = customers(args.recipients)
+    subject, body = compile_template(SUBJECT, BUSINESS), compile_template(BODY, BUSINESS)
+
+    def render():
+        for c in audience:
+            subject.render(c)
+            body.render(c)
+
+    def render_batch():
+        for start in range(0, len(audience), CAMPAIGN_BATCH_SIZE):
+            batch = audience[start:start + CAMPAIGN_BATCH_SIZE]
+            subject.render_batch(batch)
+            body.render_batch(batch)
+
+    def naive():
+        for c in audience:
+            naive_render(SUBJECT, c)
+            naive_render(BODY, c)
+
+    compile_ms = statistics.median(timed(lambda: (compile_template(SUBJECT, BUSINESS), compile_template(BODY, BUSINESS)), 100))
+    print(f"{args.recipients} recipients, subject + body ({len(BODY)} chars), batches of {CAMPAIGN_BATCH_SIZE}")
+    print(f"  compile       {compile_ms:9.3f} ms")
+    for name, fn in (("render", render), ("render_batch", render_batch), ("naive", naive)):
+        ms = statistics.median(timed(fn, args.repeat))
+        print(f"  {name:12s}  {ms:9.1f} ms  {args.recipients / (ms / 1000):10.0f} recipients/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+benchmarks/tracking_events.py
+-----------------------------
+Tracking events/sec (utils/tracking.py, routes/tracking_routes.py).
+
+  record    signature check + in-memory count, the work a hit does on the
+            request path, from 1..N threads
+  request   open pixel / click redirect end to end through the app
+            (TestClient, one client thread)
+  flush     writing a backlog of unique opens: the cross-worker dedup
+            update_many on campaign_deliveries, then the bulk $inc
+            (mongomock has no bulk_write of UpdateOne and no index on the
+            update_many, so with --in-memory only the dedup step is timed
+            and it is far slower than on a server)
+
+  python -m benchmarks.tracking_events --events 20000 --threads 1 4 8
+"""
+
+import random
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import parser, bench_database
+
+
+def make_events(campaigns: list, recipients: int, count: int) -> list:
+    """(kind, campaign_id, customer_id, signature) tuples; about 1 in 4 is a click."""
+    from utils.tracking import sign
+
+    rng = random.Random(7)
+    events = []
+    for _ in range(count):
+        campaign_id, customer_id = rng.choice(campaigns), f"customer-{rng.randrange(recipients)}"
+        if rng.random() < 0.25:
+            events.append(("click", campaign_id, customer_id, sign("click", campaign_id, customer_id, "https://example.com")))
+        else:
+            events.append(("open", campaign_id, customer_id, sign("open", campaign_id, customer_id)))
+    return events
+
+
+def record(tracker, events: list) -> None:
+    from utils.tracking import verify
+
+    for kind, campaign_id, customer_id, signature in events:
+        if kind == "open":
+            if verify(signature, "open", campaign_id, customer_id):
+                tracker.record_open(campaign_id, customer_id)
+        elif verify(signature, "click", campaign_id, customer_id, "https://example.com"):
+            tracker.record_click(campaign_id)
+
+
+def bench_record(events: list, threads: int) -> float:
+    from utils.tracking import TrackingAggregator
+
+    tracker = TrackingAggregator()
+    chunks = [events[i::threads] for i in range(threads)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda chunk: record(tracker, chunk), chunks))
+    return len(events) / (time.perf_counter() - started)
+
+
+def bench_requests(events: list) -> float:
+    from fastapi.testclient import TestClient
+
+    import main
+
+    client = TestClient(main.app)
+    started = time.perf_counter()
+    for kind, campaign_id, customer_id, signature in events:
+        if kind == "open":
+            client.get(f"/t/o/{campaign_id}/{customer_id}/{signature}.gif")
+        else:
+            client.get(f"/t/c/{campaign_id}/{customer_id}/{signature}?u=https%3A%2F%2Fexample.com",
+                       follow_redirects=False)
+    return len(events) / (time.perf_counter() - started)
+
+
+def bench_flush(db, campaigns: list, recipients: int, events: list, in_memory: bool) -> str:
+    from utils.tracking import TrackingAggregator
+
+    db["campaign_deliveries"].insert_many([{
+        "campaign_id": campaign_id, "business_id": "bench", "customer_id": f"customer-{i}",
+        "status": "sent", "created_at": datetime.utcnow(),
+    } for campaign_id in campaigns for i in range(recipients)])
+    tracker = TrackingAggregator()
+    tracker._get_db = lambda: db
+    record(tracker, events)
+    pending = sum(len(ids) for ids in tracker._opens.values())
+
+    started = time.perf_counter()
+    tracker._mark_opens(db)
+    dedup = time.perf_counter() - started
+    first_opens = sum(counts[0] for counts in tracker._counts.values())
+    line = f"{pending} pending opens, {first_opens} first opens: dedup {dedup * 1000:8.1f} ms"
+    if not in_memory:
+        started = time.perf_counter()
+        tracker.flush()
+        line += f"  bulk $inc {(time.perf_counter() - started) * 1000:8.1f} ms"
+    return line
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--events", type=int, default=20000)
+    p.add_argument("--campaigns", type=int, default=10)
+    p.add_argument("--recipients", type=int, default=5000, help="recipients per campaign")
+    p.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    p.add_argument("--requests", type=int, default=2000, help="events sent through the app")
+    args = p.parse_args()
+
+    with bench_database(args) as db:
+        campaigns = [db["campaigns"].insert_one({
+            "business_id": "bench", "name": f"Campaign {i}",
+            "analytics": {"sent": args.recipients, "opened": 0, "clicked": 0},
+        }).inserted_id for i in range(args.campaigns)]
+        campaigns = [str(oid) for oid in campaigns]
+        events = make_events(campaigns, args.recipients, args.events)
+        print(f"{args.events} events over {args.campaigns} campaigns x {args.recipients} recipients")
+
+        for threads in args.threads:
+            print(f"record   threads={threads:2d}  {bench_record(events, threads):10.0f} events/s")
+        print(f"request  threads= 1  {bench_requests(events[:args.requests]):10.0f} events/s")
+        print(f"flush    {bench_flush(db, campaigns, args.recipients, events, args.in_memory)}")
+
+
+if __name__ == "__main__":
+    main()
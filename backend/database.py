@@ -4,11 +4,20 @@ database.py
 Manages the MongoDB connection using pymongo.
 Provides a single reusable get_database() function.
 Indexes are created once on first connection.
+
+MongoClient is not fork-safe: a forked worker (see serve.py) drops any
+client inherited from its parent and connects afresh on first use.
 """
 
-from pymongo import MongoClient, ASCENDING
+import os
+import logging
+
+from pymongo import MongoClient, ASCENDING, TEXT
+from pymongo.errors import DuplicateKeyError, OperationFailure
 from config import MONGO_URI
 
+logger = logging.getLogger(__name__)
+
 # Module-level singletons — connection is reused across requests
 _client = None
 _db = None
@@ -29,6 +38,16 @@ def get_database():
     return _db
 
 
+def _reset_after_fork():
+    """Forget the parent's client in a forked child; get_database() reconnects."""
+    global _client, _db
+    _client = None
+    _db = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 def _create_indexes(db):
     """
     Creates all necessary indexes for performance and data integrity.
@@ -48,4 +67,73 @@ def _create_indexes(db):
         "assets",
     ]
     for collection in collections_with_business_id:
-        db[collection].create_index([("business_id", ASCENDING)])
\ No newline at end of file
+        db[collection].create_index([("business_id", ASCENDING)])
+
+    # Blob reference lookups when deleting uploaded Brand Vault files
+    db["assets"].create_index([("business_id", ASCENDING), ("blob_sha256", ASCENDING)])
+    db["asset_uploads"].create_index([("business_id", ASCENDING)])
+    db["asset_uploads"].create_index([("updated_at", ASCENDING)])
+
+    # Job queue: one job per identical piece of work, and the claim query
+    db["jobs"].create_index(
+        [("kind", ASCENDING), ("business_id", ASCENDING), ("dedupe_key", ASCENDING)],
+        unique=True,
+    )
+    db["jobs"].create_index([("kind", ASCENDING), ("status", ASCENDING), ("run_at", ASCENDING)])
+    db["posters"].create_index([("job_id", ASCENDING)], sparse=True)
+
+    # Product catalog filters and sorts (GET /products/). _id is the keyset
+    # tie-breaker, so every sort is served from an index with no in-memory sort.
+    db["products"].create_index([("business_id", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)])
+    db["products"].create_index([("business_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)])
+    # Products from before prefix search get name_lower from migrate.py
+    db["products"].create_index([("business_id", ASCENDING), ("name_lower", ASCENDING)])
+    db["products"].create_index([("business_id", ASCENDING), ("name", TEXT), ("description", TEXT)])
+
+    # Advisor retrieval embeddings: one row per document, incremental sync
+    # by update time, and tombstones expire once every worker has synced
+    db["embeddings"].create_index([("business_id", ASCENDING), ("key", ASCENDING)], unique=True)
+    db["embeddings"].create_index([("business_id", ASCENDING), ("updated_at", ASCENDING)])
+    db["embeddings"].create_index([("expires_at", ASCENDING)], expireAfterSeconds=0)
+
+    # Public site lookups by project name (GET /sites/{name}); unique, so
+    # two concurrent claims of a name can't both succeed
+    _create_project_name_index(db)
+
+    # Website version history: one record per version, also the edit lock
+    db["website_versions"].create_index(
+        [("website_id", ASCENDING), ("version", ASCENDING)], unique=True
+    )
+    db["website_versions"].create_index([("business_id", ASCENDING)])
+
+    # Campaign scheduler's next-due query
+    db["campaigns"].create_index([("status", ASCENDING), ("send_at", ASCENDING)])
+
+    # Campaign sends: one delivery per recipient, also the at-most-once claim
+    db["campaign_deliveries"].create_index(
+        [("campaign_id", ASCENDING), ("customer_id", ASCENDING)], unique=True
+    )
+    db["campaign_deliveries"].create_index([("business_id", ASCENDING)])
+
+    # Content-hash dedup of uploaded logos, per business
+    db["logo_uploads"].create_index(
+        [("business_id", ASCENDING), ("sha256", ASCENDING)], unique=True
+    )
+
+
+def _create_project_name_index(db):
+    """
+    Unique index on non-empty vercel_project_name. Replaces the earlier
+    non-unique sparse index on the same key if a database still has it.
+    """
+    keys = [("vercel_project_name", ASCENDING)]
+    options = {"unique": True, "partialFilterExpression": {"vercel_project_name": {"$gt": ""}}}
+    try:
+        db["websites"].create_index(keys, **options)
+    except DuplicateKeyError:
+        logger.error("Duplicate website project names exist; rename them to enforce uniqueness.")
+    except OperationFailure as e:
+        if e.code not in (85, 86):   # IndexOptionsConflict, IndexKeySpecsConflict
+            raise
+        db["websites"].drop_index(keys)
+        db["websites"].create_index(keys, **options)
@@ -2,24 +2,68 @@
 main.py
 -------
 BizSolve API entry point.
-Registers all routers, configures CORS, and sets up the FastAPI app.
+Registers all routers, configures CORS, response compression and metrics, and sets up the FastAPI app.
+Starts background job workers, the tracking flusher and the campaign
+scheduler for the lifetime of the process.
+
+Development: uvicorn main:app --reload
+Production:  python serve.py   (pre-forked workers, see serve.py)
 """
 
+from contextlib import asynccontextmanager
+
+import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from database import get_database
+from utils.job_queue import JobWorkerPool, JOB_WORKERS
+from utils.compression import CompressionMiddleware
+from utils.metrics import MetricsMiddleware
+from utils.request_profiler import ProfilerMiddleware, instrument_endpoints
+from utils.tracking import tracker
+from utils.campaign_scheduler import scheduler
+from utils.llm_resilience import gemini_inflight
+
 # Import all route modules
 from routes.auth_routes import router as auth_router
 from routes.business_routes import router as business_router
 from routes.product_routes import router as product_router
-from routes.website_routes import router as website_routes
-from routes.campaign_routes import router as campaign_router
+from routes.website_routes import router as website_routes, JOB_HANDLERS as website_job_handlers
+from routes.campaign_routes import router as campaign_router, JOB_HANDLERS as campaign_job_handlers
 from routes.asset_routes import router as asset_router
-from routes.poster_routes import router as poster_router
+from routes.poster_routes import router as poster_router, JOB_HANDLERS as poster_job_handlers
 from routes.customer_routes import router as customer_router
 from routes.chatlog_routes import router as chatlog_router
-from routes.chat_routes import router as chat_router          # ← NEW
+from routes.chat_routes import router as chat_router, JOB_HANDLERS as chat_job_handlers  # ← NEW
 from routes.admin_routes import router as admin_router
+from routes.site_routes import router as site_router
+from routes.tracking_routes import router as tracking_router
+from routes.dashboard_routes import router as dashboard_router
+from routes.metrics_routes import router as metrics_router
+
+
+# ---------------------------------------------------------------------------
+# Lifespan — background services
+# ---------------------------------------------------------------------------
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_handlers = {
+        **poster_job_handlers, **website_job_handlers, **campaign_job_handlers, **chat_job_handlers,
+    }
+    job_workers = JobWorkerPool(get_database, job_handlers, concurrency=JOB_WORKERS)
+    job_workers.start()
+    tracker.start(get_database)
+    scheduler.start(get_database)
+    yield
+    # Let calls already talking to Gemini finish. Under serve.py, calls made
+    # by requests were waited for before requests were cancelled; this covers
+    # plain uvicorn and calls from background services
+    await anyio.to_thread.run_sync(gemini_inflight.drain)
+    scheduler.stop()
+    job_workers.stop()
+    tracker.stop()
 
 
 # ---------------------------------------------------------------------------
@@ -36,6 +80,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",       # Swagger UI
     redoc_url="/redoc",     # ReDoc
+    lifespan=lifespan,
 )
 
 # ---------------------------------------------------------------------------
@@ -49,8 +94,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# ---------------------------------------------------------------------------
+# Response compression (gzip / brotli / zstd) — see utils/compression.py
+# ---------------------------------------------------------------------------
+
+app.add_middleware(CompressionMiddleware)
+
+# ---------------------------------------------------------------------------
+# Slow-request profiling (DB round trips, opt-in call trees) — see
+# utils/request_profiler.py
+# ---------------------------------------------------------------------------
+
+app.add_middleware(ProfilerMiddleware)
+
+# ---------------------------------------------------------------------------
+# Request metrics (Prometheus, GET /metrics) — outermost, so it times
+# everything above — see utils/metrics.py
+# ---------------------------------------------------------------------------
+
+app.add_middleware(MetricsMiddleware)
+
 # ---------------------------------------------------------------------------
 # Register Routers
 # ---------------------------------------------------------------------------
@@ -66,6 +132,10 @@ app.include_router(customer_router)     # /customers/*
 app.include_router(chatlog_router)      # /chatlogs/*
 app.include_router(chat_router)         # /chat/*   ← NEW
 app.include_router(admin_router)        # /admin/*
+app.include_router(dashboard_router)    # /dashboard/*
+app.include_router(metrics_router)      # /metrics  (Prometheus)
+app.include_router(site_router)         # /sites/*  (public)
+app.include_router(tracking_router)     # /t/*      (public, campaign tracking)
 
 # ---------------------------------------------------------------------------
 # Health check
@@ -73,4 +143,7 @@ app.include_router(admin_router)        # /admin/*
 
 @app.get("/", tags=["Health"])
 def root():
-    return {"status": "ok", "message": "BizSolve API is running 🚀"}
\ No newline at end of file
+    return {"status": "ok", "message": "BizSolve API is running 🚀"}
+
+# Endpoint timing / call-tree capture for the request profiler
+instrument_endpoints(app)
@@ -0,0 +1,88 @@
+"""
+migrate.py
+----------
+One-time data migrations. Run from backend/ after deploying a release
+that adds one:
+
+  python migrate.py              Apply every migration not yet applied
+  python migrate.py --list       Show each migration and whether it has run
+
+Applied migrations are recorded in the "migrations" collection, so each
+runs once per database no matter how many API processes start. Every
+migration only touches documents that still need it, so re-running one
+(e.g. after an interrupted run) is safe.
+
+DB Schema (MongoDB migrations collection):
+{
+  _id: str,                # migration name
+  applied_at: datetime,
+  modified: int            # documents changed
+}
+"""
+
+import argparse
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import get_database  # noqa: E402  (needs .env loaded)
+
+
+def backfill_product_name_lower(db) -> int:
+    """name_lower for prefix search (GET /products/?q=) on products created before it existed."""
+    return db["products"].update_many(
+        {"name_lower": {"$exists": False}},
+        [{"$set": {"name_lower": {"$toLower": "$name"}}}],
+    ).modified_count
+
+
+def backfill_business_version(db) -> int:
+    """version on business profiles created before optimistic locking, so it can be matched directly."""
+    return db["businesses"].update_many(
+        {"version": {"$exists": False}},
+        {"$set": {"version": 1}},
+    ).modified_count
+
+
+# Applied in order; never rename or reorder an entry once it has shipped
+MIGRATIONS = [
+    ("0001_product_name_lower", backfill_product_name_lower),
+    ("0002_business_version", backfill_business_version),
+]
+
+
+def pending(db) -> list:
+    applied = {m["_id"] for m in db["migrations"].find({}, {"_id": 1})}
+    return [(name, fn) for name, fn in MIGRATIONS if name not in applied]
+
+
+def migrate(db) -> list:
+    """Apply pending migrations; return the names applied."""
+    done = []
+    for name, fn in pending(db):
+        modified = fn(db)
+        db["migrations"].insert_one({"_id": name, "applied_at": datetime.utcnow(), "modified": modified})
+        print(f"{name}: {modified} documents updated")
+        done.append(name)
+    return done
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--list", action="store_true", help="show migrations and whether they have run")
+    args = p.parse_args()
+
+    db = get_database()
+    if args.list:
+        waiting = {name for name, _ in pending(db)}
+        for name, _ in MIGRATIONS:
+            print(f"{'pending' if name in waiting else 'applied':8s} {name}")
+        return
+    if not migrate(db):
+        print("Nothing to migrate.")
+
+
+if __name__ == "__main__":
+    main()
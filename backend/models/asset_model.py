@@ -13,6 +13,23 @@ DB Schema (MongoDB assets collection):
   parent_folder_id: str | None,   # None = root level
   content: str | None,            # Used for notes
   file_url: str | None,           # Used for files/images
+  blob_sha256: str | None,        # Set for files uploaded via /assets/uploads
+  size: int | None,               # Bytes, for uploaded files
+  content_type: str | None,       # MIME type, for uploaded files
+  created_at: datetime,
+  updated_at: datetime
+}
+
+Resumable upload sessions (MongoDB asset_uploads collection):
+{
+  _id: ObjectId,
+  business_id: str,
+  name: str,
+  type: "file" | "image",
+  parent_folder_id: str | None,
+  content_type: str,
+  size: int,                      # Declared total size
+  received: int,                  # Bytes stored so far
   created_at: datetime,
   updated_at: datetime
 }
@@ -42,6 +59,18 @@ class AssetUpdateRequest(BaseModel):
     parent_folder_id: Optional[str] = None
 
 
+class AssetUploadCreateRequest(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    type: Literal["file", "image"]
+    parent_folder_id: Optional[str] = None
+    size: int = Field(..., gt=0, description="Total size of the file in bytes")
+    content_type: Optional[str] = None
+    sha256: Optional[str] = Field(
+        None,
+        description="Optional hex SHA-256 of the file; lets the server skip the upload if it already has the content",
+    )
+
+
 # ---------------------------------------------------------------------------
 # Response Models
 # ---------------------------------------------------------------------------
@@ -54,5 +83,15 @@ class AssetResponse(BaseModel):
     parent_folder_id: Optional[str]
     content: Optional[str]
     file_url: Optional[str]
+    size: Optional[int] = None
+    content_type: Optional[str] = None
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+
+class AssetUploadResponse(BaseModel):
+    upload_id: Optional[str]
+    offset: int
+    size: int
+    chunk_size: int
+    asset: Optional[AssetResponse] = None   # Set when the server already had the content
\ No newline at end of file
@@ -17,6 +17,7 @@ DB Schema (MongoDB businesses collection):
   brand_colors: [str] (optional),
   preferred_style: str (optional),
   logo_url: str (optional),
+  version: int,               # Incremented on every update
   created_at: datetime
 }
 """
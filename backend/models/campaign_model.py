@@ -12,9 +12,11 @@ DB Schema (MongoDB campaigns collection):
   body: str,
   sender_name: str,
   reply_to: str,
-  status: "draft" | "sent" | "scheduled",
+  status: "draft" | "scheduled" | "sending" | "sent" | "failed",   # last three set by the send engine
   analytics: { sent: int, opened: int, clicked: int },
-  created_at: datetime
+  send_at: datetime (optional),   # UTC; required when status is "scheduled"
+  created_at: datetime,
+  sent_at: datetime (optional)
 }
 """
 
@@ -29,11 +31,12 @@ from datetime import datetime
 
 class CampaignCreateRequest(BaseModel):
     name: str = Field(..., min_length=1, max_length=200)
-    subject: str = Field(..., min_length=1, max_length=300)
-    body: str = Field(..., min_length=1)
+    subject: str = Field(..., min_length=1, max_length=300, description="Template, e.g. 'Hi {{ customer.first_name }}'")
+    body: str = Field(..., min_length=1, description="Template — see utils/campaign_template.py for placeholders")
     sender_name: str
     reply_to: Optional[EmailStr] = None
     status: Literal["draft", "sent", "scheduled"] = "draft"
+    send_at: Optional[datetime] = Field(None, description="When to send a scheduled campaign (UTC)")
 
 
 class CampaignUpdateRequest(BaseModel):
@@ -43,6 +46,7 @@ class CampaignUpdateRequest(BaseModel):
     sender_name: Optional[str] = None
     reply_to: Optional[EmailStr] = None
     status: Optional[Literal["draft", "sent", "scheduled"]] = None
+    send_at: Optional[datetime] = None
 
 
 # ---------------------------------------------------------------------------
@@ -65,4 +69,5 @@ class CampaignResponse(BaseModel):
     reply_to: Optional[str]
     status: str
     analytics: CampaignAnalytics
+    send_at: Optional[datetime] = None
     created_at: datetime
\ No newline at end of file
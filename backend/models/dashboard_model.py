@@ -0,0 +1,68 @@
+"""
+models/dashboard_model.py
+-------------------------
+Pydantic models for the dashboard summary (GET /dashboard/summary).
+Recent items are lean projections of the full resource models — fetch a
+resource's own endpoint for the complete document.
+"""
+
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+
+from models.business_model import BusinessResponse
+
+
+# ---------------------------------------------------------------------------
+# Response Models
+# ---------------------------------------------------------------------------
+
+class DashboardUser(BaseModel):
+    id: str
+    name: str
+    email: str
+    role: str
+
+
+class DashboardCounts(BaseModel):
+    websites: int
+    websites_live: int
+    posters: int
+    campaigns: int
+    campaigns_sent: int
+    products: int
+    customers: int
+    chatlogs: int
+
+
+class RecentWebsite(BaseModel):
+    id: str
+    template: str
+    published_url: Optional[str]
+    version: int
+    created_at: datetime
+    updated_at: datetime
+
+
+class RecentPoster(BaseModel):
+    id: str
+    title: str
+    image_url: Optional[str]
+    created_at: datetime
+
+
+class RecentCampaign(BaseModel):
+    id: str
+    name: str
+    subject: str
+    status: str
+    created_at: datetime
+
+
+class DashboardSummaryResponse(BaseModel):
+    user: DashboardUser
+    business: Optional[BusinessResponse]
+    counts: DashboardCounts
+    recent_websites: List[RecentWebsite]
+    recent_posters: List[RecentPoster]
+    recent_campaigns: List[RecentCampaign]
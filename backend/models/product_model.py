@@ -8,6 +8,7 @@ DB Schema (MongoDB products collection):
   _id: ObjectId,
   business_id: str,
   name: str,
+  name_lower: str,         # lowercased name, for prefix search
   description: str,
   price: float,
   image_url: str,
@@ -16,7 +17,7 @@ DB Schema (MongoDB products collection):
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 
@@ -49,4 +50,20 @@ class ProductResponse(BaseModel):
     description: Optional[str]
     price: float
     image_url: Optional[str]
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+
+class PriceBand(BaseModel):
+    min: Optional[float]     # None = open-ended below
+    max: Optional[float]     # None = open-ended above
+    count: int
+
+
+class ProductStatsResponse(BaseModel):
+    count: int
+    min: Optional[float]
+    max: Optional[float]
+    mean: Optional[float]
+    median: Optional[float]
+    percentiles: Dict[str, float]   # "p10", "p25", ... "p99"
+    bands: List[PriceBand]
@@ -15,10 +15,23 @@ DB Schema (MongoDB websites collection):
   created_at: datetime,
   updated_at: datetime
 }
+
+DB Schema (MongoDB website_versions collection — see utils/website_history.py):
+{
+  _id: ObjectId,
+  website_id: str,
+  business_id: str,
+  version: int,                      # unique per website_id
+  patch: list,                       # RFC 6902 ops from the previous version
+  is_snapshot: bool,
+  snapshot: dict | None,             # full editable state on snapshot versions
+  author: str | None,                # email of the editing user
+  created_at: datetime
+}
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Literal
 from datetime import datetime
 
 
@@ -43,6 +56,17 @@ class WebsiteUpdateRequest(BaseModel):
     published_url: Optional[str] = None
 
 
+class JsonPatchOperation(BaseModel):
+    """
+    One RFC 6902 operation. Paths address the editable website fields,
+    e.g. "/content_json/hero/headline" or "/template".
+    """
+    op: Literal["add", "remove", "replace", "move", "copy", "test"]
+    path: str
+    value: Optional[Any] = None
+    from_: Optional[str] = Field(None, alias="from")
+
+
 # ---------------------------------------------------------------------------
 # Response Models
 # ---------------------------------------------------------------------------
@@ -56,4 +80,25 @@ class WebsiteResponse(BaseModel):
     published_url: Optional[str]
     version: int
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+
+class WebsiteVersionSummary(BaseModel):
+    version: int
+    operations: int
+    is_snapshot: bool
+    author: Optional[str]
+    created_at: datetime
+
+
+class WebsiteVersionResponse(BaseModel):
+    website_id: str
+    version: int
+    state: Dict[str, Any]
+
+
+class WebsiteDiffResponse(BaseModel):
+    website_id: str
+    from_version: int
+    to_version: int
+    patch: List[Dict[str, Any]]
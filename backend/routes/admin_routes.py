@@ -7,13 +7,20 @@ Admin-only endpoints. All routes in this file require the "admin" role.
   GET /admin/users              - List all users
   GET /admin/users/{id}         - Get a specific user
   DELETE /admin/users/{id}      - Delete a user and their business
+  GET /admin/llm                - AI provider circuit breaker and hedging stats
+  GET /admin/scheduler          - Campaign scheduler leadership and drift/lag
+  GET /admin/profiles           - Recent slow / profiled requests (all workers)
+  GET /admin/profiles/{id}      - One request profile, by X-Profile-Id
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, status
 from bson import ObjectId
 
 from database import get_database
 from utils.dependencies import require_admin
+from utils import vector_index, site_builder, request_profiler
+from utils.llm_resilience import gemini_breaker, hedge_snapshot
+from utils.campaign_scheduler import scheduler
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -101,8 +108,47 @@ def delete_user(user_id: str, admin: dict = Depends(require_admin)):
 
     # Delete all business-scoped data
     if business_id:
-        for collection in ["businesses", "products", "websites", "campaigns", "posters", "customers", "chatlogs", "assets"]:
+        for website in db["websites"].find({"business_id": business_id}, {"_id": 1}):
+            site_builder.delete_site(str(website["_id"]))
+        for collection in [
+            "businesses", "products", "websites", "campaigns", "posters", "customers", "chatlogs", "assets",
+            "website_versions", "campaign_deliveries",
+        ]:
             db[collection].delete_many({"business_id": business_id})
+        vector_index.drop_tenant(db, business_id)
 
     # Delete the user
-    db["users"].delete_one({"_id": oid})
\ No newline at end of file
+    db["users"].delete_one({"_id": oid})
+
+
+@router.get("/llm")
+def llm_health(admin: dict = Depends(require_admin)):
+    """Circuit breaker state/transitions and hedged-request counters for Gemini."""
+    return {
+        "breaker": gemini_breaker.snapshot(),
+        "hedging": hedge_snapshot(),
+    }
+
+
+@router.get("/scheduler")
+def scheduler_health(admin: dict = Depends(require_admin)):
+    """Campaign scheduler leadership, queue depth, and firing drift/lag."""
+    return scheduler.stats()
+
+
+@router.get("/profiles")
+def recent_profiles(
+    limit: int = Query(20, ge=1, le=200),
+    admin: dict = Depends(require_admin),
+):
+    """Most recent slow or profiled requests across workers, newest first."""
+    return request_profiler.recent(limit)
+
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, admin: dict = Depends(require_admin)):
+    """A single request profile, by the X-Profile-Id response header."""
+    record = request_profiler.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found (it may have been evicted).")
+    return record
@@ -7,19 +7,64 @@ Brand Vault asset management (folders, notes, files, images):
   POST   /assets/               - Create an asset or folder
   PATCH  /assets/{id}           - Update an asset
   DELETE /assets/{id}           - Delete an asset (and optionally its children)
+  GET    /assets/{id}/content   - Download an uploaded file (supports Range)
+
+Resumable uploads for large files/images:
+  POST   /assets/uploads                 - Start a session (size, optional sha256)
+  GET    /assets/uploads/{upload_id}     - Current offset, to resume after a drop
+  PATCH  /assets/uploads/{upload_id}     - Append a chunk (Upload-Offset header, raw body)
+  POST   /assets/uploads/{upload_id}/complete - Finish and create the asset
+  DELETE /assets/uploads/{upload_id}     - Abandon a session
+
+Sessions idle for ASSET_UPLOAD_EXPIRE_HOURS (default 24) are expired and
+their partial files deleted.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status, Query
-from datetime import datetime
+import os
+import re
+import time
+import uuid
+import mimetypes
+from urllib.parse import quote
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Request, Response, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timedelta
 from typing import Optional
 from bson import ObjectId
 
 from database import get_database
-from models.asset_model import AssetCreateRequest, AssetUpdateRequest, AssetResponse
+from models.asset_model import (
+    AssetCreateRequest,
+    AssetUpdateRequest,
+    AssetResponse,
+    AssetUploadCreateRequest,
+    AssetUploadResponse,
+)
 from utils.dependencies import get_current_user
+from utils import vector_index, blob_store, etag
+from utils.responses import trusted_response
 
 router = APIRouter(prefix="/assets", tags=["Brand Vault"])
 
+ASSET_MAX_UPLOAD_BYTES = int(os.getenv("ASSET_MAX_UPLOAD_BYTES", 2 * 1024 ** 3))
+
+ASSET_UPLOAD_EXPIRE_HOURS = float(os.getenv("ASSET_UPLOAD_EXPIRE_HOURS", 24))
+
+# Suggested client chunk size; any chunk size is accepted
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# How long one PATCH may hold a session's write claim (a slow chunk upload)
+UPLOAD_CHUNK_LEASE_SECONDS = 600
+
+# Expired sessions are swept at most this often per worker
+_UPLOAD_SWEEP_INTERVAL_SECONDS = 3600
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_UNSAFE_FILENAME_RE = re.compile(r'[^\x20-\x7e]|["\\]')
+
+_next_upload_sweep = 0.0
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -34,28 +79,363 @@ def serialize_asset(a: dict) -> dict:
         "parent_folder_id": a.get("parent_folder_id"),
         "content": a.get("content"),
         "file_url": a.get("file_url"),
+        "size": a.get("size"),
+        "content_type": a.get("content_type"),
         "created_at": a["created_at"],
         "updated_at": a["updated_at"],
     }
 
 
-def get_asset_or_404(db, asset_id: str, business_id: str) -> dict:
+def sync_note_index(business_id: str, asset: dict) -> None:
+    """Keep the advisor's vector index in step with note content."""
+    if asset["type"] != "note":
+        return
+    key = f"note:{asset['_id']}"
+    if asset.get("content"):
+        vector_index.index_document(business_id, key, vector_index.note_text(asset))
+    else:
+        vector_index.remove_documents(business_id, [key])
+
+
+def get_asset_or_404(db, asset_id: str, business_id: str, projection: dict = None) -> dict:
     try:
         oid = ObjectId(asset_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid asset ID format.")
-    asset = db["assets"].find_one({"_id": oid, "business_id": business_id})
+    asset = db["assets"].find_one({"_id": oid, "business_id": business_id}, projection)
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found.")
     return asset
 
 
+def get_upload_or_404(db, upload_id: str, business_id: str) -> dict:
+    try:
+        oid = ObjectId(upload_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid upload ID format.")
+    upload = db["asset_uploads"].find_one({"_id": oid, "business_id": business_id})
+    if not upload or upload["updated_at"] < upload_expiry_cutoff():
+        raise HTTPException(status_code=404, detail="Upload session not found.")
+    return upload
+
+
+def upload_expiry_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(hours=ASSET_UPLOAD_EXPIRE_HOURS)
+
+
+def sweep_expired_uploads(db) -> None:
+    """Delete idle upload sessions and their partial files (at most hourly per worker)."""
+    global _next_upload_sweep
+    now = time.monotonic()
+    if now < _next_upload_sweep:
+        return
+    _next_upload_sweep = now + _UPLOAD_SWEEP_INTERVAL_SECONDS
+    for upload in db["asset_uploads"].find(
+        {"updated_at": {"$lt": upload_expiry_cutoff()}}, {"business_id": 1}
+    ):
+        blob_store.discard_upload(upload["business_id"], str(upload["_id"]))
+        db["asset_uploads"].delete_one({"_id": upload["_id"], "updated_at": {"$lt": upload_expiry_cutoff()}})
+
+
+def claim_chunk(db, upload: dict, offset: int) -> Optional[str]:
+    """
+    Take the session's write claim for a chunk starting at offset. Only one
+    request can hold it, and only while the server's offset is still
+    offset, so two PATCHes for the same range can't both write. Returns the
+    claim token, or None if the offset moved or another chunk is in flight.
+    """
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+    claimed = db["asset_uploads"].update_one(
+        {
+            "_id": upload["_id"],
+            "received": offset,
+            "$or": [{"writer": None}, {"writer_until": {"$lt": now}}],
+        },
+        {"$set": {
+            "writer": token,
+            "writer_until": now + timedelta(seconds=UPLOAD_CHUNK_LEASE_SECONDS),
+            "updated_at": now,
+        }},
+    )
+    return token if claimed.modified_count else None
+
+
+def content_disposition(name: str) -> str:
+    """
+    inline Content-Disposition for a stored file name (RFC 6266): an ASCII
+    fallback for old clients plus the exact UTF-8 name (RFC 5987).
+    """
+    fallback = _UNSAFE_FILENAME_RE.sub("_", name) or "download"
+    return f"inline; filename=\"{fallback}\"; filename*=UTF-8''{quote(name, safe='')}"
+
+
+def verify_parent_folder(db, parent_folder_id: Optional[str], business_id: str) -> None:
+    """Raise 404 unless parent_folder_id is None or an existing folder of this business."""
+    if not parent_folder_id:
+        return
+    try:
+        oid = ObjectId(parent_folder_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid parent folder ID format.")
+    parent = db["assets"].find_one({
+        "_id": oid,
+        "business_id": business_id,
+        "type": "folder",
+    })
+    if not parent:
+        raise HTTPException(status_code=404, detail="Parent folder not found.")
+
+
+def create_blob_asset(db, business_id: str, meta: dict, sha256: str, size: int) -> dict:
+    """Insert the asset document for a file stored in the blob store."""
+    now = datetime.utcnow()
+    doc = {
+        "name": meta["name"],
+        "type": meta["type"],
+        "parent_folder_id": meta.get("parent_folder_id"),
+        "content": None,
+        "blob_sha256": sha256,
+        "size": size,
+        "content_type": meta["content_type"],
+        "business_id": business_id,
+        "created_at": now,
+        "updated_at": now,
+    }
+    result = db["assets"].insert_one(doc)
+    doc["_id"] = result.inserted_id
+    doc["file_url"] = f"/assets/{result.inserted_id}/content"
+    db["assets"].update_one({"_id": result.inserted_id}, {"$set": {"file_url": doc["file_url"]}})
+    etag.bump(db, business_id, "assets")
+    return doc
+
+
+def release_blob(db, business_id: str, sha256: Optional[str]) -> None:
+    """Delete a blob once no asset of this business references it any more."""
+    if sha256 and not db["assets"].find_one({"business_id": business_id, "blob_sha256": sha256}, {"_id": 1}):
+        blob_store.delete_blob(business_id, sha256)
+
+
+def parse_range(range_header: str, size: int):
+    """
+    Parse a single-range "bytes=" header into an inclusive (start, end).
+    Raises 416 for unsatisfiable or multi-range requests.
+    """
+    match = _RANGE_RE.match(range_header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        raise HTTPException(
+            status_code=416,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, end
+
+
+# ---------------------------------------------------------------------------
+# Resumable uploads
+# (declared before /{asset_id} routes so "uploads" isn't taken as an ID)
+# ---------------------------------------------------------------------------
+
+@router.post("/uploads", response_model=AssetUploadResponse, status_code=status.HTTP_201_CREATED)
+def start_upload(
+    data: AssetUploadCreateRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Start a resumable upload. If sha256 is given and this business already
+    stores that content, the asset is created immediately and no bytes
+    need to be sent.
+    """
+    if data.size > ASSET_MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File exceeds the maximum upload size.")
+
+    db = get_database()
+    business_id = current_user["business_id"]
+    verify_parent_folder(db, data.parent_folder_id, business_id)
+    sweep_expired_uploads(db)
+
+    meta = {
+        **data.dict(exclude={"sha256", "size"}),
+        "content_type": data.content_type
+        or mimetypes.guess_type(data.name)[0]
+        or "application/octet-stream",
+    }
+
+    sha256 = data.sha256.lower() if data.sha256 else None
+    try:
+        # Size of the content already stored, never the client's declared size
+        stored_size = blob_store.blob_size(business_id, sha256) if sha256 else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if stored_size is not None:
+        asset = create_blob_asset(db, business_id, meta, sha256, stored_size)
+        return {
+            "upload_id": None,
+            "offset": stored_size,
+            "size": stored_size,
+            "chunk_size": UPLOAD_CHUNK_SIZE,
+            "asset": serialize_asset(asset),
+        }
+
+    now = datetime.utcnow()
+    session = {
+        **meta,
+        "business_id": business_id,
+        "size": data.size,
+        "received": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
+    result = db["asset_uploads"].insert_one(session)
+    blob_store.start_upload(business_id, str(result.inserted_id))
+
+    return {
+        "upload_id": str(result.inserted_id),
+        "offset": 0,
+        "size": data.size,
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+    }
+
+
+@router.get("/uploads/{upload_id}", response_model=AssetUploadResponse)
+def get_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    """Return how many bytes the server has, so a client can resume from there."""
+    db = get_database()
+    upload = get_upload_or_404(db, upload_id, current_user["business_id"])
+    return {
+        "upload_id": upload_id,
+        "offset": upload["received"],
+        "size": upload["size"],
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+    }
+
+
+@router.patch("/uploads/{upload_id}", response_model=AssetUploadResponse)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Append the raw request body at Upload-Offset. The offset must equal the
+    server's current offset (see GET), otherwise 409 is returned with the
+    correct offset. The body is streamed to disk as it arrives.
+
+    The range is claimed atomically before anything is written, so of two
+    concurrent PATCHes for the same offset one gets 409.
+    """
+    db = get_database()
+    business_id = current_user["business_id"]
+    upload = await run_in_threadpool(get_upload_or_404, db, upload_id, business_id)
+
+    token = None
+    if upload_offset == upload["received"]:
+        token = await run_in_threadpool(claim_chunk, db, upload, upload_offset)
+    if token is None:
+        current = await run_in_threadpool(get_upload_or_404, db, upload_id, business_id)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Offset mismatch or another chunk in progress. Resume from {current['received']}.",
+            headers={"Upload-Offset": str(current["received"])},
+        )
+
+    received = upload_offset
+    try:
+        f = await run_in_threadpool(blob_store.open_part_for_append, business_id, upload_id, upload_offset)
+        try:
+            async for chunk in request.stream():
+                received += len(chunk)
+                if received > upload["size"]:
+                    raise HTTPException(status_code=413, detail="Chunk extends past the declared file size.")
+                await run_in_threadpool(f.write, chunk)
+        finally:
+            await run_in_threadpool(f.close)
+    except BaseException:
+        # Nothing is committed; the next chunk truncates back to the old offset
+        await run_in_threadpool(
+            db["asset_uploads"].update_one,
+            {"_id": upload["_id"], "writer": token},
+            {"$set": {"writer": None, "writer_until": None}},
+        )
+        raise
+
+    await run_in_threadpool(
+        db["asset_uploads"].update_one,
+        {"_id": upload["_id"], "writer": token},
+        {"$set": {"received": received, "writer": None, "writer_until": None, "updated_at": datetime.utcnow()}},
+    )
+
+    return {
+        "upload_id": upload_id,
+        "offset": received,
+        "size": upload["size"],
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+    }
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=AssetResponse, status_code=status.HTTP_201_CREATED)
+def complete_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Finish an upload: hash it, dedupe against stored content, create the
+    asset. The session's write claim is taken first, so of two concurrent
+    completes one gets 409 instead of finding the part file already moved.
+    """
+    db = get_database()
+    business_id = current_user["business_id"]
+    upload = get_upload_or_404(db, upload_id, business_id)
+
+    if upload["received"] != upload["size"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete: {upload['received']} of {upload['size']} bytes received.",
+            headers={"Upload-Offset": str(upload["received"])},
+        )
+
+    token = claim_chunk(db, upload, upload["size"])
+    if token is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is already being completed.")
+    try:
+        sha256, size = blob_store.finalize_upload(business_id, upload_id)
+        asset = create_blob_asset(db, business_id, upload, sha256, size)
+    except BaseException:
+        db["asset_uploads"].update_one(
+            {"_id": upload["_id"], "writer": token},
+            {"$set": {"writer": None, "writer_until": None}},
+        )
+        raise
+    db["asset_uploads"].delete_one({"_id": upload["_id"]})
+
+    return serialize_asset(asset)
+
+
+@router.delete("/uploads/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+def abandon_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    db = get_database()
+    upload = get_upload_or_404(db, upload_id, current_user["business_id"])
+    blob_store.discard_upload(current_user["business_id"], upload_id)
+    db["asset_uploads"].delete_one({"_id": upload["_id"]})
+
+
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
 
 @router.get("/", response_model=list[AssetResponse])
 def list_assets(
+    request: Request,
+    response: Response,
     parent_folder_id: Optional[str] = Query(None, description="Filter by folder. Omit for root."),
     current_user: dict = Depends(get_current_user),
 ):
@@ -65,19 +445,80 @@ def list_assets(
     Omit to list root-level assets.
     """
     db = get_database()
+    not_modified = etag.etag_or_304(
+        request, response, etag.collection_etag(db, current_user["business_id"], "assets")
+    )
+    if not_modified:
+        return not_modified
+
     query = {
         "business_id": current_user["business_id"],
         "parent_folder_id": parent_folder_id,   # None = root level
     }
     assets = list(db["assets"].find(query))
-    return [serialize_asset(a) for a in assets]
+    return trusted_response([serialize_asset(a) for a in assets], response)
 
 
 @router.get("/{asset_id}", response_model=AssetResponse)
-def get_asset(asset_id: str, current_user: dict = Depends(get_current_user)):
+def get_asset(
+    asset_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
     db = get_database()
+
+    # updated_at changes on every edit — check it before loading the full note
+    meta = get_asset_or_404(db, asset_id, current_user["business_id"], projection={"updated_at": 1})
+    stamp = int(meta["updated_at"].timestamp() * 1000)
+    not_modified = etag.etag_or_304(request, response, f'"asset-{asset_id}-{stamp}"')
+    if not_modified:
+        return not_modified
+
     asset = get_asset_or_404(db, asset_id, current_user["business_id"])
-    return serialize_asset(asset)
+    return trusted_response(serialize_asset(asset), response)
+
+
+@router.get("/{asset_id}/content")
+def download_asset_content(
+    asset_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Stream an uploaded file. Honours single-range "Range: bytes=..." requests
+    with 206 Partial Content, so large files can be streamed or resumed.
+    """
+    db = get_database()
+    business_id = current_user["business_id"]
+    asset = get_asset_or_404(db, asset_id, business_id)
+    if not asset.get("blob_sha256"):
+        raise HTTPException(status_code=404, detail="This asset has no uploaded content.")
+
+    size = asset["size"]
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": f'"{asset["blob_sha256"]}"',
+        "Content-Disposition": content_disposition(asset["name"]),
+    }
+
+    if range_header:
+        start, end = parse_range(range_header, size)
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            blob_store.iter_blob(business_id, asset["blob_sha256"], start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=asset.get("content_type"),
+            headers=headers,
+        )
+
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(
+        blob_store.iter_blob(business_id, asset["blob_sha256"]),
+        media_type=asset.get("content_type"),
+        headers=headers,
+    )
 
 
 @router.post("/", response_model=AssetResponse, status_code=status.HTTP_201_CREATED)
@@ -89,14 +530,7 @@ def create_asset(
     db = get_database()
 
     # If a parent_folder_id is given, verify it exists and is a folder
-    if data.parent_folder_id:
-        parent = db["assets"].find_one({
-            "_id": ObjectId(data.parent_folder_id),
-            "business_id": current_user["business_id"],
-            "type": "folder",
-        })
-        if not parent:
-            raise HTTPException(status_code=404, detail="Parent folder not found.")
+    verify_parent_folder(db, data.parent_folder_id, current_user["business_id"])
 
     now = datetime.utcnow()
     doc = {
@@ -107,6 +541,8 @@ def create_asset(
     }
     result = db["assets"].insert_one(doc)
     doc["_id"] = result.inserted_id
+    etag.bump(db, current_user["business_id"], "assets")
+    sync_note_index(current_user["business_id"], doc)
     return serialize_asset(doc)
 
 
@@ -129,8 +565,10 @@ def update_asset(
         {"_id": ObjectId(asset_id)},
         {"$set": update_fields},
     )
+    etag.bump(db, current_user["business_id"], "assets")
 
     updated = get_asset_or_404(db, asset_id, current_user["business_id"])
+    sync_note_index(current_user["business_id"], updated)
     return serialize_asset(updated)
 
 
@@ -142,11 +580,24 @@ def delete_asset(asset_id: str, current_user: dict = Depends(get_current_user)):
     db = get_database()
     asset = get_asset_or_404(db, asset_id, current_user["business_id"])
 
+    removed_keys = [f"note:{asset_id}"]
+    released_blobs = {asset.get("blob_sha256")}
+
     # Cascade delete children if this is a folder
     if asset["type"] == "folder":
-        db["assets"].delete_many({
+        children = {
             "parent_folder_id": asset_id,
             "business_id": current_user["business_id"],
-        })
+        }
+        for c in db["assets"].find(children, {"_id": 1, "blob_sha256": 1}):
+            removed_keys.append(f"note:{c['_id']}")
+            released_blobs.add(c.get("blob_sha256"))
+        db["assets"].delete_many(children)
+
+    db["assets"].delete_one({"_id": ObjectId(asset_id)})
+    etag.bump(db, current_user["business_id"], "assets")
+    vector_index.remove_documents(current_user["business_id"], removed_keys)
 
-    db["assets"].delete_one({"_id": ObjectId(asset_id)})
\ No newline at end of file
+    # Uploaded content is shared by identical files — only drop unreferenced blobs
+    for sha256 in released_blobs:
+        release_blob(db, current_user["business_id"], sha256)
\ No newline at end of file
@@ -95,6 +95,7 @@ def register(data: RegisterRequest):
         "brand_colors": data.brand_colors or [],
         "preferred_style": data.preferred_style,
         "logo_url": None,   # Updated later via PATCH /business/me
+        "version": 1,       # Bumped on every profile change
         "created_at": datetime.utcnow(),
     }
     business_result = db["businesses"].insert_one(business_doc)
@@ -7,15 +7,24 @@ Business profile endpoints (scoped to the authenticated user's business):
   POST  /business/me/logo   - Upload business logo
 """
 
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from bson import ObjectId
+from datetime import datetime
 
 from database import get_database
 from models.business_model import BusinessUpdateRequest, BusinessResponse
 from utils.dependencies import get_current_user
+from utils import prompt_cache, etag, site_cache
+from utils.image_utils import hash_upload, prepare_logo, FileTooLargeError
+from utils.responses import trusted_response
+from utils.gemini_utils_chatbot import delete_context_cache
 
 router = APIRouter(prefix="/business", tags=["Business"])
 
+# Retries of a version bump that lost a race with another update
+VERSION_UPDATE_ATTEMPTS = 5
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -48,16 +57,50 @@ def get_business_or_404(db, business_id: str) -> dict:
     return business
 
 
+def update_business_versioned(db, business_id: str, fields: dict, condition: dict = None) -> bool:
+    """
+    $set fields on a business and bump its `version`, which keys the chat
+    prompt cache, ETags and site builds. Businesses created before the field
+    existed count as version 1, so their first update moves them to 2 (an
+    $inc on the missing field would leave it at 1). The write is guarded on
+    the version read, so concurrent updates each bump it.
+
+    Returns False if no business matches condition (e.g. nothing changed).
+    """
+    query = {"_id": ObjectId(business_id), **(condition or {})}
+    for _ in range(VERSION_UPDATE_ATTEMPTS):
+        current = db["businesses"].find_one(query, {"version": 1})
+        if current is None:
+            return False
+        version = current.get("version")
+        guard = {"version": version} if version is not None else {"version": {"$exists": False}}
+        result = db["businesses"].update_one(
+            {**query, **guard},
+            {"$set": {**fields, "version": (version or 1) + 1}},
+        )
+        if result.matched_count:
+            return True
+    raise HTTPException(status_code=409, detail="Business profile was updated concurrently. Please retry.")
+
+
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
 
 @router.get("/me", response_model=BusinessResponse)
-def get_my_business(current_user: dict = Depends(get_current_user)):
+def get_my_business(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     """Get the authenticated user's business profile."""
     db = get_database()
+
+    # The version field changes on every profile update — check it before loading the profile
+    meta = db["businesses"].find_one({"_id": ObjectId(current_user["business_id"])}, {"version": 1})
+    if meta:
+        not_modified = etag.etag_or_304(request, response, f'"business-{meta["_id"]}-v{meta.get("version", 1)}"')
+        if not_modified:
+            return not_modified
+
     business = get_business_or_404(db, current_user["business_id"])
-    return serialize_business(business)
+    return trusted_response(serialize_business(business), response)
 
 
 @router.patch("/me", response_model=BusinessResponse)
@@ -72,10 +115,12 @@ def update_my_business(
     if not update_fields:
         raise HTTPException(status_code=400, detail="No fields provided to update.")
 
-    db["businesses"].update_one(
-        {"_id": ObjectId(current_user["business_id"])},
-        {"$set": update_fields},
-    )
+    # Bump version so cached chat prompt prefixes are rebuilt
+    update_business_versioned(db, current_user["business_id"], update_fields)
+    dropped = prompt_cache.invalidate(current_user["business_id"])
+    if dropped:
+        delete_context_cache(dropped["provider_cache"])
+    site_cache.invalidate_business(current_user["business_id"])
 
     business = get_business_or_404(db, current_user["business_id"])
     return serialize_business(business)
@@ -89,7 +134,9 @@ async def upload_logo(
     """
     Upload a logo image for the authenticated user's business.
     Accepts: jpg, jpeg, png, webp, svg
-    The logo is uploaded to Cloudinary and the URL is saved to the business document.
+    Raster images are downscaled to 500x500 and re-encoded to WebP locally,
+    then uploaded to Cloudinary; the URL is saved to the business document.
+    Re-uploading an identical file reuses the stored URL without uploading.
     """
 
     # Validate file type
@@ -100,26 +147,61 @@ async def upload_logo(
             detail=f"Invalid file type '{logo.content_type}'. Allowed: jpg, png, webp, svg"
         )
 
-    # Read file bytes
-    file_bytes = await logo.read()
-    if not file_bytes:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    business_id = current_user["business_id"]
+    db = get_database()
 
-    # Upload to Cloudinary
+    # Hash the upload in chunks straight from the spooled temp file —
+    # the raw bytes are never held in memory as a whole
     try:
-        from utils.cloudinary_utils import upload_logo as cloudinary_upload
-        logo_url = cloudinary_upload(file_bytes, logo.filename)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Logo upload failed: {str(e)}")
+        digest, _ = await run_in_threadpool(hash_upload, logo.file)
+    except FileTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Identical image uploaded before → reuse its URL, skip processing and upload
+    existing = await run_in_threadpool(
+        db["logo_uploads"].find_one,
+        {"business_id": business_id, "sha256": digest},
+    )
 
-    # Save logo URL to business document
-    db = get_database()
-    db["businesses"].update_one(
-        {"_id": ObjectId(current_user["business_id"])},
-        {"$set": {"logo_url": logo_url}},
+    if existing:
+        logo_url = existing["url"]
+    else:
+        # Downscale + re-encode to WebP locally (CPU-bound, off the loop)
+        try:
+            image_bytes, _ = await run_in_threadpool(prepare_logo, logo.file, logo.content_type)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # Upload to Cloudinary (off the event loop — the SDK is blocking)
+        try:
+            from utils.cloudinary_utils import upload_logo_async
+            logo_url = await upload_logo_async(
+                image_bytes, logo.filename, public_id=f"{business_id}/{digest[:20]}"
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Logo upload failed: {str(e)}")
+
+        await run_in_threadpool(
+            db["logo_uploads"].update_one,
+            {"business_id": business_id, "sha256": digest},
+            {"$set": {"url": logo_url, "created_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+    # Save logo URL to business document (pymongo is blocking too)
+    await run_in_threadpool(
+        update_business_versioned,
+        db,
+        business_id,
+        {"logo_url": logo_url},
+        {"logo_url": {"$ne": logo_url}},
     )
+    site_cache.invalidate_business(business_id)
 
     return {
         "message": "Logo uploaded successfully.",
         "logo_url": logo_url,
-    }
\ No newline at end of file
+        "deduplicated": existing is not None,
+    }
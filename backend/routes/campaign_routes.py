@@ -7,18 +7,34 @@ Email campaign management endpoints:
   POST   /campaigns/          - Create a campaign
   PATCH  /campaigns/{id}      - Update a campaign
   DELETE /campaigns/{id}      - Delete a campaign
+
+Sending (runs on the background job queue, see utils/campaign_sender.py):
+  POST   /campaigns/{id}/send - Queue delivery to all customers → 202 + job
+  GET    /campaigns/{id}/send - Delivery job status and stats
+
+Campaigns with status "scheduled" are sent automatically at send_at by
+utils/campaign_scheduler.py. Once a campaign is "sending" or "sent", a
+PATCH of its status or send_at is rejected with 409.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response
+from datetime import datetime, timezone
 from bson import ObjectId
 
 from database import get_database
 from models.campaign_model import CampaignCreateRequest, CampaignUpdateRequest, CampaignResponse
 from utils.dependencies import get_current_user
+from utils import etag, job_queue
+from utils.campaign_sender import send_campaign
+from utils.campaign_scheduler import scheduler
+from utils.campaign_template import compile_template, TemplateError
+from utils.responses import trusted_response
 
 router = APIRouter(prefix="/campaigns", tags=["Campaigns"])
 
+# Statuses past which a campaign can no longer be rescheduled
+SEND_STATUSES = ("sending", "sent")
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -35,6 +51,7 @@ def serialize_campaign(c: dict) -> dict:
         "reply_to": c.get("reply_to"),
         "status": c.get("status", "draft"),
         "analytics": c.get("analytics", {"sent": 0, "opened": 0, "clicked": 0}),
+        "send_at": c.get("send_at"),
         "created_at": c["created_at"],
     }
 
@@ -50,22 +67,110 @@ def get_campaign_or_404(db, campaign_id: str, business_id: str) -> dict:
     return campaign
 
 
+def to_utc(value: datetime) -> datetime:
+    """Store datetimes as naive UTC, like every other timestamp in the database."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def validate_templates(fields: dict) -> None:
+    """Reject subject/body templates with bad syntax or unknown placeholders."""
+    for field in ("subject", "body"):
+        if fields.get(field):
+            try:
+                compile_template(fields[field])
+            except TemplateError as e:
+                raise HTTPException(status_code=400, detail=f"Invalid {field} template: {e}")
+
+
+def schedule_if_needed(campaign: dict) -> None:
+    """Tell this process's scheduler about a newly (re)scheduled campaign."""
+    if campaign.get("status") == "scheduled" and campaign.get("send_at"):
+        scheduler.notify(str(campaign["_id"]), campaign["send_at"])
+
+
+def serialize_send_job(j: dict) -> dict:
+    return {
+        "job_id": str(j["_id"]),
+        "status": j["status"],
+        "attempts": j.get("attempts", 0),
+        "result": j.get("result"),
+        "error": j.get("error"),
+        "created_at": j["created_at"],
+        "updated_at": j["updated_at"],
+    }
+
+
+def run_campaign_send_job(db, job: dict) -> dict:
+    """
+    Job handler: deliver the campaign, then mark it sent. Transient
+    delivery failures are retried while the job has attempts left; after
+    the last attempt the campaign is finished with them counted as failed
+    (or marked "failed" if the send itself broke), never left "sending".
+    """
+    campaign = db["campaigns"].find_one({"_id": ObjectId(job["payload"]["campaign_id"])})
+    if not campaign:
+        return {"skipped": "Campaign was deleted."}
+
+    last_attempt = job["attempts"] >= job["max_attempts"]
+    try:
+        stats = send_campaign(db, campaign, on_batch=lambda: job_queue.extend_lease(db, job))
+    except Exception:
+        if last_attempt:
+            finish_campaign(db, campaign, "failed")
+        raise
+    if stats["failed"] and not last_attempt:
+        # Retried with backoff; the next attempt only resends the transient failures
+        raise RuntimeError(f"{stats['failed']} of {stats['sent'] + stats['failed']} deliveries failed.")
+
+    finish_campaign(db, campaign, "sent")
+    return stats
+
+
+def finish_campaign(db, campaign: dict, final_status: str) -> None:
+    update = {"status": final_status}
+    if final_status == "sent":
+        update["sent_at"] = datetime.utcnow()
+    db["campaigns"].update_one({"_id": campaign["_id"]}, {"$set": update})
+    etag.bump(db, campaign["business_id"], "campaigns")
+
+
+# Job kinds handled by this module, registered with the worker pool in main.py
+JOB_HANDLERS = {"campaign_send": run_campaign_send_job}
+
+
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
 
 @router.get("/", response_model=list[CampaignResponse])
-def list_campaigns(current_user: dict = Depends(get_current_user)):
+def list_campaigns(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     db = get_database()
+    not_modified = etag.etag_or_304(
+        request, response, etag.collection_etag(db, current_user["business_id"], "campaigns")
+    )
+    if not_modified:
+        return not_modified
     campaigns = list(db["campaigns"].find({"business_id": current_user["business_id"]}))
-    return [serialize_campaign(c) for c in campaigns]
+    return trusted_response([serialize_campaign(c) for c in campaigns], response)
 
 
 @router.get("/{campaign_id}", response_model=CampaignResponse)
-def get_campaign(campaign_id: str, current_user: dict = Depends(get_current_user)):
+def get_campaign(
+    campaign_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
     db = get_database()
+    not_modified = etag.etag_or_304(
+        request, response, etag.collection_etag(db, current_user["business_id"], "campaigns")
+    )
+    if not_modified:
+        return not_modified
     campaign = get_campaign_or_404(db, campaign_id, current_user["business_id"])
-    return serialize_campaign(campaign)
+    return trusted_response(serialize_campaign(campaign), response)
 
 
 @router.post("/", response_model=CampaignResponse, status_code=status.HTTP_201_CREATED)
@@ -74,14 +179,21 @@ def create_campaign(
     current_user: dict = Depends(get_current_user),
 ):
     db = get_database()
+    if data.status == "scheduled" and not data.send_at:
+        raise HTTPException(status_code=400, detail="Scheduled campaigns need a send_at time.")
+    validate_templates(data.dict())
     doc = {
         **data.dict(),
         "business_id": current_user["business_id"],
         "analytics": {"sent": 0, "opened": 0, "clicked": 0},
         "created_at": datetime.utcnow(),
     }
+    if doc["send_at"]:
+        doc["send_at"] = to_utc(doc["send_at"])
     result = db["campaigns"].insert_one(doc)
     doc["_id"] = result.inserted_id
+    etag.bump(db, current_user["business_id"], "campaigns")
+    schedule_if_needed(doc)
     return serialize_campaign(doc)
 
 
@@ -92,17 +204,30 @@ def update_campaign(
     current_user: dict = Depends(get_current_user),
 ):
     db = get_database()
-    get_campaign_or_404(db, campaign_id, current_user["business_id"])
+    existing = get_campaign_or_404(db, campaign_id, current_user["business_id"])
 
     update_fields = {k: v for k, v in data.dict().items() if v is not None}
     if not update_fields:
         raise HTTPException(status_code=400, detail="No fields provided to update.")
+    reschedules = "status" in update_fields or "send_at" in update_fields
+    if reschedules and existing.get("status") in SEND_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Campaign is already {existing['status']}.")
+    if "send_at" in update_fields:
+        update_fields["send_at"] = to_utc(update_fields["send_at"])
+    validate_templates(update_fields)
+    merged = {**existing, **update_fields}
+    if merged.get("status") == "scheduled" and not merged.get("send_at"):
+        raise HTTPException(status_code=400, detail="Scheduled campaigns need a send_at time.")
 
-    db["campaigns"].update_one(
-        {"_id": ObjectId(campaign_id)},
-        {"$set": update_fields},
-    )
+    query = {"_id": ObjectId(campaign_id)}
+    if reschedules:
+        # The scheduler may have started the send since we read the campaign
+        query["status"] = {"$nin": list(SEND_STATUSES)}
+    if db["campaigns"].update_one(query, {"$set": update_fields}).matched_count == 0:
+        raise HTTPException(status_code=409, detail="Campaign is already being sent.")
+    etag.bump(db, current_user["business_id"], "campaigns")
     updated = get_campaign_or_404(db, campaign_id, current_user["business_id"])
+    schedule_if_needed(updated)
     return serialize_campaign(updated)
 
 
@@ -119,4 +244,36 @@ def delete_campaign(campaign_id: str, current_user: dict = Depends(get_current_u
         "business_id": current_user["business_id"],
     })
     if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Campaign not found.")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Campaign not found.")
+
+    db["campaign_deliveries"].delete_many({"campaign_id": campaign_id})
+    etag.bump(db, current_user["business_id"], "campaigns")
+
+
+@router.post("/{campaign_id}/send", status_code=status.HTTP_202_ACCEPTED)
+def send_campaign_now(campaign_id: str, current_user: dict = Depends(get_current_user)):
+    db = get_database()
+    campaign = get_campaign_or_404(db, campaign_id, current_user["business_id"])
+    if campaign.get("status") == "sent":
+        raise HTTPException(status_code=409, detail="Campaign has already been sent.")
+
+    db["campaigns"].update_one({"_id": campaign["_id"]}, {"$set": {"status": "sending"}})
+    etag.bump(db, current_user["business_id"], "campaigns")
+    job = job_queue.enqueue(
+        db, "campaign_send", current_user["business_id"], campaign_id, {"campaign_id": campaign_id}
+    )
+    return serialize_send_job(job)
+
+
+@router.get("/{campaign_id}/send")
+def get_campaign_send(campaign_id: str, current_user: dict = Depends(get_current_user)):
+    db = get_database()
+    get_campaign_or_404(db, campaign_id, current_user["business_id"])
+    job = db["jobs"].find_one({
+        "kind": "campaign_send",
+        "business_id": current_user["business_id"],
+        "dedupe_key": campaign_id,
+    })
+    if not job:
+        raise HTTPException(status_code=404, detail="Campaign has not been sent.")
+    return serialize_send_job(job)
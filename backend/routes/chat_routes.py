@@ -2,26 +2,63 @@
 routes/chat_routes.py
 
 Founder AI Assistant
-POST /chat/
+POST /chat/      - One question, one JSON answer
+WS   /chat/ws    - Persistent session with streamed answers
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+import os
+import json
+import asyncio
+import logging
+from collections import deque
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
 from pydantic import BaseModel, Field
 from datetime import datetime
 from bson import ObjectId
 
 from database import get_database
+from utils.auth_utils import decode_access_token
 from utils.dependencies import get_current_user
-from utils.gemini_utils_chatbot import generate_chat_response
+from utils import prompt_cache, vector_index, etag, job_queue
+from utils.llm_resilience import ProviderUnavailableError
+from utils.gemini_utils_chatbot import (
+    generate_chat_response,
+    stream_chat_response,
+    create_context_cache,
+    delete_context_cache,
+    CONTEXT_CACHE_TTL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chat", tags=["Founder AI Assistant"])
 
+# Approximate token budget for retrieved notes/products/past chats per turn
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", 400))
+
+# Chat turns included verbatim in each prompt
+RECENT_TURNS = 5
+
+# WebSocket limits (per worker process)
+WS_MAX_CONNECTIONS = int(os.getenv("CHAT_WS_MAX_CONNECTIONS", 500))
+WS_MAX_CONNECTIONS_PER_USER = int(os.getenv("CHAT_WS_MAX_CONNECTIONS_PER_USER", 3))
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("CHAT_WS_IDLE_TIMEOUT_SECONDS", 300))
+WS_AUTH_TIMEOUT_SECONDS = float(os.getenv("CHAT_WS_AUTH_TIMEOUT_SECONDS", 10))
+
 
 class ChatRequest(BaseModel):
     message: str = Field(..., min_length=1)
 
 
-def build_prompt(business: dict, user_message: str, conversation_history: str) -> str:
+def build_profile_prefix(business: dict) -> str:
+    """
+    Static part of the prompt: response rules + business profile.
+    Only changes when the business document changes, so it is cached
+    per business version (see utils/prompt_cache.py).
+    """
     return f"""You are a sharp, experienced business advisor helping a founder grow their business.
 
 RESPONSE RULES — FOLLOW STRICTLY:
@@ -44,6 +81,16 @@ Location: {business.get("location", "N/A")}
 Primary Goal: {business.get("primary_goal", "N/A")}
 Brand Tone: {business.get("brand_tone", "N/A")}
 
+"""
+
+
+def build_prompt(user_message: str, conversation_history: str, retrieved_context: str = "") -> str:
+    """Per-turn part of the prompt, appended after the cached profile prefix."""
+    return f"""========================
+RELEVANT NOTES, PRODUCTS & PAST ADVICE
+========================
+{retrieved_context if retrieved_context.strip() else "None."}
+
 ========================
 RECENT CONVERSATION
 ========================
@@ -59,52 +106,344 @@ YOUR RESPONSE (max 150 words, fully complete)
 ========================"""
 
 
-@router.post("/")
-def chat(body: ChatRequest, current_user: dict = Depends(get_current_user)):
-    db = get_database()
+def get_profile_prefix(db, business_id: str) -> dict:
+    """
+    Return the cached prompt prefix for a business, rebuilding it only
+    when the business document's version has changed.
+    """
+    entry = prompt_cache.get_prefix(business_id)
 
-    business_id = current_user.get("business_id")
-    if not business_id:
-        raise HTTPException(status_code=404, detail="No business linked to this account.")
+    if entry is not None and not prompt_cache.needs_revalidation(entry):
+        return refresh_provider_cache(business_id, entry)
 
     try:
-        business = db["businesses"].find_one({"_id": ObjectId(business_id)})
+        oid = ObjectId(business_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid business ID.")
 
+    if entry is not None:
+        # Cheap version-only lookup; the full profile is not re-read
+        meta = db["businesses"].find_one({"_id": oid}, {"version": 1})
+        if meta and meta.get("version", 1) == entry["version"]:
+            prompt_cache.mark_validated(business_id)
+            return refresh_provider_cache(business_id, entry)
+        # Profile changed: the old provider cache will never be used again
+        delete_context_cache(entry["provider_cache"])
+
+    business = db["businesses"].find_one({"_id": oid})
     if not business:
         raise HTTPException(
             status_code=404,
             detail="Business profile not found. Please set up your business first."
         )
 
+    version = business.get("version", 1)
+    prefix = build_profile_prefix(business)
+    cache_name = create_context_cache(prefix, display_name=f"bizsolve-{business_id}-v{version}")
+
+    return prompt_cache.put_prefix(
+        business_id,
+        version,
+        prefix,
+        provider_cache=cache_name,
+        provider_ttl_seconds=CONTEXT_CACHE_TTL_SECONDS,
+    )
+
+
+def refresh_provider_cache(business_id: str, entry: dict) -> dict:
+    """Recreate an expired provider context cache for an otherwise current prefix."""
+    if not prompt_cache.provider_cache_expired(entry):
+        return entry
+    expired = entry["provider_cache"]
+    cache_name = create_context_cache(
+        entry["prefix"], display_name=f"bizsolve-{business_id}-v{entry['version']}"
+    )
+    updated = prompt_cache.replace_provider_cache(business_id, expired, cache_name, CONTEXT_CACHE_TTL_SECONDS)
+    if updated is None:
+        # A concurrent turn refreshed it first
+        delete_context_cache(cache_name)
+        return prompt_cache.get_prefix(business_id) or entry
+    delete_context_cache(expired)
+    return updated
+
+
+def load_recent_chats(db, business_id: str) -> list:
+    """Last five chat turns for a business, oldest first."""
     recent_chats = list(
         db["chatlogs"]
         .find({"business_id": business_id})
         .sort("timestamp", -1)
-        .limit(5)
+        .limit(RECENT_TURNS)
     )
     recent_chats.reverse()
+    return recent_chats
+
 
+def format_history(recent_chats: list) -> str:
     conversation_history = ""
     for chat_log in recent_chats:
         conversation_history += f"Founder: {chat_log.get('message')}\nAdvisor: {chat_log.get('response')}\n\n"
+    return conversation_history
+
+
+def prepare_turn(db, business_id: str, message: str, recent_chats: list, entry: dict) -> str:
+    """Build the per-turn prompt, including retrieved context."""
+    # Recent turns are already in the prompt verbatim — don't retrieve them again
+    retrieved_context = vector_index.retrieve_context(
+        db,
+        business_id,
+        message,
+        token_budget=RETRIEVAL_TOKEN_BUDGET,
+        exclude={f"chat:{c['_id']}" for c in recent_chats},
+    )
+    return build_prompt(message, format_history(recent_chats), retrieved_context)
+
+
+def save_chatlog(db, business_id: str, user_email: str, message: str, response_text: str, usage: dict) -> dict:
+    """Persist a completed turn and add it to the retrieval index."""
+    chatlog = {
+        "business_id": business_id,
+        "user_email": user_email,
+        "message": message,
+        "response": response_text,
+        "timestamp": datetime.utcnow(),
+        "usage": usage,
+    }
+    result = db["chatlogs"].insert_one(chatlog)
+    chatlog["_id"] = result.inserted_id
+    etag.bump(db, business_id, "chatlogs")
+    vector_index.index_document(
+        business_id, f"chat:{result.inserted_id}", vector_index.chatlog_text(chatlog)
+    )
+    return chatlog
+
+
+def run_vector_backfill_job(db, job: dict) -> dict:
+    """Job handler: embed a business's documents that predate its retrieval index."""
+    return vector_index.backfill_tenant(
+        db, job["business_id"], on_batch=lambda: job_queue.extend_lease(db, job)
+    )
+
+
+# Job kinds handled by this module, registered with the worker pool in main.py
+JOB_HANDLERS = {"vector_backfill": run_vector_backfill_job}
 
-    prompt = build_prompt(business, body.message.strip(), conversation_history)
+
+# ---------------------------------------------------------------------------
+# HTTP endpoint
+# ---------------------------------------------------------------------------
+
+@router.post("/")
+def chat(body: ChatRequest, current_user: dict = Depends(get_current_user)):
+    db = get_database()
+
+    business_id = current_user.get("business_id")
+    if not business_id:
+        raise HTTPException(status_code=404, detail="No business linked to this account.")
+
+    entry = get_profile_prefix(db, business_id)
+    message = body.message.strip()
+    recent_chats = load_recent_chats(db, business_id)
+
+    prompt = prepare_turn(db, business_id, message, recent_chats, entry)
+    cache_name = prompt_cache.provider_cache_name(entry)
 
     try:
-        response_text = generate_chat_response(prompt)
+        response_text, usage = generate_chat_response(
+            prompt,
+            prefix=entry["prefix"],
+            cache_name=cache_name,
+        )
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
     except RuntimeError as e:
         raise HTTPException(status_code=502, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    db["chatlogs"].insert_one({
-        "business_id": business_id,
-        "user_email": current_user.get("email"),
-        "message": body.message.strip(),
-        "response": response_text,
-        "timestamp": datetime.utcnow(),
-    })
+    save_chatlog(
+        db,
+        business_id,
+        current_user.get("email"),
+        message,
+        response_text,
+        {**usage, "prefix_cache": "provider" if cache_name else "local"},
+    )
+
+    return {"response": response_text}
+
+
+# ---------------------------------------------------------------------------
+# WebSocket endpoint
+#
+# Protocol (JSON frames):
+#   client → {"type": "auth", "token": "<jwt>"}        first frame, within WS_AUTH_TIMEOUT_SECONDS
+#            {"message": "..."}
+#   server → {"type": "ready"}                         once, after auth
+#            {"type": "chunk", "text": "..."}          streamed response
+#            {"type": "done", "response": "..."}       full response
+#            {"type": "error", "detail": "..."}        turn or frame failed; socket stays open
+#
+# Auth: browsers can't set headers on WebSockets, and a token in the URL
+# ends up in proxy and access logs, so the JWT is sent in the first frame.
+# The user, business prompt prefix and recent history are loaded once at
+# connect and kept on the connection for every later turn.
+# ---------------------------------------------------------------------------
+
+_ws_connections = {"total": 0, "per_user": {}}
+_ws_lock = asyncio.Lock()
+
+
+async def _ws_acquire(user_id: str) -> bool:
+    async with _ws_lock:
+        per_user = _ws_connections["per_user"].get(user_id, 0)
+        if _ws_connections["total"] >= WS_MAX_CONNECTIONS or per_user >= WS_MAX_CONNECTIONS_PER_USER:
+            return False
+        _ws_connections["total"] += 1
+        _ws_connections["per_user"][user_id] = per_user + 1
+        return True
+
+
+async def _ws_release(user_id: str) -> None:
+    async with _ws_lock:
+        _ws_connections["total"] -= 1
+        remaining = _ws_connections["per_user"].get(user_id, 1) - 1
+        if remaining:
+            _ws_connections["per_user"][user_id] = remaining
+        else:
+            _ws_connections["per_user"].pop(user_id, None)
+
+
+async def _receive_frame(websocket: WebSocket, timeout: float) -> Optional[dict]:
+    """
+    Next JSON object from the client, or None (after telling the client)
+    if the frame isn't one. Raises asyncio.TimeoutError if nothing arrives.
+    """
+    received = await asyncio.wait_for(websocket.receive(), timeout=timeout)
+    if received["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(received.get("code", status.WS_1000_NORMAL_CLOSURE))
+    try:
+        frame = json.loads(received.get("text") or received.get("bytes") or "")
+    except ValueError:
+        frame = None
+    if not isinstance(frame, dict):
+        await websocket.send_json({"type": "error", "detail": "Frames must be JSON objects."})
+        return None
+    return frame
+
+
+def _authenticate_ws(token: str) -> Optional[dict]:
+    """Decode the JWT and load the user, or None if either fails."""
+    try:
+        user_id = decode_access_token(token).get("sub")
+        if not user_id:
+            return None
+        return get_database()["users"].find_one({"_id": ObjectId(user_id)})
+    except Exception:
+        return None
+
+
+@router.websocket("/ws")
+async def chat_ws(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        frame = await _receive_frame(websocket, WS_AUTH_TIMEOUT_SECONDS)
+    except (asyncio.TimeoutError, WebSocketDisconnect):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Authentication timed out.")
+        return
+    token = frame.get("token") if frame and frame.get("type") == "auth" else None
+    current_user = await run_in_threadpool(_authenticate_ws, token) if isinstance(token, str) else None
+    if current_user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Invalid or expired token.")
+        return
+
+    business_id = current_user.get("business_id")
+    if not business_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="No business linked to this account.")
+        return
+
+    user_id = str(current_user["_id"])
+    if not await _ws_acquire(user_id):
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason="Too many open chat connections.")
+        return
+
+    try:
+        db = get_database()
+        try:
+            entry = await run_in_threadpool(get_profile_prefix, db, business_id)
+        except HTTPException as e:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+            return
+
+        recent_chats = await run_in_threadpool(load_recent_chats, db, business_id)
+        history = deque(recent_chats, maxlen=RECENT_TURNS)
+
+        await websocket.send_json({"type": "ready"})
+
+        while True:
+            try:
+                frame = await _receive_frame(websocket, WS_IDLE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.close(code=status.WS_1000_NORMAL_CLOSURE, reason="Idle timeout.")
+                return
+            if frame is None:
+                continue
+
+            message = str(frame.get("message", "")).strip()
+            if not message:
+                await websocket.send_json({"type": "error", "detail": "Message must not be empty."})
+                continue
+
+            # Pick up profile edits made from another tab/device mid-session
+            if prompt_cache.needs_revalidation(entry):
+                try:
+                    entry = await run_in_threadpool(get_profile_prefix, db, business_id)
+                except HTTPException as e:
+                    # e.g. the business was deleted — the session can't continue
+                    await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+                    return
+                except Exception:
+                    logger.exception("Reloading the chat profile failed for business %s", business_id)
+                    await websocket.close(code=status.WS_1011_INTERNAL_ERROR, reason="Couldn't load the business profile.")
+                    return
+
+            prompt = await run_in_threadpool(prepare_turn, db, business_id, message, list(history), entry)
+            cache_name = prompt_cache.provider_cache_name(entry)
+
+            parts, usage = [], {}
+            try:
+                stream = stream_chat_response(prompt, prefix=entry["prefix"], cache_name=cache_name)
+                async for event in iterate_in_threadpool(stream):
+                    if "delta" in event:
+                        parts.append(event["delta"])
+                        await websocket.send_json({"type": "chunk", "text": event["delta"]})
+                    else:
+                        usage = event["usage"]
+            except (RuntimeError, ValueError) as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+                continue
+
+            response_text = "".join(parts).strip()
+            try:
+                chatlog = await run_in_threadpool(
+                    save_chatlog,
+                    db,
+                    business_id,
+                    current_user.get("email"),
+                    message,
+                    response_text,
+                    {**usage, "prefix_cache": "provider" if cache_name else "local", "channel": "ws"},
+                )
+            except Exception as e:
+                # The reply was streamed; only its record is missing, so keep the session
+                if not isinstance(e, HTTPException):
+                    logger.exception("Saving a chat log failed for business %s", business_id)
+                await websocket.send_json({"type": "error", "detail": "Couldn't save this conversation."})
+                continue
+            history.append(chatlog)
+            await websocket.send_json({"type": "done", "response": response_text})
 
-    return {"response": response_text}
\ No newline at end of file
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await _ws_release(user_id)
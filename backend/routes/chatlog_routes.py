@@ -5,12 +5,14 @@ Handles storing and retrieving founder AI chat history.
 No AI logic here. Only database operations.
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response
 from datetime import datetime
 from bson import ObjectId
 
 from database import get_database
 from utils.dependencies import get_current_user
+from utils import vector_index, etag
+from utils.responses import trusted_response
 
 router = APIRouter(prefix="/chatlogs", tags=["Founder AI Logs"])
 
@@ -33,10 +35,13 @@ def serialize_chatlog(c: dict) -> dict:
 # Get All Logs
 # -----------------------------
 @router.get("/")
-def list_chatlogs(current_user: dict = Depends(get_current_user)):
+def list_chatlogs(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     db = get_database()
 
     business_id = current_user.get("business_id")
+    not_modified = etag.etag_or_304(request, response, etag.collection_etag(db, business_id, "chatlogs"))
+    if not_modified:
+        return not_modified
 
     chatlogs = list(
         db["chatlogs"]
@@ -44,7 +49,7 @@ def list_chatlogs(current_user: dict = Depends(get_current_user)):
         .sort("timestamp", -1)
     )
 
-    return [serialize_chatlog(c) for c in chatlogs]
+    return trusted_response([serialize_chatlog(c) for c in chatlogs], response)
 
 
 # -----------------------------
@@ -65,4 +70,7 @@ def delete_chatlog(chatlog_id: str, current_user: dict = Depends(get_current_use
     })
 
     if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Chatlog not found.")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Chatlog not found.")
+
+    etag.bump(db, current_user.get("business_id"), "chatlogs")
+    vector_index.remove_documents(current_user.get("business_id"), [f"chat:{chatlog_id}"])
\ No newline at end of file
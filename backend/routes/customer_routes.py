@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 from bson import ObjectId
 
 from database import get_database
 from utils.dependencies import get_current_user
+from utils import etag
+from utils.responses import trusted_response
 
 router = APIRouter(prefix="/customers", tags=["Customers"])
 
@@ -25,15 +27,30 @@ def serialize_customer(c: dict) -> dict:
 
 
 @router.get("/")
-def list_customers(current_user: dict = Depends(get_current_user)):
+def list_customers(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     db = get_database()
+    not_modified = etag.etag_or_304(
+        request, response, etag.collection_etag(db, current_user["business_id"], "customers")
+    )
+    if not_modified:
+        return not_modified
     customers = list(db["customers"].find({"business_id": current_user["business_id"]}))
-    return [serialize_customer(c) for c in customers]
+    return trusted_response([serialize_customer(c) for c in customers], response)
 
 
 @router.get("/{customer_id}")
-def get_customer(customer_id: str, current_user: dict = Depends(get_current_user)):
+def get_customer(
+    customer_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
     db = get_database()
+    not_modified = etag.etag_or_304(
+        request, response, etag.collection_etag(db, current_user["business_id"], "customers")
+    )
+    if not_modified:
+        return not_modified
     try:
         oid = ObjectId(customer_id)
     except Exception:
@@ -41,7 +58,7 @@ def get_customer(customer_id: str, current_user: dict = Depends(get_current_user
     customer = db["customers"].find_one({"_id": oid, "business_id": current_user["business_id"]})
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found.")
-    return serialize_customer(customer)
+    return trusted_response(serialize_customer(customer), response)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -60,6 +77,7 @@ def add_customer(data: CustomerCreateRequest, current_user: dict = Depends(get_c
     }
     result = db["customers"].insert_one(doc)
     doc["_id"] = result.inserted_id
+    etag.bump(db, current_user["business_id"], "customers")
     return serialize_customer(doc)
 
 
@@ -72,4 +90,6 @@ def delete_customer(customer_id: str, current_user: dict = Depends(get_current_u
         raise HTTPException(status_code=400, detail="Invalid customer ID format.")
     result = db["customers"].delete_one({"_id": oid, "business_id": current_user["business_id"]})
     if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Customer not found.")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Customer not found.")
+
+    etag.bump(db, current_user["business_id"], "customers")
\ No newline at end of file
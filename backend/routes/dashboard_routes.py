@@ -0,0 +1,170 @@
+"""
+routes/dashboard_routes.py
+--------------------------
+Dashboard home page data in one request (scoped to the authenticated user's business):
+  GET /dashboard/summary   - Profile, counts and recent items
+
+The counts and recent-item queries are independent, so they run
+concurrently on a small thread pool, each with a lean projection and a
+limit. Results are cached per business and keyed by the business version
+plus the change counters of every collection shown (utils/etag.py), so any
+write is reflected on the next load; the same signature is the ETag.
+
+  DASHBOARD_CACHE_SECONDS=30    (optional) upper bound on cached summary age
+  DASHBOARD_FANOUT_WORKERS=8    (optional) threads shared by all summaries
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, Request, Response
+
+from database import get_database
+from models.dashboard_model import DashboardSummaryResponse
+from routes.business_routes import serialize_business
+from utils.dependencies import get_current_user
+from utils import etag
+from utils.request_profiler import ContextThreadPoolExecutor
+from utils.responses import trusted_response
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+DASHBOARD_CACHE_SECONDS = float(os.getenv("DASHBOARD_CACHE_SECONDS", 30))
+DASHBOARD_FANOUT_WORKERS = int(os.getenv("DASHBOARD_FANOUT_WORKERS", 8))
+
+# Collections whose change counters decide whether a cached summary is current
+COLLECTIONS = ("websites", "posters", "campaigns", "products", "customers", "chatlogs")
+
+RECENT_WEBSITES = 5
+RECENT_POSTERS = 4
+RECENT_CAMPAIGNS = 3
+
+_CACHE_MAX_ENTRIES = 1024
+
+_executor = ContextThreadPoolExecutor(max_workers=DASHBOARD_FANOUT_WORKERS, thread_name_prefix="dashboard")
+_cache_lock = threading.Lock()
+_cache: "OrderedDict[str, tuple]" = OrderedDict()  # business_id -> (signature, cached_at, data)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def summary_signature(db, business_id: str) -> str:
+    """Business version + per-collection change counters, read before any data."""
+    ids = [f"{business_id}:{c}" for c in COLLECTIONS]
+    seqs = {c["_id"]: c.get("seq", 0) for c in db["change_counters"].find({"_id": {"$in": ids}})}
+    business = db["businesses"].find_one({"_id": ObjectId(business_id)}, {"version": 1}) or {}
+    return f"v{business.get('version', 1)}:" + ",".join(str(seqs.get(i, 0)) for i in ids)
+
+
+def load_summary(db, business_id: str) -> dict:
+    """Run every count and recent-items query concurrently."""
+    scope = {"business_id": business_id}
+    queries = {
+        "business": lambda: db["businesses"].find_one({"_id": ObjectId(business_id)}),
+        "websites": lambda: db["websites"].count_documents(scope),
+        "websites_live": lambda: db["websites"].count_documents({**scope, "published_url": {"$nin": [None, ""]}}),
+        "posters": lambda: db["posters"].count_documents(scope),
+        "campaigns": lambda: db["campaigns"].count_documents(scope),
+        "campaigns_sent": lambda: db["campaigns"].count_documents({**scope, "status": "sent"}),
+        "products": lambda: db["products"].count_documents(scope),
+        "customers": lambda: db["customers"].count_documents(scope),
+        "chatlogs": lambda: db["chatlogs"].count_documents(scope),
+        "recent_websites": lambda: list(
+            db["websites"].find(
+                scope,
+                {"template": 1, "published_url": 1, "version": 1, "created_at": 1, "updated_at": 1},
+            ).sort("updated_at", -1).limit(RECENT_WEBSITES)
+        ),
+        "recent_posters": lambda: list(
+            db["posters"].find(scope, {"title": 1, "image_url": 1, "created_at": 1})
+            .sort("created_at", -1).limit(RECENT_POSTERS)
+        ),
+        "recent_campaigns": lambda: list(
+            db["campaigns"].find(scope, {"name": 1, "subject": 1, "status": 1, "created_at": 1})
+            .sort("created_at", -1).limit(RECENT_CAMPAIGNS)
+        ),
+    }
+    futures = {key: _executor.submit(query) for key, query in queries.items()}
+    results = {key: future.result() for key, future in futures.items()}
+
+    business = results["business"]
+    return {
+        "business": serialize_business(business) if business else None,
+        "counts": {key: results[key] for key in (
+            "websites", "websites_live", "posters", "campaigns",
+            "campaigns_sent", "products", "customers", "chatlogs",
+        )},
+        "recent_websites": [
+            {
+                "id": str(w["_id"]),
+                "template": w["template"],
+                "published_url": w.get("published_url"),
+                "version": w.get("version", 1),
+                "created_at": w["created_at"],
+                "updated_at": w.get("updated_at", w["created_at"]),
+            }
+            for w in results["recent_websites"]
+        ],
+        "recent_posters": [
+            {"id": str(p["_id"]), "title": p["title"], "image_url": p.get("image_url"), "created_at": p["created_at"]}
+            for p in results["recent_posters"]
+        ],
+        "recent_campaigns": [
+            {
+                "id": str(c["_id"]),
+                "name": c["name"],
+                "subject": c["subject"],
+                "status": c.get("status", "draft"),
+                "created_at": c["created_at"],
+            }
+            for c in results["recent_campaigns"]
+        ],
+    }
+
+
+def cached_summary(db, business_id: str, signature: str) -> dict:
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _cache.get(business_id)
+        if entry and entry[0] == signature and now - entry[1] < DASHBOARD_CACHE_SECONDS:
+            _cache.move_to_end(business_id)
+            return entry[2]
+
+    data = load_summary(db, business_id)
+    with _cache_lock:
+        _cache[business_id] = (signature, now, data)
+        _cache.move_to_end(business_id)
+        while len(_cache) > _CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return data
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+@router.get("/summary", response_model=DashboardSummaryResponse)
+def dashboard_summary(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+    """Everything the dashboard home page shows, in one response."""
+    db = get_database()
+    business_id = current_user["business_id"]
+    user = {
+        "id": str(current_user["_id"]),
+        "name": current_user["name"],
+        "email": current_user["email"],
+        "role": current_user.get("role", "user"),
+    }
+
+    signature = summary_signature(db, business_id)
+    digest = hashlib.sha1(f"{signature}:{sorted(user.items())}".encode()).hexdigest()[:16]
+    not_modified = etag.etag_or_304(request, response, f'"dashboard-{business_id}-{digest}"')
+    if not_modified:
+        return not_modified
+
+    return trusted_response({"user": user, **cached_summary(db, business_id, signature)}, response)
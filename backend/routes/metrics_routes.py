@@ -0,0 +1,26 @@
+"""
+routes/metrics_routes.py
+------------------------
+Prometheus scrape endpoint (metrics are defined in utils/metrics.py):
+  GET /metrics   - Text exposition format
+
+Open by default; set METRICS_TOKEN to require "Authorization: Bearer <token>".
+"""
+
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request, Response
+
+from utils import metrics
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics(request: Request):
+    if metrics.METRICS_TOKEN:
+        supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        if not hmac.compare_digest(supplied, metrics.METRICS_TOKEN):
+            raise HTTPException(status_code=401, detail="Invalid metrics token.")
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
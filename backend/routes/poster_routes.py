@@ -7,21 +7,43 @@ Poster management endpoints (for AI-generated marketing posters):
   POST   /posters/       - Save a generated poster
   DELETE /posters/{id}   - Delete a poster
 
-NOTE: Actual AI image generation (e.g. DALL-E, Stable Diffusion) will be
-      integrated separately. This route handles storage of generated results.
+AI generation (runs on the background job queue, see utils/job_queue.py):
+  POST /posters/generate             - Queue a generation job → 202 + job id
+  GET  /posters/jobs/{job_id}        - Poll job status
+  GET  /posters/jobs/{job_id}/events - Server-Sent Events stream of status changes
+
+NOTE: The image model itself lives in utils/poster_generator.py (set
+      POSTER_GENERATOR; generation answers 503 until then). Finished
+      posters are saved to the same library as above.
+
+  POSTER_RESULT_TTL_SECONDS=86400   (optional) how long an identical request
+                                    returns the finished job instead of
+                                    generating a new poster
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+import os
+import json
+import asyncio
+import hashlib
+from fastapi import APIRouter, HTTPException, Depends, Query, status, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from database import get_database
 from utils.dependencies import get_current_user
+from utils import job_queue, etag, poster_generator
+from utils.responses import trusted_response
+from utils.poster_generator import generate_poster
 
 router = APIRouter(prefix="/posters", tags=["Posters"])
 
+POSTER_RESULT_TTL_SECONDS = float(os.getenv("POSTER_RESULT_TTL_SECONDS", 86400))
+
 
 # ---------------------------------------------------------------------------
 # Models (simple enough to keep inline)
@@ -33,6 +55,11 @@ class PosterCreateRequest(BaseModel):
     image_url: str = Field(..., description="URL of the generated poster image")
 
 
+class PosterGenerateRequest(BaseModel):
+    title: str = Field(..., min_length=1, max_length=200)
+    prompt: str = Field(..., min_length=1, max_length=2000)
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -59,22 +86,176 @@ def get_poster_or_404(db, poster_id: str, business_id: str) -> dict:
     return poster
 
 
+def serialize_job(j: dict) -> dict:
+    job_id = str(j["_id"])
+    return {
+        "job_id": job_id,
+        "status": j["status"],
+        "attempts": j.get("attempts", 0),
+        "result": j.get("result"),
+        "error": j.get("error"),
+        "status_url": f"/posters/jobs/{job_id}",
+        "events_url": f"/posters/jobs/{job_id}/events",
+        "created_at": j["created_at"],
+        "updated_at": j["updated_at"],
+    }
+
+
+def get_job_or_404(db, job_id: str, business_id: str) -> dict:
+    try:
+        oid = ObjectId(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid job ID format.")
+    job = db["jobs"].find_one({"_id": oid, "kind": "poster", "business_id": business_id})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+def prompt_dedupe_key(data: PosterGenerateRequest) -> str:
+    """
+    Identical requests map to the same job: the prompt and title ignoring
+    case and spacing, plus every other generation option as given.
+    """
+    fields = data.dict()
+    for name in ("title", "prompt"):
+        fields[name] = " ".join(fields[name].lower().split())
+    canonical = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def run_poster_job(db, job: dict) -> dict:
+    """Job handler: generate the image and save it to the poster library."""
+    business = db["businesses"].find_one({"_id": ObjectId(job["business_id"])}) or {}
+    payload = job["payload"]
+    image_url = generate_poster(payload["title"], payload["prompt"], business)
+
+    # Keyed on job and run so a retried attempt never saves the poster
+    # twice, while a forced or expired re-run adds a new one
+    poster = db["posters"].find_one_and_update(
+        {"job_id": str(job["_id"]), "job_run": job.get("run", 0)},
+        {"$set": {
+            "business_id": job["business_id"],
+            "title": payload["title"],
+            "prompt_used": payload["prompt"],
+            "image_url": image_url,
+        }, "$setOnInsert": {"created_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+        projection={"_id": 1},
+    )
+    etag.bump(db, job["business_id"], "posters")
+    return {"poster_id": str(poster["_id"]), "image_url": image_url}
+
+
+# Job kinds handled by this module, registered with the worker pool in main.py
+JOB_HANDLERS = {"poster": run_poster_job}
+
+# How often the SSE stream re-checks job status, and when it gives up
+_EVENTS_POLL_SECONDS = 1.0
+_EVENTS_MAX_SECONDS = 600
+
+
+# ---------------------------------------------------------------------------
+# Generation endpoints
+# ---------------------------------------------------------------------------
+
+@router.post("/generate", status_code=status.HTTP_202_ACCEPTED)
+def generate(
+    data: PosterGenerateRequest,
+    force: bool = Query(False, description="Generate again even if an identical poster was just made"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Queue AI generation of a poster. Returns immediately with a job id;
+    poll status_url or subscribe to events_url for the result.
+    Re-submitting an identical request returns the existing job (and,
+    for POSTER_RESULT_TTL_SECONDS after it finished, its result).
+    """
+    if not poster_generator.is_configured():
+        raise HTTPException(status_code=503, detail="Poster generation is not configured.")
+    db = get_database()
+    job = job_queue.enqueue(
+        db,
+        kind="poster",
+        business_id=current_user["business_id"],
+        dedupe_key=prompt_dedupe_key(data),
+        payload=data.dict(),
+        result_ttl=POSTER_RESULT_TTL_SECONDS,
+        force=force,
+    )
+    return serialize_job(job)
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    db = get_database()
+    return serialize_job(get_job_or_404(db, job_id, current_user["business_id"]))
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Server-Sent Events: emits a "status" event whenever the job changes,
+    and closes after the job succeeds or fails.
+    """
+    db = get_database()
+    business_id = current_user["business_id"]
+    job = await run_in_threadpool(get_job_or_404, db, job_id, business_id)
+
+    async def stream():
+        last_seen = None
+        waited = 0.0
+        current = job
+        while True:
+            marker = (current["status"], current.get("attempts"), current["updated_at"])
+            if marker != last_seen:
+                last_seen = marker
+                payload = json.dumps(serialize_job(current), default=str)
+                yield f"event: status\ndata: {payload}\n\n"
+            if current["status"] in job_queue.TERMINAL_STATUSES or waited >= _EVENTS_MAX_SECONDS:
+                return
+            await asyncio.sleep(_EVENTS_POLL_SECONDS)
+            waited += _EVENTS_POLL_SECONDS
+            current = await run_in_threadpool(get_job_or_404, db, job_id, business_id)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
 
 @router.get("/")
-def list_posters(current_user: dict = Depends(get_current_user)):
+def list_posters(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     db = get_database()
+    not_modified = etag.etag_or_304(
+        request, response, etag.collection_etag(db, current_user["business_id"], "posters")
+    )
+    if not_modified:
+        return not_modified
     posters = list(db["posters"].find({"business_id": current_user["business_id"]}))
-    return [serialize_poster(p) for p in posters]
+    return trusted_response([serialize_poster(p) for p in posters], response)
 
 
 @router.get("/{poster_id}")
-def get_poster(poster_id: str, current_user: dict = Depends(get_current_user)):
+def get_poster(
+    poster_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
     db = get_database()
     poster = get_poster_or_404(db, poster_id, current_user["business_id"])
-    return serialize_poster(poster)
+    # Posters are never edited, so the ID alone identifies the representation
+    not_modified = etag.etag_or_304(request, response, f'"poster-{poster_id}"')
+    if not_modified:
+        return not_modified
+    return trusted_response(serialize_poster(poster), response)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -91,6 +272,7 @@ def save_poster(
     }
     result = db["posters"].insert_one(doc)
     doc["_id"] = result.inserted_id
+    etag.bump(db, current_user["business_id"], "posters")
     return serialize_poster(doc)
 
 
@@ -107,4 +289,6 @@ def delete_poster(poster_id: str, current_user: dict = Depends(get_current_user)
         "business_id": current_user["business_id"],
     })
     if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Poster not found.")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Poster not found.")
+
+    etag.bump(db, current_user["business_id"], "posters")
\ No newline at end of file
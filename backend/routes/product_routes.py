@@ -2,23 +2,40 @@
 routes/product_routes.py
 ------------------------
 Product management endpoints (scoped to the authenticated user's business):
-  GET    /products/          - List all products
+  GET    /products/          - List products (search, filter, sort, paginate)
+  GET    /products/stats     - Price distribution of the catalog
   GET    /products/{id}      - Get a single product
   POST   /products/          - Create a product
   PATCH  /products/{id}      - Update a product
   DELETE /products/{id}      - Delete a product
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response, Query
 from datetime import datetime
+from typing import Literal, Optional
 from bson import ObjectId
+import base64
+import re
 
 from database import get_database
-from models.product_model import ProductCreateRequest, ProductUpdateRequest, ProductResponse
+from models.product_model import (
+    ProductCreateRequest, ProductUpdateRequest, ProductResponse, ProductStatsResponse,
+)
 from utils.dependencies import get_current_user
+from utils import vector_index, etag, catalog_stats
+from utils.responses import trusted_response
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+# Sort options for GET /products/ → (field, direction). Each is backed by a
+# (business_id, field, _id) index; _id breaks ties so pages never overlap.
+SORTS = {
+    "created_at": ("created_at", 1),
+    "-created_at": ("created_at", -1),
+    "price": ("price", 1),
+    "-price": ("price", -1),
+}
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -37,6 +54,28 @@ def serialize_product(p: dict) -> dict:
     }
 
 
+def encode_cursor(product: dict, field: str) -> str:
+    """Opaque keyset cursor: the last row's sort value and _id."""
+    value = product[field].isoformat() if field == "created_at" else repr(float(product[field]))
+    return base64.urlsafe_b64encode(f"{value}|{product['_id']}".encode()).decode()
+
+
+def decode_cursor(cursor: str, field: str) -> tuple:
+    try:
+        value, _, oid = base64.urlsafe_b64decode(cursor.encode()).decode().partition("|")
+        value = datetime.fromisoformat(value) if field == "created_at" else float(value)
+        return value, ObjectId(oid)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+
+def product_etag(product: dict) -> str:
+    """Per-product ETag: changes only when this product is edited."""
+    # Products created before updated_at existed fall back to created_at
+    stamp = int(product.get("updated_at", product["created_at"]).timestamp() * 1000)
+    return f'"product-{product["_id"]}-{stamp}"'
+
+
 def get_product_or_404(db, product_id: str, business_id: str) -> dict:
     """
     Fetch a product by ID, scoped to the user's business.
@@ -58,19 +97,99 @@ def get_product_or_404(db, product_id: str, business_id: str) -> dict:
 # ---------------------------------------------------------------------------
 
 @router.get("/", response_model=list[ProductResponse])
-def list_products(current_user: dict = Depends(get_current_user)):
-    """List all products for the authenticated user's business."""
+def list_products(
+    request: Request,
+    response: Response,
+    q: Optional[str] = Query(None, max_length=200, description="Name prefix (case-insensitive)"),
+    search: Optional[str] = Query(None, max_length=200, description="Full-text search over name and description"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    sort: Literal["created_at", "-created_at", "price", "-price"] = Query("created_at"),
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size. Omit for the whole catalog."),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    List products for the authenticated user's business.
+    With ?limit=N, results are paged by keyset: the X-Next-Cursor response
+    header holds the cursor for the next page and is absent on the last one.
+    """
     db = get_database()
-    products = list(db["products"].find({"business_id": current_user["business_id"]}))
-    return [serialize_product(p) for p in products]
+    not_modified = etag.etag_or_304(
+        request, response, etag.collection_etag(db, current_user["business_id"], "products")
+    )
+    if not_modified:
+        return not_modified
+
+    field, direction = SORTS[sort]
+    query = {"business_id": current_user["business_id"]}
+    if q:
+        query["name_lower"] = {"$regex": "^" + re.escape(q.lower())}
+    if search:
+        query["$text"] = {"$search": search}
+    if min_price is not None or max_price is not None:
+        query["price"] = {}
+        if min_price is not None:
+            query["price"]["$gte"] = min_price
+        if max_price is not None:
+            query["price"]["$lte"] = max_price
+    if cursor:
+        value, oid = decode_cursor(cursor, field)
+        op = "$gt" if direction == 1 else "$lt"
+        query["$or"] = [{field: {op: value}}, {field: value, "_id": {op: oid}}]
+
+    products = db["products"].find(query).sort([(field, direction), ("_id", direction)])
+    if limit:
+        products = list(products.limit(limit + 1))
+        if len(products) > limit:
+            products = products[:limit]
+            response.headers["X-Next-Cursor"] = encode_cursor(products[-1], field)
+    return trusted_response([serialize_product(p) for p in products], response)
+
+
+# Declared before /{product_id} so "stats" is not taken for a product ID
+@router.get("/stats", response_model=ProductStatsResponse)
+def product_stats(
+    request: Request,
+    response: Response,
+    bands: int = Query(10, ge=1, le=100, description="Number of equal-width price bands"),
+    edges: Optional[str] = Query(None, description="Comma-separated band edges, e.g. 0,10,50,100 (overrides bands)"),
+    current_user: dict = Depends(get_current_user),
+):
+    """Price count, range, mean, median, percentiles and count per price band."""
+    db = get_database()
+    tag = etag.collection_etag(db, current_user["business_id"], "products")
+    not_modified = etag.etag_or_304(request, response, tag)
+    if not_modified:
+        return not_modified
+
+    edge_list = None
+    if edges:
+        try:
+            edge_list = [float(e) for e in edges.split(",") if e.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="edges must be comma-separated numbers.")
+        if not edge_list or len(edge_list) > 100:
+            raise HTTPException(status_code=400, detail="Provide between 1 and 100 edges.")
+
+    prices = catalog_stats.load_prices(db, current_user["business_id"], tag)
+    return trusted_response(catalog_stats.price_stats(prices, bands, edge_list), response)
 
 
 @router.get("/{product_id}", response_model=ProductResponse)
-def get_product(product_id: str, current_user: dict = Depends(get_current_user)):
+def get_product(
+    product_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
     """Get a single product by ID."""
     db = get_database()
     product = get_product_or_404(db, product_id, current_user["business_id"])
-    return serialize_product(product)
+    not_modified = etag.etag_or_304(request, response, product_etag(product))
+    if not_modified:
+        return not_modified
+    return trusted_response(serialize_product(product), response)
 
 
 @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
@@ -83,11 +202,17 @@ def create_product(
 
     doc = {
         **data.dict(),
+        "name_lower": data.name.lower(),
         "business_id": current_user["business_id"],
         "created_at": datetime.utcnow(),
     }
+    doc["updated_at"] = doc["created_at"]
     result = db["products"].insert_one(doc)
     doc["_id"] = result.inserted_id
+    etag.bump(db, current_user["business_id"], "products")
+    vector_index.index_document(
+        current_user["business_id"], f"product:{doc['_id']}", vector_index.product_text(doc)
+    )
 
     return serialize_product(doc)
 
@@ -107,13 +232,21 @@ def update_product(
     update_fields = {k: v for k, v in data.dict().items() if v is not None}
     if not update_fields:
         raise HTTPException(status_code=400, detail="No fields provided to update.")
+    if "name" in update_fields:
+        update_fields["name_lower"] = update_fields["name"].lower()
+    update_fields["updated_at"] = datetime.utcnow()
 
     db["products"].update_one(
         {"_id": ObjectId(product_id)},
         {"$set": update_fields},
     )
 
+    etag.bump(db, current_user["business_id"], "products")
+
     updated = get_product_or_404(db, product_id, current_user["business_id"])
+    vector_index.index_document(
+        current_user["business_id"], f"product:{product_id}", vector_index.product_text(updated)
+    )
     return serialize_product(updated)
 
 
@@ -133,4 +266,7 @@ def delete_product(product_id: str, current_user: dict = Depends(get_current_use
     })
 
     if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Product not found.")
\ No newline at end of file
+        raise HTTPException(status_code=404, detail="Product not found.")
+
+    etag.bump(db, current_user["business_id"], "products")
+    vector_index.remove_documents(current_user["business_id"], [f"product:{product_id}"])
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+routes/site_routes.py
+---------------------
+Public (unauthenticated) read path for published websites:
+  GET /sites/{vercel_project_name}  - Rendered HTML of the site's latest version
+
+Only websites with a published_url are served; drafts are 404.
+
+Pages come from the static build (utils/site_builder.py) and are kept in
+an in-process LRU (utils/site_cache.py), so a cache hit never touches
+MongoDB or the disk. Browsers and CDNs may cache for SITE_MAX_AGE_SECONDS
+and then revalidate with If-None-Match.
+
+Builds never run inside a public request: if the latest version (or
+business profile) hasn't been built yet, a build job is queued and the
+newest existing build is served meanwhile. A site with no build at all
+answers 503 with Retry-After until its first build lands. Either way the
+result is cached for a few seconds (site_cache stale entries), so a busy
+site queues its rebuild once, not on every hit.
+
+  SITE_MAX_AGE_SECONDS=60       (optional)
+"""
+
+import os
+import hashlib
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from bson import ObjectId
+
+from database import get_database
+from routes.website_routes import queue_site_build
+from utils import etag, site_builder, site_cache
+
+router = APIRouter(prefix="/sites", tags=["Public Sites"])
+
+SITE_MAX_AGE_SECONDS = int(os.getenv("SITE_MAX_AGE_SECONDS", 60))
+CACHE_CONTROL = f"public, max-age={SITE_MAX_AGE_SECONDS}, stale-while-revalidate={SITE_MAX_AGE_SECONDS * 5}"
+
+# Served while a newer build is queued, so caches re-check soon
+STALE_CACHE_CONTROL = "public, max-age=5"
+BUILD_RETRY_AFTER_SECONDS = 5
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def load_site(project_name: str) -> dict:
+    """
+    Cache miss: find the published site and serve its build. A current
+    build is cached; an out-of-date or missing one is cached briefly as a
+    stale entry (body None if nothing is built yet) once a rebuild is queued.
+    """
+    db = get_database()
+    website = db["websites"].find_one(
+        {"vercel_project_name": project_name, "published_url": {"$nin": [None, ""]}},
+    )
+    if not website:
+        raise HTTPException(status_code=404, detail="Site not found.")
+    business = db["businesses"].find_one({"_id": ObjectId(website["business_id"])}, {"version": 1}) or {}
+
+    website_id = str(website["_id"])
+    built = site_builder.read_page(website_id, website.get("version", 1))
+    if built is not None and built[1].get("business_version") == business.get("version", 1):
+        body = built[0].encode("utf-8")
+        return site_cache.put(project_name, body, _etag(body), website["business_id"])
+
+    queue_site_build(db, website, missing=True)
+    latest = site_builder.latest_manifest(website_id)
+    if built is None and latest is not None:
+        built = site_builder.read_page(website_id, latest["version"])
+    if built is None:
+        return site_cache.put(project_name, None, None, website["business_id"], stale=True)
+    body = built[0].encode("utf-8")
+    return site_cache.put(project_name, body, _etag(body), website["business_id"], stale=True)
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+@router.get("/{vercel_project_name}")
+async def get_site(vercel_project_name: str, request: Request):
+    entry = site_cache.get(vercel_project_name)
+    if entry is None:
+        entry = await run_in_threadpool(load_site, vercel_project_name)
+    if entry["body"] is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Site is being built. Try again shortly.",
+            headers={"Retry-After": str(BUILD_RETRY_AFTER_SECONDS)},
+        )
+
+    headers = {"ETag": entry["etag"], "Cache-Control": STALE_CACHE_CONTROL if entry["stale"] else CACHE_CONTROL}
+    if etag.matches(request, entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="text/html; charset=utf-8", headers=headers)
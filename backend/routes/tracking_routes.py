@@ -0,0 +1,35 @@
+"""
+routes/tracking_routes.py
+-------------------------
+Public campaign tracking endpoints (links are generated by utils/tracking.py):
+  GET /t/o/{campaign_id}/{customer_id}/{signature}.gif   - Open pixel
+  GET /t/c/{campaign_id}/{customer_id}/{signature}?u=    - Click redirect
+
+Neither endpoint touches MongoDB: hits are verified by signature, counted
+in memory and flushed to campaigns.analytics in the background.
+"""
+
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import RedirectResponse
+
+from utils.tracking import tracker, verify, PIXEL_GIF
+
+router = APIRouter(prefix="/t", tags=["Tracking"])
+
+_NO_STORE = {"Cache-Control": "no-store, max-age=0"}
+
+
+@router.get("/o/{campaign_id}/{customer_id}/{signature}.gif", include_in_schema=False)
+async def track_open(campaign_id: str, customer_id: str, signature: str):
+    # Always return the pixel — a bad signature just isn't counted
+    if verify(signature, "open", campaign_id, customer_id):
+        tracker.record_open(campaign_id, customer_id)
+    return Response(content=PIXEL_GIF, media_type="image/gif", headers=_NO_STORE)
+
+
+@router.get("/c/{campaign_id}/{customer_id}/{signature}", include_in_schema=False)
+async def track_click(campaign_id: str, customer_id: str, signature: str, u: str = Query(...)):
+    if not verify(signature, "click", campaign_id, customer_id, u):
+        raise HTTPException(status_code=404, detail="Link not found.")
+    tracker.record_click(campaign_id)
+    return RedirectResponse(u, status_code=302, headers=_NO_STORE)
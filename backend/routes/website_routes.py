@@ -7,15 +7,47 @@ Website management endpoints (scoped to the authenticated user's business):
   POST  /websites/      - Create a website
   PATCH /websites/{id}  - Update a website (auto-increments version)
   DELETE /websites/{id} - Delete a website
+
+  GET   /websites/{id}/versions            - Version history (newest first)
+  GET   /websites/{id}/versions/{version}  - Website content at a past version
+  GET   /websites/{id}/diff?from_version=&to_version=
+                                           - JSON Patch between two versions
+
+  POST  /websites/{id}/build?full=false    - Queue a static build → 202 + job
+  GET   /websites/{id}/build               - Latest build job and manifest
+
+Static builds (utils/site_builder.py) run on the job queue and are also
+queued automatically whenever a website is created or updated.
+
+PATCH accepts either a partial object (fields to overwrite) or an RFC 6902
+JSON Patch array (Content-Type: application/json-patch+json), e.g.
+  [{"op": "replace", "path": "/content_json/hero/headline", "value": "Hi"}]
+Both are applied atomically against the version that was read; a
+concurrent edit returns 409. Send If-Match with the website's ETag to
+make sure the edit is based on the version you last fetched (412 if not).
 """
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, status, Request, Response, Body, Header, Query
 from datetime import datetime
+from typing import List, Optional, Union
 from bson import ObjectId
+from pydantic import ValidationError
+from pymongo.errors import DuplicateKeyError
 
 from database import get_database
-from models.website_model import WebsiteCreateRequest, WebsiteUpdateRequest, WebsiteResponse
+from models.website_model import (
+    WebsiteCreateRequest,
+    WebsiteUpdateRequest,
+    WebsiteResponse,
+    JsonPatchOperation,
+    WebsiteVersionSummary,
+    WebsiteVersionResponse,
+    WebsiteDiffResponse,
+)
 from utils.dependencies import get_current_user
+from utils import etag, website_history, job_queue, site_builder, site_cache
+from utils.json_patch import PatchError, apply_patch, make_patch
+from utils.responses import trusted_response
 
 router = APIRouter(prefix="/websites", tags=["Websites"])
 
@@ -38,33 +70,147 @@ def serialize_website(w: dict) -> dict:
     }
 
 
-def get_website_or_404(db, website_id: str, business_id: str) -> dict:
+def get_website_or_404(db, website_id: str, business_id: str, projection: dict = None) -> dict:
     try:
         oid = ObjectId(website_id)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid website ID format.")
-    website = db["websites"].find_one({"_id": oid, "business_id": business_id})
+    website = db["websites"].find_one({"_id": oid, "business_id": business_id}, projection)
     if not website:
         raise HTTPException(status_code=404, detail="Website not found.")
     return website
 
 
+def check_project_name_available(db, project_name: Optional[str], website_id: Optional[ObjectId] = None) -> None:
+    """
+    Public sites are served by vercel_project_name, so it must be unique.
+    This gives the friendly early 409; the unique index settles races.
+    """
+    if not project_name:
+        return
+    query = {"vercel_project_name": project_name}
+    if website_id is not None:
+        query["_id"] = {"$ne": website_id}
+    if db["websites"].find_one(query, {"_id": 1}):
+        raise HTTPException(status_code=409, detail="That project name is already in use.")
+
+
+def website_etag(website: dict) -> str:
+    return f'"website-{website["_id"]}-v{website.get("version", 1)}"'
+
+
+def apply_update(current: dict, data) -> dict:
+    """Return the new editable state for a merge body or a JSON Patch array."""
+    if isinstance(data, list):
+        try:
+            new_state = apply_patch(current, [op.dict(by_alias=True, exclude_unset=True) for op in data])
+        except PatchError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid JSON Patch: {e}")
+
+        unknown = set(new_state) - set(website_history.EDITABLE_FIELDS) if isinstance(new_state, dict) else None
+        if unknown is None or unknown:
+            raise HTTPException(status_code=422, detail=f"Patch may only change: {', '.join(website_history.EDITABLE_FIELDS)}.")
+        try:
+            WebsiteCreateRequest(**new_state)
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=f"Patched website is invalid: {e.errors()[0]['msg']}")
+        if not isinstance(new_state.get("content_json", {}), dict):
+            raise HTTPException(status_code=422, detail="content_json must be an object.")
+        return new_state
+
+    update_fields = {k: v for k, v in data.dict().items() if v is not None}
+    if not update_fields:
+        raise HTTPException(status_code=400, detail="No fields provided to update.")
+    return {**current, **update_fields}
+
+
+def queue_site_build(db, website: dict, force_full: bool = False, missing: bool = False) -> dict:
+    """
+    Queue a static build of the website's current version (one job per
+    website version and business profile version). missing=True means the
+    build's output is known to be absent, so a finished job is re-run.
+    """
+    website_id = str(website["_id"])
+    business = db["businesses"].find_one({"_id": ObjectId(website["business_id"])}, {"version": 1}) or {}
+    dedupe_key = f"{website_id}:v{website.get('version', 1)}:b{business.get('version', 1)}"
+    if force_full:
+        # Explicit full rebuilds are never deduplicated against earlier builds
+        dedupe_key += f":full:{ObjectId()}"
+    return job_queue.enqueue(
+        db, "site_build", website["business_id"], dedupe_key,
+        {"website_id": website_id, "force_full": force_full},
+        result_ttl=0 if missing else None,
+    )
+
+
+def serialize_build_job(j: dict) -> dict:
+    return {
+        "job_id": str(j["_id"]),
+        "status": j["status"],
+        "attempts": j.get("attempts", 0),
+        "result": j.get("result"),
+        "error": j.get("error"),
+        "created_at": j["created_at"],
+        "updated_at": j["updated_at"],
+    }
+
+
+def run_site_build_job(db, job: dict) -> dict:
+    """Job handler: render the website's current version to the artifact store."""
+    website = db["websites"].find_one({"_id": ObjectId(job["payload"]["website_id"])})
+    if not website:
+        return {"skipped": "Website was deleted."}
+    business = db["businesses"].find_one({"_id": ObjectId(website["business_id"])}) or {}
+    manifest = site_builder.build_site(website, business, force_full=job["payload"].get("force_full", False))
+    # Drop this worker's stale entry now; other workers refresh theirs within the stale TTL
+    site_cache.invalidate(website.get("vercel_project_name"))
+    return manifest
+
+
+# Job kinds handled by this module, registered with the worker pool in main.py
+JOB_HANDLERS = {"site_build": run_site_build_job}
+
+
+def get_version_state_or_404(db, website_id: str, version: int) -> dict:
+    state = website_history.reconstruct(db, website_id, version)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"Version {version} not found in history.")
+    return state
+
+
 # ---------------------------------------------------------------------------
 # Endpoints
 # ---------------------------------------------------------------------------
 
 @router.get("/", response_model=list[WebsiteResponse])
-def list_websites(current_user: dict = Depends(get_current_user)):
+def list_websites(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
     db = get_database()
+    not_modified = etag.etag_or_304(
+        request, response, etag.collection_etag(db, current_user["business_id"], "websites")
+    )
+    if not_modified:
+        return not_modified
     websites = list(db["websites"].find({"business_id": current_user["business_id"]}))
-    return [serialize_website(w) for w in websites]
+    return trusted_response([serialize_website(w) for w in websites], response)
 
 
 @router.get("/{website_id}", response_model=WebsiteResponse)
-def get_website(website_id: str, current_user: dict = Depends(get_current_user)):
+def get_website(
+    website_id: str,
+    request: Request,
+    response: Response,
+    current_user: dict = Depends(get_current_user),
+):
     db = get_database()
+
+    # Check the version alone first — content_json is only loaded on a miss
+    meta = get_website_or_404(db, website_id, current_user["business_id"], projection={"version": 1})
+    not_modified = etag.etag_or_304(request, response, website_etag(meta))
+    if not_modified:
+        return not_modified
+
     website = get_website_or_404(db, website_id, current_user["business_id"])
-    return serialize_website(website)
+    return trusted_response(serialize_website(website), response)
 
 
 @router.post("/", response_model=WebsiteResponse, status_code=status.HTTP_201_CREATED)
@@ -73,6 +219,7 @@ def create_website(
     current_user: dict = Depends(get_current_user),
 ):
     db = get_database()
+    check_project_name_available(db, data.vercel_project_name)
     now = datetime.utcnow()
     doc = {
         **data.dict(),
@@ -81,38 +228,84 @@ def create_website(
         "created_at": now,
         "updated_at": now,
     }
-    result = db["websites"].insert_one(doc)
+    try:
+        result = db["websites"].insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="That project name is already in use.")
     doc["_id"] = result.inserted_id
+    website_history.record_version(
+        db, doc, 1, None, website_history.editable_state(doc), current_user["email"]
+    )
+    etag.bump(db, current_user["business_id"], "websites")
+    queue_site_build(db, doc)
     return serialize_website(doc)
 
 
 @router.patch("/{website_id}", response_model=WebsiteResponse)
 def update_website(
     website_id: str,
-    data: WebsiteUpdateRequest,
+    data: Union[List[JsonPatchOperation], WebsiteUpdateRequest] = Body(...),
+    if_match: Optional[str] = Header(None, alias="If-Match"),
     current_user: dict = Depends(get_current_user),
 ):
     db = get_database()
 
     # Verify ownership
     existing = get_website_or_404(db, website_id, current_user["business_id"])
+    if if_match and website_etag(existing) not in [t.strip().removeprefix("W/") for t in if_match.split(",")]:
+        raise HTTPException(status_code=412, detail="Website has changed since it was fetched.")
 
-    update_fields = {k: v for k, v in data.dict().items() if v is not None}
-    if not update_fields:
-        raise HTTPException(status_code=400, detail="No fields provided to update.")
+    current = website_history.editable_state(existing)
+    new_state = apply_update(current, data)
+    delta = make_patch(current, new_state)
+    if not delta:
+        return serialize_website(existing)
+    if new_state.get("vercel_project_name") != current.get("vercel_project_name"):
+        check_project_name_available(db, new_state.get("vercel_project_name"), existing["_id"])
 
-    # Auto-increment version and update timestamp
-    update_fields["updated_at"] = datetime.utcnow()
+    # Record the delta first: the unique (website_id, version) index lets
+    # only one concurrent edit of this version through
+    version = existing.get("version", 1)
+    website_history.ensure_base(db, existing)
+    try:
+        record_id = website_history.record_version(
+            db, existing, version + 1, delta, new_state, current_user["email"]
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Website was modified concurrently. Reload and retry.")
 
-    db["websites"].update_one(
-        {"_id": ObjectId(website_id)},
-        {
-            "$set": update_fields,
-            "$inc": {"version": 1},
-        },
-    )
+    # Auto-increment version and update timestamp
+    update = {"$set": {**new_state, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}}
+    removed = [field for field in website_history.EDITABLE_FIELDS if field in current and field not in new_state]
+    if removed:
+        update["$unset"] = {field: "" for field in removed}
+    # Whatever stops the write, the recorded version must not outlive it
+    try:
+        result = db["websites"].update_one(
+            {
+                "_id": existing["_id"],
+                "business_id": current_user["business_id"],
+                "version": version if "version" in existing else {"$exists": False},
+            },
+            update,
+        )
+    except DuplicateKeyError:
+        website_history.discard_version(db, record_id)
+        raise HTTPException(status_code=409, detail="That project name is already in use.")
+    except Exception:
+        # Unless the error came after the write landed (v+1 can only be ours)
+        if not db["websites"].find_one({"_id": existing["_id"], "version": version + 1}, {"_id": 1}):
+            website_history.discard_version(db, record_id)
+        raise
+    if result.matched_count == 0:
+        website_history.discard_version(db, record_id)
+        raise HTTPException(status_code=409, detail="Website was modified concurrently. Reload and retry.")
+    etag.bump(db, current_user["business_id"], "websites")
+    site_cache.invalidate(current.get("vercel_project_name"))
+    site_cache.invalidate(new_state.get("vercel_project_name"))
 
     updated = get_website_or_404(db, website_id, current_user["business_id"])
+    queue_site_build(db, updated)
     return serialize_website(updated)
 
 
@@ -124,9 +317,99 @@ def delete_website(website_id: str, current_user: dict = Depends(get_current_use
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid website ID format.")
 
-    result = db["websites"].delete_one({
-        "_id": oid,
-        "business_id": current_user["business_id"],
-    })
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Website not found.")
\ No newline at end of file
+    deleted = db["websites"].find_one_and_delete(
+        {"_id": oid, "business_id": current_user["business_id"]},
+        projection={"vercel_project_name": 1},
+    )
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Website not found.")
+
+    etag.bump(db, current_user["business_id"], "websites")
+    site_cache.invalidate(deleted.get("vercel_project_name"))
+    website_history.delete_history(db, website_id)
+    site_builder.delete_site(str(oid))
+
+
+# ---------------------------------------------------------------------------
+# Version history
+# ---------------------------------------------------------------------------
+
+@router.get("/{website_id}/versions", response_model=list[WebsiteVersionSummary])
+def list_website_versions(website_id: str, current_user: dict = Depends(get_current_user)):
+    db = get_database()
+    get_website_or_404(db, website_id, current_user["business_id"], projection={"_id": 1})
+    return [
+        {
+            "version": v["version"],
+            "operations": len(v.get("patch") or []),
+            "is_snapshot": v.get("is_snapshot", False),
+            "author": v.get("author"),
+            "created_at": v["created_at"],
+        }
+        for v in website_history.list_versions(db, website_id)
+    ]
+
+
+@router.get("/{website_id}/versions/{version}", response_model=WebsiteVersionResponse)
+def get_website_version(website_id: str, version: int, current_user: dict = Depends(get_current_user)):
+    db = get_database()
+    get_website_or_404(db, website_id, current_user["business_id"], projection={"_id": 1})
+    state = get_version_state_or_404(db, website_id, version)
+    return {"website_id": website_id, "version": version, "state": state}
+
+
+@router.get("/{website_id}/diff", response_model=WebsiteDiffResponse)
+def diff_website_versions(
+    website_id: str,
+    from_version: int = Query(..., ge=1),
+    to_version: Optional[int] = Query(None, ge=1, description="Defaults to the current version"),
+    current_user: dict = Depends(get_current_user),
+):
+    """JSON Patch that turns from_version into to_version."""
+    db = get_database()
+    website = get_website_or_404(db, website_id, current_user["business_id"])
+    if to_version is None or to_version == website.get("version", 1):
+        to_version = website.get("version", 1)
+        to_state = website_history.editable_state(website)
+    else:
+        to_state = get_version_state_or_404(db, website_id, to_version)
+    from_state = get_version_state_or_404(db, website_id, from_version)
+    return {
+        "website_id": website_id,
+        "from_version": from_version,
+        "to_version": to_version,
+        "patch": make_patch(from_state, to_state),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Static builds
+# ---------------------------------------------------------------------------
+
+@router.post("/{website_id}/build", status_code=status.HTTP_202_ACCEPTED)
+def build_website(
+    website_id: str,
+    full: bool = Query(False, description="Re-render every section, ignoring the fragment cache"),
+    current_user: dict = Depends(get_current_user),
+):
+    db = get_database()
+    website = get_website_or_404(db, website_id, current_user["business_id"])
+    return serialize_build_job(queue_site_build(db, website, force_full=full))
+
+
+@router.get("/{website_id}/build")
+def get_website_build(website_id: str, current_user: dict = Depends(get_current_user)):
+    db = get_database()
+    get_website_or_404(db, website_id, current_user["business_id"], projection={"_id": 1})
+    job = db["jobs"].find_one(
+        {
+            "kind": "site_build",
+            "business_id": current_user["business_id"],
+            "dedupe_key": {"$regex": f"^{website_id}:"},
+        },
+        sort=[("created_at", -1)],
+    )
+    return {
+        "job": serialize_build_job(job) if job else None,
+        "manifest": site_builder.latest_manifest(website_id),
+    }
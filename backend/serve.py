@@ -0,0 +1,217 @@
+"""
+serve.py
+--------
+Production entry point: a pre-forking supervisor for uvicorn workers (POSIX).
+
+  python serve.py
+
+  - main is imported once here, before forking, so import-time work is
+    done once and shared copy-on-write by every worker.
+  - Workers share one listening socket. Nothing connects to MongoDB before
+    the fork; each worker opens its own client on first use (database.py
+    also drops any client inherited across a fork).
+  - A worker exits after WEB_MAX_REQUESTS requests (plus up to
+    WEB_MAX_REQUESTS_JITTER, so workers don't all recycle at once) and is
+    replaced, capping memory growth. 0 disables recycling.
+  - SIGTERM / SIGINT: workers stop accepting, then wait for in-flight
+    requests and in-flight Gemini calls together, for up to the larger of
+    WEB_GRACEFUL_TIMEOUT and LLM_DRAIN_SECONDS. Only then are requests
+    still running cancelled, so a chat reply waiting on Gemini gets the
+    whole drain window rather than being cut off first. The app's shutdown
+    then stops the background services. Workers still running after that
+    are killed.
+
+Settings (.env, optional):
+  HOST=0.0.0.0
+  PORT=8000
+  WEB_WORKERS=<CPU count>
+  WEB_MAX_REQUESTS=10000
+  WEB_MAX_REQUESTS_JITTER=1000
+  WEB_GRACEFUL_TIMEOUT=30
+  LOG_LEVEL=info
+  PROMETHEUS_MULTIPROC_DIR=...   aggregate /metrics across workers (utils/metrics.py);
+                                 cleared on startup
+"""
+
+import asyncio
+import glob
+import logging
+import os
+import signal
+import socket
+import time
+
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", 8000))
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", os.cpu_count() or 1))
+WEB_MAX_REQUESTS = int(os.getenv("WEB_MAX_REQUESTS", 10000))
+WEB_MAX_REQUESTS_JITTER = int(os.getenv("WEB_MAX_REQUESTS_JITTER", 1000))
+WEB_GRACEFUL_TIMEOUT = int(os.getenv("WEB_GRACEFUL_TIMEOUT", 30))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+
+# A worker that dies this soon after starting is crashing, not recycling
+_MIN_WORKER_LIFETIME_SECONDS = 1.0
+
+logger = logging.getLogger("serve")
+
+
+def _bind() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _grace_seconds() -> float:
+    from utils.llm_resilience import LLM_DRAIN_SECONDS
+
+    return max(WEB_GRACEFUL_TIMEOUT, LLM_DRAIN_SECONDS)
+
+
+class DrainingServer(uvicorn.Server):
+    """
+    uvicorn.Server whose graceful wait (the step bounded by
+    timeout_graceful_shutdown, after which uvicorn cancels requests) also
+    waits for in-flight Gemini calls, instead of leaving them to the
+    lifespan shutdown that runs after requests are already gone.
+    """
+
+    async def _wait_tasks_to_complete(self) -> None:
+        await asyncio.gather(super()._wait_tasks_to_complete(), self._wait_llm_calls())
+
+    async def _wait_llm_calls(self) -> None:
+        from utils.llm_resilience import gemini_inflight
+
+        if gemini_inflight.count and not self.force_exit:
+            logger.info("Waiting for %d in-flight LLM call(s)", gemini_inflight.count)
+        while gemini_inflight.count and not self.force_exit:
+            await asyncio.sleep(0.1)
+
+
+def _run_worker(app, sock: socket.socket) -> None:
+    """Body of a forked worker; never returns."""
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(
+        app,
+        limit_max_requests=WEB_MAX_REQUESTS or None,
+        limit_max_requests_jitter=WEB_MAX_REQUESTS_JITTER if WEB_MAX_REQUESTS else 0,
+        timeout_graceful_shutdown=_grace_seconds(),
+        proxy_headers=True,
+        log_level=LOG_LEVEL,
+    )
+    code = 0
+    try:
+        DrainingServer(config).run(sockets=[sock])
+    except BaseException:
+        logger.exception("Worker %d crashed", os.getpid())
+        code = 1
+    os._exit(code)
+
+
+class Supervisor:
+    def __init__(self, app, sock: socket.socket, workers: int):
+        self._app = app
+        self._sock = sock
+        self._target = workers
+        self._workers = {}  # pid -> started (monotonic)
+        self._stopping = False
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(self._app, self._sock)
+        self._workers[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+
+    def _on_signal(self, signum, frame) -> None:
+        if not self._stopping:
+            logger.info("Received %s, shutting down workers", signal.Signals(signum).name)
+        self._stopping = True
+
+    def _reap(self) -> list:
+        """Collect exited workers; return their lifetimes in seconds."""
+        from utils import metrics
+
+        lifetimes = []
+        while self._workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            started = self._workers.pop(pid, None)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            metrics.mark_worker_dead(pid)
+            lifetimes.append(time.monotonic() - started)
+            if not self._stopping:
+                logger.info("Worker %d exited (code %d), replacing it", pid, code)
+        return lifetimes
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        for _ in range(self._target):
+            self._spawn()
+
+        while not self._stopping:
+            lifetimes = self._reap()
+            if any(t < _MIN_WORKER_LIFETIME_SECONDS for t in lifetimes):
+                time.sleep(_MIN_WORKER_LIFETIME_SECONDS)  # crash loop — don't fork-bomb
+            while not self._stopping and len(self._workers) < self._target:
+                self._spawn()
+            time.sleep(0.2)
+
+        self._shutdown()
+
+    def _shutdown(self) -> None:
+        from utils.llm_resilience import LLM_DRAIN_SECONDS
+
+        for pid in self._workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        # Grace period, then the lifespan's own drain for calls started by background services
+        deadline = time.monotonic() + _grace_seconds() + LLM_DRAIN_SECONDS + 10
+        while self._workers and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in self._workers:
+            logger.warning("Worker %d did not stop in time, killing it", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self._sock.close()
+        logger.info("All workers stopped")
+
+
+def run() -> None:
+    logging.basicConfig(level=LOG_LEVEL.upper(), format="%(asctime)s [%(name)s] %(message)s")
+    # Stale files from a previous run would be summed into /metrics
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(multiproc_dir, "*.db")):
+            os.remove(path)
+
+    from main import app  # preload before forking
+
+    sock = _bind()
+    logger.info("Serving on http://%s:%d with %d workers", HOST, PORT, WEB_WORKERS)
+    Supervisor(app, sock, WEB_WORKERS).run()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,107 @@
+"""
+startup_check.py
+----------------
+Cold-start budget for the API process. Run from backend/:
+
+  python startup_check.py              Fail (exit 1) if importing main is over budget
+  python startup_check.py --profile    Slowest imports, by cumulative time
+
+Every measurement imports main in a fresh interpreter, so nothing is
+already in sys.modules. The budget check takes the median of several
+runs and also fails if an SDK that is meant to load on first use
+(LAZY_MODULES) was imported at startup.
+
+Settings (.env or flags, optional):
+  STARTUP_BUDGET_MS=1000     --budget-ms
+  STARTUP_CHECK_RUNS=5       --runs
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", 1000))
+STARTUP_CHECK_RUNS = int(os.getenv("STARTUP_CHECK_RUNS", 5))
+
+# Heavy SDKs that must stay off the startup path (loaded on first use)
+LAZY_MODULES = ("google.generativeai", "cloudinary")
+
+_MEASURE = f"""
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = (time.perf_counter() - started) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def measure() -> dict:
+    """Import main once in a fresh interpreter; return its import time and any lazy SDKs loaded."""
+    result = subprocess.run(
+        [sys.executable, "-c", _MEASURE], cwd=_HERE, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def profile(top: int) -> None:
+    """Print the slowest imports of main (python -X importtime), by cumulative time."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=_HERE, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+
+def check(budget_ms: float, runs: int) -> bool:
+    timings, loaded = [], set()
+    for _ in range(runs):
+        sample = measure()
+        timings.append(sample["ms"])
+        loaded.update(sample["loaded"])
+    median = statistics.median(timings)
+    print(
+        f"import main: median {median:.0f} ms, min {min(timings):.0f} ms, "
+        f"max {max(timings):.0f} ms over {runs} runs (budget {budget_ms:.0f} ms)"
+    )
+    ok = True
+    if median > budget_ms:
+        print(f"FAIL: cold start is {median - budget_ms:.0f} ms over budget")
+        ok = False
+    if loaded:
+        print(f"FAIL: imported at startup but should load on first use: {', '.join(sorted(loaded))}")
+        ok = False
+    if ok:
+        print("OK")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or profile API cold-start time.")
+    parser.add_argument("--profile", action="store_true", help="list the slowest imports instead")
+    parser.add_argument("--top", type=int, default=25, help="modules listed by --profile")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=STARTUP_CHECK_RUNS)
+    args = parser.parse_args()
+
+    if args.profile:
+        profile(args.top)
+    else:
+        sys.exit(0 if check(args.budget_ms, args.runs) else 1)
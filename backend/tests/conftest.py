@@ -0,0 +1,61 @@
+"""
+Shared fixtures. Tests run offline: MongoDB is replaced by mongomock and
+embeddings use the deterministic local backend.
+
+  cd backend && python -m pytest
+"""
+
+import os
+import sys
+
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ["EMBEDDING_BACKEND"] = "local"
+os.environ["JOB_WORKERS"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mongomock
+import pytest
+
+import database
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh in-memory database, also returned by database.get_database()."""
+    monkeypatch.setattr(database, "MongoClient", mongomock.MongoClient)
+    monkeypatch.setattr(database, "_client", None)
+    monkeypatch.setattr(database, "_db", None)
+    test_db = database.get_database()
+    yield test_db
+    test_db.client.drop_database(test_db.name)
+
+
+@pytest.fixture
+def client(db):
+    """TestClient for the app; background services (lifespan) are not started."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register a founder with a business and return their Authorization header."""
+    response = client.post("/auth/register", json={
+        "name": "Ann",
+        "email": "ann@example.com",
+        "password": "secret1",
+        "business_name": "Bean There",
+        "category": "Cafe",
+        "description": "Neighbourhood coffee shop",
+        "target_audience": "Commuters",
+        "primary_goal": "More regulars",
+        "brand_tone": "Friendly",
+        "offerings": "Coffee, pastries",
+    })
+    assert response.status_code == 201, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,111 @@
+"""
+Resumable Brand Vault uploads (routes/asset_routes.py, utils/blob_store.py).
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from urllib.parse import unquote
+
+import pytest
+
+from routes import asset_routes
+from utils import blob_store
+
+
+@pytest.fixture(autouse=True)
+def blob_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(blob_store, "BLOB_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(asset_routes, "_next_upload_sweep", 0.0)
+    return tmp_path
+
+
+def upload(client, auth_headers, body: bytes, name="notes.txt", **extra):
+    started = client.post("/assets/uploads", headers=auth_headers, json={
+        "name": name, "type": "file", "size": len(body), **extra,
+    })
+    assert started.status_code == 201, started.text
+    upload_id = started.json()["upload_id"]
+    chunk = client.patch(
+        f"/assets/uploads/{upload_id}", headers={**auth_headers, "Upload-Offset": "0"}, content=body,
+    )
+    assert chunk.status_code == 200, chunk.text
+    done = client.post(f"/assets/uploads/{upload_id}/complete", headers=auth_headers)
+    assert done.status_code == 201, done.text
+    return done.json()
+
+
+def test_dedup_records_stored_size_not_declared_size(client, auth_headers):
+    body = b"hello brand vault"
+    upload(client, auth_headers, body)
+
+    again = client.post("/assets/uploads", headers=auth_headers, json={
+        "name": "copy.txt", "type": "file", "size": 999,
+        "sha256": hashlib.sha256(body).hexdigest(),
+    })
+
+    assert again.status_code == 201
+    assert again.json()["asset"]["size"] == len(body)
+    content = client.get(f"/assets/{again.json()['asset']['id']}/content", headers=auth_headers)
+    assert content.headers["content-length"] == str(len(body))
+    assert content.content == body
+
+
+def test_download_filename_is_escaped(client, auth_headers):
+    name = 'menü "final".txt'
+    asset = upload(client, auth_headers, b"data", name=name)
+
+    response = client.get(f"/assets/{asset['id']}/content", headers=auth_headers)
+
+    assert response.status_code == 200
+    disposition = response.headers["content-disposition"]
+    assert 'filename="men_ _final_.txt"' in disposition
+    assert unquote(disposition.split("filename*=UTF-8''")[1]) == name
+
+
+def test_chunk_range_is_claimed_once(client, auth_headers, db):
+    started = client.post("/assets/uploads", headers=auth_headers, json={
+        "name": "a.bin", "type": "file", "size": 8,
+    }).json()
+    upload_doc = db["asset_uploads"].find_one()
+
+    # A request that read the same offset but lost the race gets no claim
+    assert asset_routes.claim_chunk(db, upload_doc, 0) is not None
+    assert asset_routes.claim_chunk(db, upload_doc, 0) is None
+
+    response = client.patch(
+        f"/assets/uploads/{started['upload_id']}",
+        headers={**auth_headers, "Upload-Offset": "0"}, content=b"12345678",
+    )
+    assert response.status_code == 409
+    assert response.headers["upload-offset"] == "0"
+
+
+def test_stale_uploads_are_expired(client, auth_headers, db, blob_dir, monkeypatch):
+    started = client.post("/assets/uploads", headers=auth_headers, json={
+        "name": "a.bin", "type": "file", "size": 8,
+    }).json()
+    upload_id = started["upload_id"]
+    db["asset_uploads"].update_many({}, {"$set": {"updated_at": datetime.utcnow() - timedelta(days=2)}})
+
+    assert client.get(f"/assets/uploads/{upload_id}", headers=auth_headers).status_code == 404
+
+    monkeypatch.setattr(asset_routes, "_next_upload_sweep", 0.0)
+    client.post("/assets/uploads", headers=auth_headers, json={"name": "b.bin", "type": "file", "size": 8})
+    assert db["asset_uploads"].count_documents({}) == 1
+    assert not list(blob_dir.rglob(f"{upload_id}.part"))
+
+
+def test_upload_is_completed_once(client, auth_headers, db):
+    started = client.post("/assets/uploads", headers=auth_headers, json={
+        "name": "a.bin", "type": "file", "size": 8,
+    }).json()
+    path = f"/assets/uploads/{started['upload_id']}"
+    client.patch(path, headers={**auth_headers, "Upload-Offset": "0"}, content=b"12345678")
+
+    # Another request is already completing the session
+    assert asset_routes.claim_chunk(db, db["asset_uploads"].find_one(), 8) is not None
+    assert client.post(f"{path}/complete", headers=auth_headers).status_code == 409
+
+    db["asset_uploads"].update_many({}, {"$set": {"writer": None, "writer_until": None}})
+    assert client.post(f"{path}/complete", headers=auth_headers).status_code == 201
+    assert client.post(f"{path}/complete", headers=auth_headers).status_code == 404
@@ -0,0 +1,81 @@
+"""
+Campaign scheduler (utils/campaign_scheduler.py).
+"""
+
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from utils import job_queue
+from utils.campaign_scheduler import CampaignScheduler
+
+
+def test_followers_do_not_queue_notified_campaigns():
+    scheduler = CampaignScheduler()
+    scheduler.notify(str(ObjectId()), datetime.utcnow())
+    assert scheduler.stats()["pending_in_memory"] == 0
+
+    scheduler._is_leader = True
+    scheduler.notify(str(ObjectId()), datetime.utcnow())
+    assert scheduler.stats()["pending_in_memory"] == 1
+
+
+def test_drift_is_measured_from_send_at(db):
+    scheduler, samples = CampaignScheduler(), []
+    scheduler.add_listener(lambda kind, seconds: samples.append((kind, seconds)))
+    campaign_id = db["campaigns"].insert_one({
+        "business_id": "b", "status": "scheduled", "send_at": datetime.utcnow() - timedelta(seconds=2),
+    }).inserted_id
+
+    scheduler._fire(db, str(campaign_id), datetime.utcnow())
+
+    (kind, drift), = samples
+    assert kind == "drift" and drift >= 2
+    assert db["campaigns"].find_one()["status"] == "sending"
+
+
+def test_wake_lag_is_measured_against_the_requested_sleep():
+    scheduler, samples = CampaignScheduler(), []
+    scheduler.add_listener(lambda kind, seconds: samples.append((kind, seconds)))
+    ticks = iter([0.05])
+
+    def tick():
+        wait = next(ticks, None)
+        if wait is None:
+            scheduler._stop.set()
+            return 0.0
+        return wait
+
+    scheduler._tick = tick
+    scheduler._run()
+
+    (kind, lag), = samples
+    assert kind == "wake_lag" and 0 <= lag < 1
+
+
+def test_sent_campaign_cannot_be_rescheduled(client, auth_headers, db):
+    created = client.post("/campaigns/", headers=auth_headers, json={
+        "name": "Spring", "subject": "Hello", "body": "Hi", "sender_name": "Ann", "status": "draft",
+    })
+    assert created.status_code == 201, created.text
+    campaign_id = created.json()["id"]
+    db["campaigns"].update_one({"_id": ObjectId(campaign_id)}, {"$set": {"status": "sent"}})
+
+    send_at = (datetime.utcnow() + timedelta(hours=1)).isoformat()
+    response = client.patch(f"/campaigns/{campaign_id}", headers=auth_headers,
+                            json={"status": "scheduled", "send_at": send_at})
+
+    assert response.status_code == 409
+    assert client.patch(f"/campaigns/{campaign_id}", headers=auth_headers, json={"name": "Renamed"}).status_code == 200
+
+
+def test_firing_reruns_a_previously_succeeded_send_job(db):
+    campaign_id = db["campaigns"].insert_one({
+        "business_id": "b", "status": "scheduled", "send_at": datetime.utcnow() - timedelta(seconds=1),
+    }).inserted_id
+    job = job_queue.enqueue(db, "campaign_send", "b", str(campaign_id), {"campaign_id": str(campaign_id)})
+    db["jobs"].update_one({"_id": job["_id"]}, {"$set": {"status": "succeeded"}})
+
+    CampaignScheduler()._fire(db, str(campaign_id), datetime.utcnow())
+
+    assert db["jobs"].find_one({"_id": job["_id"]})["status"] == "queued"
@@ -0,0 +1,116 @@
+"""
+Campaign delivery (utils/campaign_sender.py) and the send job's outcome
+(routes/campaign_routes.py).
+"""
+
+import smtplib
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from routes.campaign_routes import run_campaign_send_job
+from utils import campaign_sender
+
+BUSINESS_ID = str(ObjectId())
+
+
+class FakePool:
+    """Records delivered recipients; addresses pick the failure mode."""
+
+    def __init__(self):
+        self.delivered = []
+
+    def send(self, message):
+        to = message["To"]
+        if to.startswith("refused"):
+            raise smtplib.SMTPRecipientsRefused({to: (550, b"No such user")})
+        if to.startswith("flaky"):
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.delivered.append(to)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    fake = FakePool()
+    monkeypatch.setattr(campaign_sender, "smtp_pool", fake)
+    monkeypatch.setattr(campaign_sender, "CAMPAIGN_RATE_PER_SECOND", 1e6)
+    campaign_sender._buckets.clear()
+    return fake
+
+
+def seed(db, emails) -> dict:
+    db["businesses"].insert_one({"_id": ObjectId(BUSINESS_ID), "name": "Bean There"})
+    db["customers"].insert_many([
+        {"business_id": BUSINESS_ID, "name": f"Customer {i}", "email": email, "created_at": datetime.utcnow()}
+        for i, email in enumerate(emails)
+    ])
+    campaign = {
+        "business_id": BUSINESS_ID, "name": "Launch", "subject": "Hi {{ customer.first_name }}",
+        "body": "Fresh beans today.", "sender_name": "Bean There", "status": "sending",
+        "analytics": {"sent": 0, "opened": 0, "clicked": 0}, "created_at": datetime.utcnow(),
+    }
+    campaign["_id"] = db["campaigns"].insert_one(campaign).inserted_id
+    return campaign
+
+
+def statuses(db) -> dict:
+    return {d["email"]: d["status"] for d in db["campaign_deliveries"].find()}
+
+
+def job_for(campaign: dict, attempts: int, max_attempts: int = 3) -> dict:
+    return {
+        "_id": ObjectId(), "worker_id": "w", "attempts": attempts, "max_attempts": max_attempts,
+        "payload": {"campaign_id": str(campaign["_id"])},
+    }
+
+
+def test_permanent_rejections_are_not_retried(db, pool):
+    campaign = seed(db, ["ok@example.com", "refused@example.com"])
+
+    stats = run_campaign_send_job(db, job_for(campaign, attempts=1))
+
+    assert (stats["sent"], stats["failed"], stats["rejected"]) == (1, 0, 1)
+    assert statuses(db) == {"ok@example.com": "sent", "refused@example.com": "rejected"}
+    assert db["campaigns"].find_one()["status"] == "sent"
+
+
+def test_transient_failures_retry_then_finish_on_last_attempt(db, pool):
+    campaign = seed(db, ["ok@example.com", "flaky@example.com"])
+
+    with pytest.raises(RuntimeError):
+        run_campaign_send_job(db, job_for(campaign, attempts=1))
+    assert statuses(db)["flaky@example.com"] == "failed"
+
+    stats = run_campaign_send_job(db, job_for(campaign, attempts=3))
+
+    assert (stats["sent"], stats["failed"], stats["skipped"]) == (0, 1, 1)
+    assert pool.delivered == ["ok@example.com"]
+    assert db["campaigns"].find_one()["status"] == "sent"
+
+
+def test_message_build_errors_are_recorded(db, pool, monkeypatch):
+    campaign = seed(db, ["ok@example.com"])
+
+    def broken(*args, **kwargs):
+        raise ValueError("bad header")
+
+    monkeypatch.setattr(campaign_sender, "build_message", broken)
+    stats = run_campaign_send_job(db, job_for(campaign, attempts=1))
+
+    assert stats["rejected"] == 1
+    assert statuses(db) == {"ok@example.com": "rejected"}
+
+
+def test_unexpected_batch_error_releases_claimed_rows(db, pool, monkeypatch):
+    campaign = seed(db, ["ok@example.com"])
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("executor down")
+
+    monkeypatch.setattr(campaign_sender._send_executor, "map", broken)
+    with pytest.raises(RuntimeError):
+        run_campaign_send_job(db, job_for(campaign, attempts=3, max_attempts=3))
+
+    assert statuses(db) == {"ok@example.com": "failed"}
+    assert db["campaigns"].find_one()["status"] == "failed"
@@ -0,0 +1,31 @@
+"""
+Campaign template language (utils/campaign_template.py).
+"""
+
+import pytest
+
+from utils.campaign_template import compile_template, TemplateError
+
+
+def test_filters_and_business_fields():
+    template = compile_template(
+        'Hi {{ customer.first_name | default("there") | upper }} from {{ business.business_name }}',
+        {"business_name": "Bean There"},
+    )
+
+    assert template.render({"name": "ann lee"}) == "Hi ANN from Bean There"
+    assert template.render_batch([{}, {"name": "Bo"}]) == ["Hi THERE from Bean There", "Hi BO from Bean There"]
+
+
+def test_pipe_inside_filter_argument_is_not_a_separator():
+    template = compile_template('{{ first_name | default("a|b") }} {{ name | default("say \\"x|y\\"") }}')
+
+    assert template.render({}) == 'a|b say "x|y"'
+
+
+@pytest.mark.parametrize("source", [
+    "{{ customer.age }}", "{{ name | shout }}", '{{ name | default("open }}', "{{ name ", "{{ name || upper }}",
+])
+def test_bad_templates_are_rejected(source):
+    with pytest.raises(TemplateError):
+        compile_template(source)
@@ -0,0 +1,30 @@
+"""
+Product price statistics (utils/catalog_stats.py, GET /products/stats).
+"""
+
+from utils import catalog_stats
+
+
+def test_prices_load_sorted_and_cache_per_etag(db):
+    catalog_stats._prices.clear()
+    db["products"].insert_many([
+        {"business_id": "b", "price": 5.0}, {"business_id": "b", "price": 1.5},
+        {"business_id": "b"}, {"business_id": "other", "price": 99.0},
+    ])
+
+    prices = catalog_stats.load_prices(db, "b", "v1")
+    assert prices.tolist() == [0.0, 1.5, 5.0]
+
+    db["products"].insert_one({"business_id": "b", "price": 2.0})
+    assert catalog_stats.load_prices(db, "b", "v1") is prices
+    assert catalog_stats.load_prices(db, "b", "v2").tolist() == [0.0, 1.5, 2.0, 5.0]
+
+
+def test_stats_endpoint(client, auth_headers):
+    for price in (4.0, 2.0, 10.0):
+        client.post("/products/", headers=auth_headers, json={"name": f"Item {price}", "price": price})
+
+    stats = client.get("/products/stats?edges=0,5", headers=auth_headers).json()
+
+    assert (stats["count"], stats["min"], stats["max"], stats["median"]) == (3, 2.0, 10.0, 4.0)
+    assert [band["count"] for band in stats["bands"]] == [2, 1]
@@ -0,0 +1,88 @@
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from utils import gemini_utils_chatbot
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text]
+
+
+class _Stream(list):
+    usage_metadata = None
+
+
+class _StubModel:
+    def generate_content(self, contents, stream=False, **kwargs):
+        return _Stream([_Chunk("Raise "), _Chunk("prices.")])
+
+
+@pytest.fixture(autouse=True)
+def stub_gemini(monkeypatch):
+    monkeypatch.setattr(gemini_utils_chatbot, "_default_model", _StubModel())
+
+
+def token_of(headers):
+    return headers["Authorization"].split()[1]
+
+
+def test_token_is_sent_in_the_first_frame(client, auth_headers):
+    with client.websocket_connect("/chat/ws") as ws:
+        ws.send_json({"type": "auth", "token": token_of(auth_headers)})
+        assert ws.receive_json() == {"type": "ready"}
+        ws.send_json({"message": "How should I price coffee?"})
+        assert ws.receive_json() == {"type": "chunk", "text": "Raise "}
+        assert ws.receive_json() == {"type": "chunk", "text": "prices."}
+        assert ws.receive_json() == {"type": "done", "response": "Raise prices."}
+
+
+def test_invalid_token_closes_the_socket(client, auth_headers):
+    with client.websocket_connect("/chat/ws") as ws:
+        ws.send_json({"type": "auth", "token": "not-a-jwt"})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_non_json_frames_get_an_error_frame(client, auth_headers):
+    with client.websocket_connect("/chat/ws") as ws:
+        ws.send_json({"type": "auth", "token": token_of(auth_headers)})
+        assert ws.receive_json() == {"type": "ready"}
+        ws.send_text("{not json")
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"message": "Still there?"})
+        assert ws.receive_json()["type"] == "chunk"
+
+
+def test_deleted_business_mid_session_closes_with_policy_violation(client, auth_headers, db, monkeypatch):
+    from utils import prompt_cache
+
+    with client.websocket_connect("/chat/ws") as ws:
+        ws.send_json({"type": "auth", "token": token_of(auth_headers)})
+        assert ws.receive_json() == {"type": "ready"}
+        db["businesses"].delete_many({})
+        monkeypatch.setattr(prompt_cache, "needs_revalidation", lambda entry: True)
+        ws.send_json({"message": "Still there?"})
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 1008
+
+
+def test_failed_chat_log_save_sends_an_error_frame(client, auth_headers, monkeypatch):
+    from routes import chat_routes
+
+    def broken_save(*args):
+        raise RuntimeError("database unavailable")
+
+    with client.websocket_connect("/chat/ws") as ws:
+        ws.send_json({"type": "auth", "token": token_of(auth_headers)})
+        assert ws.receive_json() == {"type": "ready"}
+        monkeypatch.setattr(chat_routes, "save_chatlog", broken_save)
+        ws.send_json({"message": "How should I price coffee?"})
+        assert ws.receive_json()["type"] == "chunk"
+        assert ws.receive_json()["type"] == "chunk"
+        assert ws.receive_json() == {"type": "error", "detail": "Couldn't save this conversation."}
+        ws.send_json({"message": "Still there?"})
+        assert ws.receive_json()["type"] == "chunk"
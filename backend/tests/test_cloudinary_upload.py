@@ -0,0 +1,93 @@
+"""
+Logo uploads against a local stand-in for the Cloudinary upload API: the
+event loop keeps serving other work while uploads are in flight, and
+uploads reuse pooled keep-alive connections.
+"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import cloudinary_utils
+
+UPLOAD_SECONDS = 0.3
+
+
+class _FakeCloudinary(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = set()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        _FakeCloudinary.connections.add(self.client_address)
+        time.sleep(UPLOAD_SECONDS)
+        body = json.dumps({"secure_url": f"https://res.example.com{self.path}"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_cloudinary(monkeypatch):
+    import cloudinary
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeCloudinary)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _FakeCloudinary.connections = set()
+
+    monkeypatch.setenv("CLOUDINARY_CLOUD_NAME", "demo")
+    monkeypatch.setenv("CLOUDINARY_API_KEY", "key")
+    monkeypatch.setenv("CLOUDINARY_API_SECRET", "secret")
+    monkeypatch.setattr(cloudinary_utils, "_uploader", None)
+    cloudinary_utils._get_uploader()
+    cloudinary.config(upload_prefix=f"http://127.0.0.1:{server.server_port}")
+    yield server
+    server.shutdown()
+
+
+def test_uploads_do_not_block_the_event_loop(fake_cloudinary):
+    async def scenario():
+        gaps = []
+
+        async def heartbeat(stop: asyncio.Event):
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(heartbeat(stop))
+        urls = await asyncio.gather(*(
+            cloudinary_utils.upload_logo_async(b"\x89PNG fake", f"logo{i}.png", public_id=f"b{i}")
+            for i in range(cloudinary_utils.LOGO_UPLOAD_CONCURRENCY)
+        ))
+        stop.set()
+        await ticker
+        return urls, gaps
+
+    started = time.perf_counter()
+    urls, gaps = asyncio.run(scenario())
+    elapsed = time.perf_counter() - started
+
+    assert all(url.startswith("https://res.example.com/") for url in urls)
+    # Uploads ran concurrently, and the loop ticked throughout
+    assert elapsed < UPLOAD_SECONDS * 2
+    assert len(gaps) > UPLOAD_SECONDS / 0.01 / 2
+    assert max(gaps) < 0.1
+
+
+def test_uploads_reuse_pooled_connections(fake_cloudinary):
+    for i in range(5):
+        cloudinary_utils.upload_logo(b"\x89PNG fake", f"logo{i}.png")
+    assert len(_FakeCloudinary.connections) == 1
@@ -0,0 +1,63 @@
+"""
+Dashboard summary (routes/dashboard_routes.py).
+"""
+
+from datetime import datetime
+
+import pytest
+
+from routes import dashboard_routes
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    dashboard_routes._cache.clear()
+    yield
+    dashboard_routes._cache.clear()
+
+
+def add_product(client, auth_headers, name: str) -> None:
+    response = client.post("/products/", headers=auth_headers, json={"name": name, "price": 3.5})
+    assert response.status_code == 201, response.text
+
+
+def test_counts_and_recent_items_are_scoped_to_the_tenant(client, auth_headers, db):
+    add_product(client, auth_headers, "Espresso")
+    client.post("/campaigns/", headers=auth_headers, json={
+        "name": "Ours", "subject": "Hi", "body": "Hello", "sender_name": "Ann",
+    })
+    other = "64b000000000000000000099"
+    now = datetime.utcnow()
+    db["products"].insert_many([{"business_id": other, "name": "Theirs", "price": 1, "created_at": now} for _ in range(3)])
+    db["campaigns"].insert_one({
+        "business_id": other, "name": "Theirs", "subject": "Hi", "status": "sent", "created_at": now,
+    })
+
+    data = client.get("/dashboard/summary", headers=auth_headers).json()
+
+    assert data["counts"]["products"] == 1
+    assert data["counts"]["campaigns"] == 1
+    assert data["counts"]["campaigns_sent"] == 0
+    assert [c["name"] for c in data["recent_campaigns"]] == ["Ours"]
+    assert data["business"]["business_name"] == "Bean There"
+
+
+def test_a_write_changes_the_etag_and_the_cached_summary(client, auth_headers):
+    first = client.get("/dashboard/summary", headers=auth_headers)
+    assert first.json()["counts"]["products"] == 0
+
+    add_product(client, auth_headers, "Latte")
+    second = client.get("/dashboard/summary", headers={**auth_headers, "If-None-Match": first.headers["etag"]})
+
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert second.json()["counts"]["products"] == 1
+
+
+def test_matching_etag_is_not_modified(client, auth_headers):
+    first = client.get("/dashboard/summary", headers=auth_headers)
+
+    second = client.get("/dashboard/summary", headers={**auth_headers, "If-None-Match": first.headers["etag"]})
+
+    assert second.status_code == 304
+    assert second.headers["etag"] == first.headers["etag"]
@@ -0,0 +1,97 @@
+"""
+Conditional GETs (utils/etag.py): ETag / If-None-Match → 304 on list and
+single-item routes.
+"""
+
+
+def create_product(client, auth_headers, name: str = "Espresso", **fields) -> dict:
+    response = client.post("/products/", headers=auth_headers, json={"name": name, "price": 3.5, **fields})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def revalidate(client, auth_headers, path: str, tag: str):
+    return client.get(path, headers={**auth_headers, "If-None-Match": tag})
+
+
+def test_list_endpoint_answers_304_on_matching_etag(client, auth_headers):
+    create_product(client, auth_headers)
+    first = client.get("/products/", headers=auth_headers)
+    assert first.status_code == 200
+
+    again = revalidate(client, auth_headers, "/products/", first.headers["etag"])
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+def test_writes_change_the_list_etag(client, auth_headers):
+    tags = [client.get("/products/", headers=auth_headers).headers["etag"]]
+    product = create_product(client, auth_headers)
+    tags.append(client.get("/products/", headers=auth_headers).headers["etag"])
+    client.patch(f"/products/{product['id']}", headers=auth_headers, json={"price": 4.0})
+    tags.append(client.get("/products/", headers=auth_headers).headers["etag"])
+    client.delete(f"/products/{product['id']}", headers=auth_headers)
+    tags.append(client.get("/products/", headers=auth_headers).headers["etag"])
+
+    assert len(set(tags)) == 4
+    assert revalidate(client, auth_headers, "/products/", tags[0]).status_code == 200
+
+
+def test_weak_etag_from_compressed_response_still_matches(client, auth_headers):
+    for i in range(20):
+        create_product(client, auth_headers, f"Product {i}", description="Single-origin beans, roasted weekly. " * 5)
+    first = client.get("/products/", headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["etag"].startswith('W/"')
+
+    again = client.get(
+        "/products/", headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": first.headers["etag"]},
+    )
+
+    assert again.status_code == 304
+
+
+def test_single_product_etag_ignores_other_products(client, auth_headers):
+    product, other = create_product(client, auth_headers, "Espresso"), create_product(client, auth_headers, "Latte")
+    path = f"/products/{product['id']}"
+    tag = client.get(path, headers=auth_headers).headers["etag"]
+
+    client.patch(f"/products/{other['id']}", headers=auth_headers, json={"price": 9.0})
+    assert revalidate(client, auth_headers, path, tag).status_code == 304
+
+    client.patch(path, headers=auth_headers, json={"price": 9.0})
+    changed = revalidate(client, auth_headers, path, tag)
+    assert changed.status_code == 200
+    assert changed.json()["price"] == 9.0
+
+
+def test_website_etag_follows_its_version(client, auth_headers):
+    website = client.post("/websites/", headers=auth_headers, json={
+        "template": "modern", "content_json": {"hero": {"headline": "Fresh coffee"}},
+    }).json()
+    other = client.post("/websites/", headers=auth_headers, json={
+        "template": "classic", "content_json": {"hero": {"headline": "Other"}},
+    }).json()
+    path = f"/websites/{website['id']}"
+    tag = client.get(path, headers=auth_headers).headers["etag"]
+
+    client.patch(f"/websites/{other['id']}", headers=auth_headers, json={"template": "minimal"})
+    assert revalidate(client, auth_headers, path, tag).status_code == 304
+
+    client.patch(path, headers=auth_headers, json={"template": "minimal"})
+    assert revalidate(client, auth_headers, path, tag).status_code == 200
+
+
+def test_asset_etag_follows_its_updated_at(client, auth_headers):
+    note = client.post("/assets/", headers=auth_headers, json={"name": "Voice", "type": "note", "content": "Warm"})
+    assert note.status_code == 201, note.text
+    path = f"/assets/{note.json()['id']}"
+    tag = client.get(path, headers=auth_headers).headers["etag"]
+    assert revalidate(client, auth_headers, path, tag).status_code == 304
+
+    client.patch(path, headers=auth_headers, json={"content": "Warm and direct"})
+    changed = revalidate(client, auth_headers, path, tag)
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != tag
@@ -0,0 +1,79 @@
+"""
+Mongo-backed job queue (utils/job_queue.py) and poster job dedupe.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from routes.poster_routes import PosterGenerateRequest, prompt_dedupe_key, run_poster_job
+from utils import job_queue, poster_generator
+
+BUSINESS_ID = "0" * 24
+
+
+def test_dedupe_key_covers_title_and_prompt():
+    base = PosterGenerateRequest(title="Autumn Sale", prompt="Warm  colours, coffee")
+
+    assert prompt_dedupe_key(base) == prompt_dedupe_key(
+        PosterGenerateRequest(title="autumn sale", prompt="warm colours, Coffee")
+    )
+    assert prompt_dedupe_key(base) != prompt_dedupe_key(
+        PosterGenerateRequest(title="Winter Sale", prompt="Warm colours, coffee")
+    )
+
+
+def test_succeeded_job_is_rerun_after_ttl_or_when_forced(db):
+    job = job_queue.enqueue(db, "poster", BUSINESS_ID, "k", {})
+    db["jobs"].update_one({"_id": job["_id"]}, {"$set": {"status": "succeeded"}})
+
+    assert job_queue.enqueue(db, "poster", BUSINESS_ID, "k", {}, result_ttl=3600)["status"] == "succeeded"
+
+    forced = job_queue.enqueue(db, "poster", BUSINESS_ID, "k", {}, force=True)
+    assert (forced["status"], forced["run"]) == ("queued", 1)
+
+    db["jobs"].update_one({"_id": job["_id"]}, {"$set": {
+        "status": "succeeded", "updated_at": datetime.utcnow() - timedelta(hours=2),
+    }})
+    expired = job_queue.enqueue(db, "poster", BUSINESS_ID, "k", {}, result_ttl=3600)
+    assert (expired["status"], expired["run"]) == ("queued", 2)
+
+
+def test_expired_lease_on_last_attempt_fails_instead_of_rerunning(db):
+    job = job_queue.enqueue(db, "poster", BUSINESS_ID, "k", {})
+    db["jobs"].update_one({"_id": job["_id"]}, {"$set": {
+        "status": "running",
+        "attempts": job["max_attempts"],
+        "lease_until": datetime.utcnow() - timedelta(seconds=1),
+    }})
+
+    assert job_queue.claim(db, ["poster"], "w") is None
+    assert db["jobs"].find_one({"_id": job["_id"]})["status"] == "failed"
+
+
+def test_expired_lease_with_attempts_left_is_reclaimed(db):
+    job = job_queue.enqueue(db, "poster", BUSINESS_ID, "k", {})
+    db["jobs"].update_one({"_id": job["_id"]}, {"$set": {
+        "status": "running",
+        "attempts": 1,
+        "lease_until": datetime.utcnow() - timedelta(seconds=1),
+    }})
+
+    claimed = job_queue.claim(db, ["poster"], "w")
+    assert claimed["_id"] == job["_id"]
+    assert claimed["attempts"] == 2
+
+
+def test_poster_generation_needs_a_configured_generator(client, auth_headers, db, monkeypatch):
+    monkeypatch.setattr(poster_generator, "POSTER_GENERATOR", "")
+    request = {"title": "Autumn Sale", "prompt": "Warm colours, coffee"}
+
+    response = client.post("/posters/generate", headers=auth_headers, json=request)
+    assert response.status_code == 503
+    assert db["jobs"].count_documents({}) == 0
+
+    # A job queued before the setting was removed fails instead of saving a placeholder
+    job = job_queue.enqueue(db, "poster", BUSINESS_ID, "k", request)
+    with pytest.raises(RuntimeError, match="not configured"):
+        run_poster_job(db, job)
+    assert db["posters"].count_documents({}) == 0
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from utils import llm_resilience as r
+
+
+@pytest.fixture(autouse=True)
+def fast_settings(monkeypatch):
+    monkeypatch.setattr(r, "_DEFAULT_HEDGE_DELAY_SECONDS", 0.05)
+    monkeypatch.setattr(r, "LLM_RETRY_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(r, "gemini_breaker", r.CircuitBreaker("test", 5, 30))
+    monkeypatch.setattr(r, "gemini_latency", r.LatencyTracker())
+
+
+def call(fn):
+    return r.call_with_resilience(fn, breaker=r.gemini_breaker, tracker=r.gemini_latency)
+
+
+def test_attempts_get_the_remaining_deadline_as_timeout(monkeypatch):
+    monkeypatch.setattr(r, "LLM_DEADLINE_SECONDS", 10)
+    timeouts = []
+    call(lambda timeout: timeouts.append(timeout))
+    assert 9 < timeouts[0] <= 10
+
+
+def test_slow_attempt_is_hedged():
+    calls = []
+
+    def slow_then_fast(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            time.sleep(0.5)
+            return "slow"
+        return "fast"
+
+    before = r.hedge_snapshot()
+    assert call(slow_then_fast) == "fast"
+    after = r.hedge_snapshot()
+    assert after["hedges"] == before["hedges"] + 1
+    assert after["hedge_wins"] == before["hedge_wins"] + 1
+
+
+def test_no_hedge_without_spare_threads(monkeypatch):
+    monkeypatch.setattr(r, "LLM_MAX_CONCURRENCY", 1)
+    calls = []
+
+    def slow(timeout):
+        calls.append(timeout)
+        time.sleep(0.2)
+        return "done"
+
+    before = r.hedge_snapshot()["hedges_skipped"]
+    assert call(slow) == "done"
+    assert len(calls) == 1
+    assert r.hedge_snapshot()["hedges_skipped"] == before + 1
+
+
+def test_counters_are_exact_under_concurrency(monkeypatch):
+    monkeypatch.setattr(r, "LLM_HEDGE_ENABLED", False)
+    before = r.hedge_snapshot()["attempts"]
+    threads = [threading.Thread(target=lambda: [call(lambda timeout: "ok") for _ in range(50)]) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert r.hedge_snapshot()["attempts"] == before + 400
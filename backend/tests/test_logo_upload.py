@@ -0,0 +1,85 @@
+"""
+Logo preprocessing (utils/image_utils.py) and POST /business/me/logo.
+"""
+
+import functools
+import io
+
+import pytest
+from PIL import Image
+
+from routes import business_routes
+from utils import cloudinary_utils
+from utils.image_utils import FileTooLargeError, LOGO_MAX_DIMENSION, hash_upload, prepare_logo
+
+SVG = b'<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="10" height="10"/></svg>'
+
+
+def png(width: int = 1200, height: int = 800) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (width, height), "#336699").save(out, format="PNG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def uploads(monkeypatch):
+    """Replace the Cloudinary upload with a recorder; returns the calls made."""
+    calls = []
+
+    async def upload_logo_async(image_bytes, filename, public_id=None):
+        calls.append(image_bytes)
+        return f"https://res.example.com/{public_id}.webp"
+
+    monkeypatch.setattr(cloudinary_utils, "upload_logo_async", upload_logo_async)
+    return calls
+
+
+def post_logo(client, auth_headers, body: bytes, content_type: str = "image/png"):
+    return client.post("/business/me/logo", headers=auth_headers, files={"logo": ("logo.png", body, content_type)})
+
+
+def test_hash_upload_enforces_the_size_cap():
+    with pytest.raises(FileTooLargeError):
+        hash_upload(io.BytesIO(b"x" * 2048), max_bytes=1024)
+    with pytest.raises(ValueError):
+        hash_upload(io.BytesIO(b""))
+
+    digest, size = hash_upload(io.BytesIO(b"logo"))
+    assert size == 4 and len(digest) == 64
+
+
+def test_raster_logos_are_downscaled_to_webp():
+    body, content_type = prepare_logo(io.BytesIO(png(1200, 800)), "image/png")
+
+    assert content_type == "image/webp"
+    image = Image.open(io.BytesIO(body))
+    assert image.format == "WEBP"
+    assert max(image.size) <= LOGO_MAX_DIMENSION
+
+
+def test_svg_logos_pass_through_unchanged():
+    assert prepare_logo(io.BytesIO(SVG), "image/svg+xml") == (SVG, "image/svg+xml")
+
+
+def test_oversized_upload_is_rejected(client, auth_headers, uploads, monkeypatch):
+    monkeypatch.setattr(business_routes, "hash_upload", functools.partial(hash_upload, max_bytes=1024))
+
+    assert post_logo(client, auth_headers, png()).status_code == 413
+    assert not uploads
+
+
+def test_empty_upload_is_rejected(client, auth_headers, uploads):
+    assert post_logo(client, auth_headers, b"").status_code == 400
+    assert not uploads
+
+
+def test_identical_logo_is_deduplicated(client, auth_headers, uploads):
+    first = post_logo(client, auth_headers, png())
+    assert first.status_code == 200, first.text
+    assert first.json()["deduplicated"] is False
+
+    second = post_logo(client, auth_headers, png())
+
+    assert second.json()["deduplicated"] is True
+    assert second.json()["logo_url"] == first.json()["logo_url"]
+    assert len(uploads) == 1
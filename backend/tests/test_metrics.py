@@ -0,0 +1,48 @@
+"""
+Prometheus metrics (utils/metrics.py, routes/metrics_routes.py).
+"""
+
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from utils import metrics
+
+
+def test_requests_are_labelled_by_route_template(client, auth_headers):
+    product_id = str(ObjectId())
+    client.get(f"/products/{product_id}", headers=auth_headers)
+
+    body = client.get("/metrics").text
+
+    assert 'http_request_duration_seconds_count{method="GET",route="/products/{product_id}",status="404"}' in body
+    assert product_id not in body
+    assert 'http_requests_in_progress{method="GET"}' in body
+
+
+def test_unmatched_paths_share_one_label(client):
+    client.get(f"/no-such-page/{ObjectId()}")
+
+    assert 'route="<unmatched>"' in client.get("/metrics").text
+
+
+def test_mongo_commands_are_recorded_by_collection(client):
+    # mongomock emits no command events — feed the listener what pymongo would
+    listener = metrics.MongoCommandMetrics()
+    started = SimpleNamespace(connection_id=("localhost", 27017), request_id=7,
+                              command_name="find", command={"find": "products", "filter": {}})
+    listener.started(started)
+    listener.succeeded(SimpleNamespace(connection_id=started.connection_id, request_id=7,
+                                       command_name="find", duration_micros=1500))
+
+    body = client.get("/metrics").text
+
+    assert 'mongodb_command_duration_seconds_count{collection="products",command="find"}' in body
+
+
+def test_metrics_token_is_enforced(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "s3cret")
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
@@ -0,0 +1,25 @@
+"""
+One-time data migrations (migrate.py).
+"""
+
+import migrate
+
+
+def test_migrations_backfill_once(db):
+    db["products"].insert_many([{"name": "Flat White"}, {"name": "Mocha", "name_lower": "mocha"}])
+    db["businesses"].insert_many([{"name": "Old"}, {"name": "New", "version": 4}])
+
+    assert migrate.migrate(db) == ["0001_product_name_lower", "0002_business_version"]
+
+    assert {p["name_lower"] for p in db["products"].find()} == {"flat white", "mocha"}
+    assert sorted(b["version"] for b in db["businesses"].find()) == [1, 4]
+    assert migrate.migrate(db) == []
+
+
+def test_connecting_does_not_backfill(db):
+    import database
+
+    db["products"].insert_one({"name": "Chai"})
+    database._create_indexes(db)
+
+    assert "name_lower" not in db["products"].find_one()
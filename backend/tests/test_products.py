@@ -0,0 +1,82 @@
+"""
+Product listing (GET /products/): name prefix, price range, sorting and
+keyset paging.
+"""
+
+import pytest
+
+
+def create_product(client, auth_headers, name: str, price: float) -> dict:
+    response = client.post("/products/", headers=auth_headers, json={"name": name, "price": price})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def names(client, auth_headers, **params) -> list:
+    response = client.get("/products/", headers=auth_headers, params=params)
+    assert response.status_code == 200, response.text
+    return [p["name"] for p in response.json()]
+
+
+@pytest.fixture
+def catalog(client, auth_headers) -> list:
+    """Products in creation order."""
+    return [
+        create_product(client, auth_headers, name, price)
+        for name, price in [("Espresso", 3.0), ("espresso tonic", 5.5), ("Latte", 4.0), ("Esp (decaf)", 3.5)]
+    ]
+
+
+def test_name_prefix_is_case_insensitive(client, auth_headers, catalog):
+    assert names(client, auth_headers, q="ESPRESSO") == ["Espresso", "espresso tonic"]
+    assert names(client, auth_headers, q="lat") == ["Latte"]
+    assert names(client, auth_headers, q="tonic") == []
+
+
+def test_name_prefix_escapes_regex_metacharacters(client, auth_headers, catalog):
+    assert names(client, auth_headers, q="esp (") == ["Esp (decaf)"]
+    assert names(client, auth_headers, q=".*") == []
+    assert names(client, auth_headers, q="e[") == []
+
+
+def test_price_range(client, auth_headers, catalog):
+    assert names(client, auth_headers, min_price=3.5) == ["espresso tonic", "Latte", "Esp (decaf)"]
+    assert names(client, auth_headers, max_price=3.5) == ["Espresso", "Esp (decaf)"]
+    assert names(client, auth_headers, min_price=3.5, max_price=4.0) == ["Latte", "Esp (decaf)"]
+
+
+@pytest.mark.parametrize("sort, expected", [
+    ("created_at", ["Espresso", "espresso tonic", "Latte", "Esp (decaf)"]),
+    ("-created_at", ["Esp (decaf)", "Latte", "espresso tonic", "Espresso"]),
+    ("price", ["Espresso", "Esp (decaf)", "Latte", "espresso tonic"]),
+    ("-price", ["espresso tonic", "Latte", "Esp (decaf)", "Espresso"]),
+])
+def test_sort_orders(client, auth_headers, catalog, sort, expected):
+    assert names(client, auth_headers, sort=sort) == expected
+
+
+@pytest.mark.parametrize("sort", ["price", "-price", "created_at", "-created_at"])
+def test_cursor_pages_through_equal_prices_without_gaps(client, auth_headers, sort):
+    created = [create_product(client, auth_headers, f"Product {i}", 2.0 if i % 3 else 4.0)["id"] for i in range(10)]
+    whole = [p["id"] for p in client.get("/products/", headers=auth_headers, params={"sort": sort}).json()]
+
+    seen, cursor = [], None
+    for _ in range(len(created)):
+        params = {"sort": sort, "limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/products/", headers=auth_headers, params=params)
+        assert response.status_code == 200, response.text
+        seen += [p["id"] for p in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert seen == whole
+    assert sorted(seen) == sorted(created)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "bm90LWEtcHJpY2V8eHl6"])
+def test_malformed_cursor_is_rejected(client, auth_headers, catalog, cursor):
+    response = client.get("/products/", headers=auth_headers, params={"sort": "price", "limit": 2, "cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor."
@@ -0,0 +1,79 @@
+"""
+Public site serving (routes/site_routes.py) and project name uniqueness.
+"""
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from routes.website_routes import run_site_build_job
+from routes import site_routes
+from utils import job_queue, site_builder, site_cache
+
+
+@pytest.fixture(autouse=True)
+def build_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(site_builder, "SITE_BUILD_DIR", str(tmp_path))
+    site_cache._entries.clear()
+    yield
+    site_cache._entries.clear()
+
+
+def create_website(client, auth_headers, **fields) -> dict:
+    response = client.post("/websites/", headers=auth_headers, json={
+        "template": "modern", "content_json": {"hero": {"headline": "Fresh coffee"}}, **fields,
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def run_queued_builds(db) -> None:
+    while (job := job_queue.claim(db, ["site_build"], "test")) is not None:
+        job_queue.mark_succeeded(db, job, run_site_build_job(db, job))
+
+
+def test_unpublished_draft_is_not_served(client, auth_headers, db):
+    create_website(client, auth_headers, vercel_project_name="bean-there")
+    run_queued_builds(db)
+
+    assert client.get("/sites/bean-there").status_code == 404
+
+
+def test_missing_build_is_queued_not_built_in_request(client, auth_headers, db):
+    create_website(
+        client, auth_headers, vercel_project_name="bean-there", published_url="https://bean-there.example",
+    )
+    db["jobs"].delete_many({})
+
+    response = client.get("/sites/bean-there")
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"]
+    assert db["jobs"].count_documents({"kind": "site_build", "status": "queued"}) == 1
+
+    run_queued_builds(db)
+    response = client.get("/sites/bean-there")
+    assert response.status_code == 200
+    assert "Fresh coffee" in response.text
+
+
+def test_project_names_are_unique_in_the_database(client, auth_headers, db):
+    create_website(client, auth_headers, vercel_project_name="bean-there")
+
+    with pytest.raises(DuplicateKeyError):
+        db["websites"].insert_one({"vercel_project_name": "bean-there"})
+    # Websites without a name don't collide
+    db["websites"].insert_many([{"vercel_project_name": None}, {"vercel_project_name": ""}, {}])
+
+
+def test_stale_site_queues_its_rebuild_once(client, auth_headers, db, monkeypatch):
+    create_website(
+        client, auth_headers, vercel_project_name="bean-there", published_url="https://bean-there.example",
+    )
+    db["jobs"].delete_many({})
+    queued = []
+    monkeypatch.setattr(site_routes, "queue_site_build", lambda db, website, **kw: queued.append(website["_id"]))
+
+    for _ in range(5):
+        assert client.get("/sites/bean-there").status_code == 503
+
+    assert len(queued) == 1
@@ -0,0 +1,60 @@
+"""
+Slow-request profiles (utils/request_profiler.py).
+"""
+
+import time
+from types import SimpleNamespace
+
+from utils import request_profiler
+from utils.request_profiler import ContextThreadPoolExecutor, RequestProfile
+
+
+def test_executor_threads_see_the_submitting_request():
+    profile = RequestProfile("GET", "/dashboard/summary", capture=False)
+    token = request_profiler._current.set(profile)
+    try:
+        with ContextThreadPoolExecutor(max_workers=2) as executor:
+            seen = list(executor.map(lambda _: request_profiler._current.get(), range(4)))
+    finally:
+        request_profiler._current.reset(token)
+
+    assert seen == [profile] * 4
+
+
+def test_only_one_capture_per_thread():
+    first = RequestProfile("GET", "/a", capture=True)
+    second = RequestProfile("GET", "/b", capture=True)
+
+    profiler = request_profiler._start_profiler(first)
+    assert profiler is not None
+    assert request_profiler._start_profiler(second) is None
+    request_profiler._finish_endpoint(first, profiler, time.perf_counter())
+
+    assert first.call_tree
+    again = request_profiler._start_profiler(second)
+    assert again is not None
+    request_profiler._finish_endpoint(second, again, time.perf_counter())
+
+
+def test_profiles_are_read_back_from_the_store(db, monkeypatch):
+    # mongomock can't create capped collections
+    monkeypatch.setattr(request_profiler, "_create_store", lambda db: None)
+    monkeypatch.setattr(request_profiler, "_store_ready", False)
+    records = [
+        RequestProfile("GET", f"/slow/{i}", capture=False).to_dict("/slow/{i}", 200, 1500.0) for i in range(3)
+    ]
+    for record in records:
+        request_profiler._save(record)
+    monkeypatch.setattr(request_profiler, "_records", request_profiler.deque())
+
+    assert [r["id"] for r in request_profiler.recent(2)] == [records[2]["id"], records[1]["id"]]
+    assert request_profiler.get(records[0]["id"])["path"] == "/slow/0"
+    assert request_profiler.get("missing") is None
+
+
+def test_command_collection():
+    find = SimpleNamespace(command_name="find", command={"find": "products"})
+    get_more = SimpleNamespace(command_name="getMore", command={"getMore": 12, "collection": "products"})
+    ping = SimpleNamespace(command_name="ping", command={"ping": 1})
+
+    assert [request_profiler.command_collection(e) for e in (find, get_more, ping)] == ["products", "products", ""]
@@ -0,0 +1,31 @@
+"""
+Production server shutdown (serve.py).
+"""
+
+import asyncio
+import threading
+import time
+
+import uvicorn
+
+import serve
+from utils.llm_resilience import gemini_inflight
+
+
+def test_graceful_wait_covers_in_flight_llm_calls():
+    server = serve.DrainingServer(uvicorn.Config(app=None, timeout_graceful_shutdown=5))
+    server.servers = []
+    started = threading.Event()
+
+    def call():
+        with gemini_inflight.track():
+            started.set()
+            time.sleep(0.3)
+
+    threading.Thread(target=call).start()
+    started.wait()
+    began = time.monotonic()
+    asyncio.run(server._wait_tasks_to_complete())
+
+    assert time.monotonic() - began >= 0.25
+    assert gemini_inflight.count == 0
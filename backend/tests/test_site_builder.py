@@ -0,0 +1,94 @@
+"""
+Static site builds (utils/site_builder.py): full vs incremental rendering.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from bson import ObjectId
+
+from utils import site_builder
+
+BUSINESS = {"business_name": "Bean There", "brand_colors": ["#123456"], "version": 1}
+
+
+@pytest.fixture(autouse=True)
+def build_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(site_builder, "SITE_BUILD_DIR", str(tmp_path))
+
+
+def website(version: int = 1, template: str = "modern", **sections) -> dict:
+    content = {
+        "hero": {"headline": "Fresh coffee"},
+        "about": {"body": "Roasted weekly."},
+        "menu": [{"name": "Espresso"}, {"name": "Latte"}],
+        **sections,
+    }
+    return {"_id": ObjectId("64b000000000000000000001"), "version": version, "template": template,
+            "content_json": content}
+
+
+def fragment_files(site: dict) -> set:
+    return set(os.listdir(os.path.join(site_builder._site_dir(str(site["_id"])), "fragments")))
+
+
+def test_first_build_renders_every_section():
+    manifest = site_builder.build_site(website(), BUSINESS)
+
+    assert manifest["mode"] == "full"
+    assert (manifest["sections_rendered"], manifest["sections_reused"]) == (3, 0)
+
+
+def test_one_section_edit_rerenders_only_that_section():
+    site_builder.build_site(website(1), BUSINESS)
+
+    manifest = site_builder.build_site(website(2, about={"body": "Roasted daily."}), BUSINESS)
+
+    assert manifest["mode"] == "incremental"
+    assert (manifest["sections_rendered"], manifest["sections_reused"]) == (1, 2)
+    page, _ = site_builder.read_page(str(website()["_id"]), 2)
+    assert "Roasted daily." in page
+
+
+def test_theme_change_rerenders_every_section():
+    site_builder.build_site(website(1), BUSINESS)
+
+    manifest = site_builder.build_site(website(2, template="classic"), BUSINESS)
+
+    assert (manifest["sections_rendered"], manifest["sections_reused"]) == (3, 0)
+
+
+def test_forced_full_build_ignores_fragment_cache():
+    site_builder.build_site(website(1), BUSINESS)
+
+    manifest = site_builder.build_site(website(1), BUSINESS, force_full=True)
+
+    assert manifest["mode"] == "full"
+    assert (manifest["sections_rendered"], manifest["sections_reused"]) == (3, 0)
+
+
+def test_unreferenced_fragments_are_pruned(monkeypatch):
+    monkeypatch.setattr(site_builder, "SITE_BUILD_KEEP", 1)
+    site_builder.build_site(website(1), BUSINESS)
+
+    manifest = site_builder.build_site(website(2, template="classic"), BUSINESS)
+
+    assert fragment_files(website()) == {f"{key}.html" for key in manifest["fragments"]}
+
+
+def test_latest_never_moves_back_to_an_older_version():
+    site_builder.build_site(website(3), BUSINESS)
+    site_builder.build_site(website(2), BUSINESS)
+
+    assert site_builder.latest_manifest(str(website()["_id"]))["version"] == 3
+
+
+def test_concurrent_builds_of_the_same_version():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        manifests = list(pool.map(
+            lambda full: site_builder.build_site(website(1), BUSINESS, force_full=full), [True, False] * 8,
+        ))
+
+    assert all(m["sections"] == 3 for m in manifests)
+    assert not [n for n in fragment_files(website()) if n.endswith(".tmp")]
@@ -0,0 +1,94 @@
+"""
+Open/click tracking (utils/tracking.py, routes/tracking_routes.py).
+"""
+
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from utils import tracking
+
+
+class FakeCampaigns:
+    """Stands in for db["campaigns"]: mongomock has no bulk_write of UpdateOne."""
+
+    def __init__(self, failed_indexes=()):
+        self.failed_indexes = failed_indexes
+        self.applied = {}
+
+    def bulk_write(self, requests, ordered=True):
+        for index, request in enumerate(requests):
+            if index not in self.failed_indexes:
+                self.applied[str(request._filter["_id"])] = request._doc["$inc"]
+        if self.failed_indexes:
+            raise BulkWriteError({"writeErrors": [{"index": i, "code": 11000} for i in self.failed_indexes]})
+
+    def distinct(self, key, filter=None):
+        return []
+
+
+class FakeDatabase:
+    def __init__(self, db, campaigns):
+        self.db, self.campaigns = db, campaigns
+
+    def __getitem__(self, name):
+        return self.campaigns if name == "campaigns" else self.db[name]
+
+
+def deliveries(db, campaign_id: str, customer_ids) -> None:
+    db["campaign_deliveries"].insert_many([
+        {"campaign_id": campaign_id, "customer_id": c, "status": "sent", "created_at": datetime.utcnow()}
+        for c in customer_ids
+    ])
+
+
+def aggregator(db, campaigns) -> tracking.TrackingAggregator:
+    tracker = tracking.TrackingAggregator()
+    tracker._get_db = lambda: FakeDatabase(db, campaigns)
+    return tracker
+
+
+@pytest.mark.parametrize("signature", ["%C3%A9", "%C3%A9" * 16, "not-hex"])
+def test_malformed_signatures_are_not_server_errors(client, signature):
+    campaign_id, customer_id = str(ObjectId()), str(ObjectId())
+
+    assert client.get(f"/t/o/{campaign_id}/{customer_id}/{signature}.gif").status_code == 200
+    assert client.get(f"/t/c/{campaign_id}/{customer_id}/{signature}?u=https://example.com").status_code == 404
+
+
+def test_open_counted_once_across_workers(db):
+    campaign_id = str(ObjectId())
+    deliveries(db, campaign_id, ["a", "b"])
+    campaigns = FakeCampaigns()
+    # Two workers, each with its own Bloom filter, see the same recipient
+    first, second = aggregator(db, campaigns), aggregator(db, campaigns)
+    first.record_open(campaign_id, "a")
+    second.record_open(campaign_id, "a")
+    second.record_open(campaign_id, "b")
+
+    first.flush()
+    assert campaigns.applied[campaign_id]["analytics.opened"] == 1
+    second.flush()
+    assert campaigns.applied[campaign_id]["analytics.opened"] == 1
+
+
+def test_partial_bulk_failure_retries_only_failed_campaigns(db):
+    ids = [str(ObjectId()) for _ in range(3)]
+    campaigns = FakeCampaigns(failed_indexes=[1])
+    tracker = aggregator(db, campaigns)
+    for campaign_id in ids:
+        tracker.record_click(campaign_id)
+
+    with pytest.raises(BulkWriteError):
+        tracker.flush()
+
+    assert tracker._counts == {ids[1]: [0, 1]}
+
+
+def test_idle_flush_does_not_connect():
+    tracker = tracking.TrackingAggregator()
+    tracker._get_db = lambda: pytest.fail("flush with nothing pending opened a connection")
+
+    assert tracker.flush() == 0
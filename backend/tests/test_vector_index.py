@@ -0,0 +1,164 @@
+import threading
+
+import numpy as np
+import pytest
+from bson import ObjectId
+
+from utils import vector_index
+
+BUSINESS = "b1"
+
+
+@pytest.fixture(autouse=True)
+def fresh_indexes(monkeypatch):
+    monkeypatch.setattr(vector_index, "_indexes", vector_index.OrderedDict())
+    monkeypatch.setattr(vector_index, "_failed_until", {})
+    monkeypatch.setattr(vector_index, "_load_locks", {})
+
+
+def flush():
+    """Wait for queued background embeddings."""
+    vector_index._updater.submit(lambda: None).result()
+
+
+def new_worker():
+    """Forget this process's in-memory indexes, as a different worker would."""
+    vector_index._indexes.clear()
+
+
+def search(db, query, k=3):
+    index = vector_index.get_index(db, BUSINESS)
+    return [key for key, _, _ in index.search(vector_index.embed([query])[0], k)]
+
+
+def test_local_embedding_is_deterministic_and_normalised():
+    a = vector_index.embed(["premium coffee beans", "weekend barista shifts"])
+    b = vector_index.embed(["premium coffee beans", "weekend barista shifts"])
+    assert a.shape == (2, vector_index.EMBEDDING_DIM)
+    assert np.array_equal(a, b)
+    assert np.allclose(np.linalg.norm(a, axis=1), 1.0)
+
+
+def test_writes_are_visible_to_other_workers(db):
+    vector_index.index_document(BUSINESS, "note:1", "Pricing: premium coffee beans at 20 dollars")
+    vector_index.index_document(BUSINESS, "note:2", "Hire baristas for weekend shifts")
+    flush()
+
+    new_worker()
+    assert search(db, "coffee beans pricing")[0] == "note:1"
+
+
+def test_sync_picks_up_writes_from_another_worker(db, monkeypatch):
+    vector_index.index_document(BUSINESS, "note:1", "Pricing: premium coffee beans")
+    flush()
+    index = vector_index.get_index(db, BUSINESS)
+
+    # Another worker writes and deletes; this worker's index isn't touched
+    monkeypatch.setattr(vector_index, "_indexes", vector_index.OrderedDict())
+    vector_index.index_document(BUSINESS, "note:2", "Hire baristas for weekend shifts")
+    vector_index.remove_documents(BUSINESS, ["note:1"])
+    flush()
+    monkeypatch.setattr(vector_index, "_indexes", vector_index.OrderedDict({BUSINESS: index}))
+
+    index.synced_at = 0  # sync interval elapsed
+    assert search(db, "baristas coffee") == ["note:2"]
+
+
+def test_delete_wins_over_an_embedding_still_in_flight(db):
+    rev = vector_index._record(db, BUSINESS, "product:1", "Espresso", deleted=False)
+    vector_index.remove_documents(BUSINESS, ["product:1"])
+    vector_index._embed_document(BUSINESS, "product:1", rev, "Espresso: strong coffee shot")
+
+    new_worker()
+    assert search(db, "espresso coffee") == []
+    assert db["embeddings"].find_one({"key": "product:1"})["vector"] is None
+
+
+def test_backfill_embeds_documents_that_predate_the_index(db):
+    db["products"].insert_one({"_id": ObjectId(), "business_id": BUSINESS, "name": "Espresso", "price": 3,
+                               "description": "strong coffee shot"})
+    db["assets"].insert_one({"_id": ObjectId(), "business_id": BUSINESS, "type": "note", "name": "hiring",
+                             "content": "hire baristas for weekend shifts"})
+
+    assert len(vector_index.get_index(db, BUSINESS)) == 0
+    assert db["jobs"].find_one({"kind": "vector_backfill", "business_id": BUSINESS})
+
+    assert vector_index.backfill_tenant(db, BUSINESS) == {"embedded": 2}
+    assert vector_index.backfill_tenant(db, BUSINESS) == {"embedded": 0}
+    new_worker()
+    assert search(db, "strong espresso")[0].startswith("product:")
+
+
+def test_lost_embeddings_are_repaired_from_the_full_source_text(db, monkeypatch):
+    note = {"_id": ObjectId(), "business_id": BUSINESS, "type": "note", "name": "menu",
+            "content": "Seasonal menu. " * 100}
+    chat = {"_id": ObjectId(), "business_id": BUSINESS, "message": "Pricing?", "response": "Charge more. " * 100}
+    db["assets"].insert_one(note)
+    db["chatlogs"].insert_one(chat)
+    gone = f"product:{ObjectId()}"
+    long_ago = vector_index.datetime.utcnow() - 2 * vector_index._PENDING_GRACE
+    for key, text in [(f"note:{note['_id']}", vector_index.note_text(note)),
+                      (f"chat:{chat['_id']}", vector_index.chatlog_text(chat)),
+                      (gone, "Product 'Old blend' ($9): discontinued")]:
+        db["embeddings"].insert_one({"business_id": BUSINESS, "key": key, "rev": 1, "deleted": False,
+                                     "snippet": vector_index._snippet(text), "vector": None, "updated_at": long_ago})
+    monkeypatch.setattr(vector_index, "CHATLOG_BACKFILL_LIMIT", 0)  # the chat is outside the recent scan
+    embedded = []
+    real_embed = vector_index.embed
+    monkeypatch.setattr(vector_index, "embed", lambda texts, **kw: embedded.extend(texts) or real_embed(texts, **kw))
+
+    assert vector_index.backfill_tenant(db, BUSINESS) == {"embedded": 3}
+
+    assert sorted(embedded) == sorted([
+        vector_index.note_text(note),
+        vector_index.chatlog_text(chat),
+        "Product 'Old blend' ($9): discontinued",
+    ])
+    assert db["embeddings"].count_documents({"vector": None}) == 0
+
+
+def test_concurrent_first_requests_share_one_load(db, monkeypatch):
+    loads = []
+    real_load = vector_index._load_tenant
+
+    def slow_load(db_, business_id):
+        loads.append(business_id)
+        threading.Event().wait(0.05)
+        return real_load(db_, business_id)
+
+    monkeypatch.setattr(vector_index, "_load_tenant", slow_load)
+    threads = [threading.Thread(target=vector_index.get_index, args=(db, BUSINESS)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert loads == [BUSINESS]
+
+
+def test_failed_load_backs_off(db, monkeypatch):
+    calls = []
+
+    def broken_load(db_, business_id):
+        calls.append(business_id)
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(vector_index, "_load_tenant", broken_load)
+    assert vector_index.retrieve_context(db, BUSINESS, "coffee", token_budget=100) == ""
+    assert vector_index.retrieve_context(db, BUSINESS, "coffee", token_budget=100) == ""
+    assert calls == [BUSINESS]
+
+
+def test_least_recently_used_businesses_are_evicted(db, monkeypatch):
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_MAX_TENANTS", 2)
+    for business_id in ("b1", "b2", "b1", "b3"):
+        vector_index.get_index(db, business_id)
+    assert list(vector_index._indexes) == ["b1", "b3"]
+
+
+def test_retrieved_context_fits_the_token_budget(db):
+    for i in range(20):
+        vector_index.index_document(BUSINESS, f"note:{i}", f"coffee note {i} " + "detail " * 40)
+    flush()
+    context = vector_index.retrieve_context(db, BUSINESS, "coffee note", token_budget=100)
+    assert context
+    assert len(context) <= 400
@@ -0,0 +1,67 @@
+"""
+Website edits and their version records (routes/website_routes.py,
+utils/website_history.py).
+"""
+
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+from bson import ObjectId
+
+
+def create_website(client, auth_headers) -> dict:
+    response = client.post("/websites/", headers=auth_headers, json={
+        "template": "modern", "content_json": {"hero": {"headline": "Hello"}},
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def orphan(db, website_id: str, version: int, age: timedelta) -> None:
+    db["website_versions"].insert_one({
+        "website_id": website_id, "business_id": "x", "version": version, "patch": [],
+        "is_snapshot": False, "snapshot": None, "author": None,
+        "created_at": datetime.utcnow() - age,
+    })
+
+
+def test_failed_website_write_discards_its_version(client, auth_headers, db, monkeypatch):
+    website = create_website(client, auth_headers)
+    update_one = mongomock.collection.Collection.update_one
+
+    def failing(self, filter, update, *args, **kwargs):
+        if self.name == "websites":
+            raise RuntimeError("primary stepped down")
+        return update_one(self, filter, update, *args, **kwargs)
+
+    with monkeypatch.context() as m, pytest.raises(RuntimeError):
+        m.setattr(mongomock.collection.Collection, "update_one", failing)
+        client.patch(f"/websites/{website['id']}", headers=auth_headers, json={"template": "classic"})
+
+    assert db["website_versions"].count_documents({"website_id": website["id"], "version": 2}) == 0
+    retried = client.patch(f"/websites/{website['id']}", headers=auth_headers, json={"template": "classic"})
+    assert retried.status_code == 200
+    assert retried.json()["version"] == 2
+
+
+def test_stale_orphan_version_is_replaced(client, auth_headers, db):
+    website = create_website(client, auth_headers)
+    orphan(db, website["id"], 2, timedelta(minutes=5))
+
+    response = client.patch(f"/websites/{website['id']}", headers=auth_headers, json={"template": "classic"})
+
+    assert response.status_code == 200
+    record = db["website_versions"].find_one({"website_id": website["id"], "version": 2})
+    assert record["patch"] == [{"op": "replace", "path": "/template", "value": "classic"}]
+
+
+def test_recent_version_record_still_blocks_concurrent_edit(client, auth_headers, db):
+    website = create_website(client, auth_headers)
+    orphan(db, website["id"], 2, timedelta(seconds=1))
+
+    response = client.patch(f"/websites/{website['id']}", headers=auth_headers, json={"template": "classic"})
+
+    assert response.status_code == 409
+    assert db["websites"].find_one({"_id": ObjectId(website["id"])})["version"] == 1
@@ -0,0 +1,127 @@
+"""
+utils/blob_store.py
+-------------------
+Local filesystem blob store for Brand Vault files, content-addressed per
+business so the same file uploaded twice is stored once.
+
+Layout under BLOB_STORE_DIR (default ./blob_store):
+  <business_id>/uploads/<upload_id>.part     in-progress resumable uploads
+  <business_id>/blobs/<sha[:2]>/<sha256>     finished, deduplicated content
+
+All functions are blocking file I/O and read/write in fixed-size chunks,
+so memory use stays constant regardless of file size. Call them through
+run_in_threadpool from async routes.
+"""
+
+import hashlib
+import os
+from typing import Iterator, Optional, Tuple
+
+BLOB_STORE_DIR = os.path.abspath(os.getenv("BLOB_STORE_DIR", "blob_store"))
+
+CHUNK_SIZE = 256 * 1024
+
+
+def _tenant_dir(business_id: str) -> str:
+    # business_id is always a str(ObjectId) — reject anything that could escape the root
+    if not business_id.isalnum():
+        raise ValueError("Invalid business ID.")
+    return os.path.join(BLOB_STORE_DIR, business_id)
+
+
+def part_path(business_id: str, upload_id: str) -> str:
+    if not upload_id.isalnum():
+        raise ValueError("Invalid upload ID.")
+    return os.path.join(_tenant_dir(business_id), "uploads", f"{upload_id}.part")
+
+
+def blob_path(business_id: str, sha256: str) -> str:
+    if len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256):
+        raise ValueError("Invalid content hash.")
+    return os.path.join(_tenant_dir(business_id), "blobs", sha256[:2], sha256)
+
+
+def blob_exists(business_id: str, sha256: str) -> bool:
+    return os.path.exists(blob_path(business_id, sha256))
+
+
+def blob_size(business_id: str, sha256: str) -> Optional[int]:
+    """Size in bytes of a stored blob, or None if the tenant doesn't have it."""
+    try:
+        return os.path.getsize(blob_path(business_id, sha256))
+    except FileNotFoundError:
+        return None
+
+
+def start_upload(business_id: str, upload_id: str) -> None:
+    """Create the empty part file for a new upload session."""
+    path = part_path(business_id, upload_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+
+def open_part_for_append(business_id: str, upload_id: str, offset: int):
+    """
+    Open an upload's part file positioned at offset, truncating anything
+    past it (a previous chunk that was cut off mid-transfer).
+    """
+    f = open(part_path(business_id, upload_id), "r+b")
+    f.truncate(offset)
+    f.seek(offset)
+    return f
+
+
+def finalize_upload(business_id: str, upload_id: str) -> Tuple[str, int]:
+    """
+    Hash a completed part file and move it into the content-addressed store.
+    If the tenant already has that content, the part file is discarded.
+
+    Returns (sha256_hex, size_in_bytes).
+    """
+    path = part_path(business_id, upload_id)
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            digest.update(chunk)
+
+    sha256 = digest.hexdigest()
+    target = blob_path(business_id, sha256)
+    if os.path.exists(target):
+        os.remove(path)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+    return sha256, size
+
+
+def discard_upload(business_id: str, upload_id: str) -> None:
+    try:
+        os.remove(part_path(business_id, upload_id))
+    except FileNotFoundError:
+        pass
+
+
+def delete_blob(business_id: str, sha256: str) -> None:
+    try:
+        os.remove(blob_path(business_id, sha256))
+    except FileNotFoundError:
+        pass
+
+
+def iter_blob(business_id: str, sha256: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+    """Yield the bytes in [start, end] (inclusive) of a blob, chunk by chunk."""
+    with open(blob_path(business_id, sha256), "rb") as f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,258 @@
+"""
+utils/campaign_scheduler.py
+---------------------------
+Fires "scheduled" campaigns at their send_at time by queueing a normal
+campaign_send job (utils/campaign_sender.py does the delivery).
+
+  - Due times are kept in an in-memory min-heap, loaded from an indexed
+    (status, send_at) query for the next SCHEDULER_WINDOW campaigns only.
+  - The thread sleeps until the earliest send_at, or until woken by
+    notify() when this process schedules a campaign. Campaigns scheduled
+    by other processes are picked up by a re-query of the same index at
+    most every SCHEDULER_RESYNC_SECONDS — campaigns is never scanned.
+  - Only the holder of the "campaign_scheduler" lease in scheduler_locks
+    fires campaigns, so running several API workers is safe. Firing also
+    flips status scheduled → sending atomically, so even two overlapping
+    leaders cannot queue a campaign twice.
+  - stats() reports drift (how late each campaign fired after send_at)
+    and wake lag (how much later than asked a timed sleep returned, i.e.
+    thread scheduling and GIL delay, not time spent in ticks). Both are
+    also exported as Prometheus histograms (utils/metrics.py).
+
+DB Schema (MongoDB scheduler_locks collection):
+{
+  _id: "campaign_scheduler",
+  owner: str,              # "<host>:<pid>"
+  lease_until: datetime
+}
+
+Settings (.env, optional):
+  SCHEDULER_ENABLED=true
+  SCHEDULER_WINDOW=500           due campaigns held in memory
+  SCHEDULER_RESYNC_SECONDS=60
+  SCHEDULER_LEASE_SECONDS=30
+"""
+
+import heapq
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from utils import etag, job_queue
+from utils.llm_resilience import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_WINDOW = int(os.getenv("SCHEDULER_WINDOW", 500))
+SCHEDULER_RESYNC_SECONDS = float(os.getenv("SCHEDULER_RESYNC_SECONDS", 60))
+SCHEDULER_LEASE_SECONDS = float(os.getenv("SCHEDULER_LEASE_SECONDS", 30))
+
+_LOCK_ID = "campaign_scheduler"
+
+
+class CampaignScheduler:
+    def __init__(self):
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._heap = []  # (send_at, campaign_id)
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._get_db: Optional[Callable] = None
+        self._is_leader = False
+        self._lease_until: Optional[datetime] = None
+        self._synced_at: Optional[datetime] = None
+        self._window_full = False
+        self._woken = False
+        self.drift = LatencyTracker()
+        self.wake_lag = LatencyTracker()
+        self.counters = {"fired": 0, "skipped": 0, "resyncs": 0}
+        self.last_drift_ms: Optional[float] = None
+        self._listeners: List[Callable[[str, float], None]] = []
+
+    # -- public API --------------------------------------------------------
+
+    def notify(self, campaign_id: str, send_at: datetime) -> None:
+        """A campaign was (re)scheduled in this process — wake up if it is sooner."""
+        with self._cond:
+            # Followers never fire; the leader's resync picks the campaign up
+            if not self._is_leader:
+                return
+            heapq.heappush(self._heap, (send_at, campaign_id))
+            self._woken = True
+            self._cond.notify()
+
+    def add_listener(self, callback: Callable[[str, float], None]) -> None:
+        """Register callback(kind, seconds) for every "drift" and "wake_lag" sample."""
+        self._listeners.append(callback)
+
+    def start(self, get_db: Callable) -> None:
+        if not SCHEDULER_ENABLED:
+            return
+        # Set here, not at import: a preloaded app is forked into workers
+        # that must each hold the lease under their own pid
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._get_db = get_db
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="campaign-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+        if self._is_leader:
+            try:
+                self._get_db()["scheduler_locks"].update_one(
+                    {"_id": _LOCK_ID, "owner": self._owner},
+                    {"$set": {"lease_until": datetime.utcnow()}},
+                )
+            except Exception:
+                logger.exception("Releasing scheduler lease failed")
+
+    def stats(self) -> dict:
+        with self._cond:
+            next_due = self._heap[0][0] if self._heap else None
+            pending = len(self._heap)
+        drift_p50, drift_p95 = self.drift.percentile(50), self.drift.percentile(95)
+        lag_p95 = self.wake_lag.percentile(95)
+        return {
+            "enabled": SCHEDULER_ENABLED,
+            "leader": self._is_leader,
+            "owner": self._owner,
+            "pending_in_memory": pending,
+            "next_due": next_due,
+            "last_drift_ms": self.last_drift_ms,
+            "drift_ms_p50": round(drift_p50 * 1000, 1) if drift_p50 is not None else None,
+            "drift_ms_p95": round(drift_p95 * 1000, 1) if drift_p95 is not None else None,
+            "wake_lag_ms_p95": round(lag_p95 * 1000, 1) if lag_p95 is not None else None,
+            **self.counters,
+        }
+
+    # -- leadership ----------------------------------------------------------
+
+    def _renew_lease(self, db, now: datetime) -> bool:
+        try:
+            lock = db["scheduler_locks"].find_one_and_update(
+                {"_id": _LOCK_ID, "$or": [{"owner": self._owner}, {"lease_until": {"$lt": now}}]},
+                {"$set": {"owner": self._owner, "lease_until": now + timedelta(seconds=SCHEDULER_LEASE_SECONDS)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # Someone else holds an unexpired lease (the upsert lost the race)
+            lock = None
+        became_leader = lock is not None and not self._is_leader
+        self._is_leader = lock is not None
+        self._lease_until = lock["lease_until"] if lock else None
+        if became_leader:
+            logger.info("Campaign scheduler: %s is now the leader", self._owner)
+            self._synced_at = None  # load the heap from scratch
+        return self._is_leader
+
+    # -- main loop -----------------------------------------------------------
+
+    def _resync(self, db, now: datetime) -> None:
+        """Reload the next SCHEDULER_WINDOW due campaigns from the (status, send_at) index."""
+        due = db["campaigns"].find(
+            {"status": "scheduled", "send_at": {"$ne": None}},
+            {"send_at": 1},
+        ).sort("send_at", 1).limit(SCHEDULER_WINDOW)
+        heap = [(c["send_at"], str(c["_id"])) for c in due]
+        self._window_full = len(heap) >= SCHEDULER_WINDOW
+        heapq.heapify(heap)
+        with self._cond:
+            self._heap = heap
+        self._synced_at = now
+        self.counters["resyncs"] += 1
+
+    def _fire(self, db, campaign_id: str, now: datetime) -> None:
+        campaign = db["campaigns"].find_one_and_update(
+            {"_id": ObjectId(campaign_id), "status": "scheduled", "send_at": {"$lte": now}},
+            {"$set": {"status": "sending"}},
+            projection={"business_id": 1, "send_at": 1},
+        )
+        if campaign is None:
+            # Rescheduled, cancelled, deleted or already fired by another leader
+            self.counters["skipped"] += 1
+            return
+        # force: a send job that already succeeded must run again, or the campaign stays "sending"
+        job_queue.enqueue(
+            db, "campaign_send", campaign["business_id"], campaign_id, {"campaign_id": campaign_id}, force=True,
+        )
+        etag.bump(db, campaign["business_id"], "campaigns")
+        drift = (datetime.utcnow() - campaign["send_at"]).total_seconds()
+        self._observe("drift", self.drift, drift)
+        self.counters["fired"] += 1
+        self.last_drift_ms = round(drift * 1000, 1)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                wait = self._tick()
+            except Exception:
+                logger.exception("Campaign scheduler tick failed")
+                wait = SCHEDULER_LEASE_SECONDS / 3
+            with self._cond:
+                # A notify() that arrived during the tick must not be slept through
+                if wait > 0 and not self._woken and not self._stop.is_set():
+                    wake_at = time.monotonic() + wait
+                    if not self._cond.wait(wait):
+                        self._observe("wake_lag", self.wake_lag, max(0.0, time.monotonic() - wake_at))
+                self._woken = False
+
+    def _observe(self, kind: str, tracker: LatencyTracker, seconds: float) -> None:
+        tracker.record(seconds)
+        for callback in self._listeners:
+            try:
+                callback(kind, seconds)
+            except Exception:
+                logger.exception("Campaign scheduler listener failed")
+
+    def _tick(self) -> float:
+        """Fire everything due; return how long to sleep before the next tick."""
+        db = self._get_db()
+        now = datetime.utcnow()
+
+        # Renew well before expiry; non-leaders retry at the same cadence
+        if self._lease_until is None or self._lease_until - now < timedelta(seconds=SCHEDULER_LEASE_SECONDS * 2 / 3):
+            if not self._renew_lease(db, now):
+                return SCHEDULER_LEASE_SECONDS / 3
+
+        if self._synced_at is None or (now - self._synced_at).total_seconds() >= SCHEDULER_RESYNC_SECONDS:
+            self._resync(db, now)
+
+        while True:
+            with self._cond:
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, campaign_id = heapq.heappop(self._heap)
+            self._fire(db, campaign_id, now)
+
+        with self._cond:
+            next_due = self._heap[0][0] if self._heap else None
+        if next_due is None and self._window_full:
+            # Drained a full window — more campaigns may be waiting beyond it
+            self._synced_at = None
+            return 0.0
+        deadlines = [
+            SCHEDULER_RESYNC_SECONDS - (now - self._synced_at).total_seconds(),
+            (self._lease_until - now).total_seconds() - SCHEDULER_LEASE_SECONDS * 2 / 3,
+        ]
+        if next_due is not None:
+            deadlines.append((next_due - now).total_seconds())
+        return max(0.0, min(deadlines))
+
+
+scheduler = CampaignScheduler()
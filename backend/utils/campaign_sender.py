@@ -0,0 +1,259 @@
+"""
+utils/campaign_sender.py
+------------------------
+Campaign send engine, run by the job queue (kind "campaign_send").
+
+  1. Streams the tenant's customers from a cursor in batches of
+     CAMPAIGN_BATCH_SIZE — the full list is never loaded into memory.
+  2. Claims each batch in campaign_deliveries (unique per campaign +
+     customer) before sending, so a retried or reclaimed job never emails
+     anyone twice; only recipients whose delivery failed transiently are
+     retried. Permanent rejections (5xx replies, a message that can't be
+     built) are recorded as "rejected" and never retried.
+  3. Renders each batch from subject/body templates compiled once per
+     send (utils/campaign_template.py): plain text, plus an HTML part with
+     tracked links and an open pixel (utils/tracking.py). Delivers through
+     the shared SMTP pool (utils/mailer.py) on CAMPAIGN_SEND_CONCURRENCY
+     threads, throttled by a per-tenant token bucket
+     (CAMPAIGN_RATE_PER_SECOND).
+  4. Records results and applies one $inc to analytics.sent per batch.
+
+The rate limit is per API process; with several processes each one
+enforces it separately.
+
+DB Schema (MongoDB campaign_deliveries collection):
+{
+  _id: ObjectId,
+  campaign_id: str,
+  customer_id: str,
+  business_id: str,
+  email: str,
+  status: "sending" | "sent" | "failed" | "rejected",   # failed = retryable
+  error: str | None,
+  created_at: datetime,
+  sent_at: datetime | None,
+  opened_at: datetime | None         # first open, set by utils/tracking.py
+}
+
+Settings (.env, optional):
+  CAMPAIGN_BATCH_SIZE=100
+  CAMPAIGN_SEND_CONCURRENCY=4
+  CAMPAIGN_RATE_PER_SECOND=10     per tenant
+"""
+
+import os
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from utils.campaign_template import compile_template
+from utils.mailer import build_message, smtp_pool
+from utils.tracking import html_body
+
+CAMPAIGN_BATCH_SIZE = int(os.getenv("CAMPAIGN_BATCH_SIZE", 100))
+CAMPAIGN_SEND_CONCURRENCY = int(os.getenv("CAMPAIGN_SEND_CONCURRENCY", 4))
+CAMPAIGN_RATE_PER_SECOND = float(os.getenv("CAMPAIGN_RATE_PER_SECOND", 10))
+
+_send_executor = ThreadPoolExecutor(max_workers=CAMPAIGN_SEND_CONCURRENCY, thread_name_prefix="campaign-send")
+
+
+# ---------------------------------------------------------------------------
+# Per-tenant rate limiting
+# ---------------------------------------------------------------------------
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, bursts up to `rate`."""
+
+    def __init__(self, rate: float):
+        self._rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._rate, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def _bucket(business_id: str) -> TokenBucket:
+    with _buckets_lock:
+        bucket = _buckets.get(business_id)
+        if bucket is None:
+            bucket = _buckets[business_id] = TokenBucket(CAMPAIGN_RATE_PER_SECOND)
+        return bucket
+
+
+# ---------------------------------------------------------------------------
+# Sending
+# ---------------------------------------------------------------------------
+
+def _claim_batch(db, campaign: dict, customers: list) -> list:
+    """Insert delivery records; return only the customers this run now owns."""
+    now = datetime.utcnow()
+    campaign_id = str(campaign["_id"])
+    docs = [
+        {
+            "campaign_id": campaign_id,
+            "customer_id": str(c["_id"]),
+            "business_id": campaign["business_id"],
+            "email": c["email"],
+            "status": "sending",
+            "error": None,
+            "created_at": now,
+            "sent_at": None,
+        }
+        for c in customers
+    ]
+    try:
+        db["campaign_deliveries"].insert_many(docs, ordered=False)
+        return customers
+    except BulkWriteError as e:
+        taken = {err["index"] for err in e.details.get("writeErrors", []) if err.get("code") == 11000}
+        if len(taken) != len(e.details.get("writeErrors", [])):
+            raise
+
+    # Already claimed by an earlier attempt: retry the ones that failed,
+    # skip the rest (sent, or possibly sent before a crash)
+    taken_ids = [str(customers[i]["_id"]) for i in taken]
+    retry_ids = {
+        d["customer_id"]
+        for d in db["campaign_deliveries"].find(
+            {"campaign_id": campaign_id, "customer_id": {"$in": taken_ids}, "status": "failed"},
+            {"customer_id": 1},
+        )
+    }
+    if retry_ids:
+        db["campaign_deliveries"].update_many(
+            {"campaign_id": campaign_id, "customer_id": {"$in": list(retry_ids)}, "status": "failed"},
+            {"$set": {"status": "sending", "error": None}},
+        )
+    return [c for i, c in enumerate(customers) if i not in taken or str(c["_id"]) in retry_ids]
+
+
+def is_permanent(error: Exception) -> bool:
+    """True for SMTP rejections another attempt can't fix (5xx replies)."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def _describe(error: Exception) -> str:
+    return str(error) or error.__class__.__name__
+
+
+def _deliver(campaign: dict, customer: dict, subject: str, text: str) -> Tuple[str, Optional[str]]:
+    """Build and send one recipient's message; return (delivery status, error)."""
+    try:
+        message = build_message(
+            customer["email"],
+            subject,
+            text,
+            campaign["sender_name"],
+            campaign.get("reply_to"),
+            html=html_body(text, str(campaign["_id"]), str(customer["_id"])),
+        )
+    except Exception as e:
+        # Bad address or content: the same message fails the same way next time
+        return "rejected", _describe(e)
+
+    _bucket(campaign["business_id"]).acquire()
+    try:
+        smtp_pool.send(message)
+    except Exception as e:
+        return ("rejected" if is_permanent(e) else "failed"), _describe(e)
+    return "sent", None
+
+
+def _record_results(db, campaign: dict, owned: list, results: list) -> None:
+    campaign_id = str(campaign["_id"])
+    sent_ids = [str(c["_id"]) for c, (result, _) in zip(owned, results) if result == "sent"]
+    if sent_ids:
+        db["campaign_deliveries"].update_many(
+            {"campaign_id": campaign_id, "customer_id": {"$in": sent_ids}},
+            {"$set": {"status": "sent", "sent_at": datetime.utcnow()}},
+        )
+        db["campaigns"].update_one({"_id": campaign["_id"]}, {"$inc": {"analytics.sent": len(sent_ids)}})
+    for customer, (result, error) in zip(owned, results):
+        if result != "sent":
+            db["campaign_deliveries"].update_one(
+                {"campaign_id": campaign_id, "customer_id": str(customer["_id"])},
+                {"$set": {"status": result, "error": error}},
+            )
+
+
+def _send_batch(db, campaign: dict, templates: tuple, customers: list) -> tuple:
+    """Returns (sent, failed, rejected, skipped) counts for the batch."""
+    owned = _claim_batch(db, campaign, customers)
+    try:
+        subjects = templates[0].render_batch(owned)
+        bodies = templates[1].render_batch(owned)
+        results = list(_send_executor.map(lambda args: _deliver(campaign, *args), zip(owned, subjects, bodies)))
+    except Exception as e:
+        # Never leave claimed rows in "sending": a later attempt skips those
+        _record_results(db, campaign, owned, [("failed", _describe(e))] * len(owned))
+        raise
+    _record_results(db, campaign, owned, results)
+
+    counts = [sum(1 for result, _ in results if result == status) for status in ("sent", "failed", "rejected")]
+    return (*counts, len(customers) - len(owned))
+
+
+def send_campaign(db, campaign: dict, on_batch: Optional[Callable[[], None]] = None) -> dict:
+    """
+    Send a campaign to every customer of its business and return stats.
+    on_batch is called after each batch (e.g. to extend the job lease).
+    """
+    started = time.perf_counter()
+    totals = [0, 0, 0, 0]   # sent, failed, rejected, skipped
+
+    business = db["businesses"].find_one({"_id": ObjectId(campaign["business_id"])}) or {}
+    templates = (
+        compile_template(campaign["subject"], business),
+        compile_template(campaign["body"], business),
+    )
+
+    cursor = (
+        db["customers"]
+        .find({"business_id": campaign["business_id"]}, {"name": 1, "email": 1})
+        .sort("_id", 1)
+        .batch_size(CAMPAIGN_BATCH_SIZE)
+    )
+    batch = []
+    for customer in cursor:
+        batch.append(customer)
+        if len(batch) >= CAMPAIGN_BATCH_SIZE:
+            totals = [t + n for t, n in zip(totals, _send_batch(db, campaign, templates, batch))]
+            batch = []
+            if on_batch:
+                on_batch()
+    if batch:
+        totals = [t + n for t, n in zip(totals, _send_batch(db, campaign, templates, batch))]
+
+    sent, failed, rejected, skipped = totals
+    elapsed = time.perf_counter() - started
+    return {
+        "sent": sent,
+        "failed": failed,
+        "rejected": rejected,
+        "skipped": skipped,
+        "duration_seconds": round(elapsed, 3),
+        "messages_per_second": round(sent / elapsed, 2) if elapsed > 0 else 0.0,
+    }
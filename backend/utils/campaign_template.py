@@ -0,0 +1,156 @@
+"""
+utils/campaign_template.py
+--------------------------
+Template language for campaign subjects and bodies.
+
+  Hi {{ customer.first_name | default("there") }},
+  Thanks for shopping at {{ business.business_name }} in {{ business.location }}!
+
+Placeholders:
+  customer.name, customer.first_name, customer.last_name, customer.email
+  business.<field> for the fields in BUSINESS_FIELDS
+  {{name}}, {{first_name}}, {{email}} are accepted as short forms of customer.*
+
+Filters (chainable with |): default("text"), upper, lower, title
+
+compile_template() parses a template once per campaign. Business fields
+are constant for a send, so they are baked into the compiled template;
+only customer fields are looked up per recipient, and each render is a
+single str.format call. Unknown fields or bad syntax raise
+TemplateError (a ValueError) at compile time, so mistakes are caught when
+the campaign is saved rather than mid-send.
+"""
+
+import re
+from typing import Callable, List, Optional
+
+BUSINESS_FIELDS = (
+    "business_name",
+    "category",
+    "description",
+    "target_audience",
+    "offerings",
+    "location",
+    "brand_tone",
+    "logo_url",
+)
+
+_CUSTOMER_FIELDS = {
+    "name": lambda c: c.get("name") or "",
+    "first_name": lambda c: (c.get("name") or "").split(" ")[0],
+    "last_name": lambda c: (c.get("name") or "").partition(" ")[2],
+    "email": lambda c: c.get("email") or "",
+}
+_ALIASES = {"name": "customer.name", "first_name": "customer.first_name", "email": "customer.email"}
+
+_TAG_RE = re.compile(r"{{(.*?)}}", re.DOTALL)
+_FILTER_RE = re.compile(r'^(\w+)(?:\(\s*"((?:[^"\\]|\\.)*)"\s*\))?$')
+_SIMPLE_FILTERS = {"upper": str.upper, "lower": str.lower, "title": str.title}
+
+
+class TemplateError(ValueError):
+    """The template has bad syntax or refers to an unknown field."""
+
+
+class CompiledTemplate:
+    """A template ready to render per recipient (see compile_template)."""
+
+    def __init__(self, fmt: str, getters: List[Callable[[dict], str]]):
+        self._fmt = fmt
+        self._getters = getters
+
+    def render(self, customer: dict) -> str:
+        if not self._getters:
+            return self._fmt
+        return self._fmt.format(*[get(customer) for get in self._getters])
+
+    def render_batch(self, customers: list) -> List[str]:
+        if not self._getters:
+            return [self._fmt] * len(customers)
+        fmt, getters = self._fmt.format, self._getters
+        return [fmt(*[get(c) for get in getters]) for c in customers]
+
+
+def _split_pipes(tag: str) -> List[str]:
+    """Split a tag on "|" outside double quotes, so default("a|b") stays whole."""
+    parts, start, quoted, escaped = [], 0, False, False
+    for i, char in enumerate(tag):
+        if escaped:
+            escaped = False
+        elif char == "\\" and quoted:
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif char == "|" and not quoted:
+            parts.append(tag[start:i])
+            start = i + 1
+    if quoted:
+        raise TemplateError("Unterminated string in template tag.")
+    parts.append(tag[start:])
+    return parts
+
+
+def _parse_filters(parts: List[str]) -> List[Callable[[str], str]]:
+    filters = []
+    for part in parts:
+        match = _FILTER_RE.match(part.strip())
+        if not match:
+            raise TemplateError(f"Invalid filter '{part.strip()}'.")
+        name, arg = match.group(1), match.group(2)
+        if name == "default":
+            if arg is None:
+                raise TemplateError('default needs a value, e.g. default("there").')
+            fallback = arg.replace('\\"', '"')
+            filters.append(lambda v, fallback=fallback: v or fallback)
+        elif name in _SIMPLE_FILTERS and arg is None:
+            filters.append(_SIMPLE_FILTERS[name])
+        else:
+            raise TemplateError(f"Unknown filter '{name}'.")
+    return filters
+
+
+def _apply(value: str, filters: List[Callable[[str], str]]) -> str:
+    for f in filters:
+        value = f(value)
+    return value
+
+
+def _literal(text: str) -> str:
+    """Escape literal text for str.format, rejecting stray tag delimiters."""
+    if "{{" in text or "}}" in text:
+        raise TemplateError("Unbalanced '{{' / '}}' in template.")
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def compile_template(template: str, business: Optional[dict] = None) -> CompiledTemplate:
+    """
+    Compile a template. With business=None, business fields render empty
+    (use this to validate a template before a business is at hand).
+    """
+    business = business or {}
+    fmt_parts, getters = [], []
+    last = 0
+    for match in _TAG_RE.finditer(template):
+        fmt_parts.append(_literal(template[last:match.start()]))
+        last = match.end()
+
+        expression, *filter_parts = _split_pipes(match.group(1))
+        field = expression.strip()
+        field = _ALIASES.get(field, field)
+        filters = _parse_filters(filter_parts)
+        scope, _, name = field.partition(".")
+
+        if scope == "customer" and name in _CUSTOMER_FIELDS:
+            getter = _CUSTOMER_FIELDS[name]
+            if filters:
+                getter = lambda c, getter=getter, filters=filters: _apply(getter(c), filters)
+            fmt_parts.append("{}")
+            getters.append(getter)
+        elif scope == "business" and name in BUSINESS_FIELDS:
+            value = _apply(str(business.get(name) or ""), filters)
+            fmt_parts.append(value.replace("{", "{{").replace("}", "}}"))
+        else:
+            raise TemplateError(f"Unknown placeholder '{{{{ {field} }}}}'.")
+
+    fmt_parts.append(_literal(template[last:]))
+    return CompiledTemplate("".join(fmt_parts), getters)
@@ -0,0 +1,98 @@
+"""
+utils/catalog_stats.py
+----------------------
+Price statistics for a business's product catalog (GET /products/stats).
+
+Prices are read once per catalog change by a price-only query hinted to
+the (business_id, price, _id) index: the plan is always a covered index
+scan that returns prices already in order, in large batches, straight
+into a NumPy array. (A $group/$push of every price hits the 16 MB
+document limit on large catalogs, and $percentile needs MongoDB 7.) The array is cached per business
+alongside the products change counter (utils/etag.py), so any product
+write invalidates it on every worker without explicit calls. Percentiles
+and band counts are then computed from the cached array in a few
+milliseconds, even for a million products.
+
+  CATALOG_STATS_CACHE_BUSINESSES=32   (optional) catalogs kept in memory
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from pymongo import ASCENDING
+
+CATALOG_STATS_CACHE_BUSINESSES = int(os.getenv("CATALOG_STATS_CACHE_BUSINESSES", 32))
+
+PERCENTILES = (10, 25, 50, 75, 90, 95, 99)
+
+_FETCH_BATCH_SIZE = 50_000
+_PRICE_INDEX = [("business_id", ASCENDING), ("price", ASCENDING), ("_id", ASCENDING)]
+
+_lock = threading.Lock()
+_prices: "OrderedDict[str, tuple]" = OrderedDict()  # business_id -> (etag, sorted prices)
+
+
+def load_prices(db, business_id: str, etag: str) -> np.ndarray:
+    """Sorted float64 array of the business's product prices, cached per etag."""
+    with _lock:
+        cached = _prices.get(business_id)
+        if cached is not None and cached[0] == etag:
+            _prices.move_to_end(business_id)
+            return cached[1]
+
+    cursor = db["products"].find(
+        {"business_id": business_id}, {"price": 1, "_id": 0}
+    ).hint(_PRICE_INDEX).sort("price", ASCENDING).batch_size(_FETCH_BATCH_SIZE)
+    prices = np.array([p.get("price") or 0.0 for p in cursor], dtype=np.float64)
+    # Already in index order (missing prices sort first, as 0.0); a stable
+    # sort of sorted input is a single linear pass
+    prices.sort(kind="stable")
+
+    with _lock:
+        _prices[business_id] = (etag, prices)
+        _prices.move_to_end(business_id)
+        while len(_prices) > CATALOG_STATS_CACHE_BUSINESSES:
+            _prices.popitem(last=False)
+    return prices
+
+
+def price_stats(prices: np.ndarray, bands: int = 10, edges: Optional[List[float]] = None) -> dict:
+    """
+    Summary of a sorted price array. Bands are `bands` equal-width ranges
+    between the lowest and highest price, or the ranges between the given
+    edges plus an open-ended band above the last edge.
+    """
+    if prices.size == 0:
+        return {
+            "count": 0, "min": None, "max": None, "mean": None, "median": None,
+            "percentiles": {}, "bands": [],
+        }
+
+    values = np.percentile(prices, PERCENTILES)
+    if edges:
+        bounds = np.asarray(sorted(edges), dtype=np.float64)
+        positions = np.searchsorted(prices, bounds, side="left")
+        band_list = [{"min": None, "max": float(bounds[0]), "count": int(positions[0])}] if positions[0] else []
+        for i in range(len(bounds)):
+            upper = float(bounds[i + 1]) if i + 1 < len(bounds) else None
+            end = positions[i + 1] if i + 1 < len(bounds) else prices.size
+            band_list.append({"min": float(bounds[i]), "max": upper, "count": int(end - positions[i])})
+    else:
+        counts, bin_edges = np.histogram(prices, bins=bands)
+        band_list = [
+            {"min": round(float(bin_edges[i]), 4), "max": round(float(bin_edges[i + 1]), 4), "count": int(counts[i])}
+            for i in range(len(counts))
+        ]
+
+    return {
+        "count": int(prices.size),
+        "min": float(prices[0]),
+        "max": float(prices[-1]),
+        "mean": round(float(prices.mean()), 4),
+        "median": round(float(values[PERCENTILES.index(50)]), 4),
+        "percentiles": {f"p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, values)},
+        "bands": band_list,
+    }
@@ -9,31 +9,80 @@ Setup:
    CLOUDINARY_CLOUD_NAME=your_cloud_name
    CLOUDINARY_API_KEY=your_api_key
    CLOUDINARY_API_SECRET=your_api_secret
+   LOGO_UPLOAD_CONCURRENCY=4          (optional, uploads in flight per worker)
+
+The Cloudinary SDK is blocking, so async routes must use
+upload_logo_async(), which runs the upload on a bounded thread pool and
+leaves the event loop free.
+
+The SDK is imported and configured on the first upload, not at import time.
 """
 
-import cloudinary
-import cloudinary.uploader
+import asyncio
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Configure Cloudinary from environment variables
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
+LOGO_UPLOAD_CONCURRENCY = int(os.getenv("LOGO_UPLOAD_CONCURRENCY", 4))
+LOGO_UPLOAD_TIMEOUT_SECONDS = int(os.getenv("LOGO_UPLOAD_TIMEOUT_SECONDS", 60))
+
+# Uploads beyond the concurrency limit queue here instead of blocking the loop
+_upload_executor = ThreadPoolExecutor(
+    max_workers=LOGO_UPLOAD_CONCURRENCY,
+    thread_name_prefix="cloudinary-upload",
 )
 
+_uploader = None
+_uploader_lock = threading.Lock()
+
+
+def _get_uploader():
+    """Import and configure the Cloudinary SDK on first use."""
+    global _uploader
+
+    if _uploader is None:
+        with _uploader_lock:
+            if _uploader is None:
+                import cloudinary
+                import cloudinary.uploader
+                import cloudinary.utils
+
+                # Configure Cloudinary from environment variables
+                cloudinary.config(
+                    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+                    api_key=os.getenv("CLOUDINARY_API_KEY"),
+                    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+                    secure=True
+                )
 
-def upload_logo(file_bytes: bytes, filename: str) -> str:
+                # The SDK builds its upload connector at import time with urllib3's
+                # default of one pooled connection per host, so concurrent uploads
+                # would each open (and throw away) a fresh TLS connection. It has no
+                # option for the pool size, so rebuild the connector with the SDK's
+                # own factory (keeping its proxy and TCP keep-alive handling, now
+                # with the config above) and a pool sized to the upload concurrency.
+                # uploader._http is private: requirements.txt pins cloudinary<2,
+                # and this must be re-checked when that pin moves.
+                cloudinary.uploader._http = cloudinary.utils.get_http_connector(
+                    cloudinary.config(),
+                    {**cloudinary.CERT_KWARGS, "maxsize": LOGO_UPLOAD_CONCURRENCY, "block": True},
+                )
+                _uploader = cloudinary.uploader
+    return _uploader
+
+
+def upload_logo(file_bytes: bytes, filename: str, public_id: Optional[str] = None) -> str:
     """
     Upload a logo image to Cloudinary.
 
     Args:
         file_bytes: Raw bytes of the uploaded file
-        filename: Original filename (used for public_id)
+        filename: Original filename (used for public_id if none is given)
+        public_id: Explicit Cloudinary public_id (without folder prefix)
 
     Returns:
         str: The secure URL of the uploaded image
@@ -42,9 +91,9 @@ def upload_logo(file_bytes: bytes, filename: str) -> str:
         Exception: If upload fails
     """
     # Strip extension from filename to use as public_id
-    public_id = f"bizsolve/logos/{filename.rsplit('.', 1)[0]}"
+    public_id = f"bizsolve/logos/{public_id or filename.rsplit('.', 1)[0]}"
 
-    result = cloudinary.uploader.upload(
+    result = _get_uploader().upload(
         file_bytes,
         public_id=public_id,
         overwrite=True,
@@ -53,7 +102,18 @@ def upload_logo(file_bytes: bytes, filename: str) -> str:
             {"width": 500, "height": 500, "crop": "limit"},  # Max 500x500
             {"quality": "auto"},                               # Auto compress
             {"fetch_format": "auto"},                          # Auto format (webp etc)
-        ]
+        ],
+        timeout=LOGO_UPLOAD_TIMEOUT_SECONDS,
     )
 
-    return result["secure_url"]
\ No newline at end of file
+    return result["secure_url"]
+
+
+async def upload_logo_async(file_bytes: bytes, filename: str, public_id: Optional[str] = None) -> str:
+    """
+    Non-blocking wrapper around upload_logo() for async routes.
+    Runs on the bounded upload pool; other requests keep being served
+    while the upload is in flight.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_upload_executor, upload_logo, file_bytes, filename, public_id)
\ No newline at end of file
@@ -0,0 +1,216 @@
+"""
+utils/compression.py
+--------------------
+Response compression middleware (zstd / brotli / gzip), negotiated from
+the client's Accept-Encoding header.
+
+  - only text-like content types (JSON, text/*, SVG, JS) are compressed
+  - bodies under COMPRESSION_MIN_BYTES are sent as-is
+  - single-body responses are compressed in one shot; bodies of at least
+    COMPRESSION_OFFLOAD_BYTES are compressed in a worker thread so large
+    payloads never stall the event loop
+  - streaming responses (SSE, chunked) are compressed chunk by chunk and
+    flushed after every chunk, so clients still see events immediately
+  - byte-range responses (Accept-Ranges / Content-Range) are left alone,
+    since ranges refer to the uncompressed bytes
+  - ETags on compressed responses are weakened (W/"..."); utils/etag.py
+    already matches weak validators from If-None-Match
+
+brotli and zstandard are optional; without them only gzip is offered.
+
+Settings (.env, optional):
+  COMPRESSION_MIN_BYTES=1024
+  COMPRESSION_OFFLOAD_BYTES=262144
+  COMPRESSION_GZIP_LEVEL=6        1-9
+  COMPRESSION_BROTLI_QUALITY=4    0-11
+  COMPRESSION_ZSTD_LEVEL=3        1-22
+"""
+
+import os
+import zlib
+from typing import Optional
+
+import anyio
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", 1024))
+COMPRESSION_OFFLOAD_BYTES = int(os.getenv("COMPRESSION_OFFLOAD_BYTES", 256 * 1024))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 4))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", 3))
+
+_COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+
+
+# ---------------------------------------------------------------------------
+# Codecs
+# ---------------------------------------------------------------------------
+
+class _GzipStream:
+    def __init__(self):
+        self._c = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+class _BrotliStream:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self) -> bytes:
+        return self._c.finish()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._c.flush()
+
+
+def _gzip(body: bytes) -> bytes:
+    return zlib.compress(body, COMPRESSION_GZIP_LEVEL, wbits=31)
+
+
+# encoding → (one-shot compress, streaming compressor), in server preference order
+CODECS = {"gzip": (_gzip, _GzipStream)}
+if brotli is not None:
+    CODECS = {"br": (lambda body: brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY), _BrotliStream), **CODECS}
+if zstandard is not None:
+    CODECS = {
+        "zstd": (lambda body: zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL).compress(body), _ZstdStream),
+        **CODECS,
+    }
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Pick the preferred supported encoding the client accepts (q > 0)."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for encoding in CODECS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _is_compressible(headers: dict) -> bool:
+    if "content-encoding" in headers or "content-range" in headers or "accept-ranges" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return content_type.startswith("text/") or content_type in _COMPRESSIBLE_TYPES
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; WebSocket and lifespan traffic pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope["headers"]}
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        compress, stream_cls = CODECS[encoding]
+        start_message = None
+        stream = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, stream, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if stream is not None:
+                data = stream.chunk(body) if body else b""
+                if not more_body:
+                    data += stream.finish()
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+
+            # First body message: decide how to send this response
+            headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in start_message["headers"]}
+            if not _is_compressible(headers) or (not more_body and len(body) < COMPRESSION_MIN_BYTES):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            raw_headers = [(k, v) for k, v in start_message["headers"] if k.lower() not in (b"content-length", b"etag", b"vary")]
+            raw_headers.append((b"content-encoding", encoding.encode("latin-1")))
+            vary = headers.get("vary")
+            raw_headers.append((b"vary", f"{vary}, Accept-Encoding".encode("latin-1") if vary else b"Accept-Encoding"))
+            if "etag" in headers:
+                tag = headers["etag"]
+                raw_headers.append((b"etag", (tag if tag.startswith("W/") else f"W/{tag}").encode("latin-1")))
+
+            if more_body:
+                stream = stream_cls()
+                await send({**start_message, "headers": raw_headers})
+                await send({"type": "http.response.body", "body": stream.chunk(body) if body else b"", "more_body": True})
+                return
+
+            if len(body) >= COMPRESSION_OFFLOAD_BYTES:
+                data = await anyio.to_thread.run_sync(compress, body)
+            else:
+                data = compress(body)
+            raw_headers.append((b"content-length", str(len(data)).encode("latin-1")))
+            await send({**start_message, "headers": raw_headers})
+            await send({"type": "http.response.body", "body": data})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,70 @@
+"""
+utils/etag.py
+-------------
+Conditional GET support (ETag / If-None-Match → 304) for resource endpoints.
+
+ETags are derived from cheap metadata rather than response bodies:
+  - list endpoints use a per-business change counter per collection
+    (change_counters collection, one tiny document per business+collection,
+    looked up by _id), bumped by every write route
+  - single documents use their own version / updated_at where they have one
+
+Counters are read BEFORE the data, and bumped AFTER each write, so a
+response is never labelled with a newer ETag than the data it contains.
+
+DB Schema (MongoDB change_counters collection):
+{
+  _id: "<business_id>:<collection>",
+  seq: int
+}
+"""
+
+from typing import Optional
+
+from fastapi import Request, Response
+
+# Browsers may store responses but must revalidate them every time
+CACHE_CONTROL = "private, no-cache"
+
+
+def collection_etag(db, business_id: str, collection: str) -> str:
+    """
+    Strong ETag for a business's view of a whole collection. Includes the
+    business ID so a browser shared between accounts never matches across them.
+    """
+    counter = db["change_counters"].find_one({"_id": f"{business_id}:{collection}"}, {"seq": 1})
+    return f'"{collection}-{business_id}-{counter["seq"] if counter else 0}"'
+
+
+def bump(db, business_id: str, collection: str) -> None:
+    """Record that a business's documents in a collection changed."""
+    db["change_counters"].update_one(
+        {"_id": f"{business_id}:{collection}"},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+    )
+
+
+def matches(request: Request, etag: str) -> bool:
+    """True if the client's If-None-Match (weak comparison) matches etag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def etag_or_304(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Return a bare 304 response if the client's If-None-Match matches etag.
+    Otherwise set the ETag/Cache-Control headers on response and return None.
+    """
+    if matches(request, etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
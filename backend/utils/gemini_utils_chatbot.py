@@ -1,44 +1,245 @@
 import os
-import google.generativeai as genai
+import time
+import logging
+import threading
+from datetime import timedelta
+from typing import Iterator, Optional, Tuple
+
 from dotenv import load_dotenv
 
+from utils import metrics
+from utils.llm_resilience import (
+    call_with_resilience,
+    gemini_breaker,
+    gemini_inflight,
+    LLM_DEADLINE_SECONDS,
+    NonRetryableError,
+    ProviderUnavailableError,
+)
+
 load_dotenv()
 
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-2.5-flash"
+
+SYSTEM_INSTRUCTION = (
+    "You are a concise, expert business advisor. "
+    "You give sharp, complete, actionable advice in 200 words or fewer it should be answered in 200 words not half answers. "
+    "You ALWAYS finish your response completely — never cut off mid-sentence. "
+    "You NEVER pad responses with unnecessary filler or repetition."
+)
+
+GENERATION_CONFIG = {
+    "max_output_tokens": 1500,  # FIXED: enough tokens to complete 150 words safely
+    "temperature": 0.7,
+    "top_p": 0.90,
+}
+
+# Gemini only accepts context caches above a minimum token count, so
+# provider-side caching is opt-in. Without it the prefix is still cached
+# in-process (see utils/prompt_cache.py) and sent inline.
+CONTEXT_CACHE_ENABLED = os.getenv("GEMINI_CONTEXT_CACHE", "false").lower() == "true"
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("GEMINI_CONTEXT_CACHE_TTL_SECONDS", 3600))
+
+_default_model = None
+_cached_models = {}
 
+_genai = None
+_genai_lock = threading.Lock()
 
-def generate_chat_response(prompt: str) -> str:
+
+def get_genai():
     """
-    Sends prompt to Gemini and returns a concise, complete response.
+    Import and configure the Gemini SDK on first use. The import costs more
+    than half a second, so it is kept off the API's startup path.
+    """
+    global _genai
+
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _genai = genai
+    return _genai
+
+
+def _get_model(cache_name: Optional[str] = None):
+    """Return a reusable GenerativeModel, bound to a context cache if given."""
+    global _default_model
+
+    if cache_name:
+        model = _cached_models.get(cache_name)
+        if model is None:
+            model = get_genai().GenerativeModel.from_cached_content(cached_content=cache_name)
+            _cached_models[cache_name] = model
+        return model
+
+    if _default_model is None:
+        _default_model = get_genai().GenerativeModel(MODEL_NAME, system_instruction=SYSTEM_INSTRUCTION)
+    return _default_model
+
+
+def create_context_cache(prefix: str, display_name: str) -> Optional[str]:
+    """
+    Upload the static prompt prefix as a Gemini context cache.
+    Returns the cache name, or None if caching is disabled or rejected
+    (e.g. the prefix is below the provider's minimum size).
     """
+    if not CONTEXT_CACHE_ENABLED:
+        return None
 
     try:
-        model = genai.GenerativeModel(
-            "gemini-2.5-flash",
-            system_instruction=(
-                "You are a concise, expert business advisor. "
-                "You give sharp, complete, actionable advice in 200 words or fewer it should be answered in 200 words not half answers. "
-                "You ALWAYS finish your response completely — never cut off mid-sentence. "
-                "You NEVER pad responses with unnecessary filler or repetition."
-            ),
+        cache = get_genai().caching.CachedContent.create(
+            model=f"models/{MODEL_NAME}",
+            display_name=display_name,
+            system_instruction=SYSTEM_INSTRUCTION,
+            contents=[prefix],
+            ttl=timedelta(seconds=CONTEXT_CACHE_TTL_SECONDS),
         )
+        return cache.name
+    except Exception as e:
+        logger.warning("Gemini context cache unavailable, using inline prefix: %s", e)
+        return None
+
+
+def delete_context_cache(cache_name: Optional[str]) -> None:
+    """
+    Drop a context cache that no longer matches the business profile, both
+    the bound model kept here and the provider-side cache. Best effort: a
+    cache that can't be deleted still expires at its TTL.
+    """
+    if not cache_name:
+        return
+    _cached_models.pop(cache_name, None)
+    try:
+        get_genai().caching.CachedContent.get(cache_name).delete()
+    except Exception as e:
+        logger.warning("Could not delete Gemini context cache %s: %s", cache_name, e)
 
+
+def generate_chat_response(
+    prompt: str,
+    prefix: str = "",
+    cache_name: Optional[str] = None,
+) -> Tuple[str, dict]:
+    """
+    Sends prompt to Gemini and returns a concise, complete response.
+
+    If cache_name is given, the prefix already lives in the provider's
+    context cache and only the per-turn prompt is sent. Otherwise the
+    prefix is prepended inline.
+
+    Returns (response_text, usage) where usage holds token counts and
+    latency for the call.
+
+    The call is hedged, retried and guarded by a circuit breaker
+    (see utils/llm_resilience.py); ProviderUnavailableError is raised
+    without contacting Gemini while the breaker is open.
+    """
+
+    def attempt(timeout: float):
         response = model.generate_content(
-            prompt,
-            generation_config=genai.GenerationConfig(
-                max_output_tokens=1500,  # FIXED: enough tokens to complete 150 words safely
-                temperature=0.7,
-                top_p=0.90,
-            ),
-            request_options={"timeout": 30},
+            contents,
+            generation_config=GENERATION_CONFIG,
+            request_options={"timeout": timeout},
+        )
+        # A blocked/empty response won't improve on retry — surface it directly
+        try:
+            text = response.text if response else None
+        except ValueError as e:
+            raise NonRetryableError(e)
+        if not text:
+            raise NonRetryableError(ValueError("Gemini returned empty response."))
+        return response
+
+    started = time.perf_counter()
+    try:
+        model = _get_model(cache_name)
+        contents = prompt if cache_name else prefix + prompt
+
+        with gemini_inflight.track():
+            response = call_with_resilience(attempt)
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        meta = getattr(response, "usage_metadata", None)
+        usage = {
+            "input_tokens": getattr(meta, "prompt_token_count", None),
+            "cached_input_tokens": getattr(meta, "cached_content_token_count", None),
+            "output_tokens": getattr(meta, "candidates_token_count", None),
+            "latency_ms": latency_ms,
+        }
+        metrics.observe_llm("generate", latency_ms / 1000, usage=usage)
+
+        return response.text.strip(), usage
+
+    except (ValueError, ProviderUnavailableError):
+        raise
+    except Exception as e:
+        metrics.observe_llm("generate", time.perf_counter() - started, ok=False)
+        raise RuntimeError(f"Gemini API error: {str(e)}")
+
+
+def stream_chat_response(
+    prompt: str,
+    prefix: str = "",
+    cache_name: Optional[str] = None,
+) -> Iterator[dict]:
+    """
+    Streams a Gemini response as it is generated.
+
+    Yields {"delta": str} for each text chunk, then a final
+    {"usage": dict} with token counts and latency.
+
+    Streams can't be hedged or transparently retried once text has been
+    sent, so only the circuit breaker applies here.
+    """
+    if not gemini_breaker.allow():
+        raise ProviderUnavailableError(
+            "AI provider is temporarily unavailable. Please try again shortly."
         )
 
-        if not response or not response.text:
-            raise ValueError("Gemini returned empty response.")
+    received_text = False
+    started = time.perf_counter()
+    try:
+        model = _get_model(cache_name)
+        contents = prompt if cache_name else prefix + prompt
 
-        return response.text.strip()
+        with gemini_inflight.track():
+            response = model.generate_content(
+                contents,
+                generation_config=GENERATION_CONFIG,
+                request_options={"timeout": LLM_DEADLINE_SECONDS},
+                stream=True,
+            )
+            for chunk in response:
+                text = chunk.text if chunk.parts else ""
+                if text:
+                    received_text = True
+                    yield {"delta": text}
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
 
-    except ValueError:
+    except GeneratorExit:
+        # Consumer went away mid-stream; the provider itself was fine
+        gemini_breaker.record_success()
         raise
     except Exception as e:
-        raise RuntimeError(f"Gemini API error: {str(e)}")
\ No newline at end of file
+        gemini_breaker.record_failure()
+        metrics.observe_llm("stream", time.perf_counter() - started, ok=False)
+        raise RuntimeError(f"Gemini API error: {str(e)}")
+
+    gemini_breaker.record_success()
+    if not received_text:
+        raise ValueError("Gemini returned empty response.")
+
+    meta = getattr(response, "usage_metadata", None)
+    usage = {
+        "input_tokens": getattr(meta, "prompt_token_count", None),
+        "cached_input_tokens": getattr(meta, "cached_content_token_count", None),
+        "output_tokens": getattr(meta, "candidates_token_count", None),
+        "latency_ms": latency_ms,
+    }
+    metrics.observe_llm("stream", latency_ms / 1000, usage=usage)
+    yield {"usage": usage}
@@ -0,0 +1,97 @@
+"""
+utils/image_utils.py
+--------------------
+Local preprocessing for uploaded logos, done before anything is sent
+to Cloudinary.
+
+  - hash_upload()    streams the upload in fixed-size chunks to compute its
+                     SHA-256 and enforce the size cap (no full read into memory)
+  - prepare_logo()   downscales to fit 500x500 and re-encodes to WebP
+
+Both are blocking (file I/O and Pillow decoding) — call them through
+run_in_threadpool from async routes.
+
+Setup:
+  pip install Pillow
+  LOGO_MAX_BYTES=10485760     (optional, default 10 MB)
+  LOGO_MAX_PIXELS=40000000    (optional, rejects decompression bombs)
+"""
+
+import hashlib
+import io
+import os
+from typing import BinaryIO, Tuple
+
+from PIL import Image, ImageOps
+
+LOGO_MAX_BYTES = int(os.getenv("LOGO_MAX_BYTES", 10 * 1024 * 1024))
+LOGO_MAX_PIXELS = int(os.getenv("LOGO_MAX_PIXELS", 40_000_000))
+LOGO_MAX_DIMENSION = 500
+LOGO_WEBP_QUALITY = int(os.getenv("LOGO_WEBP_QUALITY", 85))
+
+_CHUNK_SIZE = 64 * 1024
+
+# Pillow can't rasterise SVG; those are uploaded as-is
+PASSTHROUGH_TYPES = {"image/svg+xml"}
+
+
+class FileTooLargeError(ValueError):
+    """Upload exceeded the configured size cap."""
+
+
+def hash_upload(file: BinaryIO, max_bytes: int = LOGO_MAX_BYTES) -> Tuple[str, int]:
+    """
+    Return (sha256_hex, size_in_bytes) of a file-like object, reading it in
+    chunks. Leaves the file positioned at the start.
+
+    Raises FileTooLargeError past max_bytes, ValueError if the file is empty.
+    """
+    file.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = file.read(_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise FileTooLargeError(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+        digest.update(chunk)
+    file.seek(0)
+
+    if size == 0:
+        raise ValueError("Uploaded file is empty.")
+    return digest.hexdigest(), size
+
+
+def prepare_logo(file: BinaryIO, content_type: str) -> Tuple[bytes, str]:
+    """
+    Downscale a raster logo to fit LOGO_MAX_DIMENSION and re-encode as WebP.
+
+    Returns (image_bytes, content_type). SVGs are returned unchanged.
+    Raises ValueError for unreadable or oversized images.
+    """
+    file.seek(0)
+    if content_type in PASSTHROUGH_TYPES:
+        return file.read(), content_type
+
+    try:
+        image = Image.open(file)
+    except Exception:
+        raise ValueError("Uploaded file is not a readable image.")
+
+    # Image.open only reads the header, so this check runs before decoding
+    if image.width * image.height > LOGO_MAX_PIXELS:
+        raise ValueError("Image dimensions are too large.")
+
+    # Let JPEG decode at a reduced scale directly instead of full size
+    image.draft("RGB", (LOGO_MAX_DIMENSION * 2, LOGO_MAX_DIMENSION * 2))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((LOGO_MAX_DIMENSION, LOGO_MAX_DIMENSION), Image.LANCZOS)
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+    out = io.BytesIO()
+    image.save(out, format="WEBP", quality=LOGO_WEBP_QUALITY, method=4)
+    return out.getvalue(), "image/webp"
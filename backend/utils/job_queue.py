@@ -0,0 +1,288 @@
+"""
+utils/job_queue.py
+------------------
+Durable background job queue stored in MongoDB (jobs collection), for
+work too slow to run inside a request (e.g. AI poster generation).
+
+DB Schema (MongoDB jobs collection):
+{
+  _id: ObjectId,
+  kind: str,                         # e.g. "poster"
+  business_id: str,
+  dedupe_key: str,                   # identical work → same job
+  payload: dict,
+  status: "queued" | "running" | "succeeded" | "failed",
+  attempts: int,
+  max_attempts: int,
+  run: int,                          # bumped each time a succeeded job is re-run
+  run_at: datetime,                  # not claimable before this (backoff)
+  lease_until: datetime | None,      # running jobs past this are reclaimed
+  result: dict | None,
+  error: str | None,
+  created_at: datetime,
+  updated_at: datetime
+}
+
+Claiming is a single find_one_and_update, so any number of worker threads
+across any number of API processes can share the queue safely. A worker
+that dies mid-job simply lets its lease expire and the job is retried,
+unless that was its last attempt, in which case it is marked failed.
+
+Settings (.env, optional):
+  JOB_WORKERS=2               worker threads per API process (0 disables)
+  JOB_LEASE_SECONDS=300
+  JOB_MAX_ATTEMPTS=3
+  JOB_RETRY_BASE_SECONDS=5
+  JOB_POLL_SECONDS=2          idle wait when the queue is empty
+"""
+
+import os
+import random
+import socket
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 300))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", 5))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 2))
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+
+# Set whenever this process enqueues work so idle workers wake immediately
+_work_available = threading.Event()
+
+
+def _upsert_job(db, key: dict, payload: dict, now: datetime) -> dict:
+    return db["jobs"].find_one_and_update(
+        key,
+        {
+            "$setOnInsert": {
+                "payload": payload,
+                "status": "queued",
+                "attempts": 0,
+                "max_attempts": JOB_MAX_ATTEMPTS,
+                "run": 0,
+                "run_at": now,
+                "lease_until": None,
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "updated_at": now,
+            }
+        },
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def enqueue(
+    db,
+    kind: str,
+    business_id: str,
+    dedupe_key: str,
+    payload: dict,
+    result_ttl: Optional[float] = None,
+    force: bool = False,
+) -> dict:
+    """
+    Queue a job, or return the existing job for the same work.
+
+    An identical queued or running job is returned as-is; a failed one is
+    reset and queued again. A succeeded job is returned until result_ttl
+    seconds after it finished (forever if None), or re-run at once with
+    force=True; a re-run increments the job's run number.
+    """
+    now = datetime.utcnow()
+    key = {"kind": kind, "business_id": business_id, "dedupe_key": dedupe_key}
+    try:
+        job = _upsert_job(db, key, payload, now)
+    except DuplicateKeyError:
+        # Lost an insert race with an identical request — use the winner's job
+        job = db["jobs"].find_one(key)
+
+    rerun = job["status"] == "succeeded" and (
+        force or (result_ttl is not None and job["updated_at"] <= now - timedelta(seconds=result_ttl))
+    )
+    if job["status"] == "failed" or rerun:
+        update = {"$set": {
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "run_at": now,
+            "error": None,
+            "updated_at": now,
+        }}
+        if rerun:
+            update["$inc"] = {"run": 1}
+        job = db["jobs"].find_one_and_update(
+            {"_id": job["_id"], "status": job["status"], "updated_at": job["updated_at"]},
+            update,
+            return_document=ReturnDocument.AFTER,
+        ) or db["jobs"].find_one({"_id": job["_id"]})
+
+    if job["status"] == "queued":
+        _work_available.set()
+    return job
+
+
+def claim(db, kinds: list, worker_id: str) -> Optional[dict]:
+    """
+    Atomically take the oldest runnable job, or one whose lease expired
+    with attempts left. Expired jobs on their last attempt are failed.
+    """
+    now = datetime.utcnow()
+    db["jobs"].update_many(
+        {
+            "kind": {"$in": kinds},
+            "status": "running",
+            "lease_until": {"$lt": now},
+            "$expr": {"$gte": ["$attempts", "$max_attempts"]},
+        },
+        {"$set": {
+            "status": "failed",
+            "error": "Worker lease expired on the last attempt.",
+            "lease_until": None,
+            "updated_at": now,
+        }},
+    )
+    return db["jobs"].find_one_and_update(
+        {
+            "kind": {"$in": kinds},
+            "$or": [
+                {"status": "queued", "run_at": {"$lte": now}},
+                {
+                    "status": "running",
+                    "lease_until": {"$lt": now},
+                    "$expr": {"$lt": ["$attempts", "$max_attempts"]},
+                },
+            ],
+        },
+        {
+            "$set": {
+                "status": "running",
+                "worker_id": worker_id,
+                "lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                "updated_at": now,
+            },
+            "$inc": {"attempts": 1},
+        },
+        sort=[("run_at", 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def extend_lease(db, job: dict) -> None:
+    """Push back a running job's lease; long handlers call this as they make progress."""
+    now = datetime.utcnow()
+    db["jobs"].update_one(
+        {"_id": job["_id"], "worker_id": job["worker_id"], "status": "running"},
+        {"$set": {"lease_until": now + timedelta(seconds=JOB_LEASE_SECONDS), "updated_at": now}},
+    )
+
+
+def mark_succeeded(db, job: dict, result: dict) -> None:
+    db["jobs"].update_one(
+        {"_id": job["_id"], "worker_id": job["worker_id"]},
+        {"$set": {
+            "status": "succeeded",
+            "result": result,
+            "error": None,
+            "lease_until": None,
+            "updated_at": datetime.utcnow(),
+        }},
+    )
+
+
+def mark_failed(db, job: dict, error: str) -> None:
+    """Requeue with jittered exponential backoff, or fail permanently."""
+    now = datetime.utcnow()
+    if job["attempts"] < job["max_attempts"]:
+        delay = JOB_RETRY_BASE_SECONDS * (2 ** (job["attempts"] - 1))
+        delay *= random.uniform(0.5, 1.5)
+        update = {
+            "status": "queued",
+            "run_at": now + timedelta(seconds=delay),
+            "error": error,
+            "lease_until": None,
+            "updated_at": now,
+        }
+    else:
+        update = {
+            "status": "failed",
+            "error": error,
+            "lease_until": None,
+            "updated_at": now,
+        }
+    db["jobs"].update_one({"_id": job["_id"], "worker_id": job["worker_id"]}, {"$set": update})
+
+
+# ---------------------------------------------------------------------------
+# Worker pool
+# ---------------------------------------------------------------------------
+
+class JobWorkerPool:
+    """
+    Background threads that claim and run jobs.
+
+    handlers maps job kind → callable(db, job) returning a result dict.
+    Exceptions from a handler are recorded and the job retried with backoff.
+    """
+
+    def __init__(self, get_db: Callable, handlers: Dict[str, Callable], concurrency: int = JOB_WORKERS):
+        self._get_db = get_db
+        self._handlers = handlers
+        self._concurrency = concurrency
+        self._stop = threading.Event()
+        self._threads = []
+        self._worker_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self) -> None:
+        for i in range(self._concurrency):
+            thread = threading.Thread(
+                target=self._run,
+                args=(f"{self._worker_prefix}:{i}",),
+                name=f"job-worker-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10) -> None:
+        """Stop claiming new jobs and wait for in-flight ones to finish."""
+        self._stop.set()
+        _work_available.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self, worker_id: str) -> None:
+        kinds = list(self._handlers)
+        while not self._stop.is_set():
+            try:
+                db = self._get_db()
+                job = claim(db, kinds, worker_id)
+            except Exception:
+                logger.exception("Job claim failed")
+                job = None
+
+            if job is None:
+                _work_available.wait(JOB_POLL_SECONDS)
+                _work_available.clear()
+                continue
+
+            try:
+                result = self._handlers[job["kind"]](db, job)
+            except Exception as e:
+                logger.warning("Job %s (%s) attempt %s failed: %s", job["_id"], job["kind"], job["attempts"], e)
+                mark_failed(db, job, str(e))
+            else:
+                mark_succeeded(db, job, result or {})
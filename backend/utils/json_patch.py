@@ -0,0 +1,172 @@
+"""
+utils/json_patch.py
+-------------------
+RFC 6902 JSON Patch: apply a patch to a document, and compute a patch
+between two documents.
+
+Used for website edits (clients send only what changed) and for the
+per-version deltas stored in website_versions.
+
+apply_patch() works on a deep copy and never mutates its input. Invalid
+or failing patches raise PatchError (a ValueError).
+"""
+
+import copy
+from typing import Any, List
+
+
+class PatchError(ValueError):
+    """The patch is malformed, targets a missing path, or a "test" failed."""
+
+
+# ---------------------------------------------------------------------------
+# JSON Pointer (RFC 6901)
+# ---------------------------------------------------------------------------
+
+def _parse_pointer(pointer: str) -> List[str]:
+    if pointer == "":
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise PatchError(f"Invalid JSON pointer '{pointer}'.")
+    return [part.replace("~1", "/").replace("~0", "~") for part in pointer[1:].split("/")]
+
+
+def _escape(token) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _list_index(container: list, token: str, allow_end: bool) -> int:
+    if token == "-" and allow_end:
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid array index '{token}'.")
+    index = int(token)
+    limit = len(container) if allow_end else len(container) - 1
+    if index > limit:
+        raise PatchError(f"Array index {index} out of range.")
+    return index
+
+
+def _resolve(doc: Any, tokens: List[str]) -> Any:
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f"Path segment '{token}' not found.")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_list_index(doc, token, allow_end=False)]
+        else:
+            raise PatchError(f"Cannot traverse into a scalar at '{token}'.")
+    return doc
+
+
+# ---------------------------------------------------------------------------
+# Operations
+# ---------------------------------------------------------------------------
+
+def _add(doc: Any, tokens: List[str], value: Any) -> Any:
+    if not tokens:
+        return value
+    parent = _resolve(doc, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, key, allow_end=True), value)
+    else:
+        raise PatchError("Cannot add a member to a scalar.")
+    return doc
+
+
+def _remove(doc: Any, tokens: List[str]) -> Any:
+    if not tokens:
+        raise PatchError("Cannot remove the whole document.")
+    parent = _resolve(doc, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise PatchError(f"Path segment '{key}' not found.")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_list_index(parent, key, allow_end=False))
+    raise PatchError("Cannot remove a member from a scalar.")
+
+
+def apply_patch(doc: Any, patch: List[dict]) -> Any:
+    """Return a new document with every operation in patch applied, in order."""
+    if not isinstance(patch, list):
+        raise PatchError("A JSON Patch must be an array of operations.")
+
+    doc = copy.deepcopy(doc)
+    for op in patch:
+        if not isinstance(op, dict) or "op" not in op or "path" not in op:
+            raise PatchError("Each operation needs 'op' and 'path'.")
+        name = op["op"]
+        tokens = _parse_pointer(op["path"])
+
+        if name in ("add", "replace", "test") and "value" not in op:
+            raise PatchError(f"'{name}' operation needs a 'value'.")
+        if name in ("move", "copy") and "from" not in op:
+            raise PatchError(f"'{name}' operation needs a 'from'.")
+
+        if name == "add":
+            doc = _add(doc, tokens, copy.deepcopy(op["value"]))
+        elif name == "remove":
+            _remove(doc, tokens)
+        elif name == "replace":
+            if not tokens:
+                doc = copy.deepcopy(op["value"])
+            else:
+                _resolve(doc, tokens)
+                _remove(doc, tokens)
+                doc = _add(doc, tokens, copy.deepcopy(op["value"]))
+        elif name == "move":
+            source = _parse_pointer(op["from"])
+            if tokens[:len(source)] == source and tokens != source:
+                raise PatchError("Cannot move a value into one of its own children.")
+            value = _remove(doc, source)
+            doc = _add(doc, tokens, value)
+        elif name == "copy":
+            value = copy.deepcopy(_resolve(doc, _parse_pointer(op["from"])))
+            doc = _add(doc, tokens, value)
+        elif name == "test":
+            if _resolve(doc, tokens) != op["value"]:
+                raise PatchError(f"Test failed at '{op['path']}'.")
+        else:
+            raise PatchError(f"Unknown operation '{name}'.")
+    return doc
+
+
+# ---------------------------------------------------------------------------
+# Diff
+# ---------------------------------------------------------------------------
+
+def make_patch(src: Any, dst: Any, path: str = "") -> List[dict]:
+    """
+    Compute a patch turning src into dst. Objects are diffed key by key and
+    equal-length arrays element by element; anything else that differs is
+    replaced whole.
+    """
+    if src == dst:
+        return []
+
+    if isinstance(src, dict) and isinstance(dst, dict):
+        ops = []
+        for key in src:
+            if key not in dst:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in dst.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in src:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(make_patch(src[key], value, child))
+        return ops
+
+    if isinstance(src, list) and isinstance(dst, list) and len(src) == len(dst):
+        ops = []
+        for index, (a, b) in enumerate(zip(src, dst)):
+            ops.extend(make_patch(a, b, f"{path}/{index}"))
+        return ops
+
+    return [{"op": "replace", "path": path, "value": dst}]
@@ -0,0 +1,358 @@
+"""
+utils/llm_resilience.py
+-----------------------
+Tail-latency and failure handling for LLM provider calls.
+
+  - Hedged requests: if the first attempt hasn't answered by the recent
+    p95 latency, a second identical attempt is fired and whichever answers
+    first wins.
+    Hedges are only fired while fewer than half of the LLM threads are
+    busy, so abandoned attempts can't starve new calls.
+  - Bounded retries with full-jitter exponential backoff, capped by an
+    overall deadline. Every attempt gets the time left before the
+    deadline as its request timeout, so a losing or abandoned attempt
+    stops holding its thread by the deadline.
+  - Circuit breaker: after repeated failures the provider is treated as
+    down and calls fail fast until a probe call succeeds.
+
+Tuning (all optional, in .env):
+  LLM_HEDGE_ENABLED=true
+  LLM_HEDGE_PERCENTILE=95
+  LLM_HEDGE_MIN_DELAY_SECONDS=1.5
+  LLM_MAX_RETRIES=2
+  LLM_RETRY_BASE_SECONDS=0.5
+  LLM_DEADLINE_SECONDS=30
+  LLM_BREAKER_FAILURE_THRESHOLD=5
+  LLM_BREAKER_RESET_SECONDS=30
+  LLM_MAX_CONCURRENCY=32
+  LLM_DRAIN_SECONDS=30            shutdown wait for in-flight calls
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import wait, FIRST_COMPLETED
+from typing import Callable, List, Optional
+
+from utils.request_profiler import ContextThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", 1.5))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 2))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", 0.5))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", 30))
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", 5))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", 30))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 32))
+LLM_DRAIN_SECONDS = float(os.getenv("LLM_DRAIN_SECONDS", 30))
+
+# Hedge delay used until enough latency samples exist to compute a percentile
+_MIN_SAMPLES_FOR_PERCENTILE = 20
+_DEFAULT_HEDGE_DELAY_SECONDS = 5.0
+
+
+class ProviderUnavailableError(RuntimeError):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+class NonRetryableError(Exception):
+    """Wrap an error raised inside an attempt to stop retries and hedging."""
+
+    def __init__(self, original: Exception):
+        super().__init__(str(original))
+        self.original = original
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker
+# ---------------------------------------------------------------------------
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+
+      closed     → calls flow; consecutive failures are counted
+      open       → calls rejected until reset_seconds have passed
+      half_open  → one probe call allowed; success closes, failure re-opens
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.transitions = {}          # "closed->open" → count
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._listeners: List[Callable[[str, str, str], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, callback: Callable[[str, str, str], None]) -> None:
+        """Register callback(name, old_state, new_state) for state transitions."""
+        self._listeners.append(callback)
+
+    def _transition(self, new_state: str) -> None:
+        old_state = self.state
+        if old_state == new_state:
+            return
+        self.state = new_state
+        key = f"{old_state}->{new_state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        logger.warning("Circuit breaker %s: %s", self.name, key)
+        for callback in self._listeners:
+            try:
+                callback(self.name, old_state, new_state)
+            except Exception:
+                logger.exception("Circuit breaker listener failed")
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_seconds:
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._transition(self.CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(self.OPEN)
+
+    def snapshot(self) -> dict:
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "transitions": dict(self.transitions),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Latency tracking for hedge delay
+# ---------------------------------------------------------------------------
+
+class LatencyTracker:
+    """Rolling window of successful call latencies (seconds)."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if len(self._samples) < _MIN_SAMPLES_FOR_PERCENTILE:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+        return ordered[index]
+
+
+# ---------------------------------------------------------------------------
+# In-flight calls, for graceful shutdown
+# ---------------------------------------------------------------------------
+
+class InFlightCalls:
+    """Counts provider calls in progress so shutdown can wait for them."""
+
+    def __init__(self):
+        self._count = 0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def track(self):
+        with self._cond:
+            self._count += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify_all()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def drain(self, timeout: float = LLM_DRAIN_SECONDS) -> bool:
+        """Wait until no calls are in flight; return False if timeout passed first."""
+        with self._cond:
+            if self._count:
+                logger.info("Waiting for %d in-flight LLM call(s)", self._count)
+            return self._cond.wait_for(lambda: self._count == 0, timeout)
+
+
+# ---------------------------------------------------------------------------
+# Resilient call
+# ---------------------------------------------------------------------------
+
+_executor = ContextThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY, thread_name_prefix="llm")
+
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=LLM_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=LLM_BREAKER_RESET_SECONDS,
+)
+gemini_latency = LatencyTracker()
+gemini_inflight = InFlightCalls()
+
+# Counters for hedging behaviour: attempts fired, hedges fired, hedges that
+# won, hedges skipped for lack of spare threads; updated from many threads
+hedge_stats = {"attempts": 0, "hedges": 0, "hedge_wins": 0, "hedges_skipped": 0, "retries": 0}
+_stats_lock = threading.Lock()
+
+# Attempts currently occupying an _executor thread (including abandoned ones)
+_running_attempts = 0
+
+
+def _count(stat: str) -> None:
+    with _stats_lock:
+        hedge_stats[stat] += 1
+
+
+def hedge_snapshot() -> dict:
+    """Consistent copy of the hedging counters plus attempts running now."""
+    with _stats_lock:
+        return {**hedge_stats, "running_attempts": _running_attempts}
+
+
+def _run_attempt(fn: Callable, timeout: float):
+    global _running_attempts
+    with _stats_lock:
+        _running_attempts += 1
+    try:
+        return fn(timeout)
+    finally:
+        with _stats_lock:
+            _running_attempts -= 1
+
+
+def _has_spare_capacity() -> bool:
+    with _stats_lock:
+        return _running_attempts < LLM_MAX_CONCURRENCY // 2
+
+
+def hedge_delay(tracker: LatencyTracker) -> float:
+    observed = tracker.percentile(LLM_HEDGE_PERCENTILE)
+    if observed is None:
+        return _DEFAULT_HEDGE_DELAY_SECONDS
+    return max(LLM_HEDGE_MIN_DELAY_SECONDS, observed)
+
+
+def _hedged_attempt(fn: Callable, tracker: LatencyTracker, timeout: float):
+    """
+    Run fn, firing a duplicate after the hedge delay if it hasn't returned.
+    Returns the first successful result; raises if every attempt failed.
+    """
+    started = time.monotonic()
+    primary = _executor.submit(_run_attempt, fn, timeout)
+    pending = {primary}
+    hedge = None
+    _count("attempts")
+
+    if LLM_HEDGE_ENABLED:
+        done, _ = wait(pending, timeout=min(hedge_delay(tracker), timeout))
+        if not done and _has_spare_capacity():
+            hedge = _executor.submit(_run_attempt, fn, timeout - (time.monotonic() - started))
+            pending.add(hedge)
+            _count("hedges")
+        elif not done:
+            _count("hedges_skipped")
+
+    last_error = None
+    while pending:
+        remaining = timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            error = future.exception()
+            if error is None:
+                tracker.record(time.monotonic() - started)
+                if future is hedge:
+                    _count("hedge_wins")
+                return future.result()
+            if isinstance(error, NonRetryableError):
+                raise error.original
+            last_error = error
+
+    # Losing or timed-out attempts run on until their own request timeout
+    # (at most the deadline) and are discarded
+    raise last_error or TimeoutError(f"LLM call exceeded {timeout:.0f}s")
+
+
+def call_with_resilience(
+    fn: Callable,
+    breaker: CircuitBreaker = gemini_breaker,
+    tracker: LatencyTracker = gemini_latency,
+):
+    """
+    Call fn(timeout) with hedging, bounded jittered retries and a circuit
+    breaker. timeout is the seconds left before the overall deadline; fn
+    should use it as the provider request timeout.
+
+    fn should raise NonRetryableError for errors that another attempt
+    cannot fix (e.g. an empty/blocked response); the wrapped error is
+    re-raised as-is and does not count against the breaker.
+
+    Raises ProviderUnavailableError while the breaker is open, otherwise
+    the last provider error once retries or the deadline are exhausted.
+    """
+    deadline = time.monotonic() + LLM_DEADLINE_SECONDS
+    last_error = None
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        if not breaker.allow():
+            raise ProviderUnavailableError(
+                "AI provider is temporarily unavailable. Please try again shortly."
+            )
+
+        remaining = deadline - time.monotonic()
+        try:
+            result = _hedged_attempt(fn, tracker, timeout=remaining)
+        except Exception as e:
+            if isinstance(e, (ValueError, NonRetryableError)):
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            last_error = e
+        else:
+            breaker.record_success()
+            return result
+
+        # Full jitter: sleep uniformly in [0, base * 2^attempt]
+        backoff = random.uniform(0, LLM_RETRY_BASE_SECONDS * (2 ** attempt))
+        if attempt == LLM_MAX_RETRIES or time.monotonic() + backoff >= deadline:
+            break
+        _count("retries")
+        time.sleep(backoff)
+
+    raise last_error
@@ -0,0 +1,137 @@
+"""
+utils/mailer.py
+---------------
+Pooled SMTP delivery for campaign email.
+
+Connections are opened lazily, kept open between messages and shared by
+the send threads (at most SMTP_POOL_SIZE at once). A connection is
+recycled after SMTP_MAX_MESSAGES_PER_CONNECTION messages, and one that
+the server dropped is replaced and the message retried once.
+
+For offline testing point it at a local SMTP sink, e.g.
+  python -m aiosmtpd -n -l localhost:1025
+(the defaults below already do).
+
+Settings (.env, optional):
+  SMTP_HOST=localhost
+  SMTP_PORT=1025
+  SMTP_USERNAME= / SMTP_PASSWORD=    login if set
+  SMTP_STARTTLS=false
+  SMTP_FROM_ADDRESS=no-reply@bizsolve.local
+  SMTP_POOL_SIZE=4
+  SMTP_MAX_MESSAGES_PER_CONNECTION=100
+  SMTP_TIMEOUT_SECONDS=30
+"""
+
+import os
+import queue
+import smtplib
+import threading
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Optional
+
+SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 1025))
+SMTP_USERNAME = os.getenv("SMTP_USERNAME")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "false").lower() == "true"
+SMTP_FROM_ADDRESS = os.getenv("SMTP_FROM_ADDRESS", "no-reply@bizsolve.local")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 4))
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", 100))
+SMTP_TIMEOUT_SECONDS = float(os.getenv("SMTP_TIMEOUT_SECONDS", 30))
+
+
+def build_message(
+    to_address: str,
+    subject: str,
+    text: str,
+    sender_name: str,
+    reply_to: Optional[str] = None,
+    html: Optional[str] = None,
+) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((sender_name, SMTP_FROM_ADDRESS))
+    message["To"] = to_address
+    message["Subject"] = subject
+    message["Message-ID"] = make_msgid(domain=SMTP_FROM_ADDRESS.split("@")[-1])
+    if reply_to:
+        message["Reply-To"] = reply_to
+    message.set_content(text)
+    if html:
+        message.add_alternative(html, subtype="html")
+    return message
+
+
+class _Connection:
+    def __init__(self):
+        self.smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        if SMTP_STARTTLS:
+            self.smtp.starttls()
+        if SMTP_USERNAME:
+            self.smtp.login(SMTP_USERNAME, SMTP_PASSWORD or "")
+        self.sent = 0
+
+    def close(self) -> None:
+        try:
+            self.smtp.quit()
+        except Exception:
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
+
+
+class SMTPPool:
+    """Bounded pool of persistent SMTP connections, safe to share between threads."""
+
+    def __init__(self, size: int = SMTP_POOL_SIZE):
+        self._idle: "queue.LifoQueue[_Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def _connection(self):
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = _Connection()
+            try:
+                yield conn
+            except Exception:
+                conn.close()
+                raise
+            if conn.sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def send(self, message: EmailMessage) -> None:
+        """
+        Deliver one message. Raises smtplib.SMTPException (or OSError)
+        if the server rejects it or cannot be reached.
+        """
+        for attempt in range(2):
+            try:
+                with self._connection() as conn:
+                    conn.smtp.send_message(message)
+                    conn.sent += 1
+                return
+            except smtplib.SMTPServerDisconnected:
+                # A pooled connection went stale — retry once on a fresh one
+                if attempt == 1:
+                    raise
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+smtp_pool = SMTPPool()
@@ -0,0 +1,233 @@
+"""
+utils/metrics.py
+----------------
+Prometheus metrics, served at GET /metrics (routes/metrics_routes.py).
+
+  http_request_duration_seconds{method, route, status}   histogram
+  http_requests_in_progress{method}                       gauge
+  mongodb_command_duration_seconds{command, collection}   histogram
+  mongodb_command_failures_total{command, collection}     counter
+  llm_call_duration_seconds{operation, outcome}           histogram
+  llm_tokens_total{kind}                                  counter
+  llm_circuit_breaker_transitions_total{breaker, transition}  counter
+  campaign_scheduler_drift_seconds                        histogram
+  campaign_scheduler_wake_lag_seconds                     histogram
+
+route is the path template ("/products/{product_id}"), never a raw path
+with IDs in it, so label cardinality stays bounded; unmatched paths share
+one label.
+
+Mongo timings come from a pymongo CommandListener registered globally on
+import, so it must be imported before the first MongoClient is created
+(main.py does this). Recording a sample is a dict lookup plus a histogram
+observe — a few microseconds per request or command.
+
+With several worker processes (serve.py), set PROMETHEUS_MULTIPROC_DIR to
+an empty directory so /metrics aggregates every worker.
+
+Settings (.env, optional):
+  METRICS_TOKEN=...              require "Authorization: Bearer <token>" on /metrics
+  PROMETHEUS_MULTIPROC_DIR=...   enable multi-process aggregation
+"""
+
+import os
+import threading
+import time
+
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    CONTENT_TYPE_LATEST,
+)
+from prometheus_client import multiprocess
+from pymongo import monitoring
+
+from utils.campaign_scheduler import scheduler
+from utils.llm_resilience import gemini_breaker
+from utils.request_profiler import command_collection
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+_UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status.",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+MONGO_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by command and collection.",
+    ["command", "collection"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+MONGO_FAILURES = Counter(
+    "mongodb_command_failures_total",
+    "MongoDB commands that returned an error.",
+    ["command", "collection"],
+)
+LLM_DURATION = Histogram(
+    "llm_call_duration_seconds",
+    "LLM provider call latency (including retries and hedging).",
+    ["operation", "outcome"],
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total",
+    "LLM tokens by kind (input, cached_input, output).",
+    ["kind"],
+)
+BREAKER_TRANSITIONS = Counter(
+    "llm_circuit_breaker_transitions_total",
+    "Circuit breaker state changes.",
+    ["breaker", "transition"],
+)
+SCHEDULER_DELAYS = {
+    "drift": Histogram(
+        "campaign_scheduler_drift_seconds",
+        "How late scheduled campaigns were queued after their send_at.",
+        buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 15, 60, 300),
+    ),
+    "wake_lag": Histogram(
+        "campaign_scheduler_wake_lag_seconds",
+        "How much later than requested the scheduler thread woke from a timed sleep.",
+        buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+    ),
+}
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        # Plain Starlette routes (/docs, /openapi.json) have fixed paths
+        return scope["path"]
+    return _UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Pure-ASGI middleware timing every HTTP request (WebSockets are skipped)."""
+
+    def __init__(self, app):
+        self.app = app
+        # Labelled children by label values: .labels() takes a lock and
+        # validates its arguments, which is most of the per-request cost
+        self._in_progress = {}
+        self._durations = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_progress = self._in_progress.get(method)
+        if in_progress is None:
+            in_progress = self._in_progress[method] = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            key = (method, _route_label(scope), status)
+            duration = self._durations.get(key)
+            if duration is None:
+                duration = self._durations[key] = HTTP_DURATION.labels(method, key[1], str(status))
+            duration.observe(elapsed)
+            in_progress.dec()
+
+
+# ---------------------------------------------------------------------------
+# MongoDB
+# ---------------------------------------------------------------------------
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    def __init__(self):
+        self._collections = {}  # (connection_id, request_id) -> collection
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = command_collection(event)
+
+    def succeeded(self, event):
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_DURATION.labels(event.command_name, collection).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        with self._lock:
+            collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_DURATION.labels(event.command_name, collection).observe(event.duration_micros / 1e6)
+        MONGO_FAILURES.labels(event.command_name, collection).inc()
+
+
+monitoring.register(MongoCommandMetrics())
+
+
+# ---------------------------------------------------------------------------
+# LLM
+# ---------------------------------------------------------------------------
+
+def observe_llm(operation: str, seconds: float, ok: bool = True, usage: dict = None) -> None:
+    """Record one LLM call; usage is the token dict returned by the Gemini helpers."""
+    LLM_DURATION.labels(operation, "ok" if ok else "error").observe(seconds)
+    for kind in ("input", "cached_input", "output"):
+        tokens = (usage or {}).get(f"{kind}_tokens")
+        if tokens:
+            LLM_TOKENS.labels(kind).inc(tokens)
+
+
+gemini_breaker.add_listener(
+    lambda name, old, new: BREAKER_TRANSITIONS.labels(name, f"{old}->{new}").inc()
+)
+
+
+# ---------------------------------------------------------------------------
+# Campaign scheduler
+# ---------------------------------------------------------------------------
+
+scheduler.add_listener(lambda kind, seconds: SCHEDULER_DELAYS[kind].observe(seconds))
+
+
+# ---------------------------------------------------------------------------
+# Exposition
+# ---------------------------------------------------------------------------
+
+def render() -> tuple:
+    """Return (body, content_type) for the current metrics."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead(pid: int) -> None:
+    """Drop a finished worker's live gauges (multi-process mode only)."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,56 @@
+"""
+utils/poster_generator.py
+-------------------------
+AI poster image generation, run by the job queue (never inside a request).
+
+Backend selection (POSTER_GENERATOR in .env, required for generation):
+  stub  → deterministic placeholder image URL after a simulated delay.
+          No network or API key; for local development, tests and queue
+          throughput benchmarks only — never set it in production, or
+          placeholders are saved to users' poster libraries.
+
+With POSTER_GENERATOR unset, POST /posters/generate answers 503 and any
+queued job fails with "Poster generator not configured". A real image
+model plugs in by adding a backend to _BACKENDS with the same signature.
+
+  POSTER_STUB_LATENCY_SECONDS=2     (optional, simulated generation time)
+"""
+
+import os
+import time
+import hashlib
+from urllib.parse import quote
+
+POSTER_GENERATOR = os.getenv("POSTER_GENERATOR", "")
+POSTER_STUB_LATENCY_SECONDS = float(os.getenv("POSTER_STUB_LATENCY_SECONDS", 2))
+
+
+def _generate_stub(title: str, prompt: str, business: dict) -> str:
+    time.sleep(POSTER_STUB_LATENCY_SECONDS)
+    colors = business.get("brand_colors") or ["#111827"]
+    background = colors[0].lstrip("#") or "111827"
+    seed = hashlib.sha256(f"{title}\n{prompt}".encode("utf-8")).hexdigest()[:12]
+    return f"https://placehold.co/1080x1350/{background}/ffffff/png?text={quote(title)}&seed={seed}"
+
+
+_BACKENDS = {
+    "stub": _generate_stub,
+}
+
+
+def is_configured() -> bool:
+    return bool(POSTER_GENERATOR)
+
+
+def generate_poster(title: str, prompt: str, business: dict) -> str:
+    """
+    Generate a poster image and return its URL.
+
+    Raises RuntimeError if no backend is configured, or it is unknown or fails.
+    """
+    if not is_configured():
+        raise RuntimeError("Poster generator not configured: set POSTER_GENERATOR.")
+    backend = _BACKENDS.get(POSTER_GENERATOR)
+    if backend is None:
+        raise RuntimeError(f"Unknown POSTER_GENERATOR '{POSTER_GENERATOR}'.")
+    return backend(title, prompt, business)
@@ -0,0 +1,128 @@
+"""
+utils/prompt_cache.py
+---------------------
+In-process cache for the static part of the advisor prompt
+(response rules + business profile), keyed by business ID and the
+business document's `version` field.
+
+The chat route only rebuilds the prefix when the version changes.
+PATCH /business/me bumps the version and calls invalidate() so the
+worker that served the update drops its entry immediately; other
+workers pick up the new version on their next revalidation.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# How many businesses to keep prefixes for in one worker
+PROMPT_CACHE_MAX_ENTRIES = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", 1024))
+
+# How long an entry is trusted before its version is re-checked in MongoDB
+PROMPT_CACHE_REVALIDATE_SECONDS = int(os.getenv("PROMPT_CACHE_REVALIDATE_SECONDS", 30))
+
+_lock = threading.Lock()
+_entries: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def get_prefix(business_id: str) -> Optional[dict]:
+    """
+    Return the cached entry for a business, or None.
+
+    Entry shape:
+      {
+        "version": int,
+        "prefix": str,                  # rendered rules + profile block
+        "provider_cache": str | None,   # provider context-cache name
+        "provider_expires_at": float,   # epoch seconds
+        "checked_at": float,            # last time the version was confirmed
+      }
+    """
+    with _lock:
+        entry = _entries.get(business_id)
+        if entry is not None:
+            _entries.move_to_end(business_id)
+        return entry
+
+
+def needs_revalidation(entry: dict) -> bool:
+    """True if the entry's version should be re-checked against the database."""
+    return time.time() - entry["checked_at"] > PROMPT_CACHE_REVALIDATE_SECONDS
+
+
+def mark_validated(business_id: str) -> None:
+    """Record that the cached version was just confirmed as current."""
+    with _lock:
+        entry = _entries.get(business_id)
+        if entry is not None:
+            entry["checked_at"] = time.time()
+
+
+def put_prefix(
+    business_id: str,
+    version: int,
+    prefix: str,
+    provider_cache: Optional[str] = None,
+    provider_ttl_seconds: int = 0,
+) -> dict:
+    """Store a freshly built prefix and return the new entry."""
+    now = time.time()
+    entry = {
+        "version": version,
+        "prefix": prefix,
+        "provider_cache": provider_cache,
+        "provider_expires_at": now + provider_ttl_seconds if provider_cache else 0.0,
+        "checked_at": now,
+    }
+    with _lock:
+        _entries[business_id] = entry
+        _entries.move_to_end(business_id)
+        while len(_entries) > PROMPT_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return entry
+
+
+def provider_cache_name(entry: dict) -> Optional[str]:
+    """
+    Return the provider cache name if it is still comfortably within its TTL.
+    A one-minute margin avoids racing the provider's own expiry.
+    """
+    if entry["provider_cache"] and entry["provider_expires_at"] - 60 > time.time():
+        return entry["provider_cache"]
+    return None
+
+
+def provider_cache_expired(entry: dict) -> bool:
+    """True if the entry had a provider cache that is now (nearly) expired."""
+    return bool(entry["provider_cache"]) and provider_cache_name(entry) is None
+
+
+def replace_provider_cache(
+    business_id: str,
+    expired: str,
+    provider_cache: Optional[str],
+    provider_ttl_seconds: int,
+) -> Optional[dict]:
+    """
+    Swap a recreated provider cache into the entry, if the entry still holds
+    the expired one. Returns the updated entry, or None if another request
+    replaced or dropped it first.
+    """
+    with _lock:
+        entry = _entries.get(business_id)
+        if entry is None or entry["provider_cache"] != expired:
+            return None
+        entry["provider_cache"] = provider_cache
+        entry["provider_expires_at"] = time.time() + provider_ttl_seconds if provider_cache else 0.0
+        return entry
+
+
+def invalidate(business_id: str) -> Optional[dict]:
+    """
+    Drop the cached prefix for a business (called on profile updates).
+    Returns the dropped entry so its provider cache can be deleted.
+    """
+    with _lock:
+        return _entries.pop(business_id, None)
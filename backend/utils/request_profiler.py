@@ -0,0 +1,385 @@
+"""
+utils/request_profiler.py
+-------------------------
+Slow-request diagnostics: per-request DB round trips, opt-in call-tree
+profiles, and a log line plus a kept record for every slow request.
+
+Every request gets a lightweight RequestProfile (in a contextvar, which
+follows the request into the threadpool, and into the worker threads of
+any ContextThreadPoolExecutor it submits to: the dashboard fan-out, LLM
+attempts and hedges, embedding updates). A pymongo CommandListener adds
+each MongoDB round trip to it — command, collection and duration — and
+the endpoint's own run time is timed separately from dependencies
+(auth) and middleware.
+
+A cProfile call tree is captured only when asked for:
+  - header  X-Profile: <PROFILER_TOKEN>   (ignored unless PROFILER_TOKEN is set)
+  - sampled PROFILER_SAMPLE_RATE of requests (0.0–1.0)
+The profiler wraps the endpoint function itself, so it runs in the thread
+that executes a sync endpoint. For async endpoints it runs on the event
+loop thread and may include other requests' work done while awaiting;
+only one capture runs per thread at a time, so an async request that
+starts while another is being captured is not profiled.
+
+Requests slower than PROFILER_SLOW_MS are logged with their breakdown.
+Slow and profiled requests are saved, off the request path, to the capped
+request_profiles collection (PROFILER_STORE_MB; the oldest are dropped
+first), so GET /admin/profiles sees every worker's. The last
+PROFILER_KEEP are also kept in memory per worker, which is all there is
+with PROFILER_STORE_MB=0. A profiled response carries its record ID in
+X-Profile-Id.
+
+Settings (.env, optional):
+  PROFILER_ENABLED=true
+  PROFILER_SLOW_MS=1000
+  PROFILER_SAMPLE_RATE=0.0
+  PROFILER_TOKEN=...
+  PROFILER_KEEP=50
+  PROFILER_STORE_MB=16           size of the capped collection; 0 disables it
+  PROFILER_TOP_FUNCTIONS=40      rows of the call tree kept per profile
+"""
+
+import contextvars
+import cProfile
+import functools
+import hmac
+import inspect
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi.routing import APIRoute, request_response
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "true").lower() == "true"
+PROFILER_SLOW_MS = float(os.getenv("PROFILER_SLOW_MS", 1000))
+PROFILER_SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", 0.0))
+PROFILER_TOKEN = os.getenv("PROFILER_TOKEN")
+PROFILER_KEEP = int(os.getenv("PROFILER_KEEP", 50))
+PROFILER_TOP_FUNCTIONS = int(os.getenv("PROFILER_TOP_FUNCTIONS", 40))
+PROFILER_STORE_MB = float(os.getenv("PROFILER_STORE_MB", 16))
+
+_STORE = "request_profiles"
+
+# Individual round trips kept per request; beyond this only totals grow
+_MAX_DB_CALLS = 200
+
+_current: contextvars.ContextVar[Optional["RequestProfile"]] = contextvars.ContextVar(
+    "request_profile", default=None
+)
+_records = deque(maxlen=PROFILER_KEEP)
+_records_lock = threading.Lock()
+# One cProfile capture per thread: on 3.11 a second enable() silently takes over the first
+_capturing = threading.local()
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor whose tasks run in a copy of the submitter's contextvars."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, capture: bool):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.capture = capture
+        self.started_at = datetime.utcnow()
+        self.endpoint_ms: Optional[float] = None
+        self.db_count = 0
+        self.db_ms = 0.0
+        self.db_calls = []  # (command, collection, ms, ok)
+        self.call_tree: Optional[str] = None
+        self._pending = {}
+        self._lock = threading.Lock()  # round trips arrive from executor threads too
+
+    def add_db_call(self, command: str, collection: str, ms: float, ok: bool) -> None:
+        with self._lock:
+            self.db_count += 1
+            self.db_ms += ms
+            if len(self.db_calls) < _MAX_DB_CALLS:
+                self.db_calls.append((command, collection, ms, ok))
+
+    def add_call_tree(self, profiler: cProfile.Profile) -> None:
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILER_TOP_FUNCTIONS)
+        self.call_tree = stream.getvalue().strip()
+
+    def db_breakdown(self) -> List[dict]:
+        """Round trips grouped by command + collection, slowest total first."""
+        groups = {}
+        with self._lock:
+            calls = list(self.db_calls)
+        for command, collection, ms, ok in calls:
+            group = groups.setdefault((command, collection), {"count": 0, "ms": 0.0, "errors": 0})
+            group["count"] += 1
+            group["ms"] += ms
+            group["errors"] += 0 if ok else 1
+        return sorted(
+            (
+                {"command": c, "collection": coll, "count": g["count"], "ms": round(g["ms"], 2), "errors": g["errors"]}
+                for (c, coll), g in groups.items()
+            ),
+            key=lambda g: g["ms"],
+            reverse=True,
+        )
+
+    def to_dict(self, route: str, status: int, duration_ms: float) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": route,
+            "status": status,
+            "started_at": self.started_at,
+            "duration_ms": round(duration_ms, 1),
+            "endpoint_ms": round(self.endpoint_ms, 1) if self.endpoint_ms is not None else None,
+            "db_round_trips": self.db_count,
+            "db_ms": round(self.db_ms, 1),
+            "db_breakdown": self.db_breakdown(),
+            "profiled": self.capture,
+            "call_tree": self.call_tree,
+        }
+
+
+# ---------------------------------------------------------------------------
+# MongoDB round trips
+# ---------------------------------------------------------------------------
+
+def command_collection(event) -> str:
+    """Collection a pymongo CommandStartedEvent targets ("" for admin commands)."""
+    target = event.command.get(event.command_name)
+    if isinstance(target, str):
+        return target
+    return event.command.get("collection", "")  # getMore
+
+
+class _DBRoundTrips(monitoring.CommandListener):
+    """Attributes each command to the request running in the issuing thread."""
+
+    def started(self, event):
+        profile = _current.get()
+        if profile is not None:
+            profile._pending[(event.connection_id, event.request_id)] = command_collection(event)
+
+    def _finish(self, event, ok: bool):
+        profile = _current.get()
+        if profile is not None:
+            collection = profile._pending.pop((event.connection_id, event.request_id), "")
+            profile.add_db_call(event.command_name, collection, event.duration_micros / 1000, ok)
+
+    def succeeded(self, event):
+        self._finish(event, True)
+
+    def failed(self, event):
+        self._finish(event, False)
+
+
+monitoring.register(_DBRoundTrips())
+
+
+# ---------------------------------------------------------------------------
+# Endpoint wrapping
+# ---------------------------------------------------------------------------
+
+def _start_profiler(profile: Optional[RequestProfile]) -> Optional[cProfile.Profile]:
+    if profile is None or not profile.capture or getattr(_capturing, "active", False):
+        # Another capture is running on this thread (concurrent async endpoints)
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ also refuses while another tool is profiling
+        return None
+    _capturing.active = True
+    return profiler
+
+
+def _finish_endpoint(profile: Optional[RequestProfile], profiler, started: float) -> None:
+    if profiler is not None:
+        profiler.disable()
+        _capturing.active = False
+        profile.add_call_tree(profiler)
+    if profile is not None:
+        profile.endpoint_ms = (time.perf_counter() - started) * 1000
+
+
+def _wrap_endpoint(call):
+    if inspect.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            profile = _current.get()
+            profiler = _start_profiler(profile)
+            started = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                _finish_endpoint(profile, profiler, started)
+    else:
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            profile = _current.get()
+            profiler = _start_profiler(profile)
+            started = time.perf_counter()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                _finish_endpoint(profile, profiler, started)
+    return endpoint
+
+
+def _api_routes(routes, seen=None):
+    """APIRoutes of an app or router, descending into included routers."""
+    seen = set() if seen is None else seen
+    for route in routes:
+        if isinstance(route, APIRoute):
+            if id(route) not in seen:
+                seen.add(id(route))
+                yield route
+        elif getattr(route, "original_router", None) is not None:
+            yield from _api_routes(route.original_router.routes, seen)
+
+
+def instrument_endpoints(app) -> None:
+    """Wrap every registered API endpoint. Call after all routers are included."""
+    if not PROFILER_ENABLED:
+        return
+    for route in _api_routes(app.routes):
+        # Included routers build their handlers from route.endpoint on first use
+        route.endpoint = _wrap_endpoint(route.endpoint)
+        route.dependant.call = route.endpoint
+        route.app = request_response(route.get_route_handler())
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def _wants_profile(scope) -> bool:
+    if PROFILER_TOKEN:
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                return hmac.compare_digest(value.decode("latin-1"), PROFILER_TOKEN)
+    return PROFILER_SAMPLE_RATE > 0 and random.random() < PROFILER_SAMPLE_RATE
+
+
+class ProfilerMiddleware:
+    """Pure-ASGI middleware that opens a RequestProfile for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILER_ENABLED:
+            return await self.app(scope, receive, send)
+
+        profile = RequestProfile(scope["method"], scope["path"], _wants_profile(scope))
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if profile.capture:
+                    message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            duration_ms = (time.perf_counter() - started) * 1000
+            if duration_ms >= PROFILER_SLOW_MS or profile.capture:
+                route = getattr(scope.get("route"), "path", scope["path"])
+                _record(profile.to_dict(route, status, duration_ms), slow=duration_ms >= PROFILER_SLOW_MS)
+
+
+# Saves happen on this thread, never on the event loop
+_store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-store")
+_store_ready = False
+
+
+def _create_store(db) -> None:
+    try:
+        db.create_collection(_STORE, capped=True, size=int(PROFILER_STORE_MB * 1024 * 1024))
+    except CollectionInvalid:
+        pass  # created by another worker
+
+
+def _save(record: dict) -> None:
+    global _store_ready
+    from database import get_database
+
+    try:
+        db = get_database()
+        if not _store_ready:
+            _create_store(db)
+            _store_ready = True
+        db[_STORE].insert_one({"_id": record["id"], **record})
+    except Exception:
+        logger.exception("Saving request profile %s failed", record["id"])
+
+
+def _record(record: dict, slow: bool) -> None:
+    with _records_lock:
+        _records.append(record)
+    if PROFILER_STORE_MB > 0:
+        _store_executor.submit(_save, record)
+    if slow:
+        top = ", ".join(
+            f"{g['command']} {g['collection']} x{g['count']} {g['ms']:.0f} ms" for g in record["db_breakdown"][:3]
+        )
+        logger.warning(
+            "Slow request %s %s -> %s in %.0f ms: endpoint %s ms, %d DB round trips %.0f ms%s [profile %s]",
+            record["method"], record["route"], record["status"], record["duration_ms"],
+            f"{record['endpoint_ms']:.0f}" if record["endpoint_ms"] is not None else "-",
+            record["db_round_trips"], record["db_ms"], f" ({top})" if top else "", record["id"],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Access
+# ---------------------------------------------------------------------------
+
+def _from_store(doc: dict) -> dict:
+    doc.pop("_id", None)
+    return doc
+
+
+def recent(limit: int = 20) -> List[dict]:
+    """Most recent slow / profiled requests (every worker's when stored), newest first."""
+    if PROFILER_STORE_MB > 0:
+        from database import get_database
+
+        docs = get_database()[_STORE].find().sort("$natural", -1).limit(limit)
+        return [_from_store(d) for d in docs]
+    with _records_lock:
+        return list(reversed(_records))[:limit]
+
+
+def get(profile_id: str) -> Optional[dict]:
+    with _records_lock:
+        record = next((r for r in _records if r["id"] == profile_id), None)
+    if record is None and PROFILER_STORE_MB > 0:
+        from database import get_database
+
+        doc = get_database()[_STORE].find_one({"_id": profile_id})
+        record = _from_store(doc) if doc else None
+    return record
@@ -0,0 +1,53 @@
+"""
+utils/responses.py
+------------------
+Fast JSON response path for read endpoints.
+
+The serialize_* helpers in each route module already build JSON-safe
+dicts with exactly the response model's fields. Letting FastAPI validate
+those again against response_model and then encode them is two extra
+passes over every item — noticeable on large list endpoints.
+
+trusted_response() skips both: the dict goes straight to orjson. The
+response_model stays on the route decorator, so OpenAPI schemas and docs
+are unchanged.
+
+  VALIDATE_RESPONSES=true   (optional) restore full response-model validation,
+                            e.g. in development or when changing serializers
+"""
+
+import os
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+
+VALIDATE_RESPONSES = os.getenv("VALIDATE_RESPONSES", "false").lower() == "true"
+
+# Headers that describe the body; never copied from the placeholder response
+_BODY_HEADERS = {"content-length", "content-type"}
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with orjson (datetimes → ISO 8601, like Pydantic)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def trusted_response(content: Any, response: Optional[Response] = None, status_code: int = 200):
+    """
+    Return content from a trusted serializer without re-validation.
+
+    Pass the route's injected `response` so headers already set on it
+    (e.g. ETag) are carried over to the returned response.
+    """
+    if VALIDATE_RESPONSES:
+        return content
+
+    headers = None
+    if response is not None:
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _BODY_HEADERS}
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
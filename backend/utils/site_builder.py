@@ -0,0 +1,352 @@
+"""
+utils/site_builder.py
+---------------------
+Renders a website document (template + content_json) into a static
+HTML/CSS bundle on local disk.
+
+Sections:
+  content_json["sections"] as a list of objects (each with an optional
+  "id"/"type"), or otherwise every top-level key of content_json in order
+  (e.g. {"hero": {...}, "about": {...}}).
+
+Each section is rendered to an HTML fragment cached under its content
+hash (renderer version + template + section JSON). Rebuilding after an
+edit to one section re-renders only that section; the rest are read
+back from the fragment cache. Builds run on the job queue (kind
+"site_build"), never inside a request.
+
+Layout under SITE_BUILD_DIR (default ./site_builds):
+  <website_id>/fragments/<key>.html       rendered sections of this site
+  <website_id>/v<version>/index.html
+  <website_id>/v<version>/styles.css
+  <website_id>/v<version>/manifest.json   build stats (timings, cache hits)
+  <website_id>/latest.json                manifest of the newest version built
+
+Fragments no kept build references are deleted after every build, so a
+site's fragment directory stays about the size of its kept builds.
+
+  SITE_BUILD_KEEP=3    (optional, builds kept per website)
+"""
+
+import hashlib
+import html
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+SITE_BUILD_DIR = os.path.abspath(os.getenv("SITE_BUILD_DIR", "site_builds"))
+SITE_BUILD_KEEP = int(os.getenv("SITE_BUILD_KEEP", 3))
+
+# Bump whenever rendering output changes, so stale fragments are not reused
+RENDERER_VERSION = "1"
+
+# Serialises latest.json and fragment pruning between job-worker threads
+_site_lock = threading.Lock()
+
+_HEADING_KEYS = ("headline", "title", "heading", "name")
+_TEXT_KEYS = ("subheadline", "subtitle", "subheading", "tagline", "body", "text", "description", "content")
+_IMAGE_KEYS = ("image", "image_url", "logo", "logo_url", "background_image")
+_LINK_KEYS = ("cta", "button")
+
+_TEMPLATE_CSS = {
+    "modern": "body{font-family:Inter,system-ui,sans-serif;line-height:1.6}"
+              "section{padding:4rem 1.5rem;max-width:72rem;margin:auto}"
+              "h2{font-size:2.25rem;letter-spacing:-.02em}",
+    "classic": "body{font-family:Georgia,'Times New Roman',serif;line-height:1.7}"
+               "section{padding:3rem 1.5rem;max-width:60rem;margin:auto;border-bottom:1px solid #e5e7eb}"
+               "h2{font-size:2rem;font-weight:normal}",
+    "minimal": "body{font-family:system-ui,sans-serif;line-height:1.5}"
+               "section{padding:2.5rem 1rem;max-width:48rem;margin:auto}"
+               "h2{font-size:1.5rem}",
+}
+
+_BASE_CSS = (
+    "*{box-sizing:border-box}body{margin:0;color:#111827}"
+    "header{display:flex;align-items:center;gap:1rem;padding:1rem 1.5rem;background:var(--brand);color:#fff}"
+    "header img{height:2.5rem}"
+    "img{max-width:100%}"
+    ".items{display:grid;grid-template-columns:repeat(auto-fit,minmax(14rem,1fr));gap:1rem;padding:0;list-style:none}"
+    ".items li{padding:1rem;border:1px solid #e5e7eb;border-radius:.5rem}"
+    ".cta{display:inline-block;padding:.75rem 1.25rem;border-radius:.375rem;background:var(--accent);color:#fff;text-decoration:none}"
+    "footer{padding:2rem;text-align:center;color:#6b7280}"
+)
+
+
+# ---------------------------------------------------------------------------
+# Paths
+# ---------------------------------------------------------------------------
+
+def _site_dir(website_id: str) -> str:
+    # website_id is always a str(ObjectId) — reject anything that could escape the root
+    if not website_id.isalnum():
+        raise ValueError("Invalid website ID.")
+    return os.path.join(SITE_BUILD_DIR, website_id)
+
+
+def build_dir(website_id: str, version: int) -> str:
+    return os.path.join(_site_dir(website_id), f"v{int(version)}")
+
+
+def _fragment_path(website_id: str, key: str) -> str:
+    return os.path.join(_site_dir(website_id), "fragments", f"{key}.html")
+
+
+def _write_atomic(path: str, data: str) -> None:
+    # A unique temp file per writer: two builds may write the same path at once
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def sections(content_json: dict) -> List[Tuple[str, Any]]:
+    """The (name, data) sections of a website's content, in page order."""
+    listed = content_json.get("sections")
+    if isinstance(listed, list):
+        return [
+            (str(s.get("id") or s.get("type") or f"section-{i}") if isinstance(s, dict) else f"section-{i}", s)
+            for i, s in enumerate(listed)
+        ]
+    return list(content_json.items())
+
+
+def _e(value: Any) -> str:
+    return html.escape(str(value), quote=True)
+
+
+def _url(value: Any) -> str:
+    """Escaped URL, with script-capable schemes (javascript:, data:) dropped."""
+    url = str(value).strip()
+    scheme = url.split(":", 1)[0].lower() if ":" in url.split("/", 1)[0] else ""
+    if scheme and scheme not in ("http", "https", "mailto", "tel"):
+        return "#"
+    return _e(url)
+
+
+def _slug(name: str) -> str:
+    return "".join(c if c.isalnum() else "-" for c in name.lower()).strip("-") or "section"
+
+
+def _render_value(value: Any) -> str:
+    if isinstance(value, dict):
+        return _render_block(value)
+    if isinstance(value, list):
+        return '<ul class="items">' + "".join(f"<li>{_render_value(v)}</li>" for v in value) + "</ul>"
+    if value is None:
+        return ""
+    return f"<p>{_e(value)}</p>"
+
+
+def _render_block(data: dict, heading_tag: str = "h3") -> str:
+    parts = []
+    for key in _HEADING_KEYS:
+        if data.get(key):
+            parts.append(f"<{heading_tag}>{_e(data[key])}</{heading_tag}>")
+            break
+    for key in _IMAGE_KEYS:
+        if isinstance(data.get(key), str) and data[key]:
+            parts.append(f'<img src="{_url(data[key])}" alt="" loading="lazy">')
+    for key in _TEXT_KEYS:
+        if isinstance(data.get(key), str) and data[key]:
+            parts.append(f"<p>{_e(data[key])}</p>")
+
+    handled = {*_HEADING_KEYS, *_TEXT_KEYS, *_IMAGE_KEYS, *_LINK_KEYS, "id", "type"}
+    for key, value in data.items():
+        if key not in handled:
+            parts.append(_render_value(value))
+
+    for key in _LINK_KEYS:
+        link = data.get(key)
+        if isinstance(link, dict) and link.get("label"):
+            parts.append(f'<a class="cta" href="{_url(link.get("url") or "#")}">{_e(link["label"])}</a>')
+        elif isinstance(link, str) and link:
+            parts.append(f'<a class="cta" href="#">{_e(link)}</a>')
+    return "".join(parts)
+
+
+def render_section(name: str, data: Any) -> str:
+    body = _render_block(data, "h2") if isinstance(data, dict) else _render_value(data)
+    return f'<section id="{_e(_slug(name))}">{body}</section>'
+
+
+def fragment_key(template: str, name: str, data: Any) -> str:
+    canonical = json.dumps([RENDERER_VERSION, template, name, data], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def render_css(template: str, business: dict) -> str:
+    # Brand colours are free text — keep only characters valid in a CSS colour
+    colors = [
+        "".join(c for c in str(color) if c.isalnum() or c in "#(),.% ")
+        for color in business.get("brand_colors") or []
+    ]
+    brand = colors[0] if colors else "#111827"
+    accent = colors[1] if len(colors) > 1 else brand
+    return (
+        f":root{{--brand:{brand};--accent:{accent}}}"
+        + _BASE_CSS
+        + _TEMPLATE_CSS.get(template, _TEMPLATE_CSS["modern"])
+    )
+
+
+def _render_page(business: dict, body: str) -> str:
+    name = _e(business.get("business_name") or "")
+    logo = business.get("logo_url")
+    logo_html = f'<img src="{_url(logo)}" alt="{name} logo">' if logo else ""
+    return (
+        "<!doctype html>"
+        '<html lang="en"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width,initial-scale=1">'
+        f"<title>{name}</title>"
+        f'<meta name="description" content="{_e(business.get("description") or "")}">'
+        '<link rel="stylesheet" href="styles.css"></head><body>'
+        f"<header>{logo_html}<strong>{name}</strong></header>"
+        f"<main>{body}</main>"
+        f"<footer>&copy; {datetime.utcnow().year} {name}</footer>"
+        "</body></html>"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Builds
+# ---------------------------------------------------------------------------
+
+def build_site(website: dict, business: dict, force_full: bool = False) -> dict:
+    """
+    Render a website version into SITE_BUILD_DIR and return its manifest.
+    force_full ignores the fragment cache (every section is re-rendered).
+    """
+    started = time.perf_counter()
+    website_id = str(website["_id"])
+    version = website.get("version", 1)
+    template = website.get("template", "modern")
+    previous = latest_manifest(website_id)
+
+    fragments, keys, rendered, reused = [], [], 0, 0
+    for name, data in sections(website.get("content_json") or {}):
+        key = fragment_key(template, name, data)
+        keys.append(key)
+        path = _fragment_path(website_id, key)
+        fragment = None
+        if not force_full:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    fragment = f.read()
+                reused += 1
+            except FileNotFoundError:
+                pass
+        if fragment is None:
+            fragment = render_section(name, data)
+            _write_atomic(path, fragment)
+            rendered += 1
+        fragments.append(fragment)
+    sections_ms = (time.perf_counter() - started) * 1000
+
+    target = build_dir(website_id, version)
+    page = _render_page(business, "".join(fragments))
+    _write_atomic(os.path.join(target, "index.html"), page)
+    _write_atomic(os.path.join(target, "styles.css"), render_css(template, business))
+
+    manifest = {
+        "website_id": website_id,
+        "version": version,
+        "business_version": business.get("version", 1),
+        "mode": "full" if force_full or previous is None else "incremental",
+        "sections": len(fragments),
+        "sections_rendered": rendered,
+        "sections_reused": reused,
+        "bytes": len(page.encode("utf-8")),
+        "sections_ms": round(sections_ms, 2),
+        "build_ms": round((time.perf_counter() - started) * 1000, 2),
+        "built_at": datetime.utcnow().isoformat(),
+        "fragments": keys,
+    }
+    _write_atomic(os.path.join(target, "manifest.json"), json.dumps(manifest))
+    with _site_lock:
+        # Builds can finish out of order — never point latest.json at an older version
+        current = latest_manifest(website_id)
+        if current is None or version >= current.get("version", 0):
+            _write_atomic(os.path.join(_site_dir(website_id), "latest.json"), json.dumps(manifest))
+        _prune(website_id)
+    return manifest
+
+
+def latest_manifest(website_id: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(_site_dir(website_id), "latest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def read_page(website_id: str, version: int) -> Optional[Tuple[str, dict]]:
+    """
+    Return (html, manifest) for a built version, with styles.css inlined so
+    the page is a single self-contained response. None if not built.
+    """
+    target = build_dir(website_id, version)
+    try:
+        with open(os.path.join(target, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        with open(os.path.join(target, "index.html"), encoding="utf-8") as f:
+            page = f.read()
+        with open(os.path.join(target, "styles.css"), encoding="utf-8") as f:
+            css = f.read()
+    except FileNotFoundError:
+        return None
+    return page.replace('<link rel="stylesheet" href="styles.css">', f"<style>{css}</style>", 1), manifest
+
+
+def _prune(website_id: str) -> None:
+    """
+    Keep only the newest SITE_BUILD_KEEP builds of a website, and delete
+    fragments none of them references.
+    """
+    root = _site_dir(website_id)
+    versions = sorted(
+        (int(d[1:]) for d in os.listdir(root) if d.startswith("v") and d[1:].isdigit()),
+        reverse=True,
+    )
+    for version in versions[SITE_BUILD_KEEP:]:
+        shutil.rmtree(build_dir(website_id, version), ignore_errors=True)
+
+    referenced = set()
+    for version in versions[:SITE_BUILD_KEEP]:
+        try:
+            with open(os.path.join(build_dir(website_id, version), "manifest.json"), encoding="utf-8") as f:
+                referenced.update(json.load(f).get("fragments", []))
+        except FileNotFoundError:
+            # A build still writing its files — keep everything until it finishes
+            return
+    try:
+        names = os.listdir(os.path.join(root, "fragments"))
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.endswith(".html") and name[:-5] not in referenced:
+            try:
+                os.remove(os.path.join(root, "fragments", name))
+            except FileNotFoundError:
+                pass
+
+
+def delete_site(website_id: str) -> None:
+    """Remove every build and fragment of a website."""
+    shutil.rmtree(_site_dir(website_id), ignore_errors=True)
@@ -0,0 +1,80 @@
+"""
+utils/site_cache.py
+-------------------
+In-process LRU of rendered public site pages, keyed by
+vercel_project_name. Serves GET /sites/{name} without touching MongoDB.
+
+Website and business updates call invalidate() / invalidate_business()
+so the worker that served the edit drops its entry immediately; other
+workers pick up changes once an entry is older than SITE_CACHE_TTL_SECONDS.
+
+A site whose build is out of date (or missing) is cached as a stale
+entry for SITE_CACHE_STALE_TTL_SECONDS: its rebuild has been queued, so
+hits in that window are served without queueing it again.
+
+  SITE_CACHE_MAX_ENTRIES=512        (optional)
+  SITE_CACHE_TTL_SECONDS=60         (optional)
+  SITE_CACHE_STALE_TTL_SECONDS=5    (optional)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+SITE_CACHE_MAX_ENTRIES = int(os.getenv("SITE_CACHE_MAX_ENTRIES", 512))
+SITE_CACHE_TTL_SECONDS = int(os.getenv("SITE_CACHE_TTL_SECONDS", 60))
+SITE_CACHE_STALE_TTL_SECONDS = int(os.getenv("SITE_CACHE_STALE_TTL_SECONDS", 5))
+
+_lock = threading.Lock()
+_entries: "OrderedDict[str, dict]" = OrderedDict()
+
+
+def get(project_name: str) -> Optional[dict]:
+    """
+    Return a fresh cached page, or None.
+
+    Entry shape:
+      {
+        "body": bytes | None,     # rendered HTML; None while the first build is queued
+        "etag": str | None,       # strong ETag of body
+        "business_id": str,
+        "stale": bool,            # a rebuild is queued; body is an older build
+        "cached_at": float,       # epoch seconds
+      }
+    """
+    with _lock:
+        entry = _entries.get(project_name)
+        if entry is None:
+            return None
+        ttl = SITE_CACHE_STALE_TTL_SECONDS if entry["stale"] else SITE_CACHE_TTL_SECONDS
+        if time.time() - entry["cached_at"] > ttl:
+            del _entries[project_name]
+            return None
+        _entries.move_to_end(project_name)
+        return entry
+
+
+def put(project_name: str, body: Optional[bytes], etag: Optional[str], business_id: str, stale: bool = False) -> dict:
+    entry = {"body": body, "etag": etag, "business_id": business_id, "stale": stale, "cached_at": time.time()}
+    with _lock:
+        _entries[project_name] = entry
+        _entries.move_to_end(project_name)
+        while len(_entries) > SITE_CACHE_MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return entry
+
+
+def invalidate(project_name: Optional[str]) -> None:
+    """Drop the cached page for a site (called when its website changes)."""
+    if project_name:
+        with _lock:
+            _entries.pop(project_name, None)
+
+
+def invalidate_business(business_id: str) -> None:
+    """Drop every cached page of a business (its name, logo or colours changed)."""
+    with _lock:
+        for name in [n for n, e in _entries.items() if e["business_id"] == business_id]:
+            del _entries[name]
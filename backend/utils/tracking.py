@@ -0,0 +1,256 @@
+"""
+utils/tracking.py
+-----------------
+Open/click tracking for campaign email.
+
+Tracking URLs carry the campaign and customer IDs plus an HMAC signature
+(keyed with SECRET_KEY), so hits are verified without a database lookup
+and click redirects cannot be abused as an open redirect.
+
+Hits are only counted in memory. A background thread flushes the totals
+every TRACKING_FLUSH_SECONDS as one unordered bulk write of
+$inc: analytics.opened / analytics.clicked per campaign, so a large send
+costs a handful of writes instead of one per event.
+
+Opens are counted once per recipient across all workers. Each flush marks
+the recipients' campaign_deliveries rows (opened_at) with one update_many
+per campaign, and only rows not already marked are counted. Before that, a
+per-worker Bloom filter per campaign (about 1.2 bytes per recipient at a
+1% false positive rate) drops repeat opens so they never reach Mongo.
+Clicks count every click.
+
+Settings (.env, optional):
+  TRACKING_BASE_URL=http://localhost:8000    public URL of this API
+  TRACKING_FLUSH_SECONDS=5
+  TRACKING_BLOOM_CAPACITY=100000             expected recipients per campaign
+  TRACKING_BLOOM_MAX_CAMPAIGNS=64            filters kept in memory (LRU)
+"""
+
+import hashlib
+import hmac
+import html
+import logging
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+from urllib.parse import quote
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from config import SECRET_KEY
+from utils import etag
+
+logger = logging.getLogger(__name__)
+
+TRACKING_BASE_URL = os.getenv("TRACKING_BASE_URL", "http://localhost:8000").rstrip("/")
+TRACKING_FLUSH_SECONDS = float(os.getenv("TRACKING_FLUSH_SECONDS", 5))
+TRACKING_BLOOM_CAPACITY = int(os.getenv("TRACKING_BLOOM_CAPACITY", 100_000))
+TRACKING_BLOOM_MAX_CAMPAIGNS = int(os.getenv("TRACKING_BLOOM_MAX_CAMPAIGNS", 64))
+
+# Transparent 1x1 GIF
+PIXEL_GIF = bytes.fromhex(
+    "47494638396101000100800000000000ffffff21f90401000000002c00000000010001000002024401003b"
+)
+
+_URL_RE = re.compile(r"https?://[^\s<>\"']+")
+_SIGNATURE_RE = re.compile(r"[0-9a-f]{32}")
+
+
+# ---------------------------------------------------------------------------
+# Signed URLs
+# ---------------------------------------------------------------------------
+
+def sign(*parts: str) -> str:
+    message = "\n".join(parts).encode("utf-8")
+    return hmac.new(SECRET_KEY.encode("utf-8"), message, hashlib.sha256).hexdigest()[:32]
+
+
+def verify(signature: str, *parts: str) -> bool:
+    # compare_digest rejects non-ASCII str, so anything but our hex is refused first
+    if not _SIGNATURE_RE.fullmatch(signature):
+        return False
+    return hmac.compare_digest(signature.encode("ascii"), sign(*parts).encode("ascii"))
+
+
+def open_url(campaign_id: str, customer_id: str) -> str:
+    return f"{TRACKING_BASE_URL}/t/o/{campaign_id}/{customer_id}/{sign('open', campaign_id, customer_id)}.gif"
+
+
+def click_url(campaign_id: str, customer_id: str, target: str) -> str:
+    signature = sign("click", campaign_id, customer_id, target)
+    return f"{TRACKING_BASE_URL}/t/c/{campaign_id}/{customer_id}/{signature}?u={quote(target, safe='')}"
+
+
+def html_body(text: str, campaign_id: str, customer_id: str) -> str:
+    """HTML version of a plain-text body, with tracked links and an open pixel."""
+    parts, last = [], 0
+    for match in _URL_RE.finditer(text):
+        parts.append(html.escape(text[last:match.start()]))
+        target = match.group(0)
+        parts.append(f'<a href="{html.escape(click_url(campaign_id, customer_id, target))}">{html.escape(target)}</a>')
+        last = match.end()
+    parts.append(html.escape(text[last:]))
+    body = "".join(parts).replace("\n", "<br>\n")
+    pixel = f'<img src="{html.escape(open_url(campaign_id, customer_id))}" width="1" height="1" alt="">'
+    return f"<html><body>{body}{pixel}</body></html>"
+
+
+# ---------------------------------------------------------------------------
+# Unique-open dedup
+# ---------------------------------------------------------------------------
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self._bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self._hashes = max(1, round(self._bits / capacity * math.log(2)))
+        self._array = bytearray((self._bits + 7) // 8)
+
+    def add(self, item: str) -> bool:
+        """Add item; return True if it was (probably) not present before."""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        new = False
+        for i in range(self._hashes):
+            bit = (h1 + i * h2) % self._bits
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self._array[byte] & mask:
+                self._array[byte] |= mask
+                new = True
+        return new
+
+
+# ---------------------------------------------------------------------------
+# In-memory aggregation + periodic flush
+# ---------------------------------------------------------------------------
+
+class TrackingAggregator:
+    """Counts hits in memory and flushes them to campaigns.analytics in bulk."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}  # campaign_id -> [opened, clicked], ready to $inc
+        self._opens = {}   # campaign_id -> customer_ids not yet checked against Mongo
+        self._blooms: "OrderedDict[str, BloomFilter]" = OrderedDict()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._get_db = None
+
+    def record_open(self, campaign_id: str, customer_id: str) -> None:
+        with self._lock:
+            bloom = self._blooms.get(campaign_id)
+            if bloom is None:
+                bloom = self._blooms[campaign_id] = BloomFilter(TRACKING_BLOOM_CAPACITY)
+                while len(self._blooms) > TRACKING_BLOOM_MAX_CAMPAIGNS:
+                    self._blooms.popitem(last=False)
+            else:
+                self._blooms.move_to_end(campaign_id)
+            if bloom.add(customer_id):
+                self._opens.setdefault(campaign_id, set()).add(customer_id)
+
+    def record_click(self, campaign_id: str) -> None:
+        with self._lock:
+            self._counts.setdefault(campaign_id, [0, 0])[1] += 1
+
+    def _restore(self, campaign_id: str, opened: int, clicked: int) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(campaign_id, [0, 0])
+            counts[0] += opened
+            counts[1] += clicked
+
+    def _mark_opens(self, db) -> None:
+        """Turn pending opens into counts of recipients no worker has counted yet."""
+        with self._lock:
+            opens, self._opens = self._opens, {}
+        now = datetime.utcnow()
+        while opens:
+            campaign_id, customer_ids = next(iter(opens.items()))
+            try:
+                first_opens = db["campaign_deliveries"].update_many(
+                    {"campaign_id": campaign_id, "customer_id": {"$in": list(customer_ids)}, "opened_at": None},
+                    {"$set": {"opened_at": now}},
+                ).modified_count
+            except Exception:
+                # Keep this and every unchecked campaign for the next flush
+                with self._lock:
+                    for campaign_id, customer_ids in opens.items():
+                        self._opens.setdefault(campaign_id, set()).update(customer_ids)
+                raise
+            del opens[campaign_id]
+            if first_opens:
+                self._restore(campaign_id, first_opens, 0)
+
+    def flush(self) -> int:
+        """Write pending counts; return how many campaigns were updated."""
+        with self._lock:
+            if not self._opens and not self._counts:
+                return 0
+        db = self._get_db()
+        self._mark_opens(db)
+        with self._lock:
+            pending, self._counts = self._counts, {}
+        if not pending:
+            return 0
+
+        items = list(pending.items())
+        try:
+            db["campaigns"].bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": ObjectId(campaign_id)},
+                        {"$inc": {"analytics.opened": opened, "analytics.clicked": clicked}},
+                    )
+                    for campaign_id, (opened, clicked) in items
+                ],
+                ordered=False,
+            )
+        except BulkWriteError as e:
+            # Only the failed updates are retried; the rest were applied
+            for error in e.details.get("writeErrors", []):
+                self._restore(items[error["index"]][0], *items[error["index"]][1])
+            raise
+        except Exception:
+            # Outcome unknown: put everything back for the next flush
+            for campaign_id, (opened, clicked) in items:
+                self._restore(campaign_id, opened, clicked)
+            raise
+
+        ids = [ObjectId(campaign_id) for campaign_id in pending]
+        for business_id in db["campaigns"].distinct("business_id", {"_id": {"$in": ids}}):
+            etag.bump(db, business_id, "campaigns")
+        return len(pending)
+
+    def start(self, get_db) -> None:
+        self._get_db = get_db
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tracking-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the flush thread and write whatever is still pending."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(TRACKING_FLUSH_SECONDS + 5)
+            self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Final tracking flush failed")
+
+    def _run(self) -> None:
+        while not self._stop.wait(TRACKING_FLUSH_SECONDS):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Tracking flush failed")
+
+
+tracker = TrackingAggregator()
@@ -0,0 +1,568 @@
+"""
+utils/vector_index.py
+---------------------
+Per-business embedding index used to give the Founder AI Assistant
+relevant context beyond the last few chat turns.
+
+Covers:
+  - Brand Vault notes      (assets with type "note")
+  - Product descriptions   (products)
+  - Past conversations     (chatlogs)
+
+Embeddings are stored in MongoDB (embeddings collection), one row per
+document, so every worker process shares them and each is embedded once:
+  - Write routes record the change synchronously (a new rev for the key,
+    or a tombstone for a delete) and embed the text on a background thread.
+    The vector is only saved if the key is still at that rev, so a delete
+    that lands while an embedding is in flight always wins.
+  - Each worker keeps an in-memory index per business for search, loaded
+    from the stored vectors on first use (no embedding on the chat path)
+    and re-synced at most every VECTOR_INDEX_SYNC_SECONDS from rows
+    updated since its last sync. The least recently used businesses are
+    evicted past VECTOR_INDEX_MAX_TENANTS.
+  - Documents that existed before the index (or whose embedding was lost
+    with a crashed worker) are embedded by a "vector_backfill" job on the
+    background queue, queued when a business's index is first loaded.
+Vectors are L2-normalised and stored as float16, so cosine similarity is
+a single matrix-vector product.
+
+DB Schema (MongoDB embeddings collection):
+{
+  business_id: str,
+  key: str,                  # "note:<id>", "product:<id>", "chat:<id>"
+  rev: int,                  # bumped on every write to the key
+  snippet: str,
+  vector: bytes | None,      # float16; None until embedded
+  deleted: bool,
+  updated_at: datetime,      # server time, drives incremental sync
+  expires_at: datetime       # tombstones only (TTL index)
+}
+
+Embedding backend (EMBEDDING_BACKEND in .env):
+  gemini  → Gemini text-embedding-004 (default when GEMINI_API_KEY is set)
+  local   → deterministic feature-hashing stub, no network (offline/tests)
+"""
+
+import os
+import re
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, List, Tuple
+
+import numpy as np
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from database import get_database
+from utils import job_queue
+from utils.request_profiler import ContextThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKEND = os.getenv(
+    "EMBEDDING_BACKEND", "gemini" if os.getenv("GEMINI_API_KEY") else "local"
+)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "models/text-embedding-004")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", 256))
+
+# Retrieval is best-effort — never let a slow embedding call stall a chat turn
+EMBEDDING_TIMEOUT_SECONDS = float(os.getenv("EMBEDDING_TIMEOUT_SECONDS", 5))
+
+# Characters of each document kept for prompt snippets
+SNIPPET_MAX_CHARS = 600
+
+# Most recent chatlogs embedded by a business's first backfill
+CHATLOG_BACKFILL_LIMIT = 500
+
+# Businesses whose index one worker keeps in memory (least recently used evicted)
+VECTOR_INDEX_MAX_TENANTS = int(os.getenv("VECTOR_INDEX_MAX_TENANTS", 256))
+
+# How stale a worker's index may get before it pulls other workers' writes
+VECTOR_INDEX_SYNC_SECONDS = float(os.getenv("VECTOR_INDEX_SYNC_SECONDS", 2))
+
+# After a failed load, retrieval is skipped for this business until then
+VECTOR_INDEX_RETRY_SECONDS = float(os.getenv("VECTOR_INDEX_RETRY_SECONDS", 60))
+
+# Each sync re-reads this much history, so a write whose timestamp was taken
+# just before the previous sync but committed after it is still picked up
+_SYNC_OVERLAP = timedelta(seconds=60)
+
+# Tombstones are kept long enough for every worker to sync past them
+_TOMBSTONE_TTL = timedelta(days=1)
+
+# A row still waiting for its vector after this long lost its embedding
+# thread (worker crash or failed call) and is re-embedded by the backfill
+_PENDING_GRACE = timedelta(minutes=5)
+
+_EMBED_BATCH_SIZE = 100
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+# ---------------------------------------------------------------------------
+# Embedding backends
+# ---------------------------------------------------------------------------
+
+def _normalise(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _embed_local(texts: List[str]) -> np.ndarray:
+    """
+    Deterministic feature-hashing embedding (unigrams + bigrams).
+    Same text always gives the same vector, across processes and runs.
+    """
+    out = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest()
+            out[row, int.from_bytes(digest, "little") % EMBEDDING_DIM] += 1.0
+    return _normalise(out)
+
+
+def _embed_gemini(texts: List[str], task_type: str) -> np.ndarray:
+    from utils import metrics
+    from utils.gemini_utils_chatbot import get_genai
+    from utils.llm_resilience import gemini_inflight
+
+    genai = get_genai()
+    vectors = []
+    started = time.perf_counter()
+    try:
+        with gemini_inflight.track():
+            for start in range(0, len(texts), _EMBED_BATCH_SIZE):
+                result = genai.embed_content(
+                    model=EMBEDDING_MODEL,
+                    content=texts[start:start + _EMBED_BATCH_SIZE],
+                    task_type=task_type,
+                    output_dimensionality=EMBEDDING_DIM,
+                    request_options={"timeout": EMBEDDING_TIMEOUT_SECONDS},
+                )
+                vectors.extend(result["embedding"])
+    except Exception:
+        metrics.observe_llm("embed", time.perf_counter() - started, ok=False)
+        raise
+    metrics.observe_llm("embed", time.perf_counter() - started)
+    return _normalise(np.asarray(vectors, dtype=np.float32))
+
+
+def embed(texts: List[str], task_type: str = "retrieval_document") -> np.ndarray:
+    """Embed a batch of texts into an (n, EMBEDDING_DIM) float32 matrix."""
+    if not texts:
+        return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    if EMBEDDING_BACKEND == "local":
+        return _embed_local(texts)
+    return _embed_gemini(texts, task_type)
+
+
+# ---------------------------------------------------------------------------
+# Per-business index
+# ---------------------------------------------------------------------------
+
+class TenantIndex:
+    """
+    Growable float16 matrix of unit vectors plus parallel key/snippet lists.
+    Deletes swap the last row into the hole so storage stays dense.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((capacity, EMBEDDING_DIM), dtype=np.float16)
+        self._keys: List[str] = []
+        self._snippets: List[str] = []
+        self._rows = {}
+        self.synced_to: Optional[datetime] = None  # newest updated_at applied
+        self.synced_at = 0.0                        # monotonic time of last sync
+        self.sync_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def upsert_many(self, keys: List[str], snippets: List[str], vectors: np.ndarray) -> None:
+        with self._lock:
+            for key, snippet, vector in zip(keys, snippets, vectors):
+                row = self._rows.get(key)
+                if row is None:
+                    row = len(self._keys)
+                    if row == self._matrix.shape[0]:
+                        grown = np.zeros((row * 2, EMBEDDING_DIM), dtype=np.float16)
+                        grown[:row] = self._matrix
+                        self._matrix = grown
+                    self._keys.append(key)
+                    self._snippets.append(snippet)
+                    self._rows[key] = row
+                else:
+                    self._snippets[row] = snippet
+                self._matrix[row] = vector
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            row = self._rows.pop(key, None)
+            if row is None:
+                return
+            last = len(self._keys) - 1
+            if row != last:
+                moved_key = self._keys[last]
+                self._matrix[row] = self._matrix[last]
+                self._keys[row] = moved_key
+                self._snippets[row] = self._snippets[last]
+                self._rows[moved_key] = row
+            self._keys.pop()
+            self._snippets.pop()
+
+    def apply_rows(self, rows: list) -> None:
+        """Apply stored embedding rows (a full load or an incremental sync)."""
+        keys, snippets, vectors = [], [], []
+        for r in rows:
+            if self.synced_to is None or r["updated_at"] > self.synced_to:
+                self.synced_to = r["updated_at"]
+            if r.get("deleted"):
+                self.remove(r["key"])
+            elif r.get("vector") is not None:
+                keys.append(r["key"])
+                snippets.append(r["snippet"])
+                vectors.append(np.frombuffer(r["vector"], dtype=np.float16))
+            # A row without a vector is being re-embedded — keep what we have
+        if keys:
+            self.upsert_many(keys, snippets, np.stack(vectors))
+
+    def search(self, query: np.ndarray, k: int, exclude: frozenset = frozenset()) -> List[Tuple[str, str, float]]:
+        """Return up to k (key, snippet, score) tuples, best first."""
+        with self._lock:
+            n = len(self._keys)
+            if n == 0:
+                return []
+            scores = self._matrix[:n].astype(np.float32) @ query.astype(np.float32)
+            want = min(n, k + len(exclude))
+            top = np.argpartition(-scores, want - 1)[:want]
+            top = top[np.argsort(-scores[top])]
+            results = []
+            for row in top:
+                key = self._keys[row]
+                if key in exclude:
+                    continue
+                results.append((key, self._snippets[row], float(scores[row])))
+                if len(results) == k:
+                    break
+            return results
+
+
+_indexes: "OrderedDict[str, TenantIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_load_locks = {}        # business_id -> lock held while its index loads
+_failed_until = {}      # business_id -> monotonic time a failed load may be retried
+
+# Single background thread for embeddings so writes never wait on them
+_updater = ContextThreadPoolExecutor(max_workers=1, thread_name_prefix="vector-index")
+
+_ROW_FIELDS = {"_id": 0, "key": 1, "snippet": 1, "vector": 1, "deleted": 1, "updated_at": 1}
+
+
+def _snippet(text: str) -> str:
+    return text.strip()[:SNIPPET_MAX_CHARS]
+
+
+def note_text(asset: dict) -> str:
+    return f"Note '{asset.get('name', '')}': {asset.get('content') or ''}"
+
+
+def product_text(product: dict) -> str:
+    return f"Product '{product.get('name', '')}' (${product.get('price', 0)}): {product.get('description') or ''}"
+
+
+def chatlog_text(chatlog: dict) -> str:
+    return f"Founder asked: {chatlog.get('message', '')}\nAdvisor answered: {chatlog.get('response', '')}"
+
+
+# Key prefix -> (source collection, text builder)
+_SOURCES = {
+    "note": ("assets", note_text),
+    "product": ("products", product_text),
+    "chat": ("chatlogs", chatlog_text),
+}
+
+
+def _source_text(db, business_id: str, key: str) -> Optional[str]:
+    """Full text of the document behind key, or None if it no longer exists."""
+    prefix, _, source_id = key.partition(":")
+    if prefix not in _SOURCES or not ObjectId.is_valid(source_id):
+        return None
+    collection, to_text = _SOURCES[prefix]
+    doc = db[collection].find_one({"_id": ObjectId(source_id), "business_id": business_id})
+    return to_text(doc) if doc else None
+
+
+def _load_tenant(db, business_id: str) -> TenantIndex:
+    """Build a business's index from its stored embeddings (no embedding calls)."""
+    rows = list(db["embeddings"].find({"business_id": business_id}, _ROW_FIELDS))
+    index = TenantIndex(capacity=max(64, len(rows)))
+    index.apply_rows(rows)
+    index.synced_at = time.monotonic()
+
+    # Embed anything written before the index existed; re-embed lost rows
+    job_queue.enqueue(db, "vector_backfill", business_id, "initial", {})
+    if db["embeddings"].find_one({
+        "business_id": business_id,
+        "vector": None,
+        "deleted": False,
+        "updated_at": {"$lt": datetime.utcnow() - _PENDING_GRACE},
+    }, {"_id": 1}):
+        hour = datetime.utcnow().strftime("%Y%m%d%H")
+        job_queue.enqueue(db, "vector_backfill", business_id, f"repair:{hour}", {})
+    return index
+
+
+def _sync(db, business_id: str, index: TenantIndex) -> None:
+    """Pull rows other workers (or this one) wrote since the last sync."""
+    if time.monotonic() - index.synced_at < VECTOR_INDEX_SYNC_SECONDS:
+        return
+    if not index.sync_lock.acquire(blocking=False):
+        return  # another request is already syncing this business
+    try:
+        query = {"business_id": business_id}
+        if index.synced_to is not None:
+            query["updated_at"] = {"$gte": index.synced_to - _SYNC_OVERLAP}
+        index.apply_rows(list(db["embeddings"].find(query, _ROW_FIELDS)))
+        index.synced_at = time.monotonic()
+    finally:
+        index.sync_lock.release()
+
+
+def get_index(db, business_id: str) -> Optional[TenantIndex]:
+    """
+    Return the business's index, loading it on first use and syncing it
+    with other workers' writes. Concurrent first requests share one load.
+    Returns None while a recent load failure is backing off.
+    """
+    with _indexes_lock:
+        index = _indexes.get(business_id)
+        if index is not None:
+            _indexes.move_to_end(business_id)
+        elif _failed_until.get(business_id, 0) > time.monotonic():
+            return None
+        load_lock = _load_locks.setdefault(business_id, threading.Lock())
+
+    if index is None:
+        with load_lock:
+            with _indexes_lock:
+                index = _indexes.get(business_id)
+            if index is None:
+                try:
+                    index = _load_tenant(db, business_id)
+                except Exception:
+                    with _indexes_lock:
+                        _failed_until[business_id] = time.monotonic() + VECTOR_INDEX_RETRY_SECONDS
+                        _load_locks.pop(business_id, None)
+                    raise
+                with _indexes_lock:
+                    _indexes[business_id] = index
+                    _failed_until.pop(business_id, None)
+                    _load_locks.pop(business_id, None)
+                    while len(_indexes) > VECTOR_INDEX_MAX_TENANTS:
+                        _indexes.popitem(last=False)
+                return index
+
+    _sync(db, business_id, index)
+    return index
+
+
+# ---------------------------------------------------------------------------
+# Writes (called from write routes)
+# ---------------------------------------------------------------------------
+
+def _record(db, business_id: str, key: str, snippet: str, deleted: bool) -> int:
+    """Record a write to a key and return its new rev."""
+    update = {
+        "$inc": {"rev": 1},
+        "$set": {"snippet": snippet, "vector": None, "deleted": deleted},
+        "$currentDate": {"updated_at": True},
+    }
+    if deleted:
+        update["$set"]["expires_at"] = datetime.utcnow() + _TOMBSTONE_TTL
+    else:
+        update["$unset"] = {"expires_at": ""}
+    for attempt in range(2):
+        try:
+            row = db["embeddings"].find_one_and_update(
+                {"business_id": business_id, "key": key},
+                update,
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            return row["rev"]
+        except DuplicateKeyError:
+            if attempt:
+                raise  # concurrent first write to the key — the retry updates it
+
+
+def _store_vectors(db, business_id: str, items: List[Tuple[str, int, str, str]]) -> None:
+    """Embed (key, rev, snippet, text) items and save each vector if the key is still at that rev."""
+    vectors = embed([text for _, _, _, text in items])
+    for (key, rev, _, _), vector in zip(items, vectors):
+        db["embeddings"].update_one(
+            {"business_id": business_id, "key": key, "rev": rev},
+            {"$set": {"vector": vector.astype(np.float16).tobytes()}, "$currentDate": {"updated_at": True}},
+        )
+
+    # Make this worker's own writes searchable without waiting for a sync
+    index = _indexes.get(business_id)
+    if index is not None:
+        current = {
+            (r["key"], r["rev"])
+            for r in db["embeddings"].find(
+                {"business_id": business_id, "key": {"$in": [key for key, _, _, _ in items]}},
+                {"_id": 0, "key": 1, "rev": 1},
+            )
+        }
+        keep = [i for i, (key, rev, _, _) in enumerate(items) if (key, rev) in current]
+        index.upsert_many([items[i][0] for i in keep], [items[i][2] for i in keep], vectors[keep])
+
+
+def _embed_document(business_id: str, key: str, rev: int, text: str) -> None:
+    try:
+        _store_vectors(get_database(), business_id, [(key, rev, _snippet(text), text)])
+    except Exception as e:
+        # The row keeps vector=None; the next backfill repair re-embeds it
+        logger.warning("Vector index update failed for %s: %s", key, e)
+
+
+def index_document(business_id: str, key: str, text: str) -> None:
+    """Add or replace a document; its embedding is computed in the background."""
+    snippet = _snippet(text)
+    rev = _record(get_database(), business_id, key, snippet, deleted=False)
+    _updater.submit(_embed_document, business_id, key, rev, text)
+
+
+def remove_documents(business_id: str, keys: List[str]) -> None:
+    """Remove documents for every worker; an embedding still in flight is discarded."""
+    db = get_database()
+    for key in keys:
+        _record(db, business_id, key, "", deleted=True)
+    index = _indexes.get(business_id)
+    if index is not None:
+        for key in keys:
+            index.remove(key)
+
+
+def drop_tenant(db, business_id: str) -> None:
+    """Forget a business's index entirely (e.g. account deletion)."""
+    db["embeddings"].delete_many({"business_id": business_id})
+    with _indexes_lock:
+        _indexes.pop(business_id, None)
+
+
+def backfill_tenant(db, business_id: str, on_batch=None) -> dict:
+    """
+    Embed the business's notes, products and recent chats that have no
+    stored row yet, plus rows whose embedding was lost. Runs as a
+    background job (see chat_routes.JOB_HANDLERS).
+    """
+    known = {
+        r["key"]
+        for r in db["embeddings"].find({"business_id": business_id}, {"_id": 0, "key": 1})
+    }
+    sources = []
+
+    for a in db["assets"].find(
+        {"business_id": business_id, "type": "note", "content": {"$nin": [None, ""]}},
+        {"name": 1, "content": 1},
+    ):
+        sources.append((f"note:{a['_id']}", note_text(a)))
+
+    for p in db["products"].find(
+        {"business_id": business_id},
+        {"name": 1, "price": 1, "description": 1},
+    ):
+        sources.append((f"product:{p['_id']}", product_text(p)))
+
+    for c in (
+        db["chatlogs"]
+        .find({"business_id": business_id}, {"message": 1, "response": 1})
+        .sort("timestamp", -1)
+        .limit(CHATLOG_BACKFILL_LIMIT)
+    ):
+        sources.append((f"chat:{c['_id']}", chatlog_text(c)))
+
+    missing = [(key, text) for key, text in sources if key not in known]
+    for key, text in missing:
+        # rev 0 rows; a concurrent write from a route takes precedence
+        try:
+            db["embeddings"].update_one(
+                {"business_id": business_id, "key": key},
+                {
+                    "$setOnInsert": {"rev": 0, "snippet": _snippet(text), "vector": None, "deleted": False},
+                    "$currentDate": {"updated_at": True},
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            pass
+    items = [(key, 0, _snippet(text), text) for key, text in missing]
+
+    lost = db["embeddings"].find(
+        {
+            "business_id": business_id,
+            "vector": None,
+            "deleted": False,
+            "updated_at": {"$lt": datetime.utcnow() - _PENDING_GRACE},
+        },
+        {"_id": 0, "key": 1, "rev": 1, "snippet": 1},
+    )
+    # Re-embed lost rows from the full source text; the stored snippet is
+    # truncated, so it is only used once the source document is gone
+    texts = dict(sources)
+    for r in lost:
+        text = texts.get(r["key"]) or _source_text(db, business_id, r["key"]) or r["snippet"]
+        items.append((r["key"], r["rev"], _snippet(text), text))
+
+    for start in range(0, len(items), _EMBED_BATCH_SIZE):
+        _store_vectors(db, business_id, items[start:start + _EMBED_BATCH_SIZE])
+        if on_batch:
+            on_batch()
+    return {"embedded": len(items)}
+
+
+# ---------------------------------------------------------------------------
+# Retrieval
+# ---------------------------------------------------------------------------
+
+def retrieve_context(
+    db,
+    business_id: str,
+    query: str,
+    token_budget: int,
+    k: int = 8,
+    exclude: Optional[set] = None,
+) -> str:
+    """
+    Return the most relevant snippets for a query, joined into one block
+    that fits within token_budget (approximated as 4 characters per token).
+    """
+    try:
+        index = get_index(db, business_id)
+        if index is None or len(index) == 0:
+            return ""
+        query_vector = embed([query], task_type="retrieval_query")[0]
+    except Exception as e:
+        logger.warning("Vector retrieval unavailable: %s", e)
+        return ""
+
+    budget_chars = token_budget * 4
+    parts = []
+    for _, snippet, score in index.search(query_vector, k, frozenset(exclude or ())):
+        if score <= 0:
+            break
+        if len(snippet) + 2 > budget_chars:
+            continue
+        parts.append(snippet)
+        budget_chars -= len(snippet) + 2
+
+    return "\n\n".join(parts)
@@ -0,0 +1,149 @@
+"""
+utils/website_history.py
+------------------------
+Version history for websites, stored as JSON Patch deltas.
+
+Every website version gets a record in website_versions holding the
+RFC 6902 patch from the previous version. Every WEBSITE_SNAPSHOT_INTERVAL
+versions (and for the first recorded version) the record also carries a
+full snapshot, so rebuilding any version replays at most
+WEBSITE_SNAPSHOT_INTERVAL - 1 small patches from the nearest snapshot.
+
+The unique (website_id, version) index doubles as the write lock: two
+concurrent edits of the same version cannot both record history. A record
+left above the website's current version by a write that never finished
+(e.g. the process died in between) is an orphan; once it is older than
+any in-flight edit could be, the next edit of that version replaces it.
+
+  WEBSITE_SNAPSHOT_INTERVAL=20   (optional)
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from utils.json_patch import apply_patch
+
+WEBSITE_SNAPSHOT_INTERVAL = int(os.getenv("WEBSITE_SNAPSHOT_INTERVAL", 20))
+
+# The part of a website document that is versioned and patchable
+EDITABLE_FIELDS = ("template", "content_json", "vercel_project_name", "published_url")
+
+# A version record this old that is still ahead of its website was orphaned
+_ORPHAN_GRACE_SECONDS = 60
+
+
+def editable_state(website: dict) -> dict:
+    """The versioned view of a website document (what JSON Patch paths address)."""
+    return {field: website[field] for field in EDITABLE_FIELDS if field in website}
+
+
+def _record(website: dict, version: int, patch: Optional[list], state: dict, author: Optional[str]) -> dict:
+    is_snapshot = patch is None or version % WEBSITE_SNAPSHOT_INTERVAL == 0
+    return {
+        "website_id": str(website["_id"]),
+        "business_id": website["business_id"],
+        "version": version,
+        "patch": patch or [],
+        "is_snapshot": is_snapshot,
+        "snapshot": state if is_snapshot else None,
+        "author": author,
+        "created_at": datetime.utcnow(),
+    }
+
+
+def ensure_base(db, website: dict) -> None:
+    """
+    Make sure the website's current version is in history — websites
+    created before history existed get a snapshot of their current state.
+    """
+    version = website.get("version", 1)
+    db["website_versions"].update_one(
+        {"website_id": str(website["_id"]), "version": version},
+        {"$setOnInsert": _record(website, version, None, editable_state(website), None)},
+        upsert=True,
+    )
+
+
+def record_version(
+    db, website: dict, version: int, patch: Optional[list], state: dict, author: Optional[str]
+) -> ObjectId:
+    """
+    Store a new version. patch=None records a full snapshot (initial version).
+    Returns the record's id, for discard_version.
+
+    Raises DuplicateKeyError if that version was already recorded, unless
+    the existing record is an orphan (see module docstring), which is
+    replaced.
+    """
+    record = _record(website, version, patch, state, author)
+    try:
+        return db["website_versions"].insert_one(record).inserted_id
+    except DuplicateKeyError:
+        current = db["websites"].find_one({"_id": website["_id"]}, {"version": 1})
+        if current is None or current.get("version", 1) >= version:
+            raise
+        record.pop("_id", None)   # set by the failed insert
+        replaced = db["website_versions"].find_one_and_replace(
+            {
+                "website_id": record["website_id"],
+                "version": version,
+                "created_at": {"$lt": record["created_at"] - timedelta(seconds=_ORPHAN_GRACE_SECONDS)},
+            },
+            record,
+            projection={"_id": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if replaced is None:
+            raise
+        return replaced["_id"]
+
+
+def discard_version(db, record_id: ObjectId) -> None:
+    """Remove a version recorded for a write that did not go through."""
+    db["website_versions"].delete_one({"_id": record_id})
+
+
+def list_versions(db, website_id: str) -> list:
+    """Version metadata, newest first (snapshots are not loaded)."""
+    return list(
+        db["website_versions"]
+        .find({"website_id": website_id}, {"snapshot": 0})
+        .sort("version", DESCENDING)
+    )
+
+
+def reconstruct(db, website_id: str, version: int) -> Optional[dict]:
+    """
+    Rebuild the editable state of a website at a given version, or None if
+    that version is not in history.
+    """
+    base = db["website_versions"].find_one(
+        {"website_id": website_id, "version": {"$lte": version}, "is_snapshot": True},
+        {"version": 1, "snapshot": 1},
+        sort=[("version", DESCENDING)],
+    )
+    if base is None:
+        return None
+
+    state = base["snapshot"]
+    expected = base["version"]
+    deltas = db["website_versions"].find(
+        {"website_id": website_id, "version": {"$gt": base["version"], "$lte": version}},
+        {"version": 1, "patch": 1},
+    ).sort("version", ASCENDING)
+    for record in deltas:
+        expected += 1
+        if record["version"] != expected:
+            return None
+        state = apply_patch(state, record["patch"])
+
+    return state if expected == version else None
+
+
+def delete_history(db, website_id: str) -> None:
+    db["website_versions"].delete_many({"website_id": website_id})
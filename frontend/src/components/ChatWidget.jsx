@@ -4,6 +4,10 @@ import axios from "axios";
 import ChatBubble from "./ChatBubble";
 import "../styles/Chat.css";
 
+// ws(s)://host/chat/ws — one authenticated socket per widget session.
+// The token goes in the first frame, never the URL (URLs end up in access logs).
+const wsUrl = () => `${import.meta.env.VITE_API_URL.replace(/^http/, "ws")}/chat/ws`;
+
 export default function ChatWidget() {
   const [messages, setMessages] = useState([
     { role: "bot", text: "Hi! I'm BizWiser, your AI business growth advisor. How can I help you today?" },
@@ -13,11 +17,67 @@ export default function ChatWidget() {
   const [error, setError]     = useState("");
   const bottomRef             = useRef(null);
   const inputRef              = useRef(null);
+  const socketRef             = useRef(null);
+  const readyRef              = useRef(false);
+  const streamingRef          = useRef(false);
 
   useEffect(() => {
     bottomRef.current?.scrollIntoView({ behavior: "smooth" });
   }, [messages, loading]);
 
+  // Open the chat socket once; HTTP POST is used whenever it isn't connected
+  useEffect(() => {
+    const token = localStorage.getItem("token");
+    if (!token || !import.meta.env.VITE_API_URL) return;
+
+    const socket = new WebSocket(wsUrl());
+    socketRef.current = socket;
+
+    socket.onopen = () => socket.send(JSON.stringify({ type: "auth", token }));
+
+    socket.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === "ready") {
+        readyRef.current = true;
+      } else if (data.type === "chunk") {
+        setLoading(false);
+        setMessages(prev => {
+          if (!streamingRef.current) {
+            streamingRef.current = true;
+            return [...prev, { role: "bot", text: data.text }];
+          }
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, text: last.text + data.text }];
+        });
+      } else if (data.type === "done") {
+        if (!streamingRef.current) {
+          setMessages(prev => [...prev, { role: "bot", text: data.response }]);
+        }
+        streamingRef.current = false;
+        setLoading(false);
+        inputRef.current?.focus();
+      } else if (data.type === "error") {
+        streamingRef.current = false;
+        setError(data.detail);
+        setMessages(prev => [...prev, { role: "bot", text: `⚠️ ${data.detail}` }]);
+        setLoading(false);
+      }
+    };
+
+    socket.onclose = () => {
+      if (socketRef.current === socket) {
+        socketRef.current = null;
+        readyRef.current = false;
+      }
+      if (streamingRef.current) {
+        streamingRef.current = false;
+        setLoading(false);
+      }
+    };
+
+    return () => socket.close();
+  }, []);
+
   const sendMessage = async () => {
     const text = input.trim();
     if (!text || loading) return;
@@ -27,6 +87,13 @@ export default function ChatWidget() {
     setMessages(prev => [...prev, { role: "user", text }]);
     setLoading(true);
 
+    const socket = socketRef.current;
+    if (socket && readyRef.current && socket.readyState === WebSocket.OPEN) {
+      streamingRef.current = false;
+      socket.send(JSON.stringify({ message: text }));
+      return;
+    }
+
     try {
       const token = localStorage.getItem("token");
       const res = await axios.post(
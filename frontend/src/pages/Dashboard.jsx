@@ -71,27 +71,27 @@ export default function Dashboard() {
   const [websites,  setWebsites]  = useState([]);
   const [posters,   setPosters]   = useState([]);
   const [campaigns, setCampaigns] = useState([]);
-  const [products,  setProducts]  = useState([]);
+  const [counts,    setCounts]    = useState({});
+  const [loadError, setLoadError] = useState(false);
 
   useEffect(() => {
     const token = localStorage.getItem("token");
     if (!token) { navigate("/login"); return; }
     const H = { Authorization: `Bearer ${token}` };
-    const safe = (p) => axios.get(`${import.meta.env.VITE_API_URL}${p}`, {headers:H}).then(r=>r.data).catch(()=>null);
     (async () => {
       try {
-        const me = await axios.get(`${import.meta.env.VITE_API_URL}/auth/me`, {headers:H});
-        setUser(me.data);
-        const [biz,webs,posts,camps,prods] = await Promise.all([
-          safe("/business/me"), safe("/websites/"), safe("/posters/"), safe("/campaigns/"), safe("/products/"),
-        ]);
-        if (biz)   setBusiness(biz);
-        const arr = (d,k) => Array.isArray(d) ? d : (d?.[k] ?? []);
-        if (webs)  setWebsites(arr(webs,"websites"));
-        if (posts) setPosters(arr(posts,"posters"));
-        if (camps) setCampaigns(arr(camps,"campaigns"));
-        if (prods) setProducts(arr(prods,"products"));
-      } catch { localStorage.removeItem("token"); navigate("/login"); }
+        const { data } = await axios.get(`${import.meta.env.VITE_API_URL}/dashboard/summary`, {headers:H});
+        setUser(data.user);
+        if (data.business) setBusiness(data.business);
+        setWebsites(data.recent_websites ?? []);
+        setPosters(data.recent_posters ?? []);
+        setCampaigns(data.recent_campaigns ?? []);
+        setCounts(data.counts ?? {});
+      } catch (err) {
+        // Only an expired or invalid session logs out; anything else keeps the user here
+        if (err.response?.status === 401) { localStorage.removeItem("token"); navigate("/login"); }
+        else setLoadError(true);
+      }
       finally { setLoading(false); }
     })();
   }, [navigate]);
@@ -198,7 +198,8 @@ export default function Dashboard() {
             <div className="dash-topbar-left">
               <div className="dash-greeting">{greeting()}, <span className="dash-greeting-name">{user?.name?.split(" ")[0]||"there"}</span></div>
               <div className="dash-topbar-sub">
-                {business ? [business.business_name, business.location].filter(Boolean).join(" · ") : "Here's your business overview"}
+                {loadError ? "Couldn't load your overview. Refresh to try again."
+                  : business ? [business.business_name, business.location].filter(Boolean).join(" · ") : "Here's your business overview"}
               </div>
             </div>
             <div className="dash-topbar-right">
@@ -253,10 +254,10 @@ export default function Dashboard() {
 
               <div className="dash-stats-row">
                 {[
-                  {label:"Websites",  value:websites.length,  sub:websites.filter(w=>w.published_url).length+" live",   icon:<svg viewBox="0 0 20 20" fill="none" stroke="currentColor" strokeWidth="1.5"><rect x="2" y="3" width="16" height="14" rx="2"/><path d="M2 7h16"/></svg>},
-                  {label:"Posters",   value:posters.length,   sub:"Generated",                                           icon:<svg viewBox="0 0 20 20" fill="none" stroke="currentColor" strokeWidth="1.5"><rect x="2" y="2" width="16" height="16" rx="2"/><path d="M2 13l4-4 3 3 3-4 6 6"/></svg>},
-                  {label:"Campaigns", value:campaigns.length, sub:campaigns.filter(c=>c.status==="sent").length+" sent", icon:<svg viewBox="0 0 20 20" fill="none" stroke="currentColor" strokeWidth="1.5"><path d="M3 5h14a1 1 0 011 1v8a1 1 0 01-1 1H3a1 1 0 01-1-1V6a1 1 0 011-1z"/><path d="M2 7l8 5 8-5"/></svg>},
-                  {label:"Products",  value:products.length,  sub:products.length===0?"Add your first":"In catalog",    icon:<svg viewBox="0 0 20 20" fill="none" stroke="currentColor" strokeWidth="1.5"><path d="M3 5h14M3 10h14M3 15h14"/></svg>},
+                  {label:"Websites",  value:counts.websites??0,  sub:(counts.websites_live??0)+" live",   icon:<svg viewBox="0 0 20 20" fill="none" stroke="currentColor" strokeWidth="1.5"><rect x="2" y="3" width="16" height="14" rx="2"/><path d="M2 7h16"/></svg>},
+                  {label:"Posters",   value:counts.posters??0,   sub:"Generated",                                           icon:<svg viewBox="0 0 20 20" fill="none" stroke="currentColor" strokeWidth="1.5"><rect x="2" y="2" width="16" height="16" rx="2"/><path d="M2 13l4-4 3 3 3-4 6 6"/></svg>},
+                  {label:"Campaigns", value:counts.campaigns??0, sub:(counts.campaigns_sent??0)+" sent", icon:<svg viewBox="0 0 20 20" fill="none" stroke="currentColor" strokeWidth="1.5"><path d="M3 5h14a1 1 0 011 1v8a1 1 0 01-1 1H3a1 1 0 01-1-1V6a1 1 0 011-1z"/><path d="M2 7l8 5 8-5"/></svg>},
+                  {label:"Products",  value:counts.products??0,  sub:!counts.products?"Add your first":"In catalog",    icon:<svg viewBox="0 0 20 20" fill="none" stroke="currentColor" strokeWidth="1.5"><path d="M3 5h14M3 10h14M3 15h14"/></svg>},
                 ].map((s,i)=>(
                   <div className="dash-stat-card" key={i} style={{animationDelay:`${i*0.07}s`}}>
                     <div className="dash-stat-icon">{s.icon}</div>